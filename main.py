@@ -4,83 +4,404 @@ Main System - Clean architecture for GPIO button control with OSC
 """
 
 import time
+STARTUP_ORIGIN = time.monotonic()  # Taken before the other imports for the startup report
+
+import argparse
+import json
+import os
+import signal
+import sys
 import threading
-from pythonosc.udp_client import SimpleUDPClient
 
-from src.gpio.gpio_handler import GPIO, setup_gpio
+from src.logging_setup import setup_logging, get_logger
+from src.startup import StartupReport, BackgroundImport
+from src.gpio.gpio_handler import load_gpio, setup_gpio
 from src.controllers.button_controller import ButtonController
-from src.managers.osc_manager import OSCManager
 from src.controllers.led_controller import LEDController
-from src.web.web_config import create_app
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
+from src.managers.osc_receiver import OSCReceiver
+from src.managers.qlc_feedback import FeedbackMonitor
+from src.managers import metrics
+from src.managers.state_store import StateStore, restore_state, attach_state, DEFAULT_STATE_FILE
+from src.managers.journal import EventJournal, attach_journal, DEFAULT_JOURNAL_FILE, DEFAULT_JOURNAL_SIZE
+from src.managers.cues import CueEngine, DEFAULT_CUE_DIR
+
+logger = get_logger("main")
+
+# Not needed for the button -> OSC path: imported in the background while it comes up
+WEB_MODULES = ("src.web.web_config", "src.web.event_stream", "src.web.server", "src.qlc.workspace", "src.qlc.watcher")
+# Split mode: Flask only loads in the web process
+SPLIT_MODULES = ("src.web.event_stream", "src.web.remote", "src.managers.shared_state", "src.qlc.workspace",
+                 "src.qlc.watcher")
 
 # Configuration
 IP = "127.0.0.1"
 OUT_PORT = 7700
+IN_PORT = 9001  # OSC control input (/2/dmx/0..11 from QLC+/TouchOSC), None = off
+FEEDBACK_PORT = 0  # QLC+ OSC feedback output (e.g. 9000, enable feedback on the OSC universe), 0 = off
 WEB_PORT = 3001
+EVENT_PORT = 3002  # Server-Sent Events status stream
+
+# QLC+ workspace (functions and VC buttons are read from it)
+WORKSPACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tanzverein.qxw")
+
+# Output: "osc" (to QLC+), or native "artnet"/"sacn" rendering of the workspace scenes
+OUTPUT_MODES = ("osc", "artnet", "sacn")
+OUTPUT_MODE = "osc"
+DMX_TARGET = None     # None = Art-Net broadcast / sACN multicast
+DMX_REFRESH = 30.0    # engine ticks per second
+DMX_KEEPALIVE = 1.0   # seconds between resends of an unchanged universe
+
+# Web server: "pooled" (bounded thread pool), "waitress" (if installed) or "dev"
+SERVER_MODES = ("dev", "pooled", "waitress")  # as in src.web.server
+SERVER_MODE = "pooled"
+WEB_WORKERS = 8
+WEB_REQUEST_TIMEOUT = 5.0  # seconds
+
+# Processes: "single" (web interface in this process) or "split" (a separate web process that
+# talks to this one over a shared-memory state block and a command socket, restarted if it crashes)
+PROCESS_MODES = ("single", "split")
+PROCESS_MODE = "single"
+
+# Button input: "edge" (interrupt-driven) or "poll" (fallback)
+INPUT_MODE = "edge"
+POLL_INTERVAL = 0.1  # seconds between reads in poll mode
+
+# Debounce/glitch filter (applies to both input modes)
+DEBOUNCE_SETTLE = 0.03     # seconds after a change in which edges are contact bounce
+DEBOUNCE_MIN_HOLD = 0.002  # seconds a level must be held (shorter pulses are EMI glitches)
+
+# Timers: "coarse" (sleep until the deadline) or "precise" (sleep, then spin the last TIMER_SPIN seconds)
+TIMING_MODES = ("coarse", "precise")
+TIMING_MODE = "coarse"
+TIMER_SPIN = 0.002  # seconds; costs one core's worth of yielding per timer
 
 # Pin definitions
 BUTTON_PIN = 16
+STATION_PINS = []  # Extra panel buttons, each with its own scene/timing, e.g. [5, 6, 12, 19, 20, 21, 23, 24]
 LED_PINS = {
     "led_green": 26,  # First LED
     "led_red": 13   # Second LED
 }
 
 
-# OSC receiving removed - button functions remain configurable
-
-def initialize_system():
-    """Initialize the button control system"""
+def initialize_system(startup, output=OUTPUT_MODE, dmx_target=DMX_TARGET, timing=TIMING_MODE):
+    """Initialize the button control system (button -> OSC path only)"""
     # Initialize GPIO (automatically uses real or mock GPIO)
-    GPIO.setmode(GPIO.BCM)
-    setup_gpio()
+    with startup.phase("gpio"):
+        gpio = load_gpio()
+        gpio.setmode(gpio.BCM)
+        setup_gpio()
+        led_controller = LEDController(gpio, LED_PINS)
     
-    # Initialize OSC client
-    osc_client = SimpleUDPClient(IP, OUT_PORT)
+    # Initialize OSC output (pre-encoded, sent from its own thread)
+    with startup.phase("osc"):
+        osc_manager = OSCManager()
+        if output == "osc":
+            osc_client = OSCSender(IP, OUT_PORT, osc_manager)
+        else:
+            # Native DMX needs the workspace scenes before the first press
+            from src.qlc.workspace import load_workspace
+            from src.qlc.dmx_output import DMXOutput
+            workspace = load_workspace(WORKSPACE_FILE)
+            osc_manager.set_workspace(workspace)
+            osc_client = DMXOutput(workspace, output, target=dmx_target, refresh=DMX_REFRESH, keepalive=DMX_KEEPALIVE)
+            osc_client.start()
     
-    # Initialize system components
-    osc_manager = OSCManager()
-    led_controller = LEDController(GPIO, LED_PINS)
-    button_controller = ButtonController(GPIO, BUTTON_PIN, osc_client, osc_manager, led_controller)
+    with startup.phase("button"):
+        button_controller = ButtonController(gpio, BUTTON_PIN, osc_client, osc_manager, led_controller,
+                                             debounce_settle=DEBOUNCE_SETTLE, debounce_min_hold=DEBOUNCE_MIN_HOLD)
+        metrics.SCHEDULER_BACKLOG.set_function(button_controller.scheduler.pending)
+        button_controller.scheduler.spin = TIMER_SPIN if timing == "precise" else 0.0
+        
+        button_station = None
+        if STATION_PINS:
+            from src.controllers.button_station import ButtonStation
+            button_station = ButtonStation(gpio, STATION_PINS, osc_client, osc_manager, led_controller,
+                                           scheduler=button_controller.scheduler,
+                                           debounce_settle=DEBOUNCE_SETTLE, debounce_min_hold=DEBOUNCE_MIN_HOLD)
+            button_station.follow(button_controller)
     
-    return button_controller, osc_manager, osc_client
+    return button_controller, osc_manager, osc_client, button_station
+
+def load_qlc_workspace(osc_manager, workspace_module):
+    """Attach the QLC+ workspace (scene labels, function API)"""
+    if osc_manager.workspace is not None:
+        return  # Already loaded for the DMX output
+    try:
+        osc_manager.set_workspace(workspace_module.load_workspace(WORKSPACE_FILE))
+    except (OSError, SyntaxError) as e:
+        # ElementTree.ParseError is a SyntaxError subclass
+        logger.warning("QLC+ workspace not loaded (%s) - scenes stay unresolved", e)
 
-def run_button_loop(button_controller):
-    """Run the button processing loop in a separate thread"""
+def run_button_loop(button_controller, poll_interval=POLL_INTERVAL):
+    """Run the button polling loop in a separate thread (fallback mode)"""
     while True:
         button_controller.process_button()
-        time.sleep(0.1)
+        time.sleep(poll_interval)
+
+def report_input_latency():
+    """Measure and print press-to-dispatch latency for each input mode"""
+    from src.gpio.latency_probe import measure_dispatch_latency
+    lines = ["⏱️  Press-to-dispatch latency:"]
+    for mode in ("edge", "poll"):
+        result = measure_dispatch_latency(load_gpio(), mode, poll_interval=POLL_INTERVAL)
+        if result is None:
+            lines.append(f"   {mode:>4}: n/a on real hardware (see per-press latency)")
+        else:
+            lines.append(f"   {mode:>4}: avg {result['avg_ms']:.2f} ms, max {result['max_ms']:.2f} ms ({result['samples']} samples)")
+    print("\n".join(lines))
+
+def start_button_input(button_controller, mode=INPUT_MODE, button_station=None):
+    """Start button input in the selected mode, falling back to polling"""
+    if mode == "edge":
+        try:
+            button_controller.start_edge_detection()
+            if button_station is not None:
+                button_station.start_edge_detection()
+            return "edge"
+        except (RuntimeError, AttributeError) as e:
+            print(f"⚠️  Edge detection unavailable ({e}) - falling back to polling")
+            button_controller.stop_edge_detection()
+            if button_station is not None:
+                button_station.stop_edge_detection()
+    
+    try:
+        button_controller.enable_tap_latch()
+    except (RuntimeError, AttributeError) as e:
+        print(f"⚠️  Tap latch unavailable ({e}) - taps shorter than {POLL_INTERVAL}s may be missed")
+    if button_station is not None:
+        button_station.start_polling(POLL_INTERVAL)
+    button_thread = threading.Thread(target=run_button_loop, args=(button_controller,), daemon=True)
+    button_thread.start()
+    return "poll"
+
+def start_split_web(args, modules, button_controller, osc_manager, osc_client, event_port, journal=None,
+                    button_station=None, workspace_watcher=None, qlc_feedback=None, cue_engine=None):
+    """Real-time side of split mode: publish state, take commands, supervise the web process"""
+    shared_state = modules["src.managers.shared_state"]
+    remote = modules["src.web.remote"]
+    state_block = shared_state.StateBlock().create()
+    publisher = shared_state.StatePublisher(state_block, button_controller, osc_manager, qlc_feedback, cue_engine,
+                                            button_station).start()
+    commands, queries = remote.build_commands(button_controller, osc_manager, osc_client, button_station,
+                                              workspace_watcher, qlc_feedback, cue_engine)
+    command_server = shared_state.CommandServer(shared_state.DEFAULT_COMMAND_SOCKET, commands, queries,
+                                                publisher).start()
+    options = remote.web_process_options(
+        state_block.path, command_server.path, button_controller, osc_client, WEB_PORT, event_port,
+        server=args.server, workers=args.workers, request_timeout=args.request_timeout,
+        journal_file=journal.path if journal is not None else None, button_station=button_station,
+        workspace_watcher=workspace_watcher, qlc_feedback=qlc_feedback, cue_engine=cue_engine)
+    return state_block, publisher, command_server, remote.WebProcess(options)
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def wait_for_shutdown(on_shutdown):
+    """Block until SIGINT/SIGTERM, then run on_shutdown (split mode: no web server in this process)"""
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        on_shutdown()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Tanzen Button Control System")
+    parser.add_argument('--server', choices=SERVER_MODES, default=SERVER_MODE, help="Web server mode")
+    parser.add_argument('--workers', type=int, default=WEB_WORKERS, help="Web worker threads")
+    parser.add_argument('--processes', choices=PROCESS_MODES, default=PROCESS_MODE,
+                        help="Web interface in this process, or split into its own process")
+    parser.add_argument('--request-timeout', type=float, default=WEB_REQUEST_TIMEOUT, help="Web request/keep-alive timeout (seconds)")
+    parser.add_argument('--output', choices=OUTPUT_MODES, default=OUTPUT_MODE, help="Scene output")
+    parser.add_argument('--dmx-target', default=DMX_TARGET, help="Art-Net/sACN destination IP")
+    parser.add_argument('--osc-in-port', type=int, default=IN_PORT, help="OSC control input port (0 = off)")
+    parser.add_argument('--qlc-feedback-port', type=int, default=FEEDBACK_PORT,
+                        help="Port QLC+ sends OSC feedback to (0 = off; OSC output only)")
+    parser.add_argument('--timing', choices=TIMING_MODES, default=TIMING_MODE,
+                        help="Effect/block timers: coarse sleep, or precise (sleep + spin to the deadline)")
+    parser.add_argument('--state-file', default=DEFAULT_STATE_FILE, help="Runtime state snapshot")
+    parser.add_argument('--journal-file', default=DEFAULT_JOURNAL_FILE, help="Event journal ring file ('' = off)")
+    parser.add_argument('--journal-size', type=int, default=DEFAULT_JOURNAL_SIZE, help="Event journal size in bytes")
+    parser.add_argument('--cue-dir', default=DEFAULT_CUE_DIR, help="Cue list directory ('' = off)")
+    parser.add_argument('--no-workspace-watch', action='store_true', help="Do not reload the QLC+ workspace when it is saved")
+    parser.add_argument('--startup-check', action='store_true',
+                        help="Bring everything up, print the startup report as JSON and exit")
+    return parser.parse_args()
 
 def main():
+    main_start = time.monotonic()
+    args = parse_args()
+    setup_logging()
     print("🚀 Starting Tanzen Button Control System...")
+    startup = StartupReport(STARTUP_ORIGIN)
+    startup.record("import", STARTUP_ORIGIN, main_start)
+    
+    # Web interface modules load in the background while the button comes up
+    web_import = BackgroundImport(*(SPLIT_MODULES if args.processes == "split" else WEB_MODULES)).start()
+    
+    # Button -> OSC path first
+    button_controller, osc_manager, osc_client, button_station = initialize_system(startup, args.output, args.dmx_target, args.timing)
+    
+    # Restore the last saved settings (and a block interrupted by a restart)
+    with startup.phase("state"):
+        state_store = StateStore(args.state_file)
+        resumed_block = restore_state(state_store, button_controller, osc_manager)
+        attach_state(state_store, button_controller, osc_manager)
+        journal = None
+        if args.journal_file:
+            journal = EventJournal(args.journal_file, args.journal_size).open()
+            attach_journal(journal, button_controller, osc_manager, button_station)
+    
+    # Cue lists: scheduled scene sequences, fired from the timer scheduler
+    cue_engine = None
+    if args.cue_dir:
+        with startup.phase("cues"):
+            cue_engine = CueEngine(args.cue_dir, osc_client, osc_manager, button_controller.scheduler,
+                                   button_controller, button_station).load()
     
-    # Initialize the system
-    button_controller, osc_manager, osc_client = initialize_system()
+    # Start button processing (edge events, or polling thread as fallback)
+    with startup.phase("input"):
+        input_mode = start_button_input(button_controller, button_station=button_station)
+    startup.mark("button_ready")
+    print(f"🔘 Button Input: {input_mode.upper()} mode - ready after {startup.marks['button_ready'] * 1000:.0f} ms")
     
-    # Create Flask app with initialized components
-    app = create_app(button_controller, osc_manager, osc_client)
+    # OSC control input (enable, delay presets, scenes)
+    osc_receiver = None
+    if args.osc_in_port:
+        with startup.phase("osc_in"):
+            osc_receiver = OSCReceiver('0.0.0.0', 0 if args.startup_check else args.osc_in_port,
+                                       osc_manager, button_controller).start()
+    
+    # QLC+ feedback: round trips, re-sends and the 'not responding' alert
+    qlc_feedback = None
+    if args.qlc_feedback_port and args.output == "osc":
+        with startup.phase("feedback"):
+            qlc_feedback = FeedbackMonitor('0.0.0.0', 0 if args.startup_check else args.qlc_feedback_port,
+                                           osc_client, osc_manager, button_controller.scheduler,
+                                           button_controller.led_controller).start()
+    
+    web_process = None
+    with startup.phase("web"):
+        modules = web_import.result()
+        startup.record("web_import", web_import.started, web_import.finished)
+        event_stream = modules["src.web.event_stream"]
+        load_qlc_workspace(osc_manager, modules["src.qlc.workspace"])
+        workspace_watcher = None
+        if osc_manager.workspace is not None and not args.no_workspace_watch:
+            # Reload scene labels and functions when the workspace is saved in QLC+
+            workspace_watcher = modules["src.qlc.watcher"].WorkspaceWatcher(WORKSPACE_FILE, osc_manager).start()
+        
+        # Start the push status stream (one thread for all dashboards)
+        status_stream = event_stream.StatusStreamServer(
+            '0.0.0.0', 0 if args.startup_check else EVENT_PORT,
+            lambda: event_stream.status_snapshot(button_controller, osc_manager, qlc_feedback, cue_engine))
+        event_stream.connect_status_stream(status_stream, button_controller, osc_manager)
+        if qlc_feedback is not None:
+            qlc_feedback.add_listener(status_stream.publish)
+        if cue_engine is not None:
+            cue_engine.add_listener(status_stream.publish)
+        if button_station is not None:
+            button_station.add_listener(status_stream.publish)
+        status_stream.start()
+        
+        if args.processes == "split":
+            # State block + command socket here, Flask in the supervised web process
+            state_block, publisher, command_server, web_process = start_split_web(
+                args, modules, button_controller, osc_manager, osc_client, status_stream.port, journal=journal,
+                button_station=button_station, workspace_watcher=workspace_watcher, qlc_feedback=qlc_feedback,
+                cue_engine=cue_engine)
+        else:
+            # Create Flask app with initialized components
+            server = modules["src.web.server"]
+            app = modules["src.web.web_config"].create_app(
+                button_controller, osc_manager, osc_client, event_port=status_stream.port,
+                button_station=button_station, journal=journal, workspace_watcher=workspace_watcher,
+                qlc_feedback=qlc_feedback, cue_engine=cue_engine)
+    startup.mark("web_ready")
+    
+    def shutdown():
+        print("\n🛑 Shutting down...")
+        if web_process is not None:
+            web_process.stop()
+            command_server.close()
+            publisher.stop()
+            state_block.close()
+        if osc_receiver is not None:
+            osc_receiver.close()
+        if qlc_feedback is not None:
+            qlc_feedback.close()
+        if cue_engine is not None:
+            cue_engine.close()
+        button_controller.cleanup()
+        if button_station is not None:
+            button_station.cleanup()
+        status_stream.stop()
+        if workspace_watcher is not None:
+            workspace_watcher.stop()
+        state_store.close()
+        if journal is not None:
+            journal.close()
+        osc_client.close()
+        load_gpio().cleanup()
+        print("✅ System stopped.")
+    
+    if args.startup_check:
+        # One write, so a log line from the logging thread cannot split the report
+        sys.stdout.write(json.dumps(startup.as_dict()) + "\n")
+        shutdown()
+        return
     
     print("✅ System ready!")
     print("📋 Button Configuration:")
     print(f"   Current Path: {osc_manager.get_button_path()}")
     print(f"   Current Delay: {osc_manager.current_delay} seconds")
     print(f"   Button Status: {'ENABLED' if button_controller.button_enabled else 'DISABLED'}")
-    print("📡 OSC Sending: Button presses send to configured path")
-    print(f"🌐 Web Interface: http://localhost:{WEB_PORT}")
+    if resumed_block:
+        print(f"   Resumed Block: {resumed_block:.0f} seconds remaining")
+    if button_station is not None:
+        print(f"   Station Buttons: {len(button_station)} (pins {', '.join(map(str, STATION_PINS))})")
+    if args.output == "osc":
+        print("📡 OSC Sending: Button presses send to configured path")
+    else:
+        print(f"💡 DMX Output: {args.output} universes {osc_client.universes} to {args.dmx_target or 'broadcast/multicast'}")
+    if args.timing == "precise":
+        print(f"⏱️  Timing: PRECISE (spin {TIMER_SPIN * 1000:.0f} ms before each deadline)")
+    if osc_manager.tempo.active:
+        print(f"🥁 Quantize: {osc_manager.tempo.quantize:g} beats at {osc_manager.tempo.bpm:.1f} BPM")
+    if osc_receiver is not None:
+        print(f"🎛️  OSC Control: listening on port {osc_receiver.port} (/2/dmx/0..11)")
+    if qlc_feedback is not None:
+        print(f"🔄 QLC+ Feedback: listening on port {qlc_feedback.port}")
+    if cue_engine is not None and cue_engine.lists:
+        status = cue_engine.get_status()
+        print(f"🎬 Cue Lists: {len(cue_engine.lists)} loaded, {status['queued']} events queued"
+              + (f", {len(cue_engine.errors)} with errors" if cue_engine.errors else ""))
+    if workspace_watcher is not None:
+        print(f"🔁 Workspace: reloading {os.path.basename(WORKSPACE_FILE)} on save")
+    print(f"🌐 Web Interface: http://localhost:{WEB_PORT}"
+          + (f" (own process, commands via {command_server.path})" if web_process is not None else ""))
+    print("🕒 Startup:")
+    print("\n".join(startup.format()))
     print("-" * 50)
     
-    # Start button processing in a separate thread
-    button_thread = threading.Thread(target=run_button_loop, args=(button_controller,), daemon=True)
-    button_thread.start()
+    # The mock-only latency probe runs once the system is up
+    threading.Thread(target=report_input_latency, name="latency-probe", daemon=True).start()
     
-    try:
-        # Start the web interface (this will block)
-        app.run(host='0.0.0.0', port=WEB_PORT, debug=False)
-        
-    except KeyboardInterrupt:
-        print("\n🛑 Shutting down...")
-        button_controller.cleanup()
-        GPIO.cleanup()
-        print("✅ System stopped.")
+    if web_process is not None:
+        # The web interface runs in its own process: this one only waits for SIGINT/SIGTERM
+        web_process.start()
+        wait_for_shutdown(shutdown)
+        return
+    
+    # Start the web interface (blocks until SIGINT/SIGTERM, then runs shutdown)
+    server.run_server(app, '0.0.0.0', WEB_PORT, mode=args.server, workers=args.workers,
+                      request_timeout=args.request_timeout, on_shutdown=shutdown)
 
 
 if __name__ == "__main__":
@@ -1,118 +1,205 @@
 """
 Button Controller System
 Handles GPIO button input, LED control, and OSC messaging
+
+Presses go through the press state machine (see press_state): idle,
+armed, effect, blocked, held and disabled, all transitions under one
+lock so OSC on/off messages stay paired per scene.
 """
 
-import time
-import threading
-from pythonosc.udp_client import SimpleUDPClient
 from .led_controller import LEDController
+from .press_state import PressStateMachine, EFFECT, BLOCKED, HELD
+from ..gpio.debounce import Debouncer, DEFAULT_SETTLE, DEFAULT_MIN_HOLD
+from ..managers.scheduler import get_default_scheduler
+from ..logging_setup import get_logger
+
+logger = get_logger("button")
+
 
 class ButtonController:
-    def __init__(self, gpio, button_pin, osc_client, osc_manager, led_controller):
+    def __init__(self, gpio, button_pin, osc_client, osc_manager, led_controller, scheduler=None,
+                 debounce_settle=DEFAULT_SETTLE, debounce_min_hold=DEFAULT_MIN_HOLD, clock=None):
         self.gpio = gpio
         self.button_pin = button_pin
         self.osc_client = osc_client
         self.osc_manager = osc_manager
+        self.scheduler = scheduler or get_default_scheduler()
+        self.clock = clock or self.scheduler.clock  # Monotonic; virtual in simulations
         
-        # State
+        # Input state (changed under the press lock: edge, timer and web request threads all get here)
         self.button_pressed = False
-        self.button_enabled = True
-        self.is_button_blocked = False
+        self.edge_detection = False
+        self.tap_latch = False  # poll mode: latched falling edges catch taps between samples
+        self._last_sample = None
+        self.last_dispatch_latency = None  # seconds from edge to press handling
+        self.last_press_time = None  # monotonic timestamp of the last press edge
         
-        # Setup GPIO
-        self.gpio.setup(self.button_pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+        # State change listeners: callback(event, data)
+        self._listeners = []
 
         # Setup LEDs using LEDController
         self.led_controller = led_controller
+
+        # Press, effect and block state
+        self.machine = PressStateMachine(osc_client, osc_manager, self.scheduler, self._press_config, self._emit,
+                                         led_controller, status_leds=True, tags={'pin': button_pin})
         
+        # Setup GPIO
+        self.gpio.setup(self.button_pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+        
+        # Raw levels go through the debounce/glitch filter before handle_edge
+        self.debouncer = Debouncer(lambda pin, level, timestamp: self.handle_edge(level, timestamp),
+                                   settle=debounce_settle, min_hold=debounce_min_hold,
+                                   scheduler=self.scheduler, read=self.gpio.input)
+        self.debouncer.add_channel(self.button_pin, self.gpio.input(self.button_pin))
+    
+    def add_listener(self, callback):
+        """Register callback(event, data) for state changes (press, block, effect)"""
+        self._listeners.append(callback)
+    
+    def _emit(self, event, **data):
+        """Notify listeners of a state change"""
+        for callback in self._listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                logger.exception("State listener failed: %s", e)
+
+    def _press_config(self):
+        """Scene, block delay and effect duration of a press"""
+        osc_manager = self.osc_manager
+        return osc_manager.get_button_path(), osc_manager.current_delay, osc_manager.current_osc_off_delay
+    
+    @property
+    def state(self):
+        """Current state name: disabled, held, blocked, armed, effect or idle"""
+        return self.machine.state
+    
+    @property
+    def lock(self):
+        """Press lock (re-entrant): hold it to act atomically with respect to presses and timers"""
+        return self.machine.lock
+    
+    @property
+    def button_enabled(self):
+        return self.machine.enabled
+    
+    @property
+    def is_button_blocked(self):
+        return bool(self.machine.flags & BLOCKED)
+    
+    @property
+    def effect_running(self):
+        """True while an effect-off message is pending"""
+        return bool(self.machine.flags & EFFECT)
+    
+    @property
+    def is_held(self):
+        """True while a cue list holds the button"""
+        return bool(self.machine.flags & HELD)
+
+    @property
+    def last_effect_off_drift(self):
+        """Seconds the last effect-off message was late"""
+        return self.machine.last_effect_off_drift
+    
+    def block_remaining(self):
+        """Seconds until the button is unblocked (0 if not blocked)"""
+        return self.machine.block_remaining()
     
     def set_button_enabled(self, enabled):
         """Enable or disable button functionality"""
-        self.button_enabled = enabled
-        print(f"Button functionality {'ENABLED' if enabled else 'DISABLED'}")
-        
-        # Set red LED state based on button enabled status
-        if enabled:
-            self.led_controller.switch_red_led(False)  # Red LED off when enabled
-            self.led_controller.switch_green_led(True)  # Green LED on when enabled
-        else:
-            self.led_controller.switch_red_led(True)   # Red LED on when disabled
-            self.led_controller.switch_green_led(False) # Green LED off when disabled
+        with self.lock:
+            self.machine.enabled = enabled
+            logger.info("Button functionality %s", 'ENABLED' if enabled else 'DISABLED')
+            self._emit('enabled', enabled=enabled)
+            
+            # Set red LED state based on button enabled status
+            if enabled:
+                self.led_controller.switch_red_led(False)  # Red LED off when enabled
+                self.led_controller.switch_green_led(True)  # Green LED on when enabled
+            else:
+                self.led_controller.switch_red_led(True)   # Red LED on when disabled
+                self.led_controller.switch_green_led(False) # Green LED off when disabled
     
     def process_button(self):
-        """Process button input - call this in main loop"""
+        """Process button input - call this in main loop (polling fallback)"""
+        timestamp = self.clock()
+        previous_sample, self._last_sample = self._last_sample, timestamp
         current_state = self.gpio.input(self.button_pin)
-        
-        # Detect button press (transition from HIGH to LOW)
-        if current_state == self.gpio.LOW and not self.button_pressed:
-            self.button_pressed = True
-            self._handle_button_press()
-    
-        # Detect button release (transition from LOW to HIGH)
-        elif current_state == self.gpio.HIGH and self.button_pressed:
-            self.button_pressed = False
-            print("Button released, ready for next press")
-    
-    def _handle_button_press(self):
-        """Handle button press sequence"""
-        print("Button pressed!")
-
-        if not self.button_enabled or self.is_button_blocked:
-            self.led_controller.blink_red_led(blink_rate=0.2, times=3)
-            print("Button functionality disabled or blocked - showing red blink feedback")
+        if (self.tap_latch and self.gpio.event_detected(self.button_pin) and previous_sample is not None
+                and current_state == self.debouncer.level(self.button_pin)):
+            # A falling edge, but the level looks unchanged: tap (or release and re-press) between samples
+            self.debouncer.pulse(self.button_pin, timestamp, previous_sample)
             return
-        
-        # Get current OSC path from manager
-        osc_path = self.osc_manager.get_button_path()
-        
-        # Send OSC message to current path
-        self.osc_client.send_message(osc_path, 1)
-        print(f"Sent OSC: {osc_path} = 1")
-        
-        # Start effect duration timer in a separate thread
-        effect_thread = threading.Thread(target=self._run_effect_duration, args=(osc_path,), daemon=True)
-        effect_thread.start()
-        
-        # Start block timer in a separate thread
-        block_delay = self.osc_manager.current_delay
-        if block_delay > 0:
-            self.is_button_blocked = True
-            print(f"Blocking button for {block_delay} seconds...")
-            block_thread = threading.Thread(target=self._run_block_timer, args=(block_delay,), daemon=True)
-            block_thread.start()
-        else:
-            print("No block delay - immediate release")
-    
-    def _run_block_timer(self, block_delay):
-        """Run block timer in separate thread"""
-        # During block: green off, red on (blocked state)
-        self.led_controller.switch_green_led(False)
-        self.led_controller.switch_red_led(True)
-        time.sleep(block_delay)
-        self.is_button_blocked = False
-        
-        # After block: restore to enabled state (green on, red off)
-        if self.button_enabled:
-            self.led_controller.switch_green_led(True)
-            self.led_controller.switch_red_led(False)
-        print("Button unblocked - LEDs restored to enabled state.")
-    
-    def _run_effect_duration(self, osc_path):
-        """Run effect duration timer in separate thread"""
-        osc_off_delay = self.osc_manager.current_osc_off_delay
-        self.led_controller.blink_green_led(duration=self.osc_manager.current_osc_off_delay, blink_rate=0.4)
-        if osc_off_delay > 0:
-            print(f"Effect duration: {osc_off_delay} seconds...")
-            time.sleep(osc_off_delay)
+        self.debouncer.feed(self.button_pin, current_state, timestamp)
 
-        else:
-            print("No effect duration - ending immediately")
-            
-        self.osc_client.send_message(osc_path, 1)
-        print(f"Sent OSC: {osc_path} = 0")
+    def enable_tap_latch(self):
+        """Poll mode: latch falling edges so taps shorter than the poll interval are not lost"""
+        self.gpio.add_event_detect(self.button_pin, self.gpio.FALLING)
+        self.tap_latch = True
+
+    def start_edge_detection(self, bouncetime=None):
+        """Switch to interrupt-driven input: edges go through the debouncer to handle_edge"""
+        kwargs = {'bouncetime': bouncetime} if bouncetime else {}
+        self.gpio.add_event_detect(self.button_pin, self.gpio.BOTH, callback=self._on_edge, **kwargs)
+        self.edge_detection = True
+        logger.info("Edge detection enabled on pin %s", self.button_pin)
+
+    def stop_edge_detection(self):
+        """Stop interrupt-driven input (polling can be used again)"""
+        if self.edge_detection or self.tap_latch:
+            self.gpio.remove_event_detect(self.button_pin)
+            self.edge_detection = False
+            self.tap_latch = False
+
+    def _on_edge(self, channel):
+        """GPIO edge callback - resolve the edge level and timestamp"""
+        edge = self.gpio.get_edge(channel) if hasattr(self.gpio, 'get_edge') else None
+        if edge is None:
+            # Real RPi.GPIO only passes the channel, so sample the level now
+            edge = (self.gpio.input(channel), self.clock())
+        self.debouncer.feed(channel, *edge)
+
+    def handle_edge(self, state, timestamp):
+        """Handle a debounced pin level change observed at timestamp"""
+        with self.lock:
+            # Detect button press (transition from HIGH to LOW)
+            if state == self.gpio.LOW and not self.button_pressed:
+                self.button_pressed = True
+                self.last_press_time = timestamp
+                self.last_dispatch_latency = self.clock() - timestamp
+                logger.debug("Button pressed!")
+                self.machine.press(timestamp, self.last_dispatch_latency)
+
+            # Detect button release (transition from LOW to HIGH)
+            elif state == self.gpio.HIGH and self.button_pressed:
+                self.button_pressed = False
+                logger.debug("Button released, ready for next press")
+    
+    def resume_block(self, remaining):
+        """Block for the rest of an interrupted block (warm start after a restart)"""
+        self.machine.start_block(remaining)
+    
+    def set_hold(self, held):
+        """Hold the button for a cue list (presses rejected with reason 'cue') or release it"""
+        with self.lock:
+            if self.machine.set_hold(held):
+                logger.info("Button %s by cue list", 'held' if held else 'released')
+                self._emit('hold', held=held)
+    
+    def end_effect(self):
+        """End a pending trigger and a running effect now (a cue takes the stage)"""
+        self.machine.end_effect()
+    
+    def cancel_timers(self):
+        """Cancel pending trigger, effect, block and debounce timers"""
+        self.debouncer.cancel()
+        self.machine.cancel()
     
     def cleanup(self):
         """Clean up resources"""
+        self.stop_edge_detection()
+        self.cancel_timers()
         self.led_controller.switch_all_leds(False)
-        print("Button controller cleaned up")
+        logger.info("Button controller cleaned up")
@@ -0,0 +1,248 @@
+"""
+Button Station
+Multi-button panel: every pin has its own scene, block delay and effect
+duration. Input state lives in flat per-column arrays indexed by button
+number, and all pins are sampled in one pass (or share one edge
+callback), so the cost per event does not grow with the panel size.
+
+Every button runs its own press state machine (see press_state, the same
+one the main button uses) under its own lock: presses (edge/poll
+thread), its timers (scheduler thread) and the cue list hold never
+interleave on one button. Enable and hold take the locks of all buttons
+in index order (locked()); the cue engine takes them before its own
+lock, the order a press reaches it in.
+"""
+
+import functools
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+from .press_state import PressStateMachine, BLOCKED
+from ..gpio.debounce import Debouncer, DEFAULT_SETTLE, DEFAULT_MIN_HOLD
+from ..managers.scheduler import get_default_scheduler
+from ..logging_setup import get_logger
+
+logger = get_logger("station")
+
+
+class ButtonStation:
+    def __init__(self, gpio, pins, osc_client, osc_manager, led_controller=None, scheduler=None,
+                 debounce_settle=DEFAULT_SETTLE, debounce_min_hold=DEFAULT_MIN_HOLD):
+        """
+        Initialize the station
+
+        Args:
+            gpio: GPIO module (RPi.GPIO or mock)
+            pins: Input pins, one per button (button N is pins[N])
+            osc_client: OSC sender
+            osc_manager: OSCManager holding the per-button settings
+            led_controller: Shared status LEDs (optional)
+            scheduler: TimerScheduler for effect-off, unblock and debounce timers
+            debounce_settle: Seconds after a change in which edges count as contact bounce
+            debounce_min_hold: Seconds a level must be held to count (glitch filter)
+        """
+        self.gpio = gpio
+        self.pins = list(pins)
+        self.osc_client = osc_client
+        self.osc_manager = osc_manager
+        self.led_controller = led_controller
+        self.scheduler = scheduler or get_default_scheduler()
+        self.edge_detection = False
+        self.enabled = True
+        self.held = False  # Held by a running cue list
+
+        count = len(self.pins)
+        self._index = {pin: i for i, pin in enumerate(self.pins)}
+
+        # State table: one column per field, one row per button
+        self.raw = bytearray([gpio.HIGH] * count)      # last sampled pin level
+        self.levels = bytearray([gpio.HIGH] * count)   # debounced pin level
+        self.press_times = array('d', [0.0] * count)   # monotonic time of last press
+        self.presses = array('L', [0] * count)          # accepted presses
+
+        self._listeners = []
+        # Press, effect and block state of each button (its lock also guards its input columns)
+        self.buttons = [PressStateMachine(osc_client, osc_manager, self.scheduler,
+                                          functools.partial(self._press_config, index),
+                                          functools.partial(self._emit, button=index), led_controller,
+                                          tags={'pin': pin, 'button': index})
+                        for index, pin in enumerate(self.pins)]
+        self._poll_thread = None
+        self._poll_running = False
+
+        osc_manager.configure_station(count)
+        for pin in self.pins:
+            gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+
+        # Channels of the debouncer are button indexes
+        self.debouncer = Debouncer(self.handle_edge, settle=debounce_settle, min_hold=debounce_min_hold,
+                                   scheduler=self.scheduler, read=lambda index: gpio.input(self.pins[index]))
+        for index in range(count):
+            self.debouncer.add_channel(index, gpio.HIGH)
+
+    def __len__(self):
+        return len(self.pins)
+
+    def add_listener(self, callback):
+        """Register callback(event, data) for state changes"""
+        self._listeners.append(callback)
+
+    def _emit(self, event, **data):
+        for callback in self._listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                logger.exception("State listener failed: %s", e)
+
+    def read_pins(self):
+        """Sample every pin in one pass"""
+        if hasattr(self.gpio, 'input_many'):
+            return self.gpio.input_many(self.pins)
+        gpio_input = self.gpio.input
+        return [gpio_input(pin) for pin in self.pins]
+
+    def poll(self, timestamp=None):
+        """One sampling pass: feed every pin whose raw level changed to the debouncer"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        raw = self.raw
+        for index, state in enumerate(self.read_pins()):
+            if state != raw[index]:
+                raw[index] = state
+                self.debouncer.feed(index, state, timestamp)
+
+    def start_polling(self, interval=0.01):
+        """Sample all pins from one thread every interval seconds"""
+        if self._poll_thread is not None:
+            return
+        self._poll_running = True
+
+        def run():
+            while self._poll_running:
+                self.poll()
+                time.sleep(interval)
+
+        self._poll_thread = threading.Thread(target=run, name="station-poll", daemon=True)
+        self._poll_thread.start()
+        logger.info("Polling %d station buttons every %s s", len(self.pins), interval)
+
+    def stop_polling(self):
+        self._poll_running = False
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout=1.0)
+        self._poll_thread = None
+
+    def start_edge_detection(self, bouncetime=None):
+        """Subscribe to edges on all pins with one shared callback"""
+        kwargs = {'bouncetime': bouncetime} if bouncetime else {}
+        for pin in self.pins:
+            self.gpio.add_event_detect(pin, self.gpio.BOTH, callback=self._on_edge, **kwargs)
+        self.edge_detection = True
+        logger.info("Edge detection enabled on %d station buttons", len(self.pins))
+
+    def stop_edge_detection(self):
+        if self.edge_detection:
+            for pin in self.pins:
+                self.gpio.remove_event_detect(pin)
+            self.edge_detection = False
+
+    def _on_edge(self, channel):
+        index = self._index.get(channel)
+        if index is None:
+            return
+        edge = self.gpio.get_edge(channel) if hasattr(self.gpio, 'get_edge') else None
+        if edge is None:
+            edge = (self.gpio.input(channel), time.monotonic())
+        self.debouncer.feed(index, *edge)
+
+    def handle_edge(self, index, state, timestamp):
+        """Handle a debounced level change of button index"""
+        button = self.buttons[index]
+        with button.lock:
+            previous = self.levels[index]
+            self.levels[index] = state
+            if state == self.gpio.LOW and previous != self.gpio.LOW:
+                self.press_times[index] = timestamp
+                if button.press(timestamp):
+                    self.presses[index] += 1
+
+    def _press_config(self, index):
+        """Scene, block delay and effect duration of a press of button index"""
+        config = self.osc_manager.get_button_config(index)
+        return self.osc_manager.button_paths[config['path_id']], config['delay'], config['osc_off_delay']
+
+    @contextmanager
+    def locked(self):
+        """Hold the locks of all buttons (index order) to act atomically with respect to presses and timers"""
+        for button in self.buttons:
+            button.lock.acquire()
+        try:
+            yield
+        finally:
+            for button in reversed(self.buttons):
+                button.lock.release()
+
+    def set_enabled(self, enabled):
+        """Enable or disable all station buttons (presses rejected, running timers continue)"""
+        with self.locked():
+            if self.enabled == enabled:
+                return
+            self.enabled = enabled
+            for button in self.buttons:
+                button.enabled = enabled
+            logger.info("Station buttons %s", 'ENABLED' if enabled else 'DISABLED')
+            self._emit('enabled', enabled=enabled)
+
+    def follow(self, button_controller):
+        """Enable and disable the station with the main button (web API, OSC control, restored state)"""
+        self.set_enabled(button_controller.button_enabled)
+        button_controller.add_listener(self._on_button_event)
+
+    def _on_button_event(self, event, data):
+        """Main button listener (its lock is held, and is taken before ours)"""
+        if event == 'enabled':
+            self.set_enabled(data['enabled'])
+
+    def set_hold(self, held):
+        """Hold all station buttons for a cue list (presses rejected with reason 'cue')"""
+        with self.locked():
+            if self.held == held:
+                return
+            self.held = held
+            for button in self.buttons:
+                button.set_hold(held)
+            self._emit('hold', held=held)
+
+    def state(self, index):
+        """State name of button index: disabled, held, blocked, armed, effect or idle"""
+        return self.buttons[index].state
+
+    def get_status(self):
+        """Per-button config and state"""
+        status = []
+        for index, pin in enumerate(self.pins):
+            config = self.osc_manager.get_button_config(index)
+            button = self.buttons[index]
+            status.append({
+                'button': index,
+                'pin': pin,
+                'scene': self.osc_manager.button_paths[config['path_id']],
+                'path_id': config['path_id'],
+                'delay': config['delay'],
+                'osc_off_delay': config['osc_off_delay'],
+                'state': button.state,
+                'blocked': bool(button.flags & BLOCKED),
+                'block_remaining': button.block_remaining(),
+                'presses': self.presses[index],
+            })
+        return status
+
+    def cleanup(self):
+        """Stop input and cancel all timers"""
+        self.stop_polling()
+        self.stop_edge_detection()
+        self.debouncer.cancel()
+        for button in self.buttons:
+            button.cancel()
+        logger.info("Button station cleaned up")
@@ -1,23 +1,49 @@
-import time
-import threading
+from .led_patterns import LEDPatternEngine, blink
+from ..logging_setup import get_logger
+
+logger = get_logger("led")
 
 class LEDController:
-    def __init__(self, gpio, pins):
+    def __init__(self, gpio, pins, engine=None):
         self.gpio = gpio
         self.pins = pins
+        self.engine = engine or LEDPatternEngine()
         self.leds = {}
         for led_name, pin in self.pins.items():
-            self.leds[led_name] = LED(gpio, pin)
+            self.leds[led_name] = LED(gpio, pin, self.engine)
+
+    def set_pattern(self, led_name, pattern, duration=None, then=None):
+        """Drive an LED with a pattern (name from PATTERNS or Pattern instance)"""
+        if led_name not in self.leds:
+            logger.warning("Unknown LED: %s", led_name)
+            return False
+        self.engine.set_pattern(self.leds[led_name], pattern, duration, then)
+        return True
+
+    def set_alert(self, led_name, pattern):
+        """Override an LED with an alert pattern until cleared with None (state changes still apply underneath)"""
+        if led_name not in self.leds:
+            logger.warning("Unknown LED: %s", led_name)
+            return False
+        self.engine.set_override(self.leds[led_name], pattern)
+        return True
+
+    def get_patterns(self):
+        """Get the pattern name currently driving each LED"""
+        return {led_name: self.engine.get_pattern(led) for led_name, led in self.leds.items()}
 
     def turn_led(self, led_name, on):
         """Turn specific LED on or off"""
-        if led_name in self.pins:
-            led_pin = self.pins[led_name]
-            self.gpio.output(led_pin, self.gpio.HIGH if on else self.gpio.LOW)
-            print(f"LED '{led_name}' {'ON' if on else 'OFF'}")
+        if self.set_pattern(led_name, 'on' if on else 'off'):
+            logger.debug("LED '%s' %s", led_name, 'ON' if on else 'OFF')
+
+    def toggle_led(self, led_name):
+        """Toggle specific LED"""
+        if led_name in self.leds:
+            self.turn_led(led_name, not self.leds[led_name].is_on)
         else:
-            print(f"Unknown LED: {led_name}")
-    
+            logger.warning("Unknown LED: %s", led_name)
+
     def turn_all_leds(self, on):
         """Turn all LEDs on or off"""
         for led_name in self.pins:
@@ -27,59 +53,79 @@ class LEDController:
         """Clean up LED resources"""
         for led_name in self.leds:
             self.leds[led_name].cleanup()
-    
+        self.engine.stop()
+
     def blink_green_led(self, duration=1.0, blink_rate=0.5, times=None):
         """Blink green LED"""
-        print(f"🟢 Green LED: Starting blink for {duration}s (rate: {blink_rate}s, times: {times})")
+        logger.debug("🟢 Green LED: Starting blink for %ss (rate: %ss, times: %s)", duration, blink_rate, times)
         self.leds["led_green"].blink(duration, blink_rate, times)
-    
+
     def blink_red_led(self, duration=1.0, blink_rate=0.5, times=None):
         """Blink red LED"""
-        print(f"🔴 Red LED: Starting blink for {duration}s (rate: {blink_rate}s, times: {times})")
+        logger.debug("🔴 Red LED: Starting blink for %ss (rate: %ss, times: %s)", duration, blink_rate, times)
         self.leds["led_red"].blink(duration, blink_rate, times)
-    
+
     def blink_all_leds(self, duration=1.0, blink_rate=0.5, times=None):
         """Blink all LEDs"""
-        print(f"💡 All LEDs: Starting blink for {duration}s (rate: {blink_rate}s, times: {times})")
+        logger.debug("💡 All LEDs: Starting blink for %ss (rate: %ss, times: %s)", duration, blink_rate, times)
         for led_name in self.leds:
             self.leds[led_name].blink(duration, blink_rate, times)
-    
+
     def switch_green_led(self, state):
         """Switch green LED on or off"""
-        print(f"🟢 Green LED: {'ON' if state else 'OFF'}")
+        logger.debug("🟢 Green LED: %s", 'ON' if state else 'OFF')
         self.leds["led_green"].switch(state)
-        
+
     def switch_red_led(self, state):
         """Switch red LED on or off"""
-        print(f"🔴 Red LED: {'ON' if state else 'OFF'}")
+        logger.debug("🔴 Red LED: %s", 'ON' if state else 'OFF')
         self.leds["led_red"].switch(state)
-        
+
     def switch_all_leds(self, state):
         """Switch all LEDs on or off"""
-        print(f"💡 All LEDs: {'ON' if state else 'OFF'}")
+        logger.debug("💡 All LEDs: %s", 'ON' if state else 'OFF')
         for led_name in self.leds:
             self.leds[led_name].switch(state)
 
+    def show_blocked(self):
+        """Blocked state: green off, red 'blocked' pattern"""
+        self.set_pattern("led_green", 'off')
+        self.set_pattern("led_red", 'blocked')
+
+    def show_error(self):
+        """Short red 'error' flash, then back to the previous red pattern"""
+        self.set_pattern("led_red", 'error')
+
 
 class LED:
-    def __init__(self, gpio, pin):
+    def __init__(self, gpio, pin, engine=None):
         """
         Initialize LED with GPIO instance and pin number
 
         Args:
             gpio: GPIO instance (RPi.GPIO or mock_gpio)
             pin: GPIO pin number for the LED
+            engine: LEDPatternEngine that drives this LED
         """
         self.gpio = gpio
         self.pin = pin
+        self.engine = engine or LEDPatternEngine()
         self.is_on = False
-        self.is_blinking = False
-        self._blink_thread = None
-        self._blink_stop_event = threading.Event()
 
         # Setup the pin as output
         self.gpio.setup(self.pin, self.gpio.OUT)
-        self.turn_off()  # Start with LED off
+        self.gpio.output(self.pin, self.gpio.LOW)  # Start with LED off
+        self.engine.add_led(self)
+
+    @property
+    def is_blinking(self):
+        """True while a non-static pattern drives the LED"""
+        return self.engine.is_animated(self)
+
+    def set_state(self, on):
+        """Write the pin (called by the engine on transitions only)"""
+        self.gpio.output(self.pin, self.gpio.HIGH if on else self.gpio.LOW)
+        self.is_on = on
 
     def switch(self, on):
         """Switch the LED on or off"""
@@ -87,15 +133,11 @@ class LED:
 
     def turn_on(self):
         """Turn the LED on"""
-        self.gpio.output(self.pin, self.gpio.HIGH)
-        self.is_on = True
-        print(f"LED on pin {self.pin}: ON")
+        self.engine.set_pattern(self, 'on')
 
     def turn_off(self):
         """Turn the LED off"""
-        self.gpio.output(self.pin, self.gpio.LOW)
-        self.is_on = False
-        print(f"LED on pin {self.pin}: OFF")
+        self.engine.set_pattern(self, 'off')
 
     def toggle(self):
         """Toggle LED state"""
@@ -111,63 +153,21 @@ class LED:
         Args:
             duration: Total duration to blink (seconds)
             blink_rate: Time between blinks (seconds)
-            times: Number of blinks (if None, blinks for duration)
+            times: Number of toggles (if None, blinks for duration)
         """
-        if self.is_blinking:
-            print(f"LED on pin {self.pin}: Stopping previous blink")
-            self.stop_blink()
-
-        self.is_blinking = True
-        self._blink_stop_event.clear()
-        print(f"LED on pin {self.pin}: Starting blink (duration: {duration}s, rate: {blink_rate}s, times: {times})")
-
-        self._blink_thread = threading.Thread(
-            target=self._blink_worker,
-            args=(duration, blink_rate, times),
-            daemon=True
-        )
-        self._blink_thread.start()
-
-    def _blink_worker(self, duration, blink_rate, times):
-        """Worker function for blinking in a separate thread"""
-        start_time = time.time()
-        blink_count = 0
-
-        try:
-            while not self._blink_stop_event.is_set():
-                # Check if we've reached the duration limit
-                if duration and (time.time() - start_time) >= duration:
-                    break
-
-                # Check if we've reached the blink count limit
-                if times and blink_count >= times:
-                    break
-
-                # Toggle LED
-                self.toggle()
-                blink_count += 1
-
-                # Wait for blink rate
-                if self._blink_stop_event.wait(blink_rate):
-                    break
-
-        finally:
-            self.is_blinking = False
-            # Ensure LED is off when blinking stops
+        if times:
+            duration = times * blink_rate
+        if not duration:
             self.turn_off()
-            print(f"LED on pin {self.pin}: Blink completed")
+            return
+        self.engine.set_pattern(self, blink(blink_rate), duration=duration, then='off')
 
     def stop_blink(self):
-        """Stop the LED from blinking"""
+        """Stop the LED from blinking (switches on the next tick, never blocks)"""
         if self.is_blinking:
-            self._blink_stop_event.set()
-            if self._blink_thread and self._blink_thread.is_alive():
-                self._blink_thread.join(timeout=1.0)
-            self.is_blinking = False
-            print(f"LED on pin {self.pin}: Blinking stopped")
+            self.turn_off()
 
     def cleanup(self):
         """Clean up LED resources"""
-        self.stop_blink()
-        self.turn_off()
-        print(f"LED on pin {self.pin}: Cleaned up")
+        self.engine.set_pattern(self, 'off')
+        self.set_state(False)
@@ -0,0 +1,234 @@
+"""
+LED Pattern Engine
+Declarative LED patterns driven for all LEDs from a single tick loop
+"""
+
+import time
+import threading
+
+from ..managers import metrics
+
+
+class Pattern:
+    def __init__(self, name, steps, repeat=None):
+        """
+        Declarative LED pattern
+
+        Args:
+            name: Pattern name
+            steps: List of (on, seconds) steps; seconds=None holds the step forever
+            repeat: Number of cycles before the pattern ends (None = forever)
+        """
+        self.name = name
+        self.steps = tuple(steps)
+        self.repeat = repeat
+        self.static = any(seconds is None for _, seconds in self.steps)
+        self.period = None if self.static else sum(seconds for _, seconds in self.steps)
+
+    @property
+    def finite(self):
+        """True if the pattern ends on its own"""
+        return self.repeat is not None and not self.static
+
+    def state_at(self, elapsed):
+        """
+        Evaluate the pattern
+
+        Returns:
+            (on, seconds until the next change or None, finished)
+        """
+        if self.static:
+            return self.steps[0][0], None, False
+        if self.repeat is not None and elapsed >= self.period * self.repeat:
+            return False, None, True
+        offset = elapsed % self.period
+        for on, seconds in self.steps:
+            if offset < seconds:
+                return on, seconds - offset, False
+            offset -= seconds
+        return self.steps[-1][0], self.period - offset, False
+
+    def __repr__(self):
+        return f"Pattern({self.name!r})"
+
+
+def blink(rate=0.5, name="blink"):
+    """Even on/off blink with the given step time"""
+    return Pattern(name, [(True, rate), (False, rate)])
+
+
+PATTERNS = {
+    'off': Pattern('off', [(False, None)]),
+    'on': Pattern('on', [(True, None)]),
+    'blink': blink(0.4),
+    'pulse': Pattern('pulse', [(True, 0.1), (False, 0.9)]),
+    'blocked': Pattern('blocked', [(True, 1.8), (False, 0.2)]),
+    'error': Pattern('error', [(True, 0.2), (False, 0.2)], repeat=3),
+    'no_response': Pattern('no_response', [(True, 0.1), (False, 0.15), (True, 0.1), (False, 0.65)]),
+}
+
+
+class _Slot:
+    __slots__ = ('led', 'pattern', 'started', 'until', 'fallback', 'override', 'override_started')
+
+    def __init__(self, led):
+        self.led = led
+        self.pattern = PATTERNS['off']
+        self.started = 0.0
+        self.until = None  # End of a timed pattern
+        self.fallback = None  # Pattern restored when a timed/finite pattern ends
+        self.override = None  # Alert pattern shown instead (the own pattern keeps running underneath)
+        self.override_started = 0.0
+
+
+class LEDPatternEngine:
+    def __init__(self, tick=0.02, clock=time.monotonic):
+        """
+        Initialize the engine
+
+        Args:
+            tick: Minimum time between evaluations (seconds)
+            clock: Monotonic clock function
+        """
+        self.tick_interval = tick
+        self.clock = clock
+        self.writes = 0  # GPIO writes issued (only on transitions)
+        self._slots = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def add_led(self, led):
+        """Register an LED with the engine (starts with the 'off' pattern)"""
+        with self._condition:
+            self._slots[led] = _Slot(led)
+
+    def set_pattern(self, led, pattern, duration=None, then=None):
+        """
+        Switch an LED to a pattern; takes effect on the next tick
+
+        Args:
+            led: Registered LED
+            pattern: Pattern instance or name from PATTERNS
+            duration: Run the pattern for this many seconds (None = until changed)
+            then: Pattern after a timed or finite pattern ends (None = restore previous)
+        """
+        if isinstance(pattern, str):
+            pattern = PATTERNS[pattern]
+        if isinstance(then, str):
+            then = PATTERNS[then]
+        with self._condition:
+            slot = self._slots[led]
+            now = self.clock()
+            if duration or pattern.finite:
+                if then is None:
+                    # Restore whatever was showing before (keep an older fallback)
+                    then = slot.fallback if slot.until is not None or slot.pattern.finite else slot.pattern
+                slot.fallback = then
+            else:
+                slot.fallback = None
+            slot.pattern = pattern
+            slot.started = now
+            slot.until = now + duration if duration else None
+            self._condition.notify()
+        metrics.LED_PATTERN_CHANGES.inc()
+        if self._thread is None:
+            self.start()
+
+    def set_override(self, led, pattern):
+        """
+        Show an alert pattern on an LED until cleared, independent of set_pattern()
+
+        Args:
+            led: Registered LED
+            pattern: Pattern instance or name from PATTERNS (None = back to the LED's own pattern)
+        """
+        if isinstance(pattern, str):
+            pattern = PATTERNS[pattern]
+        with self._condition:
+            slot = self._slots[led]
+            if pattern is slot.override:
+                return
+            slot.override = pattern
+            slot.override_started = self.clock()
+            self._condition.notify()
+        metrics.LED_PATTERN_CHANGES.inc()
+        if self._thread is None:
+            self.start()
+
+    def get_pattern(self, led):
+        """Get the name of the pattern currently driving an LED"""
+        slot = self._slots[led]
+        return (slot.override or slot.pattern).name
+
+    def is_animated(self, led):
+        """True while a non-static pattern drives an LED"""
+        slot = self._slots[led]
+        return not (slot.override or slot.pattern).static
+
+    def tick(self, now=None):
+        """
+        Evaluate all LEDs once and write GPIO only where the state changed
+
+        Returns:
+            Clock time of the next state change, or None if all LEDs are static
+        """
+        if now is None:
+            now = self.clock()
+        next_change = None
+        with self._condition:
+            for slot in self._slots.values():
+                if slot.until is not None and now >= slot.until:
+                    self._end_pattern(slot, slot.until)
+                on, wait, finished = slot.pattern.state_at(now - slot.started)
+                if finished:
+                    self._end_pattern(slot, now)
+                    on, wait, _ = slot.pattern.state_at(0)
+                if slot.override is not None:
+                    on, override_wait, _ = slot.override.state_at(now - slot.override_started)
+                    if override_wait is not None:
+                        wait = override_wait if wait is None else min(wait, override_wait)
+                if on != slot.led.is_on:
+                    slot.led.set_state(on)
+                    self.writes += 1
+                    metrics.LED_WRITES.inc()
+                deadline = now + wait if wait is not None else None
+                if slot.until is not None:
+                    deadline = slot.until if deadline is None else min(deadline, slot.until)
+                if deadline is not None and (next_change is None or deadline < next_change):
+                    next_change = deadline
+        return next_change
+
+    def _end_pattern(self, slot, now):
+        slot.pattern = slot.fallback or PATTERNS['off']
+        slot.fallback = None
+        slot.started = now
+        slot.until = None
+
+    def start(self):
+        """Start the tick loop thread"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="led-engine", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the tick loop thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self):
+        """Tick loop: sleep until the next change or a pattern switch"""
+        with self._condition:
+            while self._running:
+                next_change = self.tick()
+                if next_change is None:
+                    self._condition.wait()
+                else:
+                    self._condition.wait(max(self.tick_interval, next_change - self.clock()))
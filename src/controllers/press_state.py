@@ -0,0 +1,267 @@
+"""
+Press State Machine
+The press handling of one button, shared by the main button and every
+station button. All transitions run under the machine's lock, so OSC
+on/off messages stay paired per scene:
+
+    idle    --press-->        effect + blocked (blocked only if block delay > 0);
+                              with beat quantize: armed + blocked instead
+    armed   --beat timer-->   effect (the on message lands on the beat)
+    armed   --press-->        re-armed for the current scene (before the block)
+    effect  --press-->        effect restarted; a different scene gets its
+                              off message before the new on message
+    effect  --effect timer--> off message sent
+    blocked --press-->        rejected
+    blocked --block timer-->  unblocked
+    any     --cue list hold-> held: presses rejected ('cue') until released
+    any     --disable-->      disabled: presses rejected, running timers continue
+
+QLC+ scene buttons are Toggle buttons (a 0 is ignored), so the off message
+is a second 1 and a running scene is extended rather than sent again.
+"""
+
+import threading
+
+from ..managers import metrics
+from ..logging_setup import get_logger, log_event
+
+logger = get_logger("button")
+
+# State flags (an effect can run while blocked)
+EFFECT = 1
+BLOCKED = 2
+ARMED = 4  # Waiting for the next beat (quantize)
+HELD = 8   # Held by a running cue list
+
+STATE_IDLE = 'idle'
+STATE_EFFECT = 'effect'
+STATE_BLOCKED = 'blocked'
+STATE_ARMED = 'armed'
+STATE_HELD = 'held'
+STATE_DISABLED = 'disabled'
+
+
+class PressStateMachine:
+    def __init__(self, osc_client, osc_manager, scheduler, config, emit, led_controller=None,
+                 status_leds=False, tags=None):
+        """
+        Initialize the state machine (idle, enabled)
+
+        Args:
+            osc_client: Sender for the scene on/off messages
+            osc_manager: OSCManager (tempo for beat quantize)
+            scheduler: TimerScheduler for the trigger, effect and block timers
+            config: Callable returning (osc_path, block_delay, effect_duration) for a press
+            emit: Callable emit(event, **data) notifying the owner's listeners
+            led_controller: LEDController for error and effect feedback (optional)
+            status_leds: Also show block and hold on the LEDs and restore them after
+                (the main button; station buttons share its LEDs)
+            tags: Fields added to the press/unblock/effect log events (pin, button)
+        """
+        self.osc_client = osc_client
+        self.osc_manager = osc_manager
+        self.scheduler = scheduler
+        self.config = config
+        self.emit = emit
+        self.led_controller = led_controller
+        self.status_leds = status_leds
+        self.tags = tags or {}
+
+        # State (changed only under lock: edge, timer and web request threads all get here)
+        self.lock = threading.RLock()
+        self.flags = 0
+        self.enabled = True
+        self.press_time = None  # monotonic timestamp of the last accepted press
+
+        # Timer handles, created once and re-armed for every press
+        self._effect_handle = scheduler.timer(self._on_effect_timer)
+        self._effect_path = None
+        self._effect_deadline = None
+        self._block_handle = scheduler.timer(self._on_block_timer)
+        self._trigger_handle = scheduler.timer(self._on_trigger_timer)
+        self._armed = None  # (osc_path, effect duration, beat time) of a press waiting for the beat
+        self.last_effect_off_drift = None  # seconds the last effect-off message was late
+
+    @property
+    def state(self):
+        """Current state name: disabled, held, blocked, armed, effect or idle"""
+        flags = self.flags
+        if not self.enabled:
+            return STATE_DISABLED
+        if flags & HELD:
+            return STATE_HELD
+        if flags & BLOCKED:
+            return STATE_BLOCKED
+        if flags & ARMED:
+            return STATE_ARMED
+        if flags & EFFECT:
+            return STATE_EFFECT
+        return STATE_IDLE
+
+    def block_remaining(self):
+        """Seconds until the button is unblocked (0 if not blocked)"""
+        if not self.flags & BLOCKED:
+            return 0
+        return self._block_handle.remaining()
+
+    def press(self, timestamp, latency=None):
+        """
+        Handle a press edge observed at timestamp
+
+        Args:
+            timestamp: Monotonic time of the edge (origin of an immediate on message)
+            latency: Seconds from the edge to this call, for the press log event
+
+        Returns:
+            True if the press was accepted, False if it was rejected
+        """
+        with self.lock:
+            if not self.enabled or self.flags & (BLOCKED | HELD):
+                reason = 'disabled' if not self.enabled else 'cue' if self.flags & HELD else 'blocked'
+                if self.led_controller is not None:
+                    self.led_controller.show_error()
+                metrics.PRESSES_REJECTED.inc(reason=reason)
+                log_event('press_rejected', reason=reason, **self.tags)
+                self.emit('press_rejected', reason=reason)
+                return False
+
+            osc_path, block_delay, effect_duration = self.config()
+            self.press_time = timestamp
+            metrics.PRESSES.inc()
+            self.emit('press', scene=osc_path)
+            if latency is None:
+                log_event('press', scene=osc_path, **self.tags)
+            else:
+                log_event('press', scene=osc_path, latency_ms=round(latency * 1000, 3), **self.tags)
+
+            # Send the on message and schedule the effect off message, on the next beat if quantized
+            beat_delay = self.osc_manager.tempo.delay(self.scheduler.clock())
+            if beat_delay > 0:
+                self._arm_trigger(osc_path, effect_duration, beat_delay)
+            else:
+                self._start_effect(osc_path, effect_duration, timestamp)
+
+            if block_delay > 0:
+                logger.info("Blocking button for %s seconds...", block_delay)
+                self.start_block(block_delay)
+            return True
+
+    def start_block(self, block_delay):
+        """Block the button and schedule the unblock (also resumes a block after a restart)"""
+        with self.lock:
+            self.flags |= BLOCKED
+            if self.status_leds:
+                # During block: red shows the blocked pattern (green finishes its effect blink)
+                self.led_controller.set_pattern("led_red", 'blocked')
+            self._block_handle.reschedule(block_delay)
+            self.emit('block_start', delay=block_delay)
+
+    def _on_block_timer(self):
+        """Scheduled: release the block"""
+        with self.lock:
+            if self._block_handle.active or self._block_handle.cancelled or not self.flags & BLOCKED:
+                return  # Re-armed or cancelled after the timer fired
+            self.flags &= ~BLOCKED
+            self._restore_leds()
+            log_event('unblock', **self.tags)
+            self.emit('block_end')
+
+    def _restore_leds(self):
+        """Back to the enabled LED state (green on, red off) once nothing holds the button (lock held)"""
+        if self.status_leds and self.enabled and not self.flags & (BLOCKED | HELD):
+            self.led_controller.switch_green_led(True)
+            self.led_controller.switch_red_led(False)
+
+    def _arm_trigger(self, osc_path, effect_duration, beat_delay):
+        """Hold the press until the next beat (lock held)"""
+        self.flags |= ARMED
+        self._armed = (osc_path, effect_duration, self.scheduler.clock() + beat_delay)
+        self._trigger_handle.reschedule(beat_delay)
+        logger.debug("Trigger armed: %s in %.0f ms", osc_path, beat_delay * 1000)
+        self.emit('armed', scene=osc_path, delay=beat_delay)
+
+    def _on_trigger_timer(self):
+        """Scheduled: the beat the press was quantized to"""
+        with self.lock:
+            if self._trigger_handle.active or self._trigger_handle.cancelled or not self.flags & ARMED:
+                return  # Re-armed or cancelled after the timer fired
+            self.flags &= ~ARMED
+            self._start_effect(*self._armed)
+
+    def _start_effect(self, osc_path, effect_duration, origin):
+        """Send the on message, start the LED feedback and schedule the off message (lock held)"""
+        if self.flags & EFFECT:
+            # A new press takes over the running effect. The same scene is only
+            # extended; a different one is switched off first.
+            self._effect_handle.cancel()
+            if self._effect_path != osc_path:
+                self._end_effect()
+        if not self.flags & EFFECT:
+            self.osc_client.send_message(osc_path, 1, origin=origin)
+            self.flags |= EFFECT
+            self._effect_path = osc_path
+
+        if self.led_controller is not None:
+            self.led_controller.blink_green_led(duration=effect_duration, blink_rate=0.4)
+        self.emit('effect_on', scene=osc_path, duration=effect_duration)
+        if effect_duration > 0:
+            logger.debug("Effect duration: %s seconds...", effect_duration)
+            self._effect_deadline = self.scheduler.clock() + effect_duration
+            self._effect_handle.reschedule(effect_duration)
+        else:
+            logger.debug("No effect duration - ending immediately")
+            self._end_effect()
+
+    def _on_effect_timer(self):
+        """Scheduled: the effect duration is over"""
+        with self.lock:
+            if self._effect_handle.active or self._effect_handle.cancelled or not self.flags & EFFECT:
+                return  # Re-armed or cancelled after the timer fired
+            self.last_effect_off_drift = max(0.0, self.scheduler.clock() - self._effect_deadline)
+            metrics.EFFECT_OFF_DRIFT.observe(self.last_effect_off_drift)
+            self._end_effect()
+
+    def _end_effect(self):
+        """Send the effect off message: the second 1 toggles the scene off (lock held)"""
+        osc_path = self._effect_path
+        self.flags &= ~EFFECT
+        self.osc_client.send_message(osc_path, 1)
+        self.emit('effect_off', scene=osc_path)
+        log_event('effect_off', scene=osc_path, **self.tags)
+
+    def end_effect(self):
+        """End a pending trigger and a running effect now (a cue takes the stage)"""
+        with self.lock:
+            if self.flags & ARMED:
+                self._trigger_handle.cancel()
+                self.flags &= ~ARMED
+            if self.flags & EFFECT:
+                self._effect_handle.cancel()
+                self._end_effect()
+
+    def set_hold(self, held):
+        """
+        Hold the button for a cue list or release it
+
+        Returns:
+            True if the hold changed
+        """
+        with self.lock:
+            if bool(self.flags & HELD) == held:
+                return False
+            if held:
+                self.flags |= HELD
+                if self.status_leds:
+                    self.led_controller.set_pattern("led_red", 'blocked')
+            else:
+                self.flags &= ~HELD
+                self._restore_leds()
+            return True
+
+    def cancel(self):
+        """Cancel the pending trigger, effect and block timers"""
+        with self.lock:
+            self._trigger_handle.cancel()
+            self.flags &= ~ARMED
+            self._effect_handle.cancel()
+            self._block_handle.cancel()
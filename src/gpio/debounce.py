@@ -0,0 +1,153 @@
+"""
+Debounce and Glitch Filter
+Sits between raw pin levels (edge events or poll samples) and the button
+logic. Works on the monotonic timestamps of the raw transitions and
+re-checks via the timer scheduler, so nothing sleeps on the input path.
+"""
+
+import threading
+
+from ..managers.scheduler import get_default_scheduler
+from ..managers import metrics
+from ..logging_setup import get_logger
+
+logger = get_logger("gpio.debounce")
+
+DEFAULT_SETTLE = 0.03     # seconds after an accepted change in which edges are contact bounce
+DEFAULT_MIN_HOLD = 0.002  # seconds a new level must persist (shorter pulses are EMI glitches)
+
+
+class _Channel:
+    __slots__ = ('stable', 'raw', 'raw_since', 'last_change', 'recheck')
+
+    def __init__(self, level, timestamp):
+        self.stable = level
+        self.raw = level
+        self.raw_since = timestamp
+        self.last_change = float('-inf')
+        self.recheck = None
+
+
+class Debouncer:
+    def __init__(self, on_change, settle=DEFAULT_SETTLE, min_hold=DEFAULT_MIN_HOLD, scheduler=None, read=None):
+        """
+        Initialize the filter
+
+        Args:
+            on_change: callback(channel, level, timestamp) for every accepted level change;
+                timestamp is when the raw transition happened
+            settle: Seconds after an accepted change during which edges count as bounce
+            min_hold: Seconds a new level must be held to be accepted (0 = accept on the leading edge)
+            scheduler: TimerScheduler used for the settle/hold re-checks
+            read: Optional read(channel) to resample the pin on a re-check (poll mode)
+        """
+        self.on_change = on_change
+        self.settle = settle
+        self.min_hold = min_hold
+        self.scheduler = scheduler or get_default_scheduler()
+        self.read = read
+        self.stats = {'accepted': 0, 'bounces': 0, 'glitches': 0}
+        self._channels = {}
+        self._lock = threading.RLock()
+
+    def add_channel(self, channel, level, timestamp=0.0):
+        """Start tracking a channel at its current (idle) level"""
+        with self._lock:
+            self._channels[channel] = _Channel(level, timestamp)
+
+    def level(self, channel):
+        """Debounced level of a channel"""
+        return self._channels[channel].stable
+
+    def feed(self, channel, level, timestamp):
+        """Raw level observed at timestamp (edge event or poll sample)"""
+        with self._lock:
+            ch = self._channels[channel]
+            if level == ch.raw:
+                # Repeated poll sample: only confirms a pending level
+                if level != ch.stable:
+                    self._evaluate(channel, ch, timestamp)
+                return
+            previous_pending = ch.raw != ch.stable
+            ch.raw = level
+            ch.raw_since = timestamp
+            if timestamp < ch.last_change + self.settle:
+                self._reject('bounces')
+                self._schedule(channel, ch, ch.last_change + self.settle)
+                return
+            if level == ch.stable:
+                if previous_pending:
+                    # Pulse ended before min_hold
+                    self._reject('glitches')
+                return
+            self._evaluate(channel, ch, timestamp)
+
+    def pulse(self, channel, timestamp, previous_sample):
+        """
+        A latched edge shows the line left its level and came back between
+        two poll samples (a short tap, or release and re-press)
+
+        Ignored unless the line was already settled at the previous sample,
+        so bounce right after a sample is not mistaken for a pulse.
+        """
+        with self._lock:
+            ch = self._channels[channel]
+            if previous_sample < ch.last_change + self.settle or ch.stable != ch.raw:
+                return
+            level = ch.stable
+            self._accept(channel, ch, 1 - level, timestamp)
+            self._accept(channel, ch, level, timestamp)
+
+    def _evaluate(self, channel, ch, now):
+        if ch.raw == ch.stable:
+            return
+        # Compared as deadline sums, so a re-check running exactly at its deadline passes
+        if now < ch.last_change + self.settle:
+            self._schedule(channel, ch, ch.last_change + self.settle)
+        elif now >= ch.raw_since + self.min_hold:
+            self._accept(channel, ch, ch.raw, ch.raw_since)
+        else:
+            self._schedule(channel, ch, ch.raw_since + self.min_hold)
+
+    def _accept(self, channel, ch, level, timestamp):
+        ch.stable = level
+        ch.last_change = timestamp
+        if ch.recheck is not None:
+            ch.recheck.cancel()
+            ch.recheck = None
+        self.stats['accepted'] += 1
+        self.on_change(channel, level, timestamp)
+
+    def _reject(self, kind):
+        self.stats[kind] += 1
+        metrics.INPUT_REJECTED.inc(kind=kind)
+
+    def _schedule(self, channel, ch, deadline):
+        if ch.recheck is not None and ch.recheck.active:
+            if ch.recheck.deadline <= deadline:
+                return  # The earlier re-check reschedules if needed
+            ch.recheck.cancel()
+        ch.recheck = self.scheduler.call_at(deadline, self._recheck, channel)
+
+    def _recheck(self, channel):
+        """Scheduled: settle/hold window over, decide on the current level"""
+        now = self.scheduler.clock()
+        with self._lock:
+            ch = self._channels.get(channel)
+            if ch is None:
+                return
+            ch.recheck = None
+            if self.read is not None:
+                level = self.read(channel)
+                if level != ch.raw:
+                    ch.raw = level
+                    ch.raw_since = now
+            self._evaluate(channel, ch, now)
+
+    def cancel(self):
+        """Drop pending re-checks"""
+        with self._lock:
+            for ch in self._channels.values():
+                if ch.recheck is not None:
+                    ch.recheck.cancel()
+                    ch.recheck = None
@@ -1,20 +1,47 @@
 """
 GPIO Handler - Automatically uses RPi.GPIO when available, falls back to mock GPIO
+The probe runs on first use (load_gpio() or accessing GPIO), not at import time
 """
 
-try:
-    import RPi.GPIO as GPIO
-    print("[GPIO] Using real RPi.GPIO")
-    USING_MOCK_GPIO = False
-except ImportError:
-    from .mock_gpio import GPIO
-    print("[GPIO] RPi.GPIO not available, using mock GPIO")
-    USING_MOCK_GPIO = True
+from ..logging_setup import get_logger
+
+logger = get_logger("gpio")
+
+_gpio = None
+_using_mock = None
+
+
+def load_gpio():
+    """Import RPi.GPIO, or the mock when it is not available (cached)"""
+    global _gpio, _using_mock
+    if _gpio is None:
+        try:
+            import RPi.GPIO as gpio
+            logger.debug("[GPIO] Using real RPi.GPIO")
+            _using_mock = False
+        except ImportError:
+            from .mock_gpio import GPIO as gpio
+            logger.debug("[GPIO] RPi.GPIO not available, using mock GPIO")
+            _using_mock = True
+        _gpio = gpio
+    return _gpio
+
+
+def __getattr__(name):
+    # Keeps `from src.gpio.gpio_handler import GPIO` working while probing lazily
+    if name == 'GPIO':
+        return load_gpio()
+    if name == 'USING_MOCK_GPIO':
+        load_gpio()
+        return _using_mock
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def setup_gpio():
     """Setup GPIO and start keyboard monitoring if using mock"""
-    if USING_MOCK_GPIO:
-        GPIO.start_keyboard_monitoring()
-        print("[GPIO] Keyboard monitoring enabled (Enter/Space to simulate button)")
+    gpio = load_gpio()
+    if _using_mock:
+        gpio.start_keyboard_monitoring()
+        logger.info("[GPIO] RPi.GPIO not available - keyboard monitoring enabled (Enter/Space to simulate button)")
     else:
-        print("[GPIO] Using real hardware GPIO")
+        logger.info("[GPIO] Using real hardware GPIO")
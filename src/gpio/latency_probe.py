@@ -0,0 +1,87 @@
+"""
+Input Latency Probe - Measures press-to-dispatch latency of the input modes
+Only works with mock GPIO, where presses can be injected with a known timestamp
+"""
+
+import time
+import random
+import threading
+
+PROBE_PIN = 99  # Spare mock pin, never wired on the real board
+
+
+def measure_dispatch_latency(gpio, mode, samples=5, poll_interval=0.1, pin=PROBE_PIN):
+    """
+    Inject presses on a spare pin and measure how long they take to be dispatched
+
+    Args:
+        gpio: GPIO instance (must provide set_input, i.e. mock GPIO)
+        mode: "edge" or "poll"
+        samples: Number of presses to inject
+        poll_interval: Sleep between reads in poll mode (seconds)
+        pin: Spare input pin used for the probe
+
+    Returns:
+        dict with min/avg/max latency in milliseconds, or None if not measurable
+    """
+    if not hasattr(gpio, 'set_input'):
+        return None
+
+    dispatched = threading.Event()
+    latencies = []
+    pressed_at = [0.0]
+
+    def on_dispatch():
+        latencies.append(time.monotonic() - pressed_at[0])
+        dispatched.set()
+
+    gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+    running = True
+    poll_thread = None
+
+    if mode == "edge":
+        def on_edge(channel):
+            if gpio.input(channel) == gpio.LOW:
+                on_dispatch()
+        gpio.add_event_detect(pin, gpio.FALLING, callback=on_edge)
+    else:
+        def poll_loop():
+            pressed = False
+            while running:
+                state = gpio.input(pin)
+                if state == gpio.LOW and not pressed:
+                    pressed = True
+                    on_dispatch()
+                elif state == gpio.HIGH:
+                    pressed = False
+                time.sleep(poll_interval)
+        poll_thread = threading.Thread(target=poll_loop, daemon=True)
+        poll_thread.start()
+
+    try:
+        for _ in range(samples):
+            # Press at a random phase relative to the poll loop
+            time.sleep(random.uniform(0, poll_interval))
+            dispatched.clear()
+            pressed_at[0] = time.monotonic()
+            gpio.set_input(pin, gpio.LOW)
+            dispatched.wait(timeout=poll_interval * 5)
+            gpio.set_input(pin, gpio.HIGH)
+            if poll_thread:
+                # Let the poller see the release before the next press
+                time.sleep(poll_interval * 1.5)
+    finally:
+        running = False
+        if poll_thread:
+            poll_thread.join(timeout=poll_interval * 2)
+        gpio.cleanup(pin)
+
+    if not latencies:
+        return None
+    return {
+        'mode': mode,
+        'samples': len(latencies),
+        'min_ms': min(latencies) * 1000,
+        'avg_ms': sum(latencies) / len(latencies) * 1000,
+        'max_ms': max(latencies) * 1000,
+    }
@@ -1,10 +1,15 @@
 import time
+import queue
 import threading
 import sys
 import select
 import tty
 import termios
 
+from ..logging_setup import get_logger
+
+logger = get_logger("gpio.mock")
+
 class GPIO:
     BCM = 'BCM'
     OUT = 'OUT'
@@ -12,6 +17,15 @@ class GPIO:
     HIGH = 1
     LOW = 0
     PUD_UP = 'PUD_UP'
+    RISING = 'RISING'
+    FALLING = 'FALLING'
+    BOTH = 'BOTH'
+
+    KEYBOARD_TAP = 0.08  # seconds a simulated keyboard press holds the pin LOW
+
+    # Edge timestamps; a simulation injects a virtual clock and dispatches edges inline
+    clock = staticmethod(time.monotonic)
+    _synchronous = False
 
     _pin_state = {}
     _pin_mode = {}
@@ -19,41 +33,154 @@ class GPIO:
     _keyboard_running = False
     _button_pin = None
 
+    # Edge detection (mirrors RPi.GPIO add_event_detect)
+    _edge_detect = {}       # pin -> edge type
+    _edge_callbacks = {}    # pin -> [callback, ...]
+    _edge_pending = {}      # pin -> True when an edge was seen (event_detected)
+    _current_edge = {}      # pin -> (state, timestamp) of the edge being dispatched
+    _event_queue = queue.Queue()
+    _event_thread = None
+
+    @staticmethod
+    def use_clock(clock, synchronous=True):
+        """Timestamp edges with clock; synchronous delivers edge callbacks inside set_input (simulation)"""
+        GPIO.clock = staticmethod(clock)
+        GPIO._synchronous = synchronous
+
     @staticmethod
     def setmode(mode):
-        print(f"[MOCK GPIO] Mode set to {mode}")
+        logger.debug("[MOCK GPIO] Mode set to %s", mode)
 
     @staticmethod
     def setup(pin, mode, pull_up_down=None):
         GPIO._pin_mode[pin] = mode
         if mode == GPIO.IN:
             GPIO._pin_state[pin] = GPIO.HIGH if pull_up_down == GPIO.PUD_UP else GPIO.LOW
-            # Store the button pin for keyboard monitoring
-            GPIO._button_pin = pin
+            # Store the first input pin as the button for keyboard monitoring
+            if GPIO._button_pin is None:
+                GPIO._button_pin = pin
         else:
             GPIO._pin_state[pin] = GPIO.LOW
-        print(f"[MOCK GPIO] Pin {pin} set as {mode}, pull {pull_up_down}")
+        logger.debug("[MOCK GPIO] Pin %s set as %s, pull %s", pin, mode, pull_up_down)
 
     @staticmethod
     def input(pin):
         state = GPIO._pin_state.get(pin, GPIO.LOW)
-        # Only print when state changes to reduce spam
+        # Only log when state changes to reduce spam
         if not hasattr(GPIO, '_last_state') or GPIO._last_state != state:
-            print(f"[MOCK GPIO] Read pin {pin}: {state}")
+            logger.debug("[MOCK GPIO] Read pin %s: %s", pin, state)
             GPIO._last_state = state
         return state
 
+    @staticmethod
+    def input_many(pins):
+        """Read several pins in one call (mock only, like a GPIO level register read)"""
+        state = GPIO._pin_state
+        return [state.get(pin, GPIO.LOW) for pin in pins]
+
     @staticmethod
     def output(pin, state):
         GPIO._pin_state[pin] = state
-        print(f"[MOCK GPIO] Set pin {pin} to {'HIGH' if state else 'LOW'}")
+        logger.debug("[MOCK GPIO] Set pin %s to %s", pin, 'HIGH' if state else 'LOW')
+
+    @staticmethod
+    def set_input(pin, state):
+        """Drive an input pin from outside (keyboard, tests) and queue the edge"""
+        timestamp = GPIO.clock()
+        previous = GPIO._pin_state.get(pin, GPIO.LOW)
+        GPIO._pin_state[pin] = state
+        if previous == state or pin not in GPIO._edge_detect:
+            return
+        edge = GPIO._edge_detect[pin]
+        if edge == GPIO.BOTH or (edge == GPIO.FALLING and state == GPIO.LOW) or (edge == GPIO.RISING and state == GPIO.HIGH):
+            GPIO._edge_pending[pin] = True
+            if GPIO._synchronous:
+                GPIO._dispatch(pin, state, timestamp)
+            else:
+                GPIO._event_queue.put((pin, state, timestamp))
+
+    @staticmethod
+    def add_event_detect(pin, edge, callback=None, bouncetime=None):
+        """Enable edge detection on an input pin (bouncetime is accepted but ignored)"""
+        GPIO._edge_detect[pin] = edge
+        GPIO._edge_callbacks[pin] = []
+        GPIO._edge_pending[pin] = False
+        if callback is not None:
+            GPIO._edge_callbacks[pin].append(callback)
+        if not GPIO._synchronous and (GPIO._event_thread is None or not GPIO._event_thread.is_alive()):
+            GPIO._event_thread = threading.Thread(target=GPIO._event_dispatcher, daemon=True)
+            GPIO._event_thread.start()
+        logger.debug("[MOCK GPIO] Edge detection (%s) enabled on pin %s", edge, pin)
+
+    @staticmethod
+    def add_event_callback(pin, callback):
+        """Add another callback to a pin with edge detection enabled"""
+        if pin not in GPIO._edge_detect:
+            raise RuntimeError(f"Add event detection using add_event_detect first before adding a callback (pin {pin})")
+        GPIO._edge_callbacks[pin].append(callback)
+
+    @staticmethod
+    def remove_event_detect(pin):
+        """Disable edge detection on a pin"""
+        GPIO._edge_detect.pop(pin, None)
+        GPIO._edge_callbacks.pop(pin, None)
+        GPIO._edge_pending.pop(pin, None)
+        GPIO._current_edge.pop(pin, None)
+
+    @staticmethod
+    def event_detected(pin):
+        """Return True once if an edge occurred since the last call"""
+        detected = GPIO._edge_pending.get(pin, False)
+        GPIO._edge_pending[pin] = False
+        return detected
+
+    @staticmethod
+    def get_edge(pin):
+        """Return (state, timestamp) of the edge currently being dispatched (mock only)"""
+        return GPIO._current_edge.get(pin)
+
+    @staticmethod
+    def _event_dispatcher():
+        """Deliver queued edges to their callbacks, one at a time like RPi.GPIO"""
+        while True:
+            event = GPIO._event_queue.get()
+            if event is None:
+                break
+            GPIO._dispatch(*event)
+
+    @staticmethod
+    def _dispatch(pin, state, timestamp):
+        GPIO._current_edge[pin] = (state, timestamp)
+        for callback in list(GPIO._edge_callbacks.get(pin, ())):
+            try:
+                callback(pin)
+            except Exception as e:
+                logger.exception("[MOCK GPIO] Edge callback for pin %s failed: %s", pin, e)
 
     @staticmethod
-    def cleanup():
-        print(f"[MOCK GPIO] Cleaning up")
+    def cleanup(pin=None):
+        if pin is not None:
+            logger.debug("[MOCK GPIO] Cleaning up pin %s", pin)
+            GPIO.remove_event_detect(pin)
+            GPIO._pin_state.pop(pin, None)
+            GPIO._pin_mode.pop(pin, None)
+            if GPIO._button_pin == pin:
+                GPIO._button_pin = None
+            return
+        logger.info("[MOCK GPIO] Cleaning up")
         GPIO._stop_keyboard_monitoring()
+        if GPIO._event_thread and GPIO._event_thread.is_alive():
+            GPIO._event_queue.put(None)
+            GPIO._event_thread.join(timeout=0.1)
+        GPIO._event_thread = None
+        GPIO._edge_detect.clear()
+        GPIO._edge_callbacks.clear()
+        GPIO._edge_pending.clear()
+        GPIO._current_edge.clear()
         GPIO._pin_state.clear()
         GPIO._pin_mode.clear()
+        GPIO._button_pin = None
+        GPIO.use_clock(time.monotonic, synchronous=False)
 
     @staticmethod
     def start_keyboard_monitoring():
@@ -62,7 +189,7 @@ class GPIO:
             GPIO._keyboard_running = True
             GPIO._keyboard_thread = threading.Thread(target=GPIO._keyboard_monitor, daemon=True)
             GPIO._keyboard_thread.start()
-            print("[MOCK GPIO] Keyboard monitoring started. Press ENTER or SPACE to simulate button press.")
+            logger.info("[MOCK GPIO] Keyboard monitoring started. Press ENTER or SPACE to simulate button press.")
 
     @staticmethod
     def _stop_keyboard_monitoring():
@@ -83,12 +210,12 @@ class GPIO:
                     char = sys.stdin.read(1)
                     if char in ['\n', '\r', ' ']:  # Enter or Space key
                         if GPIO._button_pin is not None:
-                            print(f"\n[MOCK GPIO] Keyboard input detected - simulating button press!")
-                            GPIO._pin_state[GPIO._button_pin] = GPIO.LOW
-                            time.sleep(0.6)  # Hold for 0.6 seconds to ensure detection
-                            GPIO._pin_state[GPIO._button_pin] = GPIO.HIGH
+                            logger.info("[MOCK GPIO] Keyboard input detected - simulating button press!")
+                            GPIO.set_input(GPIO._button_pin, GPIO.LOW)
+                            time.sleep(GPIO.KEYBOARD_TAP)  # A short tap; debouncing/tap latch catch it
+                            GPIO.set_input(GPIO._button_pin, GPIO.HIGH)
                     elif char == 'q':  # Quit
-                        print(f"\n[MOCK GPIO] Quit key pressed")
+                        logger.info("[MOCK GPIO] Quit key pressed")
                         GPIO._keyboard_running = False
                         break
             except:
@@ -99,8 +226,8 @@ class GPIO:
     @staticmethod
     def simulate_button_press(pin, duration=0.5):
         """Simulate a button being pressed (active LOW)"""
-        GPIO._pin_state[pin] = GPIO.LOW
-        print(f"[MOCK GPIO] Simulate button press on pin {pin}")
+        GPIO.set_input(pin, GPIO.LOW)
+        logger.debug("[MOCK GPIO] Simulate button press on pin %s", pin)
         time.sleep(duration)
-        GPIO._pin_state[pin] = GPIO.HIGH
-        print(f"[MOCK GPIO] Simulate button release on pin {pin}")
+        GPIO.set_input(pin, GPIO.HIGH)
+        logger.debug("[MOCK GPIO] Simulate button release on pin %s", pin)
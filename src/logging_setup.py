@@ -0,0 +1,96 @@
+"""
+Logging Setup
+Leveled, queue-backed logging: hot paths only enqueue records, one listener
+thread formats and writes them
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+ROOT_LOGGER = "tanzen"
+EVENT_LOGGER = "tanzen.events"
+
+# Chatty per-write loggers silenced in quiet (production) mode
+QUIET_LOGGERS = ("tanzen.gpio", "tanzen.led")
+
+_listener = None
+
+
+def get_logger(name):
+    """Get a logger below the tanzen namespace (e.g. 'gpio', 'button')"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+_event_logger = logging.getLogger(EVENT_LOGGER)
+
+
+def log_event(event, **fields):
+    """Log a structured event (press, osc_send, ...) as event key=value pairs"""
+    if _event_logger.isEnabledFor(logging.INFO):
+        _event_logger.info("%s", event, extra={'event': event, 'fields': fields})
+
+
+class EventFormatter(logging.Formatter):
+    """Formats structured events as 'event key=value ...'"""
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None)
+        if fields is not None:
+            record.msg = record.event + ''.join(f" {key}={value!r}" for key, value in fields.items())
+            record.args = None
+        return super().format(record)
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=None, quiet=None, stream=None):
+    """
+    Configure the tanzen loggers
+
+    Args:
+        level: Log level name (default: TANZEN_LOG_LEVEL or INFO)
+        quiet: Production mode, silences per-write GPIO/LED logs (default: TANZEN_LOG_QUIET)
+        stream: Output stream (default: stdout)
+    """
+    global _listener
+    if level is None:
+        level = os.environ.get("TANZEN_LOG_LEVEL", "INFO")
+    if quiet is None:
+        quiet = os.environ.get("TANZEN_LOG_QUIET", "0").lower() in ("1", "true", "yes")
+
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(EventFormatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S"))
+
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [_EnqueueHandler(records)]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING if quiet else logging.NOTSET)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
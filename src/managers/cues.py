@@ -0,0 +1,515 @@
+"""
+Cue Lists
+Pre-programmed scene sequences from config/cues/<name>.json, e.g. "Scene B
+at 21:00 for 10 minutes, then Scene D, button blocked during the show".
+Each run of a list is expanded into absolute on/off events in one heap,
+and a single scheduler timer is armed for the head. Thousands of cues
+therefore cost no threads, only one heap entry each.
+
+List file:
+
+    {"start": "21:00", "days": ["fri", "sat"], "manual": "block", "end": 3600,
+     "cues": [{"at": 0, "scene": "Scene B", "duration": 600},
+              {"at": "21:10", "scene": 4}]}
+
+    start    "HH:MM[:SS]" daily (optionally only on days) or
+             "YYYY-MM-DD HH:MM[:SS]" once, local time
+    cues     at: seconds after the start or "HH:MM[:SS]"; scene: path or
+             scene id; duration: seconds (omitted: until the next cue,
+             the last one until end, or left on)
+    end      seconds after the start when the list is over (optional)
+    manual   how presses and the list share the stage while it runs:
+               block     presses are rejected ('cue')
+               override  a press switches the cue scene off; the next cue takes over again
+               layer     presses and cues are independent
+    enabled  false keeps the file without running it
+
+A list shows one scene at a time, and under block and override a cue
+first ends a manual effect that is still running. Deadlines are wall
+times mapped onto the monotonic clock; if the wall clock jumps (NTP sync
+on a Pi without RTC), the heap is rebuilt. A run in progress at start-up
+(or after an edit) is joined: the scene that should be on is switched on.
+Scenes are QLC+ Toggle buttons, so a cue switches its scene off with a
+second 1, as the button does.
+"""
+
+import datetime
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+from . import metrics
+from ..logging_setup import get_logger, log_event
+
+logger = get_logger("cues")
+
+DEFAULT_CUE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config", "cues")
+MANUAL_RULES = ('block', 'override', 'layer')
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+CLOCK_CHECK = 30.0      # seconds between wall-clock jump checks while lists are queued
+CLOCK_TOLERANCE = 1.0   # wall/monotonic offset change that counts as a jump
+DAY = 86400
+
+# Event actions, in the order they apply at the same instant
+HOLD, OFF, ON, RELEASE = range(4)
+ACTION_NAMES = ('hold', 'off', 'on', 'release')
+
+
+def _parse_clock(text):
+    """'HH:MM[:SS]' -> datetime.time; raises ValueError"""
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.datetime.strptime(text, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid time {text!r} (expected HH:MM[:SS])")
+
+
+def _seconds_of_day(clock_time):
+    return clock_time.hour * 3600 + clock_time.minute * 60 + clock_time.second
+
+
+class CueList:
+    def __init__(self, name, data, osc_manager):
+        """
+        Initialize (and validate) a cue list
+
+        Args:
+            name: List name (file name without .json)
+            data: Parsed list file (see the module docstring)
+            osc_manager: OSCManager with the scene paths cues refer to
+
+        Raises:
+            ValueError with a message for the first invalid field
+        """
+        if not NAME_PATTERN.match(name):
+            raise ValueError("Name must be 1-64 letters, digits, '-' or '_'")
+        if not isinstance(data, dict):
+            raise ValueError("A cue list is a JSON object")
+        self.name = name
+        self.data = data
+        self.enabled = bool(data.get('enabled', True))
+        self.manual = data.get('manual', 'block')
+        if self.manual not in MANUAL_RULES:
+            raise ValueError(f"manual must be one of {', '.join(MANUAL_RULES)}")
+
+        start = data.get('start')
+        if not isinstance(start, str):
+            raise ValueError("start is required ('HH:MM' daily or 'YYYY-MM-DD HH:MM' once)")
+        date_part, _, clock_part = start.strip().rpartition(' ')
+        self.start_time = _parse_clock(clock_part)
+        self.start_date = None
+        if date_part:
+            try:
+                self.start_date = datetime.date.fromisoformat(date_part.strip())
+            except ValueError:
+                raise ValueError(f"Invalid start date {date_part!r} (expected YYYY-MM-DD)") from None
+        days = data.get('days') or []
+        if self.start_date is not None and days:
+            raise ValueError("days only apply to daily lists")
+        try:
+            self.days = {WEEKDAYS.index(day.lower()[:3]) for day in days}
+        except (AttributeError, ValueError):
+            raise ValueError(f"days must be weekday names ({', '.join(WEEKDAYS)})") from None
+
+        cues = data.get('cues')
+        if not isinstance(cues, list) or not cues:
+            raise ValueError("cues must be a non-empty list")
+        scene_ids = {path: path_id for path_id, path in osc_manager.button_paths.items()}
+        start_seconds = _seconds_of_day(self.start_time)
+        self.cues = []
+        for number, cue in enumerate(cues, 1):
+            if not isinstance(cue, dict):
+                raise ValueError(f"Cue {number}: expected an object")
+            at = cue.get('at', 0)
+            if isinstance(at, str):
+                offset = (_seconds_of_day(_parse_clock(at)) - start_seconds) % DAY
+            elif isinstance(at, (int, float)) and at >= 0:
+                offset = float(at)
+            else:
+                raise ValueError(f"Cue {number}: at must be seconds >= 0 or 'HH:MM[:SS]'")
+            scene = cue.get('scene')
+            if scene in osc_manager.button_paths:
+                path = osc_manager.button_paths[scene]
+            elif scene in scene_ids:
+                path = scene
+            else:
+                raise ValueError(f"Cue {number}: unknown scene {scene!r}")
+            duration = cue.get('duration')
+            if duration is not None and (not isinstance(duration, (int, float)) or duration <= 0):
+                raise ValueError(f"Cue {number}: duration must be seconds > 0")
+            self.cues.append((offset, path, duration))
+        self.cues.sort(key=lambda cue: cue[0])
+
+        end = data.get('end')
+        if end is not None and (not isinstance(end, (int, float)) or end < self.cues[-1][0]):
+            raise ValueError("end must be seconds after the start, not before the last cue")
+        self.end = end
+        self.length = max([end or 0] + [offset + (duration or 0) for offset, _, duration in self.cues])
+        if self.start_date is None and self.length >= DAY:
+            raise ValueError("A daily list must be shorter than a day")
+
+    @property
+    def daily(self):
+        return self.start_date is None
+
+    def next_run(self, now):
+        """Wall time of the run in progress at now, or of the next run (None if there is none)"""
+        if not self.daily:
+            start = datetime.datetime.combine(self.start_date, self.start_time).timestamp()
+            return start if now < start + self.length else None
+        today = datetime.date.fromtimestamp(now)
+        for days in range(-1, 9):
+            date = today + datetime.timedelta(days=days)
+            if self.days and date.weekday() not in self.days:
+                continue
+            start = datetime.datetime.combine(date, self.start_time).timestamp()
+            if now < start + self.length:
+                return start
+        return None
+
+    def expand(self, start):
+        """All events of the run starting at wall time start: [(wall time, action, path)]"""
+        events = [(start, HOLD, None)]
+        for index, (offset, path, duration) in enumerate(self.cues):
+            on_at = start + offset
+            following = self.cues[index + 1] if index + 1 < len(self.cues) else None
+            if duration is not None:
+                off_at = on_at + duration
+            elif following is not None:
+                # Until the next cue; the same scene again just stays on
+                off_at = None if following[1] == path else start + following[0]
+            else:
+                off_at = start + self.end if self.end is not None else None
+            events.append((on_at, ON, path))
+            if off_at is not None:
+                events.append((off_at, OFF, path))
+        events.append((start + self.length, RELEASE, None))
+        events.sort(key=lambda event: (event[0], event[1]))
+        return events
+
+
+class _Event:
+    """One queued action of a list run"""
+
+    __slots__ = ('wall', 'action', 'path', 'name', 'cue_list', 'run_start')
+
+    def __init__(self, wall, action, path, name, cue_list=None, run_start=None):
+        self.wall = wall
+        self.action = action
+        self.path = path
+        self.name = name
+        self.cue_list = cue_list  # None: clean-up of a list that is gone
+        self.run_start = run_start
+
+
+class CueEngine:
+    def __init__(self, directory, osc_client, osc_manager, scheduler, button_controller=None, button_station=None,
+                 wall_clock=time.time):
+        """
+        Initialize the engine (load() reads the lists and queues their runs)
+
+        Args:
+            directory: Directory with the <name>.json cue lists
+            osc_client: Sender for the scene on/off messages
+            osc_manager: OSCManager with the scene paths
+            scheduler: TimerScheduler that fires the queued events (its clock is the monotonic clock)
+            button_controller: ButtonController held and preempted by running lists (optional)
+            button_station: ButtonStation held by running lists (optional)
+            wall_clock: Wall clock the list start times refer to
+        """
+        self.directory = directory
+        self.osc_client = osc_client
+        self.osc_manager = osc_manager
+        self.scheduler = scheduler
+        self.button_controller = button_controller
+        self.button_station = button_station
+        self.wall_clock = wall_clock
+        self.lists = {}
+        self.errors = {}  # file name -> why it was not loaded
+        self._heap = []
+        self._seq = itertools.count()
+        self._offset = None  # wall - monotonic at the last rebuild
+        self._running = {}  # list name -> run start (wall) of the run in progress
+        self._on_stage = {}  # list name -> scene path it switched on
+        self._held = set()  # names of running 'block' lists
+        self._lock = threading.RLock()
+        self._timer = scheduler.timer(self._on_timer)
+        self._listeners = []
+
+        # Stats
+        self.fired = 0
+        self.rebuilds = 0
+        self.clock_jumps = 0
+        self.max_lateness = 0.0
+
+        for source in (button_controller, button_station):
+            if source is not None:
+                source.add_listener(self._on_button_event)
+
+    def add_listener(self, callback):
+        """Register callback(event, data) for cue events ('cue')"""
+        self._listeners.append(callback)
+
+    def _emit(self, event, **data):
+        for callback in self._listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                logger.exception("Cue listener failed: %s", e)
+
+    def load(self):
+        """Read every list in the directory and queue their runs"""
+        lists, errors = {}, {}
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            names = []
+        for file_name in names:
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name)) as f:
+                    data = json.load(f)
+                cue_list = CueList(file_name[:-5], data, self.osc_manager)
+            except (OSError, ValueError) as e:
+                errors[file_name] = str(e)
+                logger.warning("Cue list %s not loaded: %s", file_name, e)
+                continue
+            lists[cue_list.name] = cue_list
+        with self._lock:
+            self.lists = lists
+            self.errors = errors
+        logger.info("Loaded %d cue lists (%d cues)", len(lists), sum(len(l.cues) for l in lists.values()))
+        self.rebuild()
+        return self
+
+    def save_list(self, name, data):
+        """
+        Create or replace a list: validate, write the file atomically, re-queue
+
+        Raises:
+            ValueError if the list is invalid
+        """
+        cue_list = CueList(name, data, self.osc_manager)
+        path = os.path.join(self.directory, f"{name}.json")
+        tmp = f"{path}.tmp"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        with self._lock:
+            self.lists[name] = cue_list
+            self.errors.pop(f"{name}.json", None)
+        logger.info("Cue list %s saved (%d cues)", name, len(cue_list.cues))
+        self.rebuild()
+        return cue_list
+
+    def delete_list(self, name):
+        """Delete a list (a run in progress ends now); returns False if there is no such list"""
+        with self._lock:
+            if self.lists.pop(name, None) is None:
+                return False
+        try:
+            os.remove(os.path.join(self.directory, f"{name}.json"))
+        except FileNotFoundError:
+            pass
+        logger.info("Cue list %s deleted", name)
+        self.rebuild()
+        return True
+
+    def rebuild(self):
+        """Recompute the heap from the lists: runs in progress are joined, finished scenes switched off"""
+        with self._lock:
+            now = self.scheduler.clock()
+            self._offset = self.wall_clock() - now
+            wall = now + self._offset
+            self._heap = []
+            running = {}
+            for cue_list in self.lists.values():
+                if not cue_list.enabled:
+                    continue
+                start = cue_list.next_run(wall)
+                if start is None:
+                    continue
+                if start <= wall:
+                    running[cue_list.name] = start
+                self._queue_run(cue_list, start, wall)
+            # Lists that were running but are gone, disabled or edited out of their run
+            for name in set(self._running) - set(running):
+                if name in self._on_stage:
+                    self._push(_Event(wall, OFF, self._on_stage[name], name))
+                self._push(_Event(wall, RELEASE, None, name))
+            self.rebuilds += 1
+            self._arm()
+
+    def _queue_run(self, cue_list, start, wall):
+        """Push the events of one run; past events of a run in progress collapse into its current state (lock held)"""
+        name = cue_list.name
+        stage = None
+        for at, action, path in cue_list.expand(start):
+            if at >= wall:
+                self._push(_Event(at, action, path, name, cue_list, start))
+            elif action == ON:
+                stage = path
+            elif action == OFF and path == stage:
+                stage = None
+        if start <= wall:
+            self._push(_Event(wall, HOLD, None, name, cue_list, start))
+            if stage is not None:
+                self._push(_Event(wall, ON, stage, name, cue_list, start))
+            elif name in self._on_stage:
+                self._push(_Event(wall, OFF, self._on_stage[name], name, cue_list, start))
+
+    def _push(self, event):
+        # Monotonic deadline; ties keep the action order, then the push order
+        heapq.heappush(self._heap, (event.wall - self._offset, event.action, next(self._seq), event))
+
+    def _arm(self):
+        """Arm the timer for the head event, or for the next clock check (lock held)"""
+        if not self._heap:
+            self._timer.cancel()
+            return
+        delay = min(self._heap[0][0] - self.scheduler.clock(), CLOCK_CHECK)
+        self._timer.reschedule(delay)
+
+    def _on_timer(self):
+        """Scheduled: fire the due events in order"""
+        now = self.scheduler.clock()
+        if abs(self.wall_clock() - now - self._offset) > CLOCK_TOLERANCE:
+            self.clock_jumps += 1
+            logger.warning("Wall clock jumped by %.1f s - re-queueing cue lists", self.wall_clock() - now - self._offset)
+            self.rebuild()
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > self.scheduler.clock():
+                    self._arm()
+                    return
+                deadline, _, _, event = heapq.heappop(self._heap)
+                self.max_lateness = max(self.max_lateness, self.scheduler.clock() - deadline)
+            self._apply(event)
+
+    def _apply(self, event):
+        """Carry out one event (button locks first, then ours: presses lock in the same order)"""
+        name, cue_list = event.name, event.cue_list
+        manual = cue_list.manual if cue_list is not None else None
+        button_lock = self.button_controller.lock if self.button_controller is not None else nullcontext()
+        station_lock = self.button_station.locked() if self.button_station is not None else nullcontext()
+        with button_lock, station_lock:
+            if event.action == ON and manual in ('block', 'override') and self.button_controller is not None:
+                self.button_controller.end_effect()
+            with self._lock:
+                if event.action == HOLD:
+                    self._running[name] = event.run_start
+                    self._set_held(name, manual == 'block')
+                elif event.action == ON:
+                    if self._on_stage.get(name) == event.path:
+                        return  # Already on (joined run, repeated scene)
+                    if name in self._on_stage:
+                        self.osc_client.send_message(self._on_stage.pop(name), 1)
+                    self.osc_client.send_message(event.path, 1)
+                    self._on_stage[name] = event.path
+                elif event.action == OFF:
+                    if self._on_stage.get(name) != event.path:
+                        return  # Replaced by a later cue or switched off by a press
+                    self.osc_client.send_message(self._on_stage.pop(name), 1)
+                else:
+                    self._running.pop(name, None)
+                    self._set_held(name, False)
+                    if cue_list is not None and self.lists.get(name) is cue_list and cue_list.enabled:
+                        # Queue the next run of a daily list
+                        start = cue_list.next_run(event.wall)
+                        if start is not None:
+                            for at, action, path in cue_list.expand(start):
+                                self._push(_Event(at, action, path, name, cue_list, start))
+                self.fired += 1
+        metrics.CUES_FIRED.inc()
+        log_event('cue', cue_list=name, action=ACTION_NAMES[event.action], scene=event.path)
+        self._emit('cue', cue_list=name, action=ACTION_NAMES[event.action], scene=event.path)
+
+    def _set_held(self, name, held):
+        """Hold the buttons while any 'block' list runs (lock held)"""
+        was_held = bool(self._held)
+        if held:
+            self._held.add(name)
+        else:
+            self._held.discard(name)
+        if bool(self._held) != was_held:
+            for target in (self.button_controller, self.button_station):
+                if target is not None:
+                    target.set_hold(bool(self._held))
+
+    def _on_button_event(self, event, data):
+        """A manual press: running 'override' lists give up the stage"""
+        if event != 'press':
+            return
+        with self._lock:
+            for name in list(self._running):
+                cue_list = self.lists.get(name)
+                if cue_list is not None and cue_list.manual == 'override' and name in self._on_stage:
+                    path = self._on_stage.pop(name)
+                    self.osc_client.send_message(path, 1)
+                    logger.info("Manual press overrides cue list %s (%s off)", name, path)
+
+    def running_lists(self):
+        """Names of the lists with a run in progress"""
+        with self._lock:
+            return sorted(self._running)
+
+    def get_list(self, name):
+        """Raw list data and its status (None if unknown)"""
+        with self._lock:
+            cue_list = self.lists.get(name)
+            if cue_list is None:
+                return None
+            return {'name': name, 'list': cue_list.data, 'status': self._list_status(cue_list)}
+
+    def _list_status(self, cue_list):
+        wall = self.wall_clock()
+        next_run = cue_list.next_run(wall) if cue_list.enabled else None
+        return {
+            'enabled': cue_list.enabled,
+            'manual': cue_list.manual,
+            'cues': len(cue_list.cues),
+            'length': cue_list.length,
+            'daily': cue_list.daily,
+            'running': cue_list.name in self._running,
+            'on_stage': self._on_stage.get(cue_list.name),
+            'next_run': next_run if next_run is not None and next_run > wall else None,
+        }
+
+    def get_status(self):
+        """Lists, load errors, the next queued event and firing statistics"""
+        with self._lock:
+            head = self._heap[0] if self._heap else None
+            return {
+                'lists': {name: self._list_status(cue_list) for name, cue_list in sorted(self.lists.items())},
+                'errors': dict(self.errors),
+                'queued': len(self._heap),
+                'next_event': {
+                    'at': head[3].wall,
+                    'in': max(0.0, head[0] - self.scheduler.clock()),
+                    'cue_list': head[3].name,
+                    'action': ACTION_NAMES[head[3].action],
+                    'scene': head[3].path,
+                } if head is not None else None,
+                'held': bool(self._held),
+                'fired': self.fired,
+                'rebuilds': self.rebuilds,
+                'clock_jumps': self.clock_jumps,
+                'max_lateness_ms': self.max_lateness * 1000,
+            }
+
+    def close(self):
+        """Stop firing (scenes on stage stay on)"""
+        with self._lock:
+            self._timer.cancel()
+            self._heap = []
@@ -0,0 +1,340 @@
+"""
+Event Journal
+Append-only record of presses, rejected presses, effects and blocks in a
+fixed-size memory-mapped ring file (config/events.journal). Each event is
+one 32-byte binary record packed in place, so a write costs microseconds
+and the file never grows: once full, the oldest records are overwritten.
+The mapping survives restarts. Timestamps never go backwards (an
+early-boot clock behind the newest record is clamped), so time ranges
+are found by binary search, and per-hour aggregates are counted in C over
+a strided view of the packed records instead of one Python object each.
+The web process attaches the same file read-only and follows the writer
+through the next-sequence field in the header.
+"""
+
+import collections
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from ..logging_setup import get_logger
+
+logger = get_logger("journal")
+
+DEFAULT_JOURNAL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config", "events.journal")
+DEFAULT_JOURNAL_SIZE = 4 * 1024 * 1024  # bytes (about 131k events)
+
+MAGIC = b'TZJ1'
+JOURNAL_VERSION = 1
+HEADER_SIZE = 64
+# magic, version, record size, capacity, next sequence, created (wall clock)
+HEADER = struct.Struct('<4sHHIQd')
+NEXT_SEQUENCE = struct.Struct('<Q')
+NEXT_SEQUENCE_OFFSET = 12
+# sequence, wall time, kind, reason, button (-1 = main), scene id (0 = none), value, padding
+RECORD = struct.Struct('<QdBBbBf8x')
+# The fields a query needs, without the sequence number
+RECORD_FIELDS = struct.Struct('<8xdBBbBf8x')
+TIME = struct.Struct('<d')
+TIME_OFFSET = 8
+WORDS_PER_RECORD = RECORD.size // 4
+EVENT_WORD = 4  # kind, reason, button and scene packed in the fifth 32-bit word
+
+KINDS = ('press', 'press_rejected', 'effect_on', 'effect_off', 'block_start', 'block_end', 'enabled', 'disabled')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS, 1)}
+REASONS = ('', 'blocked', 'disabled', 'cue')
+REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+MAIN_BUTTON = -1
+
+
+class EventJournal:
+    def __init__(self, path=DEFAULT_JOURNAL_FILE, size=DEFAULT_JOURNAL_SIZE, clock=time.time):
+        """
+        Initialize the journal (call open() before appending)
+
+        Args:
+            path: Ring file
+            size: File size in bytes; the record capacity follows from it
+            clock: Wall clock for record timestamps
+        """
+        self.path = path
+        self.size = size
+        self.clock = clock
+        self.capacity = (size - HEADER_SIZE) // RECORD.size
+        if self.capacity < 1:
+            raise ValueError(f"Journal size {size} is too small")
+        self.created = None
+        self._next = 1  # Sequence number of the next record
+        self._last_time = 0.0
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm = None
+        self._readonly = False
+
+    def open(self):
+        """Map the ring file, creating (or replacing an incompatible) one"""
+        header = None
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(HEADER.size)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not read journal %s: %s", self.path, e)
+
+        fresh = True
+        if header is not None and len(header) == HEADER.size:
+            magic, version, record_size, capacity, next_sequence, created = HEADER.unpack(header)
+            if (magic, version, record_size, capacity) == (MAGIC, JOURNAL_VERSION, RECORD.size, self.capacity) \
+                    and os.path.getsize(self.path) == self.size:
+                fresh = False
+                self._next = max(1, next_sequence)
+                self.created = created
+            else:
+                logger.warning("Journal %s has a different format or size - starting a new one", self.path)
+                os.replace(self.path, f"{self.path}.old")
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if fresh:
+            self.created = self.clock()
+            self._next = 1
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, JOURNAL_VERSION, RECORD.size, self.capacity, self._next, self.created))
+                f.truncate(self.size)
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), self.size)
+        if len(self):
+            self._last_time = self._time_at(len(self) - 1)
+        logger.info("Event journal %s: %d of %d records", self.path, len(self), self.capacity)
+        return self
+
+    def attach(self):
+        """Map an existing ring file read-only (a reader in another process; the writer keeps appending)"""
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, capacity, next_sequence, created = HEADER.unpack_from(self._mm)
+        if (magic, version, record_size) != (MAGIC, JOURNAL_VERSION, RECORD.size):
+            self.close()
+            raise ValueError(f"{self.path} is not a journal")
+        self.size = len(self._mm)
+        self.capacity = capacity
+        self.created = created
+        self._next = max(1, next_sequence)
+        self._readonly = True
+        return self
+
+    def _refresh(self):
+        """Pick up records the writer appended since (read-only mapping); caller holds the lock"""
+        if self._readonly:
+            self._next = max(1, NEXT_SEQUENCE.unpack_from(self._mm, NEXT_SEQUENCE_OFFSET)[0])
+
+    def __len__(self):
+        return min(self._next - 1, self.capacity)
+
+    def append(self, kind, scene=0, value=0.0, reason='', button=MAIN_BUTTON):
+        """
+        Write one event record (callable from any thread)
+
+        Args:
+            kind: One of KINDS
+            scene: Scene preset id (0 = none)
+            value: Press latency (ms), effect duration or block delay (s)
+            reason: Rejection reason (one of REASONS)
+            button: Station button index (-1 = main button)
+        """
+        code = KIND_CODES[kind]
+        reason_code = REASON_CODES.get(reason, 0)
+        with self._lock:
+            mm = self._mm
+            if mm is None or self._readonly:
+                return
+            sequence = self._next
+            t = self._last_time = max(self.clock(), self._last_time)
+            RECORD.pack_into(mm, HEADER_SIZE + (sequence - 1) % self.capacity * RECORD.size,
+                             sequence, t, code, reason_code, button, scene, value)
+            # The header moves last: a record only counts once it is complete
+            self._next = sequence + 1
+            NEXT_SEQUENCE.pack_into(mm, NEXT_SEQUENCE_OFFSET, self._next)
+
+    def _offset(self, index):
+        """File offset of the record at logical index (0 = oldest)"""
+        oldest = max(1, self._next - self.capacity)
+        return HEADER_SIZE + (oldest - 1 + index) % self.capacity * RECORD.size
+
+    def _time_at(self, index):
+        return TIME.unpack_from(self._mm, self._offset(index) + TIME_OFFSET)[0]
+
+    def _index(self, t, lo=0, hi=None):
+        """First logical index in [lo, hi) whose time is >= t (binary search)"""
+        hi = len(self) if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_at(mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _range(self, start, end):
+        """Logical index range [lo, hi) of records with start <= t < end; caller holds the lock"""
+        lo = 0 if start is None else self._index(start)
+        hi = len(self) if end is None else self._index(end, lo)
+        return lo, hi
+
+    def _copy(self, lo, hi):
+        """Records [lo, hi) in logical order as one bytes object; caller holds the lock"""
+        if lo >= hi:
+            return b''
+        first, last = self._offset(lo), self._offset(hi - 1) + RECORD.size
+        if first < last:
+            return self._mm[first:last]
+        return self._mm[first:HEADER_SIZE + self.capacity * RECORD.size] + self._mm[HEADER_SIZE:last]
+
+    def query(self, start=None, end=None, kinds=None, button=None, limit=1000):
+        """
+        Events in a time range, oldest first
+
+        Args:
+            start: Wall-clock start (inclusive), None = oldest
+            end: Wall-clock end (exclusive), None = now
+            kinds: Event kinds to include (None = all)
+            button: Only this button (-1 = main button, None = all)
+            limit: Return at most the newest limit matches
+
+        Returns:
+            [{'t', 'kind', 'reason', 'button', 'scene', 'value'}]
+        """
+        codes = None if kinds is None else {KIND_CODES[kind] for kind in kinds}
+        with self._lock:
+            if self._mm is None:
+                return []
+            self._refresh()
+            data = self._copy(*self._range(start, end))
+        events = []
+        # Newest first, stopping at the limit
+        for offset in range(len(data) - RECORD.size, -1, -RECORD.size):
+            t, code, reason, button_index, scene, value = RECORD_FIELDS.unpack_from(data, offset)
+            if not 0 < code <= len(KINDS):
+                continue  # Never written, or lost with a power cut before the flush
+            if (codes is not None and code not in codes) or (button is not None and button_index != button):
+                continue
+            events.append({'t': t, 'kind': KINDS[code - 1], 'reason': REASONS[reason] if reason < len(REASONS) else '',
+                           'button': button_index, 'scene': scene, 'value': round(value, 3)})
+            if len(events) >= limit:
+                break
+        events.reverse()
+        return events
+
+    def hourly(self, start=None, end=None, kinds=None, button=None):
+        """
+        Per-hour counts (UTC hours)
+
+        Returns:
+            [{'hour': start of the hour, 'counts': {kind: n}, 'rejected': {reason: n}, 'scenes': {scene id: presses}}]
+        """
+        codes = None if kinds is None else {KIND_CODES[kind] for kind in kinds}
+        with self._lock:
+            if self._mm is None:
+                return []
+            self._refresh()
+            lo, hi = self._range(start, end)
+            # Hour boundaries by binary search, then one copy of the whole range
+            bounds = []
+            index = lo
+            while index < hi:
+                hour = int(self._time_at(index) // 3600) * 3600
+                following = self._index(hour + 3600, index, hi)
+                bounds.append((hour, index - lo, following - lo))
+                index = following
+            data = self._copy(lo, hi)
+        words = memoryview(data).cast('I')
+
+        hours = []
+        for hour, first, last in bounds:
+            entry = {'hour': hour, 'counts': {}, 'rejected': {}, 'scenes': {}}
+            # One C-level pass: how often each (kind, reason, button, scene) word occurs
+            combos = collections.Counter(words[first * WORDS_PER_RECORD + EVENT_WORD:last * WORDS_PER_RECORD:WORDS_PER_RECORD])
+            for word, n in combos.items():
+                code, reason, button_index, scene = word.to_bytes(4, sys.byteorder)
+                if not 0 < code <= len(KINDS) or (codes is not None and code not in codes):
+                    continue
+                if button is not None and (button_index - 256 if button_index > 127 else button_index) != button:
+                    continue
+                kind = KINDS[code - 1]
+                entry['counts'][kind] = entry['counts'].get(kind, 0) + n
+                if kind == 'press':
+                    entry['scenes'][scene] = entry['scenes'].get(scene, 0) + n
+                elif kind == 'press_rejected':
+                    reason = REASONS[reason] if reason < len(REASONS) else 'unknown'
+                    entry['rejected'][reason] = entry['rejected'].get(reason, 0) + n
+            if entry['counts']:
+                hours.append(entry)
+        words.release()
+        return hours
+
+    def get_stats(self):
+        """Size and fill level"""
+        oldest = None
+        with self._lock:
+            if self._mm is not None:
+                self._refresh()
+            if len(self) and self._mm is not None:
+                oldest = self._time_at(0)
+        return {
+            'path': self.path,
+            'size_bytes': self.size,
+            'capacity': self.capacity,
+            'records': len(self),
+            'written': self._next - 1,
+            'oldest': oldest,
+            'created': self.created,
+        }
+
+    def flush(self):
+        """Write dirty pages to disk (the page cache already survives a process restart)"""
+        with self._lock:
+            if self._mm is not None and not self._readonly:
+                self._mm.flush()
+
+    def close(self):
+        """Flush and unmap"""
+        with self._lock:
+            if self._mm is None:
+                return
+            if not self._readonly:
+                self._mm.flush()
+            self._mm.close()
+            self._mm = None
+            self._file.close()
+            self._file = None
+
+
+def attach_journal(journal, button_controller, osc_manager, button_station=None):
+    """Record controller (and station) events in the journal"""
+    scene_ids = {name: path_id for path_id, name in osc_manager.button_paths.items()}
+
+    def recorder(default_button, latency):
+        def on_event(event, data):
+            if event == 'enabled':
+                journal.append('enabled' if data['enabled'] else 'disabled', button=default_button)
+                return
+            if event not in KIND_CODES:
+                return
+            if event == 'press':
+                value = latency() or 0.0
+            else:
+                value = data.get('duration', data.get('delay', 0.0))
+            journal.append(event, scene=scene_ids.get(data.get('scene'), 0), value=value,
+                           reason=data.get('reason', ''), button=data.get('button', default_button))
+        return on_event
+
+    def main_latency():
+        latency = button_controller.last_dispatch_latency
+        return latency * 1000 if latency is not None else None
+
+    button_controller.add_listener(recorder(MAIN_BUTTON, main_latency))
+    if button_station is not None:
+        button_station.add_listener(recorder(MAIN_BUTTON, lambda: None))
@@ -0,0 +1,178 @@
+"""
+Metrics
+Minimal in-process counters, gauges and histograms rendered in the
+Prometheus text exposition format (served at /metrics)
+"""
+
+import bisect
+import os
+import resource
+import threading
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.type = 'counter'
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Increase the counter (labels must match labelnames)"""
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Current value for a label set"""
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def samples(self):
+        if not self._values and not self.labelnames:
+            yield self.name, {}, 0
+        for key, value in list(self._values.items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Gauge:
+    def __init__(self, name, help_text, function=None):
+        self.name = name
+        self.help = help_text
+        self.type = 'gauge'
+        self._value = 0
+        self._function = function
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, function):
+        """Compute the value on every scrape instead of storing it"""
+        self._function = function
+
+    def value(self):
+        if self._function is not None:
+            try:
+                return self._function()
+            except Exception:
+                return float('nan')
+        return self._value
+
+    def samples(self):
+        yield self.name, {}, self.value()
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.type = 'histogram'
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self):
+        return self._count
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self._counts):
+            cumulative += count
+            yield f"{self.name}_bucket", {'le': '+Inf' if bound == float('inf') else repr(bound)}, cumulative
+        yield f"{self.name}_sum", {}, self._sum
+        yield f"{self.name}_count", {}, self._count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render all metrics in Prometheus text format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _process_rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak RSS (kilobytes on Linux) when /proc is unavailable
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+DRIFT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.5)
+JITTER_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05)
+
+REGISTRY = MetricsRegistry()
+
+PRESSES = REGISTRY.register(Counter(
+    'tanzen_button_presses_total', 'Button presses that triggered a scene'))
+PRESSES_REJECTED = REGISTRY.register(Counter(
+    'tanzen_button_presses_rejected_total', 'Button presses rejected while blocked or disabled', ('reason',)))
+OSC_SENT = REGISTRY.register(Counter(
+    'tanzen_osc_messages_sent_total', 'OSC messages sent'))
+OSC_SEND_ERRORS = REGISTRY.register(Counter(
+    'tanzen_osc_send_errors_total', 'OSC messages that failed to send'))
+OSC_DROPPED = REGISTRY.register(Counter(
+    'tanzen_osc_messages_dropped_total', 'OSC messages dropped because the send queue was full'))
+OSC_RECEIVED = REGISTRY.register(Counter(
+    'tanzen_osc_messages_received_total', 'OSC control input messages', ('kind',)))
+PRESS_TO_SEND = REGISTRY.register(Histogram(
+    'tanzen_press_to_send_seconds', 'Time from button edge to OSC datagram sent', LATENCY_BUCKETS))
+EFFECT_OFF_DRIFT = REGISTRY.register(Histogram(
+    'tanzen_effect_off_drift_seconds', 'Lateness of the effect-off message against its deadline', DRIFT_BUCKETS))
+TIMER_LATENESS = REGISTRY.register(Histogram(
+    'tanzen_timer_lateness_seconds', 'Lateness of scheduled callbacks against their deadline', JITTER_BUCKETS))
+QLC_ROUND_TRIP = REGISTRY.register(Histogram(
+    'tanzen_qlc_round_trip_seconds', 'Time from a scene press sent to its QLC+ feedback echo', LATENCY_BUCKETS))
+QLC_RESENDS = REGISTRY.register(Counter(
+    'tanzen_qlc_resends_total', 'Scene presses re-sent because QLC+ did not echo them in time'))
+QLC_UNANSWERED = REGISTRY.register(Counter(
+    'tanzen_qlc_unanswered_total', 'Scene presses given up after all re-sends without a QLC+ echo'))
+CUES_FIRED = REGISTRY.register(Counter(
+    'tanzen_cue_events_total', 'Cue list events fired (holds, scene on/off, releases)'))
+WEB_RESTARTS = REGISTRY.register(Counter(
+    'tanzen_web_process_restarts_total', 'Web process restarts after it exited (split process mode)'))
+INPUT_REJECTED = REGISTRY.register(Counter(
+    'tanzen_input_edges_rejected_total', 'Raw input edges rejected by the debounce filter', ('kind',)))
+DMX_FRAMES = REGISTRY.register(Counter(
+    'tanzen_dmx_frames_total', 'Art-Net/sACN frames sent by the native DMX output', ('kind',)))
+LED_WRITES = REGISTRY.register(Counter(
+    'tanzen_led_gpio_writes_total', 'GPIO writes issued by the LED pattern engine'))
+LED_PATTERN_CHANGES = REGISTRY.register(Counter(
+    'tanzen_led_pattern_changes_total', 'LED pattern switches'))
+THREADS = REGISTRY.register(Gauge(
+    'tanzen_threads', 'Live Python threads', threading.active_count))
+SCHEDULER_BACKLOG = REGISTRY.register(Gauge(
+    'tanzen_scheduler_backlog', 'Timers waiting in the scheduler'))
+PROCESS_RSS = REGISTRY.register(Gauge(
+    'tanzen_process_resident_memory_bytes', 'Resident memory of the process', _process_rss_bytes))
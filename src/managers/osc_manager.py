@@ -3,6 +3,11 @@ OSC Manager System
 Handles OSC message routing, path management, and delay presets
 """
 
+from .tempo import BeatClock
+from ..logging_setup import get_logger
+
+logger = get_logger("osc")
+
 class OSCManager:
     def __init__(self):
         # QLC Scene presets
@@ -30,6 +35,30 @@ class OSCManager:
         self.current_delay = 30  # Block delay (how long button is blocked)
         self.current_osc_off_delay = 30  # OSC off delay (when to send release message)
         
+        # Config change listeners: callback(field)
+        self._listeners = []
+        
+        # Per-button settings for a multi-button station: index -> {path_id, delay, osc_off_delay}
+        self.button_configs = {}
+        
+        # Parsed QLC+ workspace (src.qlc.workspace.Workspace), optional
+        self.workspace = None
+        
+        # Tempo for beat-quantized triggers (quantize off until set)
+        self.tempo = BeatClock()
+    
+    def add_listener(self, callback):
+        """Register callback(field) to be called after a config change"""
+        self._listeners.append(callback)
+    
+    def notify_change(self, field):
+        """Notify listeners that a config field changed"""
+        for callback in self._listeners:
+            try:
+                callback(field)
+            except Exception as e:
+                logger.exception("Config listener failed: %s", e)
+        
     def get_button_path(self):
         """Get current QLC scene"""
         return self.button_paths[self.current_path]
@@ -38,10 +67,11 @@ class OSCManager:
         """Set QLC scene by ID (1-5)"""
         if path_id in self.button_paths:
             self.current_path = path_id
-            print(f"QLC scene set to: {self.get_button_path()}")
+            logger.info("QLC scene set to: %s", self.get_button_path())
+            self.notify_change('path')
             return True
         else:
-            print(f"Invalid scene ID: {path_id}. Must be 1-5")
+            logger.warning("Invalid scene ID: %s. Must be 1-5", path_id)
             return False
     
     def set_delay_preset(self, preset_id):
@@ -49,14 +79,117 @@ class OSCManager:
         if preset_id in self.delay_presets:
             self.current_delay = self.delay_presets[preset_id]
             if self.current_delay == 0:
-                print("Sleep delay set to: NO DELAY (immediate)")
+                logger.info("Sleep delay set to: NO DELAY (immediate)")
             else:
-                print(f"Sleep delay set to: {self.current_delay} seconds")
+                logger.info("Sleep delay set to: %s seconds", self.current_delay)
+            self.notify_change('delay')
             return True
         else:
-            print(f"Invalid delay preset: {preset_id}. Must be 0-6")
+            logger.warning("Invalid delay preset: %s. Must be 0-6", preset_id)
             return False
     
+    def set_timing(self, block_delay, osc_off_delay):
+        """Set block delay and effect duration in seconds"""
+        self.current_delay = block_delay
+        self.current_osc_off_delay = osc_off_delay
+        self.notify_change('timing')
+    
+    def set_tempo(self, bpm=None, quantize=None):
+        """
+        Set the BPM and/or the quantize grid in beats (0 = off)
+
+        Raises:
+            ValueError for an out-of-range BPM or grid
+        """
+        if bpm is not None:
+            self.tempo.set_bpm(bpm)
+        if quantize is not None:
+            self.tempo.set_quantize(quantize)
+        logger.info("Tempo: %s BPM, quantize %s beats", self.tempo.bpm, self.tempo.quantize)
+        self.notify_change('tempo')
+    
+    def tap_tempo(self, t=None):
+        """Tap tempo input; returns the BPM once two taps are in"""
+        bpm = self.tempo.tap(t)
+        if bpm is not None:
+            self.notify_change('tempo')
+        return bpm
+    
+    def configure_station(self, count):
+        """Create settings for station buttons 0..count-1 (scenes assigned round-robin)"""
+        for index in range(count):
+            self.button_configs.setdefault(index, self.default_button_config(index))
+    
+    def default_button_config(self, index):
+        """Initial settings of station button index: round-robin scene, the main button's delays"""
+        path_ids = sorted(self.button_paths)
+        return {
+            'path_id': path_ids[index % len(path_ids)],
+            'delay': self.current_delay,
+            'osc_off_delay': self.current_osc_off_delay,
+        }
+    
+    def get_button_config(self, index):
+        """Settings of one station button"""
+        return self.button_configs[index]
+    
+    def set_button_config(self, index, path_id=None, delay=None, osc_off_delay=None):
+        """Update settings of one station button (None leaves a field unchanged)"""
+        if index not in self.button_configs:
+            logger.warning("Invalid station button: %s", index)
+            return False
+        if path_id is not None and path_id not in self.button_paths:
+            logger.warning("Invalid scene ID: %s", path_id)
+            return False
+        if (delay is not None and delay < 0) or (osc_off_delay is not None and osc_off_delay < 0):
+            logger.warning("Delays cannot be negative")
+            return False
+        # Replace the dict so a press reading it never sees a half-applied update
+        config = dict(self.button_configs[index])
+        for field, value in (('path_id', path_id), ('delay', delay), ('osc_off_delay', osc_off_delay)):
+            if value is not None:
+                config[field] = value
+        self.button_configs[index] = config
+        logger.info("Station button %s: %s, block %ss, effect %ss", index,
+                    self.button_paths[config['path_id']], config['delay'], config['osc_off_delay'])
+        self.notify_change('button')
+        return True
+    
+    def set_workspace(self, workspace):
+        """Attach a parsed QLC+ workspace to resolve scenes to functions"""
+        self.workspace = workspace
+        self.notify_change('workspace')
+    
+    def get_function_for_path(self, path_id):
+        """QLC+ function triggered by a scene preset (or None)"""
+        if self.workspace is None or path_id not in self.button_paths:
+            return None
+        return self.workspace.function_for_osc_path(self.button_paths[path_id])
+    
+    def find_path_for_function(self, function_id):
+        """Scene preset ID whose OSC path triggers the function (or None)"""
+        for path_id in self.button_paths:
+            function = self.get_function_for_path(path_id)
+            if function is not None and function.id == function_id:
+                return path_id
+        return None
+    
+    def select_function(self, function_id):
+        """Select the scene preset that triggers a QLC+ function"""
+        path_id = self.find_path_for_function(function_id)
+        if path_id is None:
+            logger.warning("Function %s has no OSC-mapped button", function_id)
+            return False
+        return self.set_button_path(path_id)
+    
+    def get_scene_labels(self):
+        """Scene preset labels including the QLC+ function name, e.g. 'Scene A · Seq1'"""
+        labels = {}
+        for path_id, path in self.button_paths.items():
+            function = self.get_function_for_path(path_id)
+            labels[path_id] = f"{path} · {function.name}" if function is not None else path
+        return labels
+    
     def get_status(self):
         """Get current status"""
         return {
@@ -0,0 +1,282 @@
+"""
+OSC Receiver
+Control input from QLC+/TouchOSC: one selector thread reads UDP datagrams,
+looks each address up in a prebuilt table and applies the result once
+per batch, so floods of fader messages collapse to a single change
+"""
+
+import selectors
+import socket
+import struct
+import threading
+
+from . import metrics
+from ..logging_setup import get_logger
+
+logger = get_logger("osc.receiver")
+
+CONTROL_PREFIX = "/2/dmx/"
+ENABLE_CONTROL = 0
+DELAY_CONTROLS = range(1, 7)   # /2/dmx/1..6 -> delay preset 1..6
+PATH_CONTROL_OFFSET = 6        # /2/dmx/7..11 -> scene 1..5
+TAP_CONTROL = 12               # /2/dmx/12 -> tap tempo (the workspace's "tap tempo" button)
+BUNDLE_TAG = b'#bundle\0'
+MAX_BATCH = 256                # datagrams read before the batch is applied
+RECEIVE_BUFFER = 1 << 20       # kernel buffer for bursts while a batch is applied
+
+# Control groups: only the last message per group in a batch is applied
+ENABLE = 'enable'
+DELAY = 'delay'
+PATH = 'path'
+TAP = 'tap'
+
+_INT = struct.Struct('>i')
+_FLOAT = struct.Struct('>f')
+_DOUBLE = struct.Struct('>d')
+_INT64 = struct.Struct('>q')
+
+
+def control_table(osc_manager):
+    """Address bytes -> (group, argument) for every control address"""
+    table = {f"{CONTROL_PREFIX}{ENABLE_CONTROL}".encode(): (ENABLE, None)}
+    for preset_id in DELAY_CONTROLS:
+        if preset_id in osc_manager.delay_presets:
+            table[f"{CONTROL_PREFIX}{preset_id}".encode()] = (DELAY, preset_id)
+    for path_id in sorted(osc_manager.button_paths):
+        table[f"{CONTROL_PREFIX}{path_id + PATH_CONTROL_OFFSET}".encode()] = (PATH, path_id)
+    table[f"{CONTROL_PREFIX}{TAP_CONTROL}".encode()] = (TAP, None)
+    return table
+
+
+def _padded_end(data, start):
+    """Index after the NUL-terminated, 4-byte padded string at start"""
+    end = data.index(b'\0', start)
+    return end + 4 - (end - start) % 4
+
+
+def first_argument(data, start):
+    """
+    Decode the first argument of an OSC message
+
+    Args:
+        data: Message bytes
+        start: Offset of the type tag string (after the padded address)
+
+    Returns:
+        int/float/str value, or None for a message without arguments
+    """
+    if start >= len(data) or data[start] != 0x2c:  # ','
+        return None  # Old-style message without type tags
+    offset = _padded_end(data, start)
+    tag = data[start + 1:start + 2]
+    if tag == b'i':
+        return _INT.unpack_from(data, offset)[0]
+    if tag == b'f':
+        return _FLOAT.unpack_from(data, offset)[0]
+    if tag == b'T':
+        return 1
+    if tag == b'F':
+        return 0
+    if tag == b'd':
+        return _DOUBLE.unpack_from(data, offset)[0]
+    if tag == b'h':
+        return _INT64.unpack_from(data, offset)[0]
+    if tag == b's':
+        return data[offset:data.index(b'\0', offset)].decode('utf-8', 'replace')
+    return None  # No arguments, nil/impulse or unsupported type
+
+
+def iter_messages(data, start=0, end=None, strict=True):
+    """
+    Yield (address bytes, type tag offset, message bytes) for a packet,
+    flattening bundles (timetags are ignored: controls apply on arrival)
+
+    strict=False also accepts addresses without the leading '/' (QLC+
+    echoes input paths as they were sent, e.g. 'Scene A').
+    """
+    end = len(data) if end is None else end
+    if data.startswith(BUNDLE_TAG, start):
+        offset = start + 16  # tag + timetag
+        while offset + 4 <= end:
+            size = _INT.unpack_from(data, offset)[0]
+            offset += 4
+            if size <= 0 or offset + size > end:
+                raise ValueError("Truncated bundle element")
+            yield from iter_messages(data, offset, offset + size, strict)
+            offset += size
+        return
+    if data[start:start + 1] != b'/' and (strict or data[start:start + 1] in (b'', b'\0')):
+        raise ValueError("Not an OSC message")
+    message = data[start:end] if start or end != len(data) else data
+    terminator = message.index(b'\0')
+    yield message[:terminator], _padded_end(message, 0), message
+
+
+class OSCReceiver:
+    def __init__(self, host, port, osc_manager, button_controller, max_batch=MAX_BATCH):
+        """
+        Initialize the receiver
+
+        Args:
+            host: Interface to listen on
+            port: UDP port (0 picks a free port)
+            osc_manager: OSCManager for delay presets and scenes
+            button_controller: ButtonController to enable/disable
+            max_batch: Datagrams read before the coalesced controls are applied
+        """
+        self.host = host
+        self.port = port
+        self.osc_manager = osc_manager
+        self.button_controller = button_controller
+        self.max_batch = max_batch
+        self._table = control_table(osc_manager)
+        self._socket = None
+        self._selector = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = None
+        self._running = False
+
+        # Stats
+        self.received = 0      # OSC messages (bundle elements counted singly)
+        self.unknown = 0
+        self.malformed = 0
+        self.applied = 0       # control changes applied
+        self.batches = 0
+        self.max_batch_seen = 0
+
+        osc_manager.add_listener(self._on_config_change)
+
+    def _on_config_change(self, field):
+        """Rebuild the address table if the scene list changed"""
+        if field == 'workspace':
+            self._table = control_table(self.osc_manager)
+
+    def start(self):
+        """Bind the socket and start the receiver thread"""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        except OSError:
+            pass
+        self._socket.bind((self.host, self.port))
+        self._socket.setblocking(False)
+        self.port = self._socket.getsockname()[1]
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._socket, selectors.EVENT_READ, 'osc')
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, 'wake')
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="osc-receiver", daemon=True)
+        self._thread.start()
+        logger.info("OSC control input listening on port %s (%d addresses)", self.port, len(self._table))
+        return self
+
+    def _run(self):
+        """Receiver thread: read a batch of datagrams, then apply the coalesced controls"""
+        while self._running:
+            for key, _ in self._selector.select():
+                if key.data == 'wake':
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                pending = {}
+                count = 0
+                received, unknown, malformed = self.received, self.unknown, self.malformed
+                while count < self.max_batch:
+                    try:
+                        data = self._socket.recv(65535)
+                    except OSError:  # BlockingIOError: batch drained
+                        break
+                    count += 1
+                    self.feed(data, pending)
+                self.batches += 1
+                self.max_batch_seen = max(self.max_batch_seen, count)
+                if pending:
+                    self.apply(pending)
+                # Metrics once per batch, not per message
+                unknown = self.unknown - unknown
+                metrics.OSC_RECEIVED.inc(self.received - received - unknown, kind='control')
+                if unknown:
+                    metrics.OSC_RECEIVED.inc(unknown, kind='unknown')
+                if self.malformed != malformed:
+                    metrics.OSC_RECEIVED.inc(self.malformed - malformed, kind='malformed')
+        self._selector.close()
+        self._socket.close()
+
+    def feed(self, data, pending):
+        """Decode one datagram into pending {group: argument}; later messages replace earlier ones"""
+        table = self._table
+        try:
+            for address, tags, message in iter_messages(data):
+                self.received += 1
+                entry = table.get(address)
+                if entry is None:
+                    self.unknown += 1
+                    continue
+                group, argument = entry
+                value = first_argument(message, tags)
+                if group is ENABLE:
+                    if value is None or isinstance(value, str):
+                        # No (numeric) argument: toggle, relative to toggles earlier in this batch
+                        value = not pending.get(ENABLE, self.button_controller.button_enabled)
+                    pending[ENABLE] = bool(value)
+                elif group is TAP:
+                    if value is None or value:
+                        # Stamped on arrival: applying at the end of the batch would shift the beat
+                        pending[TAP] = self.osc_manager.tempo.clock()
+                elif value is None or value:
+                    # Preset/scene buttons act on press; the 0 of the release is ignored
+                    pending[group] = argument
+        except (ValueError, IndexError, struct.error):
+            self.malformed += 1
+
+    def apply(self, pending):
+        """Apply coalesced controls, skipping values that are already set"""
+        changed = 0
+        for group, argument in pending.items():
+            if group is ENABLE:
+                if argument != self.button_controller.button_enabled:
+                    self.button_controller.set_button_enabled(argument)
+                    changed += 1
+            elif group is TAP:
+                self.osc_manager.tap_tempo(argument)
+                changed += 1
+            elif group is DELAY:
+                if self.osc_manager.delay_presets[argument] != self.osc_manager.current_delay:
+                    self.osc_manager.set_delay_preset(argument)
+                    changed += 1
+            elif argument != self.osc_manager.current_path:
+                self.osc_manager.set_button_path(argument)
+                changed += 1
+        self.applied += changed
+        logger.debug("OSC controls applied: %s (%d changed)", pending, changed)
+
+    def get_stats(self):
+        """Get receive statistics"""
+        return {
+            'port': self.port,
+            'received': self.received,
+            'unknown': self.unknown,
+            'malformed': self.malformed,
+            'applied': self.applied,
+            'batches': self.batches,
+            'max_batch': self.max_batch_seen,
+        }
+
+    def close(self):
+        """Stop the receiver thread and close the socket"""
+        self._running = False
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._wake_r.close()
+        self._wake_w.close()
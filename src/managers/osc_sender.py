@@ -0,0 +1,176 @@
+"""
+OSC Sender
+Non-blocking OSC output stage: pre-encoded datagrams for every configured
+scene, sent from one thread over a single persistent UDP socket
+"""
+
+import queue
+import socket
+import struct
+import threading
+import time
+from . import metrics
+from ..logging_setup import get_logger
+
+logger = get_logger("osc.sender")
+
+BUTTON_VALUES = (0, 1)
+
+
+def _osc_string(text):
+    """OSC string: UTF-8, NUL-terminated, padded to a multiple of 4 bytes"""
+    data = text.encode() + b'\0'
+    return data + b'\0' * (-len(data) % 4)
+
+
+def encode_message(address, value):
+    """Encode a single-argument OSC message to datagram bytes"""
+    # int/float/str are encoded inline so python-osc stays off the startup path
+    if isinstance(value, bool):
+        pass
+    elif isinstance(value, int) and -2**31 <= value < 2**31:
+        return _osc_string(address) + _osc_string(',i') + struct.pack('>i', value)
+    elif isinstance(value, float):
+        return _osc_string(address) + _osc_string(',f') + struct.pack('>f', value)
+    elif isinstance(value, str):
+        return _osc_string(address) + _osc_string(',s') + _osc_string(value)
+    from pythonosc.osc_message_builder import OscMessageBuilder
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg(value)
+    return builder.build().dgram
+
+
+class OSCSender:
+    def __init__(self, ip, port, osc_manager=None, queue_size=64):
+        """
+        Initialize the sender (drop-in for SimpleUDPClient.send_message)
+
+        Args:
+            ip: Target IP (QLC+)
+            port: Target UDP port
+            osc_manager: OSCManager whose scenes are pre-encoded
+            queue_size: Maximum queued datagrams before new sends are dropped
+        """
+        self.ip = ip
+        self.port = port
+        self.osc_manager = osc_manager
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._datagrams = {}
+        self._encoded_paths = frozenset()
+        self._listeners = []
+
+        # One socket for the lifetime of the sender
+        self._address = (ip, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        # Stats
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_send_time = None  # seconds spent in socket send
+        self.max_send_time = 0.0
+        self._total_send_time = 0.0
+        self.last_queue_time = None  # seconds from enqueue to send
+
+        if osc_manager is not None:
+            self.rebuild()
+            osc_manager.add_listener(self._on_config_change)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="osc-sender", daemon=True)
+        self._thread.start()
+
+    def rebuild(self):
+        """Pre-encode datagrams for all configured scenes and button values"""
+        paths = frozenset(self.osc_manager.button_paths.values())
+        self._datagrams = {
+            (path, value): encode_message(path, value)
+            for path in paths
+            for value in BUTTON_VALUES
+        }
+        self._encoded_paths = paths
+        logger.info("OSC sender: pre-encoded %d messages", len(self._datagrams))
+
+    def _on_config_change(self, field):
+        """Rebuild the datagram table only if the scene list changed"""
+        if frozenset(self.osc_manager.button_paths.values()) != self._encoded_paths:
+            self.rebuild()
+
+    def add_listener(self, callback):
+        """Register callback(address, value, sent_at) run in the sender thread after each datagram is sent"""
+        self._listeners.append(callback)
+
+    def send_message(self, address, value, origin=None):
+        """
+        Queue an OSC message without blocking; returns False if dropped
+
+        Args:
+            address: OSC address (scene)
+            value: Integer argument
+            origin: time.monotonic() of the button edge, for press-to-send latency
+        """
+        datagram = self._datagrams.get((address, value))
+        if datagram is None:
+            datagram = encode_message(address, value)
+        try:
+            self._queue.put_nowait((datagram, time.monotonic(), origin, address, value))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            metrics.OSC_DROPPED.inc()
+            logger.warning("OSC sender queue full - dropped %s = %s", address, value)
+            return False
+
+    def _run(self):
+        """Sender thread: drain the queue onto the socket"""
+        while self._running:
+            item = self._queue.get()
+            if item is None:
+                break
+            datagram, queued_at, origin, address, value = item
+            start = time.monotonic()
+            try:
+                self._socket.sendto(datagram, self._address)
+            except OSError as e:
+                self.errors += 1
+                metrics.OSC_SEND_ERRORS.inc()
+                logger.warning("OSC send failed: %s", e)
+                continue
+            end = time.monotonic()
+            self.sent += 1
+            metrics.OSC_SENT.inc()
+            if origin is not None:
+                metrics.PRESS_TO_SEND.observe(end - origin)
+            self.last_send_time = end - start
+            self.last_queue_time = end - queued_at
+            self._total_send_time += self.last_send_time
+            self.max_send_time = max(self.max_send_time, self.last_send_time)
+            for listener in self._listeners:
+                try:
+                    listener(address, value, start)
+                except Exception as e:
+                    logger.exception("Send listener failed: %s", e)
+
+    def get_stats(self):
+        """Get send statistics (times in milliseconds)"""
+        return {
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queued': self._queue.qsize(),
+            'encoded_messages': len(self._datagrams),
+            'last_send_ms': self.last_send_time * 1000 if self.last_send_time is not None else None,
+            'avg_send_ms': self._total_send_time / self.sent * 1000 if self.sent else None,
+            'max_send_ms': self.max_send_time * 1000,
+            'last_queue_ms': self.last_queue_time * 1000 if self.last_queue_time is not None else None,
+        }
+
+    def close(self):
+        """Stop the sender thread and close the socket"""
+        self._running = False
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+        self._socket.close()
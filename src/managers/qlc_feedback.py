@@ -0,0 +1,288 @@
+"""
+QLC+ Feedback
+Listens for the OSC feedback QLC+ sends for its Virtual Console buttons
+(the button state, on the same path as the input) and matches each echo
+to the scene press that caused it: round-trip time per press, re-sends
+while QLC+ has not answered, and a 'not responding' state shown on the
+LEDs and in the web API.
+
+The scene buttons in the workspace are Toggle buttons, so a press is only
+re-sent while no echo for its path has arrived: once QLC+ has answered, a
+second 1 would switch the scene off again. The effect-off message is
+such a second 1 and waits for its own echo (QLC+ reports the button off).
+A 0 ends the wait for its path.
+"""
+
+import collections
+import select
+import socket
+import threading
+import time
+
+from . import metrics
+from .osc_receiver import first_argument, iter_messages
+from ..logging_setup import get_logger
+
+logger = get_logger("osc.feedback")
+
+DEFAULT_FEEDBACK_PORT = 9000  # QLC+ OSC feedback output port
+RESPONSE_TIMEOUT = 0.5        # seconds before the first re-send (doubles per re-send)
+MAX_RESENDS = 3               # 0.5 + 1 + 2 + 4 s: covers QLC+ still starting up
+RTT_WINDOW = 256              # round trips kept for the percentiles
+
+STATUS_UNKNOWN = 'unknown'
+STATUS_OK = 'ok'
+STATUS_NOT_RESPONDING = 'not_responding'
+ALERT_LED = "led_green"
+
+
+class _Pending:
+    """A press waiting for its echo"""
+
+    __slots__ = ('path', 'first_sent', 'sent_at', 'resends', 'handle')
+
+    def __init__(self, path, sent_at):
+        self.path = path
+        self.first_sent = sent_at
+        self.sent_at = sent_at
+        self.resends = 0
+        self.handle = None
+
+
+class FeedbackMonitor:
+    def __init__(self, host, port, osc_client, osc_manager, scheduler, led_controller=None,
+                 timeout=RESPONSE_TIMEOUT, max_resends=MAX_RESENDS, clock=time.monotonic):
+        """
+        Initialize the monitor (start() binds the feedback port)
+
+        Args:
+            host: Interface to listen on
+            port: UDP port QLC+ sends feedback to (0 picks a free port)
+            osc_client: OSCSender whose scene presses are tracked (and re-sent)
+            osc_manager: OSCManager with the scene paths
+            scheduler: TimerScheduler for the response timeouts
+            led_controller: Optional LEDController for the 'not responding' alert
+            timeout: Seconds to wait for an echo before the first re-send
+            max_resends: Re-sends before a press is given up
+            clock: Monotonic clock (the same one the sender stamps sends with)
+        """
+        self.host = host
+        self.port = port
+        self.osc_client = osc_client
+        self.osc_manager = osc_manager
+        self.scheduler = scheduler
+        self.led_controller = led_controller
+        self.timeout = timeout
+        self.max_resends = max_resends
+        self.clock = clock
+        self.status = STATUS_UNKNOWN
+        self.button_states = {}  # path -> last state QLC+ reported (True = on)
+        self._pending = {}  # path -> _Pending
+        self._unclaimed = {}  # path -> arrival of the last echo no press was waiting for
+        self._resending = {}  # path -> re-sends not yet reported by the sender
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._socket = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = None
+        self._running = False
+
+        # Stats
+        self.presses = 0
+        self.echoes = 0
+        self.matched = 0
+        self.unmatched = 0  # Echoes without a waiting press (faders, releases, QLC+ UI clicks)
+        self.resends = 0
+        self.unanswered = 0
+        self.last_echo_at = None
+        self.last_rtt = None
+        self._rtts = collections.deque(maxlen=RTT_WINDOW)
+
+        osc_client.add_listener(self.on_sent)
+
+    def add_listener(self, callback):
+        """Register callback(event, data) for status changes ('qlc' event)"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Bind the feedback port and start the listener thread"""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((self.host, self.port))
+        self._socket.setblocking(False)
+        self.port = self._socket.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="qlc-feedback", daemon=True)
+        self._thread.start()
+        logger.info("QLC+ feedback listening on port %s", self.port)
+        return self
+
+    def on_sent(self, address, value, sent_at):
+        """
+        Sender listener: a press starts waiting for its echo, a release ends the wait
+
+        The sender reports a datagram after sendto() returns, so on a fast
+        link the echo can arrive first; it is kept as unclaimed and matched
+        here if it came after the send started.
+        """
+        if address not in self.osc_manager.button_paths.values():
+            return
+        with self._lock:
+            pending = self._pending.get(address)
+            if value and self._resending.get(address):
+                # Our own re-send (its echo may already have answered the press)
+                self._resending[address] -= 1
+                if pending is not None:
+                    pending.sent_at = sent_at
+                return
+            if pending is not None:
+                pending.handle.cancel()
+                del self._pending[address]
+            if not value:
+                return
+            self.presses += 1
+            echoed_at = self._unclaimed.pop(address, None)
+            if echoed_at is None or echoed_at < sent_at:
+                pending = self._pending[address] = _Pending(address, sent_at)
+                pending.handle = self.scheduler.call_at(sent_at + self.timeout, self._on_timeout, pending)
+                return
+            self.unmatched -= 1
+            rtt = self._matched(echoed_at - sent_at)
+        metrics.QLC_ROUND_TRIP.observe(rtt)
+
+    def on_echo(self, address, value, received_at=None):
+        """A feedback message from QLC+: resolve the press waiting on its path"""
+        received_at = self.clock() if received_at is None else received_at
+        with self._lock:
+            self.echoes += 1
+            self.last_echo_at = received_at
+            self.button_states[address] = bool(value)
+            pending = self._pending.pop(address, None)
+            if pending is None:
+                self.unmatched += 1
+                self._unclaimed[address] = received_at
+            else:
+                pending.handle.cancel()
+                rtt = self._matched(received_at - pending.sent_at)
+        if pending is not None:
+            metrics.QLC_ROUND_TRIP.observe(rtt)
+            logger.debug("QLC+ echoed %s = %s after %.1f ms (%d re-sends)", address, value, rtt * 1000, pending.resends)
+        self._set_status(STATUS_OK)
+
+    def _matched(self, rtt):
+        """Record a round trip; caller holds the lock"""
+        self.matched += 1
+        self.last_rtt = rtt
+        self._rtts.append(rtt)
+        return rtt
+
+    def _on_timeout(self, pending):
+        """Scheduled: no echo yet - re-send the press, or give it up"""
+        path = pending.path
+        with self._lock:
+            if self._pending.get(path) is not pending:
+                return  # Answered, released or replaced by a newer press
+            if pending.resends >= self.max_resends:
+                del self._pending[path]
+                self.unanswered += 1
+                resend = False
+            else:
+                pending.resends += 1
+                self.resends += 1
+                self._resending[path] = self._resending.get(path, 0) + 1
+                resend = True
+                pending.handle = self.scheduler.call_later(self.timeout * 2 ** pending.resends, self._on_timeout, pending)
+        self._set_status(STATUS_NOT_RESPONDING)
+        if not resend:
+            metrics.QLC_UNANSWERED.inc()
+            logger.warning("QLC+ never answered %s - press lost", path)
+            return
+        metrics.QLC_RESENDS.inc()
+        logger.warning("No QLC+ feedback for %s - re-sending (%d/%d)", path, pending.resends, self.max_resends)
+        if not self.osc_client.send_message(path, 1):
+            with self._lock:
+                self._resending[path] -= 1  # Dropped: no send notification will come
+
+    def _set_status(self, status):
+        with self._lock:
+            if status == self.status:
+                return
+            previous, self.status = self.status, status
+        if status == STATUS_NOT_RESPONDING:
+            logger.warning("QLC+ not responding")
+        elif previous == STATUS_NOT_RESPONDING:
+            logger.info("QLC+ responding again")
+        if self.led_controller is not None:
+            self.led_controller.set_alert(ALERT_LED, 'no_response' if status == STATUS_NOT_RESPONDING else None)
+        for callback in self._listeners:
+            try:
+                callback('qlc', {'status': status})
+            except Exception as e:
+                logger.exception("Status listener failed: %s", e)
+
+    def _run(self):
+        """Listener thread: decode feedback datagrams"""
+        while self._running:
+            readable, _, _ = select.select([self._socket, self._wake_r], [], [])
+            if self._wake_r in readable:
+                break
+            while True:
+                try:
+                    data = self._socket.recv(65535)
+                except OSError:  # BlockingIOError: drained
+                    break
+                received_at = self.clock()
+                try:
+                    for address, tags, message in iter_messages(data, strict=False):
+                        value = first_argument(message, tags)
+                        if not isinstance(value, str):
+                            self.on_echo(address.decode('utf-8', 'replace'), value, received_at)
+                except (ValueError, IndexError):
+                    logger.debug("Malformed feedback datagram (%d bytes)", len(data))
+        self._socket.close()
+
+    def round_trip_ms(self):
+        """Round-trip times (ms) over the recent window: last, min, p50, p95, max"""
+        if not self._rtts:
+            return None
+        ordered = sorted(self._rtts)
+        return {
+            'last': self.last_rtt * 1000,
+            'min': ordered[0] * 1000,
+            'p50': ordered[len(ordered) // 2] * 1000,
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            'max': ordered[-1] * 1000,
+        }
+
+    def get_stats(self):
+        """Status, matching counters and round-trip times"""
+        return {
+            'status': self.status,
+            'port': self.port,
+            'presses': self.presses,
+            'echoes': self.echoes,
+            'matched': self.matched,
+            'unmatched': self.unmatched,
+            'resends': self.resends,
+            'unanswered': self.unanswered,
+            'waiting': len(self._pending),
+            'last_echo_age': self.clock() - self.last_echo_at if self.last_echo_at is not None else None,
+            'round_trip_ms': self.round_trip_ms(),
+            'button_states': dict(self.button_states),
+        }
+
+    def close(self):
+        """Stop the listener thread and cancel waiting presses"""
+        self._running = False
+        with self._lock:
+            for pending in self._pending.values():
+                pending.handle.cancel()
+            self._pending.clear()
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._wake_r.close()
+        self._wake_w.close()
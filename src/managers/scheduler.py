@@ -0,0 +1,262 @@
+"""
+Timer Scheduler
+Runs all delayed and periodic callbacks (effect off, block end, LED blinking)
+from one thread using a heap of monotonic deadlines
+
+In precise mode (spin > 0) the thread sleeps on its condition only until
+spin seconds before a deadline and yields in a loop for the rest, which
+takes the OS wake-up latency out of the callback's lateness. Lateness is
+measured for every callback either way (get_timing_stats()).
+"""
+
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+from . import metrics
+from ..logging_setup import get_logger
+
+logger = get_logger("scheduler")
+
+LATENESS_WINDOW = 1024  # callbacks kept for the jitter percentiles
+
+
+class TimerHandle:
+    """Cancellable handle for a scheduled callback"""
+
+    __slots__ = ('deadline', 'interval', 'callback', 'args', 'cancelled', '_seq', '_scheduler')
+
+    def __init__(self, scheduler, deadline, callback, args, interval=None):
+        self._scheduler = scheduler
+        self._seq = 0
+        self.deadline = deadline
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    @property
+    def active(self):
+        """True while the callback is still going to run"""
+        return not self.cancelled and self._seq != 0
+
+    def remaining(self):
+        """Seconds until the callback runs (0 if it is due or inactive)"""
+        if not self.active:
+            return 0
+        return max(0.0, self.deadline - self._scheduler.clock())
+
+    def cancel(self):
+        """Cancel the callback (safe to call more than once)"""
+        self._scheduler.cancel(self)
+
+    def reschedule(self, delay):
+        """Move the callback to run delay seconds from now"""
+        self._scheduler.reschedule(self, delay)
+        return self
+
+
+class TimerScheduler:
+    def __init__(self, clock=time.monotonic, name="timer-scheduler", spin=0.0):
+        """
+        Initialize the scheduler
+
+        Args:
+            clock: Monotonic clock function returning seconds
+            name: Name of the scheduler thread
+            spin: Seconds before each deadline spent yielding instead of
+                  sleeping (0 = coarse mode, sleep until the deadline)
+        """
+        self.clock = clock
+        self.name = name
+        self.spin = spin
+        self.dispatched = 0
+        self._lateness = collections.deque(maxlen=LATENESS_WINDOW)
+        self._heap = []
+        self._counter = itertools.count(1)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._active = 0
+
+    def start(self):
+        """Start the scheduler thread (no-op if already running)"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the scheduler thread, dropping pending callbacks"""
+        with self._condition:
+            self._running = False
+            self._heap.clear()
+            self._active = 0
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def call_later(self, delay, callback, *args):
+        """Run callback(*args) after delay seconds"""
+        return self.call_at(self.clock() + max(0, delay), callback, *args)
+
+    def call_at(self, deadline, callback, *args):
+        """Run callback(*args) at the given clock() deadline"""
+        handle = TimerHandle(self, deadline, callback, args)
+        self._push(handle, deadline)
+        return handle
+
+    def call_every(self, interval, callback, *args, first_delay=0):
+        """Run callback(*args) every interval seconds until cancelled"""
+        handle = TimerHandle(self, self.clock() + first_delay, callback, args, interval=interval)
+        self._push(handle, handle.deadline)
+        return handle
+
+    def timer(self, callback, *args):
+        """Create an unscheduled handle; arm (and re-arm) it with handle.reschedule(delay)"""
+        return TimerHandle(self, None, callback, args)
+
+    def cancel(self, handle):
+        """Cancel a scheduled callback; its heap entry is dropped lazily"""
+        with self._condition:
+            if handle.active:
+                self._active -= 1
+            handle.cancelled = True
+            handle._seq = 0
+
+    def reschedule(self, handle, delay):
+        """Move a (possibly already fired or cancelled) handle to run after delay"""
+        with self._condition:
+            if handle.active:
+                self._active -= 1
+            handle.cancelled = False
+            # Pushed under the same lock: a cancel() can only come before or after, never in between
+            self._push_locked(handle, self.clock() + max(0, delay))
+        if self._thread is None:
+            self.start()
+
+    def pending(self):
+        """Number of callbacks waiting to run (scheduler backlog)"""
+        return self._active
+
+    def get_timing_stats(self):
+        """Timing mode and callback lateness (ms) over the recent window"""
+        with self._condition:
+            ordered = sorted(self._lateness)
+            dispatched = self.dispatched
+        stats = {
+            'mode': 'precise' if self.spin > 0 else 'coarse',
+            'spin_ms': self.spin * 1000,
+            'dispatched': dispatched,
+            'lateness_ms': None,
+        }
+        if ordered:
+            stats['lateness_ms'] = {
+                'mean': sum(ordered) / len(ordered) * 1000,
+                'p50': ordered[len(ordered) // 2] * 1000,
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+                'max': ordered[-1] * 1000,
+            }
+        return stats
+
+    def _push(self, handle, deadline):
+        with self._condition:
+            self._push_locked(handle, deadline)
+        if self._thread is None:
+            self.start()
+
+    def _push_locked(self, handle, deadline):
+        """Add a heap entry for handle; caller holds the lock"""
+        # A new sequence number invalidates any older heap entry of this handle
+        handle._seq = next(self._counter)
+        handle.deadline = deadline
+        heapq.heappush(self._heap, (deadline, handle._seq, handle))
+        self._active += 1
+        if self._heap[0][2] is handle:
+            self._condition.notify()
+
+    def _peek(self):
+        """Earliest live heap entry (deadline, seq, handle), or None; caller holds the lock"""
+        while self._heap:
+            entry = self._heap[0]
+            if entry[1] == entry[2]._seq:
+                return entry
+            heapq.heappop(self._heap)  # Cancelled or rescheduled entry
+        return None
+
+    def _take(self, entry):
+        """Pop the due head entry, re-arming periodic handles; caller holds the lock"""
+        deadline, _, handle = entry
+        heapq.heappop(self._heap)
+        lateness = self.clock() - deadline
+        self.dispatched += 1
+        self._lateness.append(lateness)
+        metrics.TIMER_LATENESS.observe(lateness)
+        if handle.interval is not None:
+            # Periodic: keep the phase fixed to avoid drift
+            handle.deadline = deadline + handle.interval
+            handle._seq = next(self._counter)
+            heapq.heappush(self._heap, (handle.deadline, handle._seq, handle))
+        else:
+            handle._seq = 0
+            self._active -= 1
+        return handle
+
+    def _pop_due(self):
+        """Wait for the next due callback; returns None when stopped"""
+        with self._condition:
+            while self._running:
+                entry = self._peek()
+                if entry is None:
+                    self._condition.wait()
+                    continue
+                delay = entry[0] - self.clock()
+                if delay > self.spin:
+                    self._condition.wait(delay - self.spin)
+                    continue
+                if delay > 0:
+                    # Precise mode: yield until the deadline with the lock
+                    # released, then look again (the head may have changed)
+                    self._condition.release()
+                    try:
+                        while self.clock() < entry[0]:
+                            time.sleep(0)
+                    finally:
+                        self._condition.acquire()
+                    continue
+                return self._take(entry)
+            return None
+
+    def _run(self):
+        """Scheduler thread main loop"""
+        while True:
+            handle = self._pop_due()
+            if handle is None:
+                break
+            self._dispatch(handle)
+
+    def _dispatch(self, handle):
+        try:
+            handle.callback(*handle.args)
+        except Exception as e:
+            logger.exception("Scheduled callback %s failed: %s", getattr(handle.callback, '__name__', handle.callback), e)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """Return the process-wide scheduler, starting it on first use"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = TimerScheduler()
+            _default_scheduler.start()
+        return _default_scheduler
@@ -0,0 +1,434 @@
+"""
+Shared State
+Process boundary between the real-time side (GPIO, timers, OSC output) and
+the web process. The real-time side publishes a JSON snapshot of the button
+and config state into a memory-mapped block (/dev/shm) under a seqlock:
+readers never take a lock the writer could wait on, they retry while a
+write is in progress and check a CRC against torn reads. Changes travel
+the other way as length-prefixed JSON commands over a Unix socket, applied
+by a command thread on the real-time side.
+"""
+
+import json
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+from ..logging_setup import get_logger
+
+logger = get_logger("shared")
+
+RUNTIME_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+DEFAULT_STATE_BLOCK = os.path.join(RUNTIME_DIR, "tanzen.state")
+DEFAULT_COMMAND_SOCKET = os.path.join(RUNTIME_DIR, "tanzen.sock")
+DEFAULT_BLOCK_SIZE = 64 * 1024  # bytes
+
+MAGIC = b'TZS1'
+HEADER_SIZE = 64
+# magic, padding, sequence (odd while a write is in progress), payload length, payload crc32
+HEADER = struct.Struct('<4s4xQII')
+SEQUENCE = struct.Struct('<Q')
+SEQUENCE_OFFSET = 8
+LENGTH_CRC = struct.Struct('<II')
+LENGTH_OFFSET = 16
+
+FRAME = struct.Struct('!I')  # Command/reply length prefix
+MAX_FRAME = 16 * 1024 * 1024
+
+# Exceptions a command may raise that the client re-raises as the same type
+ERROR_TYPES = {'ValueError': ValueError, 'TypeError': TypeError, 'OSError': OSError}
+
+
+class RemoteError(RuntimeError):
+    """A command failed on the real-time side, or the connection to it is gone"""
+
+
+class StateBlock:
+    def __init__(self, path=DEFAULT_STATE_BLOCK, size=DEFAULT_BLOCK_SIZE):
+        """
+        Initialize the state block (create() on the writer side, attach() on a reader)
+
+        Args:
+            path: Block file, ideally on tmpfs
+            size: File size in bytes (header + largest snapshot)
+        """
+        self.path = path
+        self.size = size
+        self.writes = 0
+        self.retries = 0  # Reads repeated because a write was in progress
+        self._sequence = 0
+        self._lock = threading.Lock()  # Writers within the one writing process
+        self._file = None
+        self._mm = None
+
+    def create(self):
+        """Create a fresh block (a new file, so a reader of an old one is never truncated under)"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 0, 0, 0))
+            f.truncate(self.size)
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), self.size)
+        return self
+
+    def attach(self):
+        """Map an existing block read-only"""
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER_SIZE or HEADER.unpack_from(self._mm)[0] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a state block")
+        self.size = len(self._mm)
+        return self
+
+    def write(self, payload):
+        """
+        Publish a payload (bytes)
+
+        Raises:
+            ValueError if it does not fit the block
+        """
+        if len(payload) > self.size - HEADER_SIZE:
+            raise ValueError(f"State snapshot of {len(payload)} bytes exceeds the block")
+        crc = zlib.crc32(payload)
+        with self._lock:
+            mm = self._mm
+            sequence = self._sequence
+            SEQUENCE.pack_into(mm, SEQUENCE_OFFSET, sequence + 1)  # Odd: write in progress
+            mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+            LENGTH_CRC.pack_into(mm, LENGTH_OFFSET, len(payload), crc)
+            self._sequence = sequence + 2
+            SEQUENCE.pack_into(mm, SEQUENCE_OFFSET, self._sequence)
+            self.writes += 1
+
+    @property
+    def sequence(self):
+        """Current sequence number (even when no write is in progress)"""
+        return SEQUENCE.unpack_from(self._mm, SEQUENCE_OFFSET)[0]
+
+    def read(self, since=None, attempts=1000):
+        """
+        Read a consistent payload
+
+        Args:
+            since: Sequence number already read: returns None while it is unchanged
+            attempts: Retries before giving up on a writer that never finishes
+
+        Returns:
+            (sequence, payload bytes), or None (unchanged, or nothing published yet)
+        """
+        mm = self._mm
+        for _ in range(attempts):
+            sequence = SEQUENCE.unpack_from(mm, SEQUENCE_OFFSET)[0]
+            if sequence == since or sequence == 0:
+                return None
+            if not sequence & 1:
+                length, crc = LENGTH_CRC.unpack_from(mm, LENGTH_OFFSET)
+                payload = mm[HEADER_SIZE:HEADER_SIZE + length] if length <= self.size - HEADER_SIZE else b''
+                # The CRC catches a torn read even where the stores were reordered
+                if SEQUENCE.unpack_from(mm, SEQUENCE_OFFSET)[0] == sequence and zlib.crc32(payload) == crc:
+                    return sequence, payload
+            self.retries += 1
+            time.sleep(0)
+        raise RemoteError(f"State block {self.path} stayed inconsistent")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class StatePublisher:
+    def __init__(self, block, button_controller, osc_manager, qlc_feedback=None, cue_engine=None,
+                 button_station=None, interval=1.0):
+        """
+        Initialize the publisher (real-time side)
+
+        Args:
+            block: StateBlock created for writing
+            button_controller: ButtonController
+            osc_manager: OSCManager
+            qlc_feedback: FeedbackMonitor (optional)
+            cue_engine: CueEngine (optional)
+            button_station: ButtonStation (optional)
+            interval: Seconds between heartbeat snapshots when nothing changes
+        """
+        self.block = block
+        self.button_controller = button_controller
+        self.osc_manager = osc_manager
+        self.qlc_feedback = qlc_feedback
+        self.cue_engine = cue_engine
+        self.button_station = button_station
+        self.interval = interval
+        self.workspace_version = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """Publish on every state or config change (coalesced in a thread) and on a heartbeat"""
+        self.button_controller.add_listener(self._on_change)
+        self.osc_manager.add_listener(self._on_config_change)
+        for source in (self.qlc_feedback, self.cue_engine, self.button_station):
+            if source is not None:
+                source.add_listener(self._on_change)
+        self.publish()
+        self._thread = threading.Thread(target=self._run, name="state-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _on_change(self, *args):
+        # Called from the press path: only wakes the publisher
+        self._wake.set()
+
+    def _on_config_change(self, field):
+        if field == 'workspace':
+            self.workspace_version += 1
+        self._wake.set()
+
+    def snapshot(self):
+        """State the web process serves without asking the real-time side"""
+        controller = self.button_controller
+        osc_manager = self.osc_manager
+        tempo = osc_manager.tempo
+        remaining = controller.block_remaining()
+        now = time.monotonic()
+        return {
+            'published': now,
+            'button': {
+                'state': controller.state,
+                'enabled': controller.button_enabled,
+                'blocked': controller.is_button_blocked,
+                'effect_running': controller.effect_running,
+                'held': controller.is_held,
+                # CLOCK_MONOTONIC is system-wide: the reader counts down without new snapshots
+                'block_deadline': now + remaining if remaining else None,
+                'last_effect_off_drift': controller.last_effect_off_drift,
+            },
+            'config': {
+                'current_path': osc_manager.current_path,
+                'current_delay': osc_manager.current_delay,
+                'current_osc_off_delay': osc_manager.current_osc_off_delay,
+                'button_paths': osc_manager.button_paths,
+                'delay_presets': osc_manager.delay_presets,
+                'button_configs': osc_manager.button_configs,
+                'tempo': {'bpm': tempo.bpm, 'quantize': tempo.quantize, 'origin': tempo.origin},
+            },
+            'qlc_status': self.qlc_feedback.status if self.qlc_feedback is not None else None,
+            'cue_lists_running': self.cue_engine.running_lists() if self.cue_engine is not None else [],
+            'workspace_version': self.workspace_version if osc_manager.workspace is not None else None,
+        }
+
+    def publish(self):
+        """Write a snapshot now (the command thread calls this before replying)"""
+        with self._lock:
+            try:
+                self.block.write(json.dumps(self.snapshot(), separators=(',', ':')).encode())
+            except (TypeError, ValueError) as e:
+                logger.error("Could not publish the state snapshot: %s", e)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped:
+                self.publish()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def send_frame(sock, message):
+    """Send one length-prefixed JSON message"""
+    payload = json.dumps(message, separators=(',', ':')).encode()
+    sock.sendall(FRAME.pack(len(payload)) + payload)
+
+
+def recv_frame(sock):
+    """Receive one length-prefixed JSON message (None when the peer closed)"""
+    header = _recv_exact(sock, FRAME.size)
+    if header is None:
+        return None
+    (length,) = FRAME.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes is too large")
+    payload = _recv_exact(sock, length)
+    return None if payload is None else json.loads(payload)
+
+
+class CommandServer:
+    def __init__(self, path, commands, queries=None, publisher=None):
+        """
+        Initialize the command server (real-time side)
+
+        Args:
+            path: Unix socket path
+            commands: {op: callable(*args, **kwargs)} that change state, returning a JSON-serializable result
+            queries: {op: callable} that only read (no snapshot afterwards)
+            publisher: StatePublisher to refresh after each command, so its reply implies a current block
+        """
+        self.path = path
+        self.commands = commands
+        self.queries = queries or {}
+        self.publisher = publisher
+        self.handled = 0
+        self.errors = 0
+        self._sock = None
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self._sock.listen(4)
+        threading.Thread(target=self._accept, name="command-server", daemon=True).start()
+        logger.info("Command socket %s", self.path)
+        return self
+
+    def _accept(self):
+        while not self._stopped:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            with self._lock:
+                self._connections.add(conn)
+            threading.Thread(target=self._serve, args=(conn,), name="command-conn", daemon=True).start()
+
+    def _serve(self, conn):
+        """One connection: requests are answered in order"""
+        try:
+            while True:
+                request = recv_frame(conn)
+                if request is None:
+                    break
+                send_frame(conn, self.execute(request))
+        except (OSError, ValueError) as e:
+            if not self._stopped:
+                logger.warning("Command connection closed: %s", e)
+        finally:
+            with self._lock:
+                self._connections.discard(conn)
+            conn.close()
+
+    def execute(self, request):
+        """Apply one request {id, op, args, kwargs} and build its reply"""
+        reply = {'id': request.get('id')}
+        op = request.get('op')
+        query = op in self.queries
+        command = self.queries[op] if query else self.commands.get(op)
+        try:
+            if command is None:
+                raise ValueError(f"Unknown command {op!r}")
+            reply['result'] = command(*request.get('args', ()), **request.get('kwargs', {}))
+            reply['ok'] = True
+        except Exception as e:
+            self.errors += 1
+            if type(e).__name__ not in ERROR_TYPES:
+                logger.exception("Command %s failed", op)
+            reply.update(ok=False, error=str(e), type=type(e).__name__)
+        self.handled += 1
+        if self.publisher is not None and not query:
+            self.publisher.publish()
+        return reply
+
+    def close(self):
+        self._stopped = True
+        if self._sock is not None:
+            self._sock.close()
+        with self._lock:
+            for conn in list(self._connections):
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class CommandClient:
+    def __init__(self, path, timeout=5.0):
+        """
+        Initialize the client (web side; one connection shared by all request threads)
+
+        Args:
+            path: Unix socket path of the CommandServer
+            timeout: Seconds to wait for a reply
+        """
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._sock = sock
+
+    def call(self, op, *args, **kwargs):
+        """
+        Run a command on the real-time side and return its result
+
+        Raises:
+            ValueError, TypeError or OSError as raised by the command; RemoteError otherwise
+        """
+        with self._lock:
+            self._ids += 1
+            request = {'id': self._ids, 'op': op, 'args': args, 'kwargs': kwargs}
+            try:
+                if self._sock is None:
+                    self._connect()
+                send_frame(self._sock, request)
+                reply = recv_frame(self._sock)
+            except (OSError, ValueError) as e:
+                self.close()
+                raise RemoteError(f"Real-time process unreachable: {e}") from e
+            if reply is None or reply.get('id') != request['id']:
+                self.close()
+                raise RemoteError("Real-time process closed the connection")
+        if not reply['ok']:
+            raise ERROR_TYPES.get(reply.get('type'), RemoteError)(reply.get('error'))
+        return reply.get('result')
+
+    def bind(self, op):
+        """Callable running one command, e.g. get_stats = client.bind('osc_stats')"""
+        return lambda *args, **kwargs: self.call(op, *args, **kwargs)
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
@@ -0,0 +1,202 @@
+"""
+Runtime State Store
+Persists the web-configurable settings (scene, delays, enabled flag,
+station buttons) and an in-flight block deadline to config/state.json.
+Changes are coalesced and written behind by one thread with an atomic
+rename, so API calls never wait for the SD card.
+"""
+
+import json
+import os
+import threading
+import time
+
+from ..logging_setup import get_logger
+
+logger = get_logger("state")
+
+DEFAULT_STATE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config", "state.json")
+STATE_VERSION = 1
+
+
+class StateStore:
+    def __init__(self, path=DEFAULT_STATE_FILE, coalesce=0.25, clock=time.time):
+        """
+        Initialize the store
+
+        Args:
+            path: JSON file holding the snapshot
+            coalesce: Seconds to gather further changes before writing
+            clock: Wall clock for saved instants (block deadline)
+        """
+        self.path = path
+        self.coalesce = coalesce
+        self.clock = clock
+        self.state = {}
+        self.writes = 0
+        self._dirty = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def load(self):
+        """Read the snapshot (empty dict if missing or unreadable)"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable state file %s: %s", self.path, e)
+            return {}
+        if data.get('version') != STATE_VERSION:
+            logger.warning("Ignoring state file with version %s", data.get('version'))
+            return {}
+        with self._condition:
+            self.state = data.get('state', {})
+        return dict(self.state)
+
+    def update(self, **fields):
+        """Merge fields into the state and schedule a write (returns immediately)"""
+        with self._condition:
+            changed = any(self.state.get(key) != value for key, value in fields.items())
+            if not changed:
+                return
+            self.state.update(fields)
+            self._dirty = True
+            self._condition.notify()
+        if self._thread is None:
+            self.start()
+
+    def start(self):
+        """Start the write-behind thread"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+            self._thread.start()
+
+    def flush(self):
+        """Write pending changes now (from the calling thread)"""
+        with self._condition:
+            if not self._dirty:
+                return
+            snapshot = dict(self.state)
+            self._dirty = False
+        self._write(snapshot)
+
+    def close(self):
+        """Stop the writer thread and flush"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._dirty:
+                    self._condition.wait()
+                if not self._running:
+                    return
+            # Let a burst of changes (slider drags, repeated clicks) collapse into one write
+            time.sleep(self.coalesce)
+            self.flush()
+
+    def _write(self, snapshot):
+        """Atomic replace: temp file, fsync, rename, fsync directory"""
+        directory = os.path.dirname(self.path)
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump({'version': STATE_VERSION, 'saved_at': self.clock(), 'state': snapshot},
+                          f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            self.writes += 1
+        except OSError as e:
+            logger.error("Could not save state to %s: %s", self.path, e)
+
+
+def restore_state(store, button_controller, osc_manager):
+    """
+    Apply the saved snapshot and resume an interrupted block
+
+    Returns:
+        Seconds of block time resumed (0 if none)
+    """
+    state = store.load()
+    if not state:
+        return 0
+    if state.get('path_id') in osc_manager.button_paths:
+        osc_manager.current_path = state['path_id']
+    if 'delay' in state and 'osc_off_delay' in state:
+        osc_manager.current_delay = state['delay']
+        osc_manager.current_osc_off_delay = state['osc_off_delay']
+    for index, saved in state.get('buttons', {}).items():
+        index = int(index)
+        config = dict(osc_manager.button_configs.get(index) or osc_manager.default_button_config(index))
+        if saved.get('path_id') not in osc_manager.button_paths:
+            # Scene removed since the snapshot: keep the button's default scene
+            logger.warning("Ignoring saved scene %s of station button %s", saved.get('path_id'), index)
+            saved = {key: value for key, value in saved.items() if key != 'path_id'}
+        config.update(saved)
+        osc_manager.button_configs[index] = config
+    try:
+        if state.get('bpm'):
+            osc_manager.tempo.set_bpm(state['bpm'])
+        osc_manager.tempo.set_quantize(state.get('quantize', 0))
+    except (TypeError, ValueError) as e:
+        logger.warning("Ignoring saved tempo: %s", e)
+    if 'button_enabled' in state:
+        button_controller.set_button_enabled(state['button_enabled'])
+
+    remaining = 0
+    if state.get('block_until'):
+        remaining = state['block_until'] - store.clock()
+        # A wall clock that jumped back (no RTC before NTP sync) must not extend the block
+        remaining = min(remaining, state.get('block_delay', remaining))
+        if remaining > 0:
+            button_controller.resume_block(remaining)
+            logger.info("Resumed block with %.1f seconds remaining", remaining)
+        else:
+            remaining = 0
+    logger.info("Restored state: scene %s, block %ss, effect %ss, %s",
+                osc_manager.get_button_path(), osc_manager.current_delay, osc_manager.current_osc_off_delay,
+                'enabled' if button_controller.button_enabled else 'disabled')
+    return remaining
+
+
+def attach_state(store, button_controller, osc_manager):
+    """Record every config and block change in the store"""
+    def save_config(field=None):
+        store.update(path_id=osc_manager.current_path,
+                     delay=osc_manager.current_delay,
+                     osc_off_delay=osc_manager.current_osc_off_delay,
+                     buttons={str(index): config for index, config in osc_manager.button_configs.items()},
+                     bpm=osc_manager.tempo.bpm,
+                     quantize=osc_manager.tempo.quantize)
+
+    def on_event(event, data):
+        if event == 'enabled':
+            store.update(button_enabled=data['enabled'])
+        elif event == 'block_start':
+            store.update(block_until=store.clock() + data['delay'], block_delay=data['delay'])
+        elif event == 'block_end':
+            store.update(block_until=None, block_delay=None)
+
+    osc_manager.add_listener(save_config)
+    button_controller.add_listener(on_event)
+    save_config()
+    store.update(button_enabled=button_controller.button_enabled)
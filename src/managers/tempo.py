@@ -0,0 +1,119 @@
+"""
+Beat Clock
+Tempo for beat-aligned triggers: a BPM set directly or tapped in, a beat
+phase (the last tap, or when the BPM was set) and a quantize grid. With
+quantize on, a press waits for the next grid point, so a scene change
+lands on the beat instead of wherever the finger happened to be.
+"""
+
+import math
+import time
+
+from ..logging_setup import get_logger
+
+logger = get_logger("tempo")
+
+MIN_BPM = 30.0
+MAX_BPM = 300.0
+TAP_TIMEOUT = 2.0  # seconds without a tap that start a new tap sequence
+MAX_TAPS = 8       # taps averaged for the tempo
+BEAT_GRACE = 0.03  # a press this shortly after a grid point still counts as on it
+
+
+class BeatClock:
+    def __init__(self, bpm=None, quantize=0, clock=time.monotonic, grace=BEAT_GRACE):
+        """
+        Initialize the beat clock
+
+        Args:
+            bpm: Tempo in beats per minute (None = no tempo)
+            quantize: Grid in beats (0 = off, 1 = every beat, 2 = half tempo, 4 = bar)
+            clock: Monotonic clock (the scheduler's)
+            grace: Seconds after a grid point in which a trigger is not delayed
+        """
+        self.clock = clock
+        self.grace = grace
+        self.bpm = None
+        self.quantize = 0
+        self.origin = None  # Clock time of a beat
+        self._taps = []
+        if bpm is not None:
+            self.set_bpm(bpm)
+        self.set_quantize(quantize)
+
+    @property
+    def period(self):
+        """Seconds per beat (None without a tempo)"""
+        return 60.0 / self.bpm if self.bpm else None
+
+    @property
+    def active(self):
+        """True if triggers are quantized"""
+        return bool(self.bpm and self.quantize)
+
+    def set_bpm(self, bpm, origin=None):
+        """
+        Set the tempo; the beat phase is kept unless origin is given
+
+        Raises:
+            ValueError outside MIN_BPM..MAX_BPM
+        """
+        bpm = float(bpm)
+        if not MIN_BPM <= bpm <= MAX_BPM:
+            raise ValueError(f"BPM must be between {MIN_BPM:.0f} and {MAX_BPM:.0f}")
+        self.bpm = bpm
+        if origin is not None or self.origin is None:
+            self.origin = self.clock() if origin is None else origin
+
+    def set_quantize(self, beats):
+        """
+        Set the quantize grid in beats (0 = off)
+
+        Raises:
+            ValueError outside 0..16 (NaN included)
+        """
+        beats = float(beats)
+        if not 0 <= beats <= 16:
+            raise ValueError("Quantize must be between 0 and 16 beats")
+        self.quantize = beats
+
+    def tap(self, t=None):
+        """
+        Tap tempo: each tap is on a beat; two or more taps set the BPM
+
+        Returns:
+            The new BPM, or None while only one tap of a sequence is in
+        """
+        t = self.clock() if t is None else t
+        if self._taps and (t - self._taps[-1] > TAP_TIMEOUT or t <= self._taps[-1]):
+            self._taps = []
+        self._taps = self._taps[-(MAX_TAPS - 1):] + [t]
+        self.origin = t
+        if len(self._taps) < 2:
+            return None
+        interval = (self._taps[-1] - self._taps[0]) / (len(self._taps) - 1)
+        self.bpm = min(MAX_BPM, max(MIN_BPM, 60.0 / interval))
+        logger.debug("Tap tempo: %.1f BPM from %d taps", self.bpm, len(self._taps))
+        return self.bpm
+
+    def next_beat(self, t):
+        """Clock time of the first grid point at or after t (grid points up to grace ago count as now)"""
+        step = self.period * (self.quantize or 1)
+        count = math.ceil((t - self.grace - self.origin) / step)
+        return max(t, self.origin + count * step)
+
+    def delay(self, t=None):
+        """Seconds a trigger at t waits for the grid (0 if quantize is off)"""
+        if not self.active:
+            return 0.0
+        t = self.clock() if t is None else t
+        return self.next_beat(t) - t
+
+    def to_dict(self):
+        now = self.clock()
+        return {
+            'bpm': round(self.bpm, 2) if self.bpm else None,
+            'quantize': self.quantize,
+            'active': self.active,
+            'next_beat_in': round(self.next_beat(now) - now, 4) if self.bpm else None,
+        }
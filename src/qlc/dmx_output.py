@@ -0,0 +1,390 @@
+"""
+DMX Output Engine
+Native Art-Net / sACN (E1.31) output of the scenes in the QLC+ workspace,
+as an alternative to sending OSC to a separate QLC+ process. Every
+universe is a preallocated 512-byte buffer; one thread renders running
+scenes and chasers (with fades, see renderer.py) HTP-merged, and sends
+changed universes immediately and unchanged ones only as keep-alives.
+"""
+
+import random
+import socket
+import struct
+import threading
+import time
+import uuid
+
+from ..managers import metrics
+from ..logging_setup import get_logger
+from .renderer import compile_chasers, scene_levels, step_timing
+
+logger = get_logger("dmx")
+
+DMX_SLOTS = 512
+ARTNET_PORT = 6454
+SACN_PORT = 5568
+PROTOCOLS = ("artnet", "sacn")
+
+ARTNET_HEADER = b'Art-Net\0' + struct.pack('<H', 0x5000) + struct.pack('>H', 14)
+ARTNET_DATA_OFFSET = 18
+SACN_DATA_OFFSET = 126
+SACN_ROOT_ID = b'ASC-E1.17\0\0\0'
+
+
+def artnet_template(universe):
+    """ArtDmx packet with a zeroed data block (sequence at byte 12)"""
+    return bytearray(ARTNET_HEADER + bytes([0, 0, universe & 0xFF, (universe >> 8) & 0x7F])
+                     + struct.pack('>H', DMX_SLOTS) + bytes(DMX_SLOTS))
+
+
+def sacn_template(universe, cid, source_name, priority=100):
+    """E1.31 data packet with a zeroed data block (sequence at byte 111)"""
+    length = SACN_DATA_OFFSET + DMX_SLOTS
+    packet = bytearray(length)
+    struct.pack_into('>HH12sHI16s', packet, 0, 0x0010, 0, SACN_ROOT_ID, 0x7000 | (length - 16), 4, cid)
+    struct.pack_into('>HI64sBHBBH', packet, 38, 0x7000 | (length - 38), 2, source_name.encode()[:63],
+                     priority, 0, 0, 0, universe)
+    struct.pack_into('>HBBHHHB', packet, 115, 0x7000 | (length - 115), 2, 0xA1, 0, 1, DMX_SLOTS + 1, 0)
+    return packet
+
+
+def parse_artnet(packet):
+    """(universe, sequence, data) of an ArtDmx packet, or None"""
+    if len(packet) < ARTNET_DATA_OFFSET or not packet.startswith(ARTNET_HEADER[:10]):
+        return None
+    length = struct.unpack_from('>H', packet, 16)[0]
+    return packet[14] | (packet[15] << 8), packet[12], bytes(packet[ARTNET_DATA_OFFSET:ARTNET_DATA_OFFSET + length])
+
+
+def parse_sacn(packet):
+    """(universe, sequence, data) of an E1.31 data packet, or None"""
+    if len(packet) < SACN_DATA_OFFSET or packet[4:16] != SACN_ROOT_ID:
+        return None
+    universe = struct.unpack_from('>H', packet, 113)[0]
+    count = struct.unpack_from('>H', packet, 123)[0] - 1
+    return universe, packet[111], bytes(packet[SACN_DATA_OFFSET:SACN_DATA_OFFSET + count])
+
+
+class _Runner:
+    """A running function: refcount, owned children and chaser position"""
+
+    __slots__ = ('function', 'refs', 'children', 'index', 'direction', 'next_step', 'started', 'compiled')
+
+    def __init__(self, function):
+        self.function = function
+        self.refs = 1
+        self.children = []
+        self.index = 0
+        self.direction = 1
+        self.next_step = None
+        self.started = None
+        self.compiled = None
+
+
+class DMXOutput:
+    def __init__(self, workspace, protocol="artnet", target=None, port=None, refresh=30.0, keepalive=1.0,
+                 universes=None, source_name="tanzen", fades=True, clock=time.monotonic):
+        """
+        Initialize the engine
+
+        Args:
+            workspace: Parsed QLC+ workspace (src.qlc.workspace.Workspace)
+            protocol: "artnet" or "sacn"
+            target: Destination IP (default: broadcast for Art-Net, multicast for sACN)
+            port: Destination UDP port (default: 6454 Art-Net, 5568 sACN)
+            refresh: Engine ticks per second (chaser stepping, keep-alive checks)
+            keepalive: Seconds after which an unchanged universe is resent
+            universes: Workspace universe IDs to output (default: those with patched fixtures)
+            source_name: sACN source name
+            fades: Render chaser fades (False: steps switch hard)
+            clock: Monotonic clock function
+        """
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown DMX protocol: {protocol}")
+        self.workspace = workspace
+        self.protocol = protocol
+        self.refresh = refresh
+        self.keepalive = keepalive
+        self.clock = clock
+        if universes is None:
+            universes = sorted({fixture['universe'] for fixture in workspace.fixtures.values()})
+        self.universes = list(universes)
+
+        # Preallocated buffers and packets, one per universe
+        self.buffers = {uid: bytearray(DMX_SLOTS) for uid in self.universes}
+        self._frame = bytearray(DMX_SLOTS * len(self.universes))  # All universes, rendered each change
+        cid = uuid.uuid5(uuid.NAMESPACE_DNS, source_name).bytes
+        self._packets = {}
+        self._destinations = {}
+        for uid in self.universes:
+            if protocol == "artnet":
+                self._packets[uid] = artnet_template(uid)
+                self._destinations[uid] = (target or '255.255.255.255', port or ARTNET_PORT)
+            else:
+                wire_universe = uid + 1  # sACN universes start at 1
+                self._packets[uid] = sacn_template(wire_universe, cid, source_name)
+                self._destinations[uid] = (target or f"239.255.{wire_universe >> 8}.{wire_universe & 0xFF}", port or SACN_PORT)
+        self._sequence = {uid: 0 for uid in self.universes}
+        self._last_sent = {uid: float('-inf') for uid in self.universes}
+        self._dirty = set()
+
+        # Scene channel values compiled to (flat channel, value); chasers to level/timing arrays
+        self._scene_values = {}
+        for function in workspace.functions.values():
+            if function.type == 'Scene':
+                self._scene_values[function.id] = list(scene_levels(workspace, function.id, self.universes).items())
+        self._compiled = compile_chasers(workspace, self.universes) if fades else {}
+        self._animating = 0  # Running compiled chasers (render every tick)
+
+        self._runners = {}
+        self._path_functions = {}
+        self._paths_on = set()  # OSC paths whose (emulated) Toggle button is on
+        self._pending_origins = []
+        self._render_needed = False
+        self._condition = threading.Condition()
+        self._wake = False
+        self._running = False
+        self._thread = None
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+        # Stats
+        self.frames = 0
+        self.change_frames = 0
+        self.keepalive_frames = 0
+        self.errors = 0
+
+    def start(self):
+        """Start the output thread"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="dmx-output", daemon=True)
+            self._thread.start()
+        logger.info("DMX output (%s) started for universes %s", self.protocol, self.universes)
+
+    def close(self):
+        """Stop all functions, send a blackout and stop the thread"""
+        with self._condition:
+            for function_id in list(self._runners):
+                self._stop(function_id, force=True)
+            self._paths_on.clear()
+            self._render(self.clock())
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._transmit(self.clock())
+        self._socket.close()
+
+    # Button flow (drop-in for OSCSender.send_message)
+
+    def send_message(self, address, value, origin=None):
+        """
+        Act like the QLC+ Toggle button of an OSC path: 1 starts its function,
+        or stops it if the path is on; 0 only stops it
+        """
+        function = self._path_functions.get(address)
+        if function is None:
+            function = self.workspace.function_for_osc_path(address)
+            if function is None:
+                logger.warning("No QLC+ function for OSC path %s", address)
+                return
+            self._path_functions[address] = function
+        with self._condition:
+            if value and address not in self._paths_on:
+                self._paths_on.add(address)
+                self.start_function(function.id, origin)
+            elif address in self._paths_on:
+                self._paths_on.discard(address)
+                self.stop_function(function.id)
+
+    def start_function(self, function_id, origin=None):
+        """Start a Scene, Chaser or Collection"""
+        with self._condition:
+            self._start(function_id, self.clock())
+            if origin is not None:
+                self._pending_origins.append(origin)
+            self._wake = True
+            self._condition.notify()
+        if self._thread is None:
+            self.start()
+
+    def stop_function(self, function_id):
+        """Stop a function started with start_function"""
+        with self._condition:
+            self._stop(function_id)
+            self._wake = True
+            self._condition.notify()
+
+    def running_functions(self):
+        """IDs of running functions"""
+        return sorted(self._runners)
+
+    def _start(self, function_id, now):
+        runner = self._runners.get(function_id)
+        if runner is not None:
+            runner.refs += 1
+            return
+        function = self.workspace.functions.get(function_id)
+        if function is None:
+            return
+        runner = self._runners[function_id] = _Runner(function)
+        if function.type == 'Collection':
+            for step in function.steps:
+                self._start(step['function'], now)
+                runner.children.append(step['function'])
+        elif function_id in self._compiled:
+            runner.compiled = self._compiled[function_id]
+            runner.started = now
+            self._animating += 1
+        elif function.type == 'Chaser' and function.steps:
+            self._enter_step(runner, 0, now)
+        self._render_needed = True
+
+    def _stop(self, function_id, force=False):
+        runner = self._runners.get(function_id)
+        if runner is None:
+            return
+        runner.refs -= 1
+        if runner.refs > 0 and not force:
+            return
+        del self._runners[function_id]
+        if runner.compiled is not None:
+            self._animating -= 1
+        for child in runner.children:
+            self._stop(child)
+        self._render_needed = True
+
+    def _enter_step(self, runner, index, now):
+        for child in runner.children:
+            self._stop(child)
+        step = runner.function.steps[index]
+        runner.index = index
+        runner.children = [step['function']]
+        self._start(step['function'], now)
+        runner.next_step = now + self._step_duration(runner.function, step)
+
+    def _step_duration(self, chaser, step):
+        """Seconds a step of an uncompiled chaser lasts (values switch without fading)"""
+        return max(step_timing(self.workspace, chaser, step)[1] / 1000.0, 1.0 / self.refresh)
+
+    def _advance(self, now):
+        """Step every running chaser whose step time is over"""
+        for runner in list(self._runners.values()):
+            if runner.compiled is not None:
+                if runner.compiled.done((now - runner.started) * 1000.0):
+                    self._stop(runner.function.id, force=True)
+                continue
+            if runner.next_step is None or now < runner.next_step:
+                continue
+            chaser = runner.function
+            count = len(chaser.steps)
+            order = chaser.run_order
+            if order == 'Random':
+                index = random.randrange(count)
+            elif order == 'PingPong' and count > 1:
+                if not 0 <= runner.index + runner.direction < count:
+                    runner.direction = -runner.direction
+                index = runner.index + runner.direction
+            else:
+                index = runner.index + 1
+                if index >= count:
+                    if order == 'SingleShot':
+                        self._stop(chaser.id, force=True)
+                        continue
+                    index = 0
+            self._enter_step(runner, index, now)
+
+    def _render(self, now):
+        """HTP-merge all running scenes and chasers into the universe buffers, marking changes dirty"""
+        self._render_needed = False
+        frame = self._frame
+        frame[:] = bytes(len(frame))
+        for function_id, runner in self._runners.items():
+            if runner.compiled is not None:
+                runner.compiled.render_into(frame, (now - runner.started) * 1000.0)
+                continue
+            for flat, value in self._scene_values.get(function_id, ()):
+                if value > frame[flat]:
+                    frame[flat] = value
+        view = memoryview(frame)
+        for position, uid in enumerate(self.universes):
+            rendered = view[position * DMX_SLOTS:(position + 1) * DMX_SLOTS]
+            if rendered != self.buffers[uid]:
+                self.buffers[uid][:] = rendered
+                self._dirty.add(uid)
+
+    def _run(self):
+        interval = 1.0 / self.refresh
+        next_tick = self.clock()
+        while True:
+            with self._condition:
+                while self._running and not self._wake:
+                    timeout = next_tick - self.clock()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                self._wake = False
+                now = self.clock()
+                self._advance(now)
+                if self._render_needed or self._animating:
+                    self._render(now)
+            self._transmit(now)
+            if now >= next_tick:
+                next_tick = max(next_tick + interval, now)
+
+    def _transmit(self, now):
+        """Send dirty universes, and keep-alives for the rest"""
+        frames = []
+        with self._condition:
+            for uid in self.universes:
+                changed = uid in self._dirty
+                if not changed and now - self._last_sent[uid] < self.keepalive:
+                    continue
+                self._dirty.discard(uid)
+                packet = self._packets[uid]
+                sequence = self._sequence[uid] = self._sequence[uid] % 255 + 1
+                if self.protocol == "artnet":
+                    packet[12] = sequence
+                    packet[ARTNET_DATA_OFFSET:] = self.buffers[uid]
+                else:
+                    packet[111] = sequence
+                    packet[SACN_DATA_OFFSET:] = self.buffers[uid]
+                self._last_sent[uid] = now
+                frames.append((bytes(packet), self._destinations[uid], changed))
+            origins, self._pending_origins = self._pending_origins, []
+
+        for data, destination, changed in frames:
+            try:
+                self._socket.sendto(data, destination)
+                self.frames += 1
+                if changed:
+                    self.change_frames += 1
+                else:
+                    self.keepalive_frames += 1
+                metrics.DMX_FRAMES.inc(kind='change' if changed else 'keepalive')
+            except OSError as e:
+                self.errors += 1
+                logger.warning("DMX send to %s failed: %s", destination, e)
+        if frames:
+            sent_at = self.clock()
+            for origin in origins:
+                metrics.PRESS_TO_SEND.observe(sent_at - origin)
+
+    def get_stats(self):
+        """Output statistics (same endpoint as the OSC sender stats)"""
+        return {
+            "protocol": self.protocol,
+            "universes": self.universes,
+            "frames": self.frames,
+            "change_frames": self.change_frames,
+            "keepalive_frames": self.keepalive_frames,
+            "errors": self.errors,
+            "running_functions": self.running_functions(),
+        }
@@ -0,0 +1,265 @@
+"""
+Chaser Renderer
+Compiles QLC+ Chaser steps and their fade-in/hold/fade-out timing into
+arrays, and computes output frames for all channels of an effect at once.
+Uses NumPy when installed (one vectorized expression per frame, or per
+batch of frames); otherwise a pure-Python fallback with the same results.
+Effects can be pre-rendered into a frame buffer so playback is indexing.
+"""
+
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..logging_setup import get_logger
+
+logger = get_logger("renderer")
+
+HAVE_NUMPY = np is not None
+DMX_SLOTS = 512
+MIN_STEP_MS = 20  # A zero step duration runs one QLC+ engine tick (50 Hz)
+
+
+def step_timing(workspace, chaser, step):
+    """(fade_in, duration, fade_out) in ms of a chaser step, resolving the chaser's speed modes"""
+    child = workspace.functions.get(step['function'])
+    child_speed = child.speed if child is not None else {'fade_in': 0, 'fade_out': 0, 'duration': 0}
+    values = {}
+    for key in ('fade_in', 'fade_out'):
+        mode = chaser.speed_modes.get(key)
+        if mode == 'PerStep':
+            values[key] = step[key]
+        elif mode == 'Default':
+            values[key] = child_speed[key]
+        else:
+            values[key] = chaser.speed[key]
+    mode = chaser.speed_modes.get('duration')
+    if mode == 'PerStep':
+        duration = step['fade_in'] + step['hold']
+    elif mode == 'Default':
+        duration = child_speed['duration']
+    else:
+        duration = chaser.speed['duration']
+    duration = max(duration, MIN_STEP_MS)
+    return min(values['fade_in'], duration), duration, values['fade_out']
+
+
+def step_sequence(chaser, seed=0):
+    """Step indexes of one cycle in run order (PingPong unfolded, Random shuffled)"""
+    count = len(chaser.steps)
+    order = list(range(count))
+    if chaser.direction == 'Backward':
+        order.reverse()
+    if chaser.run_order == 'PingPong' and count > 2:
+        order += order[-2:0:-1]
+    elif chaser.run_order == 'Random':
+        random.Random(seed).shuffle(order)
+    return order
+
+
+def scene_levels(workspace, scene_id, universes):
+    """{flat channel: value} of a scene, flat = universe position * 512 + address"""
+    positions = {uid: i for i, uid in enumerate(universes)}
+    levels = {}
+    function = workspace.functions.get(scene_id)
+    if function is None or function.type != 'Scene':
+        return levels
+    for fixture_id, channel, value in function.values:
+        fixture = workspace.fixtures.get(fixture_id)
+        if fixture is None or fixture['universe'] not in positions:
+            continue
+        slot = fixture['address'] + channel
+        if slot < DMX_SLOTS:
+            flat = positions[fixture['universe']] * DMX_SLOTS + slot
+            levels[flat] = max(levels.get(flat, 0), value)
+    return levels
+
+
+class CompiledChaser:
+    def __init__(self, workspace, chaser, universes, seed=0, use_numpy=None):
+        """
+        Compile a chaser into timing and level arrays
+
+        Args:
+            workspace: Parsed QLC+ workspace
+            chaser: Chaser function whose steps are all Scenes
+            universes: Universe IDs of the output frame (defines flat channel numbers)
+            seed: Shuffle seed for Random run order
+            use_numpy: Force the NumPy (True) or pure-Python (False) path; None = NumPy if installed
+        """
+        if use_numpy and not HAVE_NUMPY:
+            raise RuntimeError("NumPy is not installed")
+        self.function = chaser
+        self.use_numpy = HAVE_NUMPY if use_numpy is None else use_numpy
+        self.loop = chaser.run_order != 'SingleShot'
+
+        sequence = step_sequence(chaser, seed)
+        step_levels = [scene_levels(workspace, chaser.steps[i]['function'], universes) for i in sequence]
+        timings = [step_timing(workspace, chaser, chaser.steps[i]) for i in sequence]
+
+        # Columns: only channels some step touches
+        self.channels = sorted({flat for levels in step_levels for flat in levels})
+        column = {flat: i for i, flat in enumerate(self.channels)}
+        entries = len(sequence)
+        # Rows: one per sequence entry, plus a zero row as "previous" of the very first step
+        levels = [[0] * len(self.channels) for _ in range(entries + 1)]
+        for row, values in zip(levels, step_levels):
+            for flat, value in values.items():
+                row[column[flat]] = value
+
+        starts, fade_in, fade_out_prev = [], [], []
+        elapsed = 0
+        for i, (step_fade_in, duration, _) in enumerate(timings):
+            starts.append(elapsed)
+            fade_in.append(step_fade_in)
+            fade_out_prev.append(timings[i - 1][2])  # The outgoing step fades out while this one fades in
+            elapsed += duration
+        self.cycle_ms = elapsed
+        self.steps = entries
+        prev_loop = [entries - 1] + list(range(entries - 1))
+        prev_first = [entries] + prev_loop[1:]
+
+        if self.use_numpy:
+            self.index = np.array(self.channels, dtype=np.intp)
+            self.levels = np.array(levels, dtype=np.float32)
+            self.starts = np.array(starts, dtype=np.float64)
+            self.fade_in = np.array(fade_in, dtype=np.float64)
+            self.fade_out_prev = np.array(fade_out_prev, dtype=np.float64)
+            self.prev_loop = np.array(prev_loop, dtype=np.intp)
+            self.prev_first = np.array(prev_first, dtype=np.intp)
+        else:
+            self.index = self.channels
+            self.levels = levels
+            self.starts = starts
+            self.fade_in = fade_in
+            self.fade_out_prev = fade_out_prev
+            self.prev_loop = prev_loop
+            self.prev_first = prev_first
+
+    def done(self, t_ms):
+        """True once a SingleShot chaser has run its last step"""
+        return not self.loop and t_ms >= self.cycle_ms
+
+    def frame(self, t_ms):
+        """Channel values (one per column) t_ms after the chaser started"""
+        if self.use_numpy:
+            return self.frames(np.array([t_ms], dtype=np.float64))[0]
+        return self._frame_python(t_ms)
+
+    def frames(self, times_ms):
+        """Values of many instants at once: (len(times), channels) uint8 array (lists without NumPy)"""
+        if not self.use_numpy:
+            return [self._frame_python(t) for t in times_ms]
+        times_ms = np.asarray(times_ms, dtype=np.float64)
+        first_pass = times_ms < self.cycle_ms
+        position = times_ms % self.cycle_ms if self.loop else np.minimum(times_ms, self.cycle_ms - 1e-6)
+        k = np.searchsorted(self.starts, position, side='right') - 1
+        dt = position - self.starts[k]
+        a_in = _ramp(dt, self.fade_in[k])
+        a_out = 1.0 - _ramp(dt, self.fade_out_prev[k])
+        prev = np.where(first_pass, self.prev_first[k], self.prev_loop[k])
+        values = np.maximum(self.levels[k] * a_in[:, None], self.levels[prev] * a_out[:, None])
+        if not self.loop:
+            values[times_ms >= self.cycle_ms] = 0
+        return np.floor(values + 0.5).astype(np.uint8)  # Rounds half up, as the Python path
+
+    def _frame_python(self, t_ms):
+        if not self.loop and t_ms >= self.cycle_ms:
+            return [0] * len(self.channels)
+        position = t_ms % self.cycle_ms
+        k = len(self.starts) - 1
+        while self.starts[k] > position:
+            k -= 1
+        dt = position - self.starts[k]
+        fade_in = self.fade_in[k]
+        fade_out = self.fade_out_prev[k]
+        a_in = min(dt / fade_in, 1.0) if fade_in > 0 else 1.0
+        a_out = max(1.0 - dt / fade_out, 0.0) if fade_out > 0 else 0.0
+        prev = self.prev_first[k] if t_ms < self.cycle_ms else self.prev_loop[k]
+        incoming = self.levels[k]
+        outgoing = self.levels[prev]
+        return [int(max(incoming[i] * a_in, outgoing[i] * a_out) + 0.5) for i in range(len(incoming))]
+
+    def render_into(self, frame, t_ms):
+        """HTP-merge this chaser at t_ms into a flat frame (bytearray or uint8 array of all universes)"""
+        values = self.frame(t_ms)
+        if self.use_numpy:
+            view = np.frombuffer(frame, dtype=np.uint8) if not isinstance(frame, np.ndarray) else frame
+            view[self.index] = np.maximum(view[self.index], values)
+        else:
+            for flat, value in zip(self.index, values):
+                if value > frame[flat]:
+                    frame[flat] = value
+
+    def prerender(self, fps):
+        """Render one pass (and the looping pass) into a FrameBuffer"""
+        count = max(1, int(round(self.cycle_ms * fps / 1000.0)))
+        passes = 2 if self.loop else 1
+        times = [i * 1000.0 / fps for i in range(count * passes)]
+        if self.use_numpy:
+            frames = self.frames(np.array(times))
+        else:
+            frames = [bytes(self._frame_python(t)) for t in times]
+        return FrameBuffer(self, frames, fps, count)
+
+
+def _ramp(dt, length):
+    """Fade progress 0..1 (1 for zero-length fades)"""
+    return np.clip(np.divide(dt, length, out=np.ones_like(dt), where=length > 0), 0.0, 1.0)
+
+
+class FrameBuffer:
+    """Pre-rendered effect: playback is indexing into the frames"""
+
+    def __init__(self, chaser, frames, fps, cycle_frames):
+        self.chaser = chaser
+        self.index = chaser.index
+        self.frames = frames
+        self.fps = fps
+        self.cycle_frames = cycle_frames
+        self.loop = chaser.loop
+
+    @property
+    def nbytes(self):
+        if self.chaser.use_numpy:
+            return self.frames.nbytes
+        return sum(len(frame) for frame in self.frames)
+
+    def frame(self, t_ms):
+        """Pre-rendered values t_ms after the start (None when a SingleShot effect is over)"""
+        i = int(t_ms * self.fps / 1000.0)
+        if i >= self.cycle_frames:
+            if not self.loop:
+                return None
+            i = self.cycle_frames + (i - self.cycle_frames) % self.cycle_frames
+        return self.frames[i]
+
+    def render_into(self, frame, t_ms):
+        """HTP-merge the pre-rendered values at t_ms into a flat frame"""
+        values = self.frame(t_ms)
+        if values is None:
+            return
+        if self.chaser.use_numpy:
+            view = np.frombuffer(frame, dtype=np.uint8) if not isinstance(frame, np.ndarray) else frame
+            view[self.index] = np.maximum(view[self.index], values)
+        else:
+            for flat, value in zip(self.index, values):
+                if value > frame[flat]:
+                    frame[flat] = value
+
+
+def compile_chasers(workspace, universes, seed=0, use_numpy=None):
+    """Compile every chaser whose steps are all Scenes: {function_id: CompiledChaser}"""
+    compiled = {}
+    for function in workspace.find_functions(function_type='Chaser'):
+        if not function.steps:
+            continue
+        if any(getattr(workspace.functions.get(step['function']), 'type', None) != 'Scene'
+               for step in function.steps):
+            logger.debug("Chaser %s has non-scene steps, not compiled", function.name)
+            continue
+        compiled[function.id] = CompiledChaser(workspace, function, universes, seed, use_numpy)
+    return compiled
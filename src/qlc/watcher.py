@@ -0,0 +1,236 @@
+"""
+Workspace Watcher
+Reloads the QLC+ workspace when it is saved: inotify on the file's
+directory (QLC+ and editors often replace the file), or mtime polling
+where inotify is not available. Only the changed sections are reparsed,
+in the watcher thread, and the new workspace is swapped into OSCManager
+with one assignment, so button handling never waits for a reload.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+from .workspace import IncrementalLoader, diff_workspaces, workspace_changed, DEFAULT_CACHE_DIR, SECTIONS
+from ..logging_setup import get_logger
+
+logger = get_logger("qlc.watcher")
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _libc.inotify_init1.argtypes = (ctypes.c_int,)
+    _libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+    HAVE_INOTIFY = True
+except (OSError, AttributeError):
+    _libc = None
+    HAVE_INOTIFY = False
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+class _Inotify:
+    """Minimal inotify watch on one directory (via libc)"""
+
+    def __init__(self, directory, mask=WATCH_MASK):
+        self.fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if _libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def fileno(self):
+        return self.fd
+
+    def read_names(self):
+        """File names with pending events"""
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+                offset += length
+
+    def close(self):
+        os.close(self.fd)
+
+
+class WorkspaceWatcher:
+    def __init__(self, path, osc_manager, interval=2.0, settle=0.5, use_inotify=None,
+                 cache_dir=DEFAULT_CACHE_DIR, on_reload=None):
+        """
+        Initialize the watcher
+
+        Args:
+            path: Workspace file
+            osc_manager: OSCManager that receives the reloaded workspace
+            interval: Seconds between mtime checks in polling mode
+            settle: Seconds without further changes before reloading (saves come in several writes)
+            use_inotify: Force inotify on/off (None = inotify if available)
+            cache_dir: Directory of the on-disk index
+            on_reload: Optional callback(workspace, diff) after a swap
+        """
+        self.path = os.path.abspath(path)
+        self.osc_manager = osc_manager
+        self.interval = interval
+        self.settle = settle
+        self.use_inotify = HAVE_INOTIFY if use_inotify is None else use_inotify
+        self.on_reload = on_reload
+        self.loader = IncrementalLoader(self.path, cache_dir=cache_dir)
+        self.mode = None
+        self._primed = False  # First load compares every section
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = None
+        self._running = False
+
+        # Stats
+        self.reloads = 0
+        self.errors = 0
+        self.last_reload_ms = None
+        self.last_reparsed = ()
+        self.last_diff = None
+        self.last_reload_at = None
+
+    def start(self):
+        """Start the watcher thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="workspace-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the watcher thread and close the wake pipe (safe to call more than once)"""
+        self._running = False
+        if self._wake_w is None:
+            return  # Already stopped: the descriptor numbers may belong to other files by now
+        os.write(self._wake_w, b'\0')
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            if self._thread.is_alive():
+                # Still in a reload; closing the pipe under its select() could hit a reused descriptor
+                logger.warning("Workspace watcher did not stop in time - leaving its wake pipe open")
+                return
+            self._thread = None
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self._wake_r = self._wake_w = None
+
+    def reload(self):
+        """
+        Reparse changed sections and swap the result in if anything differs
+
+        Returns:
+            The diff, or None if nothing changed (or the file could not be parsed)
+        """
+        started = time.perf_counter()
+        try:
+            workspace = self.loader.load()
+        except (OSError, SyntaxError) as e:
+            # ElementTree.ParseError is a SyntaxError: likely a save in progress, the next event retries
+            self.errors += 1
+            logger.warning("Workspace reload failed (%s) - keeping the current one", e)
+            return None
+        if not self.loader.last_reparsed:
+            return None
+        self.last_reparsed = self.loader.last_reparsed
+        current = self.osc_manager.workspace
+        # Sections that were not reparsed are the ones current was built from
+        diff = diff_workspaces(current, workspace, self.last_reparsed if self._primed else SECTIONS)
+        self._primed = True
+        if not workspace_changed(diff):
+            logger.debug("Workspace saved without changes (%.1f ms)", (time.perf_counter() - started) * 1000)
+            self.loader.save(workspace)
+            return None
+        self.last_diff = diff
+        self.osc_manager.set_workspace(workspace)  # One reference swap; readers see old or new
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.loader.save(workspace)
+        self.reloads += 1
+        self.last_reload_ms = elapsed_ms
+        self.last_reload_at = time.time()
+        functions = diff['functions']
+        logger.info("Workspace reloaded in %.1f ms (sections: %s; functions +%d -%d ~%d renamed %d; buttons +%d -%d ~%d)",
+                    elapsed_ms, ', '.join(self.last_reparsed), len(functions['added']), len(functions['removed']),
+                    len(functions['changed']), len(functions['renamed']), len(diff['buttons']['added']),
+                    len(diff['buttons']['removed']), len(diff['buttons']['changed']))
+        if self.on_reload is not None:
+            self.on_reload(workspace, diff)
+        return diff
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _run(self):
+        watch = None
+        if self.use_inotify:
+            try:
+                watch = _Inotify(os.path.dirname(self.path))
+            except OSError as e:
+                logger.warning("inotify unavailable (%s) - polling the workspace every %ss", e, self.interval)
+        self.mode = "inotify" if watch is not None else "poll"
+        logger.info("Watching %s (%s)", self.path, self.mode)
+
+        # Prime the section index (and pick up edits made since startup)
+        last_stat = self._stat()
+        self.reload()
+        name = os.path.basename(self.path)
+        try:
+            while self._running:
+                if watch is not None:
+                    readable, _, _ = select.select([watch, self._wake_r], [], [])
+                    if self._wake_r in readable or name not in watch.read_names():
+                        continue
+                    # Wait until the save is complete (no events for settle seconds)
+                    while self._running:
+                        readable, _, _ = select.select([watch, self._wake_r], [], [], self.settle)
+                        if not readable or self._wake_r in readable:
+                            break
+                        watch.read_names()
+                else:
+                    readable, _, _ = select.select([self._wake_r], [], [], self.interval)
+                    stat = self._stat()
+                    if readable or stat == last_stat or stat is None:
+                        continue
+                    time.sleep(self.settle)
+                    if self._stat() != stat:
+                        continue  # Still being written; check again next interval
+                    last_stat = stat
+                if self._running:
+                    self.reload()
+        finally:
+            # The wake pipe is closed by stop(), which may still write to it
+            if watch is not None:
+                watch.close()
+
+    def get_stats(self):
+        """Watcher mode, reload count and the last diff"""
+        return {
+            'path': self.path,
+            'mode': self.mode,
+            'reloads': self.reloads,
+            'errors': self.errors,
+            'last_reload_ms': self.last_reload_ms,
+            'last_reload_at': self.last_reload_at,
+            'last_reparsed': list(self.last_reparsed),
+            'last_diff': self.last_diff,
+        }
@@ -0,0 +1,550 @@
+"""
+QLC+ Workspace Loader
+Streams a .qxw file with an iterative XML parser and builds in-memory
+indexes: functions by ID/name/type, Virtual Console buttons by caption and
+OSC input channel mappings. Parsed results are cached on disk, keyed by
+file mtime and content hash. IncrementalLoader reparses only the sections
+(universes, functions, Virtual Console) whose bytes changed.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from ..logging_setup import get_logger
+
+logger = get_logger("qlc.workspace")
+
+CACHE_VERSION = 1
+SECTIONS = ('universes', 'functions', 'virtualconsole')
+# Top-level elements of the functions section (QLC+ never nests Fixture or Function in them)
+ENGINE_ITEM = re.compile(rb'<Function\b[^>]*/>|<(Fixture|Function)\b.*?</\1>', re.S)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config", "cache")
+
+
+def osc_channel(path):
+    """
+    QLC+ OSC input channel for an OSC path
+
+    The QLC+ OSC plugin maps every incoming path to a channel with Qt's
+    qChecksum (CRC-16/X.25) of the path bytes.
+    """
+    crc = 0xFFFF
+    for byte in path.encode():
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8408 if crc & 1 else crc >> 1
+    return ~crc & 0xFFFF
+
+
+def _tag(element):
+    """Tag name without the QLC+ XML namespace"""
+    tag = element.tag
+    return tag.rsplit('}', 1)[1] if '}' in tag else tag
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class QLCFunction:
+    __slots__ = ('id', 'type', 'name', 'path', 'speed', 'speed_modes', 'run_order',
+                 'direction', 'steps', 'values')
+
+    def __init__(self, function_id, function_type, name, path=""):
+        self.id = function_id
+        self.type = function_type
+        self.name = name
+        self.path = path
+        self.speed = {'fade_in': 0, 'fade_out': 0, 'duration': 0}  # milliseconds
+        self.speed_modes = {}
+        self.run_order = None
+        self.direction = None
+        self.steps = []  # Chaser/Collection: {'function': id, 'fade_in', 'hold', 'fade_out'}
+        self.values = []  # Scene: (fixture_id, channel, value)
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        function = cls(data['id'], data['type'], data['name'], data['path'])
+        for slot in cls.__slots__[4:]:
+            setattr(function, slot, data[slot])
+        function.values = [tuple(value) for value in function.values]
+        return function
+
+
+class VCButton:
+    __slots__ = ('id', 'caption', 'function_id', 'action', 'inputs')
+
+    def __init__(self, button_id, caption, function_id=None, action=None, inputs=None):
+        self.id = button_id
+        self.caption = caption
+        self.function_id = function_id
+        self.action = action
+        self.inputs = inputs or []  # [(universe, channel)]
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], data['caption'], data['function_id'], data['action'],
+                   [tuple(item) for item in data['inputs']])
+
+
+class Workspace:
+    def __init__(self, universes=None, fixtures=None, functions=None, buttons=None):
+        """
+        Parsed QLC+ workspace with lookup indexes
+
+        Args:
+            universes: {universe_id: {'name', 'input', 'output'}}
+            fixtures: {fixture_id: {'name', 'universe', 'address', 'channels'}}
+            functions: [QLCFunction]
+            buttons: [VCButton]
+        """
+        self.universes = universes or {}
+        self.fixtures = fixtures or {}
+        self.functions = {}
+        self.functions_by_name = {}
+        self.functions_by_type = {}
+        self.buttons = []
+        self.buttons_by_caption = {}
+        self.buttons_by_input = {}
+        for function in functions or ():
+            self.add_function(function)
+        for button in buttons or ():
+            self.add_button(button)
+
+    def add_function(self, function):
+        self.functions[function.id] = function
+        self.functions_by_name.setdefault(function.name.lower(), []).append(function)
+        self.functions_by_type.setdefault(function.type, []).append(function)
+
+    def add_button(self, button):
+        self.buttons.append(button)
+        self.buttons_by_caption.setdefault(button.caption.lower(), []).append(button)
+        for universe, channel in button.inputs:
+            self.buttons_by_input.setdefault((universe, channel), []).append(button)
+
+    @property
+    def osc_universes(self):
+        """Universe IDs with the OSC input plugin"""
+        return [uid for uid, universe in self.universes.items()
+                if (universe.get('input') or {}).get('plugin') == 'OSC']
+
+    def find_functions(self, name=None, function_type=None):
+        """Functions filtered by (case-insensitive substring of) name and type"""
+        candidates = self.functions_by_type.get(function_type, []) if function_type else self.functions.values()
+        if name:
+            needle = name.lower()
+            return [f for f in candidates if needle in f.name.lower()]
+        return list(candidates)
+
+    def buttons_for_osc_path(self, path):
+        """VC buttons that an OSC message to path triggers"""
+        channel = osc_channel(path)
+        buttons = []
+        for universe in self.osc_universes:
+            buttons.extend(self.buttons_by_input.get((universe, channel), ()))
+        return buttons
+
+    def function_for_osc_path(self, path):
+        """QLC+ function started by an OSC message to path (or None)"""
+        for button in self.buttons_for_osc_path(path):
+            if button.function_id in self.functions:
+                return self.functions[button.function_id]
+        return None
+
+    def osc_buttons(self):
+        """VC buttons with an input on an OSC universe: [(button, channel)]"""
+        osc = set(self.osc_universes)
+        return [(button, channel) for button in self.buttons
+                for universe, channel in button.inputs if universe in osc]
+
+    def to_dict(self):
+        return {
+            'universes': {str(uid): universe for uid, universe in self.universes.items()},
+            'fixtures': {str(fid): fixture for fid, fixture in self.fixtures.items()},
+            'functions': [function.to_dict() for function in self.functions.values()],
+            'buttons': [button.to_dict() for button in self.buttons],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            universes={int(uid): universe for uid, universe in data['universes'].items()},
+            fixtures={int(fid): fixture for fid, fixture in data['fixtures'].items()},
+            functions=[QLCFunction.from_dict(item) for item in data['functions']],
+            buttons=[VCButton.from_dict(item) for item in data['buttons']],
+        )
+
+
+def parse_workspace(source):
+    """
+    Parse a .qxw workspace (path or file object) with iterparse
+
+    Elements are cleared as soon as they are consumed, so memory stays
+    proportional to the largest single function, not the file.
+    """
+    universes = {}
+    fixtures = {}
+    functions = []
+    buttons = []
+    stack = []
+    button_stack = []  # Open VC buttons (frames can nest them)
+    current_function = None
+    current_universe = None
+
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        tag = _tag(element)
+        if event == 'start':
+            parent = stack[-1] if stack else None
+            stack.append(tag)
+            in_engine = len(stack) >= 2 and stack[1] == 'Engine' and stack[0] == 'Workspace'
+            if tag == 'Function' and parent == 'Engine' and in_engine:
+                current_function = QLCFunction(_int(element.get('ID')), element.get('Type', ''),
+                                               element.get('Name', ''), element.get('Path', ''))
+            elif tag == 'Universe' and parent == 'InputOutputMap':
+                current_universe = {'name': element.get('Name', ''), 'input': None, 'output': None}
+                universes[_int(element.get('ID'))] = current_universe
+            elif tag == 'Button' and 'VirtualConsole' in stack:
+                button_stack.append(VCButton(_int(element.get('ID')), element.get('Caption', '')))
+            continue
+
+        stack.pop()
+        parent = stack[-1] if stack else None
+
+        if current_universe is not None and tag in ('Input', 'Output') and parent == 'Universe':
+            patch = {'plugin': element.get('Plugin'), 'uid': element.get('UID'),
+                     'line': _int(element.get('Line')), 'parameters': {}}
+            for child in element:
+                if _tag(child) == 'PluginParameters':
+                    patch['parameters'] = dict(child.attrib)
+            current_universe[tag.lower()] = patch
+        elif tag == 'Universe' and parent == 'InputOutputMap':
+            current_universe = None
+        elif tag == 'Fixture' and parent == 'Engine':
+            fixture = {child_tag: child.text for child in element for child_tag in (_tag(child),)}
+            fixtures[_int(fixture.get('ID'))] = {
+                'name': fixture.get('Name', ''),
+                'universe': _int(fixture.get('Universe')),
+                'address': _int(fixture.get('Address')),
+                'channels': _int(fixture.get('Channels'), 1),
+            }
+            element.clear()
+        elif current_function is not None and parent == 'Function':
+            if tag == 'Speed':
+                current_function.speed = {'fade_in': _int(element.get('FadeIn')),
+                                          'fade_out': _int(element.get('FadeOut')),
+                                          'duration': _int(element.get('Duration'))}
+            elif tag == 'SpeedModes':
+                current_function.speed_modes = {'fade_in': element.get('FadeIn'),
+                                                'fade_out': element.get('FadeOut'),
+                                                'duration': element.get('Duration')}
+            elif tag == 'RunOrder':
+                current_function.run_order = element.text
+            elif tag == 'Direction':
+                current_function.direction = element.text
+            elif tag == 'Step':
+                current_function.steps.append({'function': _int(element.text),
+                                               'fade_in': _int(element.get('FadeIn')),
+                                               'hold': _int(element.get('Hold')),
+                                               'fade_out': _int(element.get('FadeOut'))})
+            elif tag == 'FixtureVal':
+                numbers = [_int(n) for n in (element.text or '').split(',') if n.strip()]
+                fixture_id = _int(element.get('ID'))
+                for channel, value in zip(numbers[::2], numbers[1::2]):
+                    current_function.values.append((fixture_id, channel, value))
+        elif tag == 'Function' and current_function is not None and parent == 'Engine':
+            functions.append(current_function)
+            current_function = None
+            element.clear()
+        elif button_stack and parent == 'Button':
+            button = button_stack[-1]
+            if tag == 'Function':
+                button.function_id = _int(element.get('ID'), None)
+            elif tag == 'Action':
+                button.action = element.text
+            elif tag == 'Input':
+                button.inputs.append((_int(element.get('Universe')), _int(element.get('Channel'))))
+        elif tag == 'Button' and button_stack:
+            buttons.append(button_stack.pop())
+            element.clear()
+
+    return Workspace(universes, fixtures, functions, buttons)
+
+
+def file_digest(path):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(path, cache_dir):
+    name = os.path.basename(path)
+    return os.path.join(cache_dir, f"{name}.index.json")
+
+
+def load_workspace(path, cache_dir=DEFAULT_CACHE_DIR, use_cache=True):
+    """
+    Load a workspace, reusing the on-disk index when the file is unchanged
+
+    The cache is valid if mtime and size match; if only the mtime changed,
+    the content hash decides (and the cache entry is refreshed).
+    """
+    stat = os.stat(path)
+    cache_file = _cache_path(path, cache_dir)
+    cached = None
+    if use_cache:
+        try:
+            with open(cache_file) as f:
+                cached = json.load(f)
+            if cached.get('version') != CACHE_VERSION:
+                cached = None
+        except (OSError, ValueError):
+            cached = None
+
+    if cached is not None:
+        if cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            logger.debug("Workspace index cache hit (mtime) for %s", path)
+            return Workspace.from_dict(cached['workspace'])
+        digest = file_digest(path)
+        if cached['sha1'] == digest:
+            logger.debug("Workspace index cache hit (hash) for %s", path)
+            _write_cache(cache_file, stat, digest, cached['workspace'])
+            return Workspace.from_dict(cached['workspace'])
+    else:
+        digest = file_digest(path)
+
+    workspace = parse_workspace(path)
+    logger.info("Parsed workspace %s: %d functions, %d VC buttons", path, len(workspace.functions), len(workspace.buttons))
+    if use_cache:
+        _write_cache(cache_file, stat, digest, workspace.to_dict())
+    return workspace
+
+
+def _write_cache(cache_file, stat, digest, workspace_data):
+    """Write the index atomically (temp file + rename)"""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = f"{cache_file}.tmp"
+        # json.dumps runs the C encoder; json.dump to a file would encode in Python
+        document = json.dumps({'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                               'sha1': digest, 'workspace': workspace_data}, separators=(',', ':'))
+        with open(tmp, 'w') as f:
+            f.write(document)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        logger.warning("Could not write workspace cache %s: %s", cache_file, e)
+
+
+def split_sections(data):
+    """
+    Split raw .qxw bytes into independently parseable sections
+
+    Returns:
+        (Workspace start tag, {'universes': bytes, 'functions': bytes, 'virtualconsole': bytes});
+        'functions' is the Engine without its InputOutputMap (fixtures, functions)
+
+    Raises:
+        ValueError if a section boundary is missing
+    """
+    def find(needle, start=0):
+        index = data.find(needle, start)
+        if index < 0:
+            raise ValueError(f"{needle.decode()} not found")
+        return index
+
+    workspace_start = find(b'<Workspace')
+    workspace_tag = data[workspace_start:find(b'>', workspace_start) + 1]
+    engine = find(b'>', find(b'<Engine', workspace_start)) + 1
+    engine_end = find(b'</Engine>', engine)
+    try:
+        io_map = find(b'<InputOutputMap', engine)
+        io_map_end = find(b'</InputOutputMap>', io_map) + len(b'</InputOutputMap>')
+        if io_map_end > engine_end:
+            raise ValueError("InputOutputMap outside the Engine")
+    except ValueError:
+        io_map = io_map_end = engine  # No universes configured
+    console = data.find(b'<VirtualConsole', engine_end)
+    console_end = data.find(b'</VirtualConsole>', console) + len(b'</VirtualConsole>') if console >= 0 else -1
+    return workspace_tag, {
+        'universes': data[io_map:io_map_end],
+        'functions': data[engine:io_map] + data[io_map_end:engine_end],
+        'virtualconsole': data[console:console_end] if console >= 0 and console_end > console else b'',
+    }
+
+
+def parse_section(name, fragment, workspace_tag=b'<Workspace>'):
+    """Parse one section from split_sections; returns the part Workspace() takes for it"""
+    if name == 'virtualconsole':
+        document = workspace_tag + fragment + b'</Workspace>'
+    else:
+        document = workspace_tag + b'<Engine>' + fragment + b'</Engine></Workspace>'
+    workspace = parse_workspace(io.BytesIO(document))
+    if name == 'universes':
+        return workspace.universes
+    if name == 'functions':
+        return workspace.fixtures, list(workspace.functions.values())
+    return workspace.buttons
+
+
+def diff_workspaces(old, new, sections=SECTIONS):
+    """
+    What changed between two workspaces
+
+    Args:
+        old: Current workspace (None = everything is new)
+        new: Reloaded workspace
+        sections: Sections to compare (the others are known to be unchanged)
+
+    Returns:
+        {'functions': {'added', 'removed', 'renamed', 'changed'}, 'buttons': {'added', 'removed', 'changed'},
+         'universes': bool, 'fixtures': bool}; lists hold IDs, renamed holds (id, old name, new name)
+    """
+    diff = {
+        'functions': {'added': [], 'removed': [], 'renamed': [], 'changed': []},
+        'buttons': {'added': [], 'removed': [], 'changed': []},
+        'universes': old is None or ('universes' in sections and old.universes != new.universes),
+        'fixtures': old is None or ('functions' in sections and old.fixtures != new.fixtures),
+    }
+    if old is None or 'functions' in sections:
+        old_functions = old.functions if old is not None else {}
+        diff['functions'] = {
+            'added': sorted(set(new.functions) - set(old_functions)),
+            'removed': sorted(set(old_functions) - set(new.functions)),
+            'renamed': [(fid, old_functions[fid].name, function.name) for fid, function in new.functions.items()
+                        if fid in old_functions and old_functions[fid].name != function.name],
+            'changed': sorted(fid for fid, function in new.functions.items()
+                              if fid in old_functions and old_functions[fid] is not function
+                              and old_functions[fid].to_dict() != function.to_dict()),
+        }
+    if old is None or 'virtualconsole' in sections:
+        old_buttons = {button.id: button for button in old.buttons} if old is not None else {}
+        new_buttons = {button.id: button for button in new.buttons}
+        diff['buttons'] = {
+            'added': sorted(set(new_buttons) - set(old_buttons)),
+            'removed': sorted(set(old_buttons) - set(new_buttons)),
+            'changed': sorted(bid for bid, button in new_buttons.items()
+                              if bid in old_buttons and old_buttons[bid].to_dict() != button.to_dict()),
+        }
+    return diff
+
+
+def workspace_changed(diff):
+    """True if diff_workspaces found any difference"""
+    return (diff['universes'] or diff['fixtures']
+            or any(diff['functions'].values()) or any(diff['buttons'].values()))
+
+
+class IncrementalLoader:
+    def __init__(self, path, cache_dir=DEFAULT_CACHE_DIR, use_cache=True):
+        """
+        Initialize the loader
+
+        Args:
+            path: Workspace file
+            cache_dir: Directory of the on-disk index (refreshed by save())
+            use_cache: Write the on-disk index
+        """
+        self.path = path
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self._sections = {}  # name -> (sha1 of the section bytes, parsed part)
+        self._items = {}  # Element bytes -> ('fixture', id, fixture) or QLCFunction
+        self._loaded = None  # (stat, sha1) of the file behind the last load
+        self.last_reparsed = ()
+        self.last_items_parsed = 0
+
+    def load(self):
+        """
+        Read the file and reparse the sections whose bytes changed since the last load
+
+        The on-disk index is not written here (save() does that), so callers
+        can apply the result first.
+
+        Returns:
+            Workspace built from the current sections
+        """
+        stat = os.stat(self.path)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        try:
+            workspace_tag, fragments = split_sections(data)
+        except ValueError as e:
+            logger.warning("Workspace %s not split into sections (%s) - full parse", self.path, e)
+            self._sections = {}
+            self.last_reparsed = SECTIONS
+            workspace = parse_workspace(io.BytesIO(data))
+        else:
+            reparsed = []
+            for name in SECTIONS:
+                digest = hashlib.sha1(fragments[name]).hexdigest()
+                cached = self._sections.get(name)
+                if cached is None or cached[0] != digest:
+                    if name == 'functions':
+                        part = self._parse_engine_items(fragments[name], workspace_tag)
+                    else:
+                        part = parse_section(name, fragments[name], workspace_tag)
+                    self._sections[name] = (digest, part)
+                    reparsed.append(name)
+            self.last_reparsed = tuple(reparsed)
+            fixtures, functions = self._sections['functions'][1]
+            workspace = Workspace(self._sections['universes'][1], fixtures, functions,
+                                  self._sections['virtualconsole'][1])
+        self._loaded = (stat, hashlib.sha1(data).hexdigest())
+        return workspace
+
+    def _parse_engine_items(self, fragment, workspace_tag):
+        """
+        Parse the functions section element by element
+
+        Fixtures and functions whose bytes were seen before are reused (the
+        same objects), the rest is parsed in one document.
+        """
+        items = [match.group() for match in ENGINE_ITEM.finditer(fragment)]
+        new_items = [item for item in dict.fromkeys(items) if item not in self._items]
+        self.last_items_parsed = len(new_items)
+        if new_items:
+            fixtures, functions = parse_section('functions', b''.join(new_items), workspace_tag)
+            new_fixtures = [item for item in new_items if item.startswith(b'<Fixture')]
+            new_functions = [item for item in new_items if not item.startswith(b'<Fixture')]
+            if len(new_fixtures) != len(fixtures) or len(new_functions) != len(functions):
+                # Duplicate IDs or elements the item pattern did not split cleanly
+                self._items = {}
+                return parse_section('functions', fragment, workspace_tag)
+            for item, (fixture_id, fixture) in zip(new_fixtures, fixtures.items()):
+                self._items[item] = ('fixture', fixture_id, fixture)
+            self._items.update(zip(new_functions, functions))
+        if len(self._items) > len(items):
+            # Forget elements that are gone from the file
+            current = set(items)
+            self._items = {item: parsed for item, parsed in self._items.items() if item in current}
+
+        fixtures = {}
+        functions = []
+        for item in items:
+            parsed = self._items[item]
+            if isinstance(parsed, tuple):
+                fixtures[parsed[1]] = parsed[2]
+            else:
+                functions.append(parsed)
+        return fixtures, functions
+
+    def save(self, workspace):
+        """Refresh the on-disk index with the workspace from the last load()"""
+        if self.use_cache and self._loaded is not None:
+            stat, digest = self._loaded
+            _write_cache(_cache_path(self.path, self.cache_dir), stat, digest, workspace.to_dict())
@@ -0,0 +1,324 @@
+"""
+Simulation Harness
+Deterministic replay of button input traces on a virtual monotonic clock.
+Mock GPIO edges, the debouncer, effect/block timers and the LED engine
+all run on simulated time in the calling thread, so an evening of
+presses replays in seconds. Every GPIO write, OSC send and controller
+event is recorded on a timeline.
+"""
+
+import heapq
+import itertools
+import json
+import random
+
+from .gpio.debounce import DEFAULT_SETTLE, DEFAULT_MIN_HOLD
+from .gpio.mock_gpio import GPIO
+from .controllers.button_controller import ButtonController
+from .controllers.led_controller import LEDController
+from .controllers.led_patterns import LEDPatternEngine
+from .managers.osc_manager import OSCManager
+from .managers.scheduler import TimerScheduler
+
+BUTTON_PIN = 16
+LED_PINS = {
+    "led_green": 26,
+    "led_red": 13
+}
+DEFAULT_HOLD = 0.15  # seconds a 'tap' holds the button
+TRACE_ACTIONS = ('press', 'release', 'tap', 'enable', 'disable', 'timing', 'scene', 'tempo', 'beat')
+
+
+class VirtualClock:
+    """Monotonic clock that only moves when the simulation advances it"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, t):
+        if t > self.now:
+            self.now = t
+
+
+class VirtualScheduler(TimerScheduler):
+    """TimerScheduler on a virtual clock, run by the simulation instead of a thread"""
+
+    def __init__(self, clock):
+        super().__init__(clock=clock, name="virtual-scheduler")
+
+    def start(self):
+        pass  # Callbacks run from run_due()
+
+    def next_deadline(self):
+        """Deadline of the earliest pending callback, or None"""
+        with self._condition:
+            entry = self._peek()
+            return entry[0] if entry is not None else None
+
+    def run_due(self):
+        """Run every callback due at the current virtual time, in deadline order"""
+        count = 0
+        while True:
+            with self._condition:
+                entry = self._peek()
+                if entry is None or entry[0] > self.clock():
+                    return count
+                handle = self._take(entry)
+            self._dispatch(handle)
+            count += 1
+
+
+class VirtualLEDEngine(LEDPatternEngine):
+    """LED pattern engine ticked by the simulation instead of its own thread"""
+
+    def start(self):
+        pass
+
+
+class Timeline:
+    """Recorded (time, kind, data) entries: 'gpio' writes, 'osc' sends, controller 'event's"""
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, t, kind, **data):
+        self.entries.append((t, kind, data))
+
+    def of_kind(self, kind, **match):
+        """Entries of one kind whose data contains all match items"""
+        return [entry for entry in self.entries
+                if entry[1] == kind and all(entry[2].get(key) == value for key, value in match.items())]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def as_list(self):
+        return [{'t': round(t, 6), 'kind': kind, **data} for t, kind, data in self.entries]
+
+    def dump(self, path):
+        """Write the timeline as JSON lines"""
+        with open(path, 'w') as f:
+            for entry in self.as_list():
+                f.write(json.dumps(entry) + '\n')
+
+
+class RecordingGPIO:
+    """GPIO proxy that records every output write on the timeline"""
+
+    def __init__(self, gpio, timeline, clock):
+        self._gpio = gpio
+        self._timeline = timeline
+        self._clock = clock
+
+    def __getattr__(self, name):
+        return getattr(self._gpio, name)
+
+    def output(self, pin, state):
+        self._timeline.record(self._clock(), 'gpio', pin=pin, state=state)
+        self._gpio.output(pin, state)
+
+
+class RecordingOSCClient:
+    """Stand-in for OSCSender that records sends instead of transmitting"""
+
+    def __init__(self, timeline, clock):
+        self._timeline = timeline
+        self._clock = clock
+        self.sent = 0
+
+    def send_message(self, address, value, origin=None):
+        self.sent += 1
+        self._timeline.record(self._clock(), 'osc', address=address, value=value)
+
+    def get_stats(self):
+        return {'sent': self.sent}
+
+    def close(self):
+        pass
+
+
+def parse_trace(lines):
+    """
+    Parse an input trace: one '<seconds> <action> [args]' per line, '#' comments
+
+    Actions: press, release, tap [hold], enable, disable,
+    timing <block> <effect>, scene <path_id>,
+    tempo <bpm> [quantize beats], beat (tap tempo)
+
+    Returns:
+        [(t, action, args)] sorted by time
+    """
+    trace = []
+    for number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        fields = line.split()
+        if len(fields) < 2 or fields[1] not in TRACE_ACTIONS:
+            raise ValueError(f"Line {number}: expected '<seconds> <action> [args]', got {line!r}")
+        trace.append((float(fields[0]), fields[1], tuple(float(arg) for arg in fields[2:])))
+    trace.sort(key=lambda item: item[0])
+    return trace
+
+
+def load_trace(path):
+    """Read a trace file (see parse_trace)"""
+    with open(path) as f:
+        return parse_trace(f)
+
+
+def synthetic_evening(hours=5.0, presses=300, seed=0, hold=DEFAULT_HOLD):
+    """Random taps spread over an evening, with bursts of impatient repeat presses"""
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(presses):
+        t = rng.uniform(0, hours * 3600)
+        trace.append((t, 'tap', (hold,)))
+        for _ in range(rng.choice((0, 0, 0, 1, 2))):
+            t += rng.uniform(0.5, 5.0)
+            trace.append((t, 'tap', (hold,)))
+    trace.sort(key=lambda item: item[0])
+    return trace
+
+
+class Simulation:
+    def __init__(self, block_delay=None, effect_duration=None, input_mode="edge", poll_interval=0.1,
+                 debounce_settle=DEFAULT_SETTLE, debounce_min_hold=DEFAULT_MIN_HOLD,
+                 button_pin=BUTTON_PIN, led_pins=None, start=0.0):
+        """
+        Initialize the simulated system (mock GPIO, button controller, LEDs, recorded OSC)
+
+        Args:
+            block_delay: Seconds the button is blocked after a press (None = OSCManager default)
+            effect_duration: Seconds until the effect off message (None = OSCManager default)
+            input_mode: "edge" or "poll"
+            poll_interval: Seconds between samples in poll mode
+            debounce_settle: Debounce settle window (seconds)
+            debounce_min_hold: Glitch filter minimum hold (seconds)
+            button_pin: Button input pin
+            led_pins: LED name -> pin
+            start: Virtual time the simulation starts at
+        """
+        self.clock = VirtualClock(start)
+        self.scheduler = VirtualScheduler(self.clock)
+        self.timeline = Timeline()
+        self.button_pin = button_pin
+
+        GPIO.cleanup()
+        GPIO.use_clock(self.clock)
+        self.gpio = RecordingGPIO(GPIO, self.timeline, self.clock)
+        self.led_engine = VirtualLEDEngine(clock=self.clock)
+        self.led_controller = LEDController(self.gpio, led_pins or LED_PINS, engine=self.led_engine)
+        self.osc_manager = OSCManager()
+        self.osc_manager.tempo.clock = self.clock
+        if block_delay is not None or effect_duration is not None:
+            self.osc_manager.set_timing(self.osc_manager.current_delay if block_delay is None else block_delay,
+                                        self.osc_manager.current_osc_off_delay if effect_duration is None else effect_duration)
+        self.osc_client = RecordingOSCClient(self.timeline, self.clock)
+        self.controller = ButtonController(self.gpio, button_pin, self.osc_client, self.osc_manager,
+                                           self.led_controller, scheduler=self.scheduler,
+                                           debounce_settle=debounce_settle, debounce_min_hold=debounce_min_hold,
+                                           clock=self.clock)
+        self.controller.add_listener(lambda event, data: self.timeline.record(self.clock(), 'event', event=event, **data))
+
+        self._inputs = []  # heap of (t, seq, action, args)
+        self._seq = itertools.count()
+        self._led_next = None
+        self._poll_handle = None
+        if input_mode == "edge":
+            self.controller.start_edge_detection()
+        else:
+            self.controller.enable_tap_latch()
+            self._poll_handle = self.scheduler.call_every(poll_interval, self.controller.process_button)
+
+    def schedule(self, t, action, *args):
+        """Add one input action at virtual time t"""
+        if action not in TRACE_ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        heapq.heappush(self._inputs, (t, next(self._seq), action, args))
+
+    def load(self, trace):
+        """Add all actions of a parsed trace"""
+        for t, action, args in trace:
+            self.schedule(t, action, *args)
+        return self
+
+    def _apply(self, action, args):
+        if action == 'press':
+            GPIO.set_input(self.button_pin, GPIO.LOW)
+        elif action == 'release':
+            GPIO.set_input(self.button_pin, GPIO.HIGH)
+        elif action == 'tap':
+            GPIO.set_input(self.button_pin, GPIO.LOW)
+            self.schedule(self.clock() + (args[0] if args else DEFAULT_HOLD), 'release')
+        elif action == 'enable':
+            self.controller.set_button_enabled(True)
+        elif action == 'disable':
+            self.controller.set_button_enabled(False)
+        elif action == 'timing':
+            self.osc_manager.set_timing(args[0], args[1])
+        elif action == 'scene':
+            self.osc_manager.set_button_path(int(args[0]))
+        elif action == 'tempo':
+            self.osc_manager.set_tempo(args[0], args[1] if len(args) > 1 else None)
+        elif action == 'beat':
+            self.osc_manager.tap_tempo()
+
+    def _busy(self):
+        """True while timers other than the poll loop, or LED animations, are pending"""
+        timers = self.scheduler.pending() - (1 if self._poll_handle is not None else 0)
+        return timers > 0 or self._led_next is not None
+
+    def run(self, until=None):
+        """
+        Replay scheduled input
+
+        Args:
+            until: Virtual time to stop at (None = when all input is replayed and the system is idle)
+
+        Returns:
+            The timeline
+        """
+        while True:
+            candidates = [t for t in (self._inputs[0][0] if self._inputs else None,
+                                      self.scheduler.next_deadline(), self._led_next) if t is not None]
+            if not candidates:
+                break
+            t = min(candidates)
+            if until is not None and t > until:
+                break
+            if until is None and not self._inputs and not self._busy():
+                break
+            self.clock.advance_to(t)
+            while self._inputs and self._inputs[0][0] <= self.clock():
+                _, _, action, args = heapq.heappop(self._inputs)
+                self._apply(action, args)
+            self.scheduler.run_due()
+            self._led_next = self.led_engine.tick(self.clock())
+            if self._led_next is not None:
+                # Like the engine thread: never re-evaluate sooner than one tick
+                self._led_next = max(self._led_next, self.clock() + self.led_engine.tick_interval)
+        if until is not None:
+            self.clock.advance_to(until)
+        return self.timeline
+
+    def summary(self):
+        """Counts of what happened during the replay"""
+        return {
+            'duration_s': self.clock(),
+            'presses': len(self.timeline.of_kind('event', event='press')),
+            'rejected': len(self.timeline.of_kind('event', event='press_rejected')),
+            'osc_sent': len(self.timeline.of_kind('osc')),
+            'gpio_writes': len(self.timeline.of_kind('gpio')),
+            'debounce': dict(self.controller.debouncer.stats),
+        }
+
+    def close(self):
+        """Stop input handling and restore the mock GPIO to real time"""
+        if self._poll_handle is not None:
+            self._poll_handle.cancel()
+        self.controller.cleanup()
+        GPIO.cleanup()
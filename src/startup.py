@@ -0,0 +1,96 @@
+"""
+Startup Report
+Per-phase timing of the boot sequence, and background loading of the
+modules that the button path does not need (web interface)
+"""
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    def __init__(self, origin=None, clock=time.monotonic):
+        """
+        Initialize the report
+
+        Args:
+            origin: Clock value the phases are measured from (process start)
+            clock: Monotonic clock function
+        """
+        self.clock = clock
+        self.origin = clock() if origin is None else origin
+        self.phases = []  # (name, start offset, duration) in seconds
+        self.marks = {}   # name -> offset in seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one phase"""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, start, self.clock())
+
+    def record(self, name, start, end):
+        """Add a phase measured elsewhere (e.g. in a background thread)"""
+        self.phases.append((name, start - self.origin, end - start))
+
+    def mark(self, name):
+        """Record the time a milestone was reached (e.g. 'button_ready')"""
+        self.marks[name] = self.clock() - self.origin
+        return self.marks[name]
+
+    def as_dict(self):
+        return {
+            'phases': [{'name': name, 'start_ms': round(start * 1000, 2), 'duration_ms': round(duration * 1000, 2)}
+                       for name, start, duration in self.phases],
+            'marks_ms': {name: round(offset * 1000, 2) for name, offset in self.marks.items()},
+        }
+
+    def format(self):
+        """Human-readable report lines"""
+        lines = [f"   {name:<12} {duration * 1000:8.1f} ms  (at {start * 1000:7.1f} ms)"
+                 for name, start, duration in self.phases]
+        lines += [f"   {name:<12} {offset * 1000:8.1f} ms" for name, offset in self.marks.items()]
+        return lines
+
+
+class BackgroundImport:
+    def __init__(self, *module_names):
+        """
+        Import modules in a daemon thread
+
+        Args:
+            module_names: Absolute module names to import
+        """
+        self.module_names = module_names
+        self.modules = {}
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._thread = threading.Thread(target=self._run, name="background-import", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        self.started = time.monotonic()
+        try:
+            for name in self.module_names:
+                self.modules[name] = importlib.import_module(name)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = time.monotonic()
+
+    def result(self, timeout=None):
+        """Wait for the imports; returns {name: module} or raises the import error"""
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError(f"Background import of {', '.join(self.module_names)} did not finish")
+        if self.error is not None:
+            raise self.error
+        return self.modules
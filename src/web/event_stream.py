@@ -0,0 +1,259 @@
+"""
+Status Event Stream
+Server-Sent Events push channel for the web UI. One selector thread serves
+every connected dashboard: a snapshot on connect, then compact state-change
+events (press, block start/end, effect on/off, config change).
+"""
+
+import itertools
+import json
+import selectors
+import socket
+import threading
+import time
+
+from ..logging_setup import get_logger
+
+logger = get_logger("web.events")
+
+RESPONSE_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"\r\n"
+    b"retry: 2000\n\n"
+)
+NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+HEARTBEAT = b": ping\n\n"
+
+
+def status_snapshot(button_controller, osc_manager, qlc_feedback=None, cue_engine=None):
+    """Full state sent to a dashboard when it connects"""
+    return {
+        "state": button_controller.state,
+        "button_enabled": button_controller.button_enabled,
+        "blocked": button_controller.is_button_blocked,
+        "block_remaining": button_controller.block_remaining(),
+        "effect_running": button_controller.effect_running,
+        "held": button_controller.is_held,
+        "current_scene": osc_manager.get_button_path(),
+        "scene_id": osc_manager.current_path,
+        "current_delay": osc_manager.current_delay,
+        "current_osc_off_delay": osc_manager.current_osc_off_delay,
+        "qlc_status": qlc_feedback.status if qlc_feedback is not None else None,
+        "cue_lists_running": cue_engine.running_lists() if cue_engine is not None else [],
+    }
+
+
+class _Client:
+    __slots__ = ('sock', 'inbuf', 'outbuf', 'streaming')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbuf = b''
+        self.outbuf = bytearray()
+        self.streaming = False
+
+
+class StatusStreamServer:
+    def __init__(self, host, port, snapshot, max_clients=64, heartbeat=15.0, max_buffer=64 * 1024):
+        """
+        Initialize the SSE server
+
+        Args:
+            host: Interface to listen on
+            port: TCP port (0 picks a free port)
+            snapshot: Callable returning the state dict sent on connect
+            max_clients: Maximum concurrent dashboards
+            heartbeat: Seconds between keep-alive comments
+            max_buffer: Drop clients whose unsent data exceeds this (bytes)
+        """
+        self.host = host
+        self.port = port
+        self.snapshot = snapshot
+        self.max_clients = max_clients
+        self.heartbeat = heartbeat
+        self.max_buffer = max_buffer
+        self._ids = itertools.count(1)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._selector = None
+        self._listener = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = None
+        self._running = False
+
+    @property
+    def client_count(self):
+        return sum(1 for client in self._clients.values() if client.streaming)
+
+    def start(self):
+        """Bind the socket and start the selector thread"""
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self.host, self.port))
+        self._listener.listen(16)
+        self._listener.setblocking(False)
+        self.port = self._listener.getsockname()[1]
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, 'accept')
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, 'wake')
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="status-stream", daemon=True)
+        self._thread.start()
+        logger.info("Status stream listening on port %s", self.port)
+
+    def stop(self):
+        """Close all connections and stop the thread"""
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def publish(self, event, data=None):
+        """Queue an event for every connected dashboard (callable from any thread)"""
+        frame = self._frame(event, data or {})
+        with self._lock:
+            self._pending.append(frame)
+        self._wake()
+
+    def _frame(self, event, data):
+        payload = json.dumps(data, separators=(',', ':'))
+        return f"id: {next(self._ids)}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self):
+        next_heartbeat = time.monotonic() + self.heartbeat
+        while self._running:
+            for key, mask in self._selector.select(timeout=max(0.0, next_heartbeat - time.monotonic())):
+                if key.data == 'accept':
+                    self._accept()
+                elif key.data == 'wake':
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    client = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(client)
+                    if mask & selectors.EVENT_WRITE and client.sock.fileno() != -1:
+                        self._flush(client)
+
+            with self._lock:
+                frames, self._pending = self._pending, []
+            if time.monotonic() >= next_heartbeat:
+                frames.append(HEARTBEAT)
+                next_heartbeat = time.monotonic() + self.heartbeat
+            if frames:
+                data = b''.join(frames)
+                for client in list(self._clients.values()):
+                    if client.streaming:
+                        client.outbuf += data
+                        self._flush(client)
+
+        for client in list(self._clients.values()):
+            self._close(client)
+        self._selector.close()
+        self._listener.close()
+
+    def _accept(self):
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        if len(self._clients) >= self.max_clients:
+            sock.close()
+            return
+        sock.setblocking(False)
+        client = _Client(sock)
+        self._clients[sock.fileno()] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(client)
+            return
+        if client.streaming:
+            return  # Ignore anything sent after the request
+        client.inbuf += data
+        if b'\r\n\r\n' not in client.inbuf:
+            if len(client.inbuf) > 8192:
+                self._close(client)
+            return
+        request_line = client.inbuf.split(b'\r\n', 1)[0].split()
+        if len(request_line) < 2 or request_line[0] != b'GET' or request_line[1].split(b'?')[0] != b'/events':
+            client.outbuf += NOT_FOUND
+            self._flush(client)
+            self._close(client)
+            return
+        client.streaming = True
+        client.outbuf += RESPONSE_HEADERS + self._frame('snapshot', self.snapshot())
+        self._flush(client)
+
+    def _flush(self, client):
+        if client.outbuf:
+            try:
+                sent = client.sock.send(client.outbuf)
+                del client.outbuf[:sent]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._close(client)
+                return
+        if len(client.outbuf) > self.max_buffer:
+            logger.warning("Dropping slow dashboard client")
+            self._close(client)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outbuf else 0)
+        try:
+            self._selector.modify(client.sock, events, client)
+        except (KeyError, ValueError):
+            pass
+
+    def _close(self, client):
+        fileno = client.sock.fileno()
+        if fileno == -1:
+            return
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        self._clients.pop(fileno, None)
+        client.sock.close()
+
+
+def connect_status_stream(stream, button_controller, osc_manager):
+    """Forward controller and config events to the stream"""
+    button_controller.add_listener(stream.publish)
+
+    def on_config_change(field):
+        stream.publish('config', {
+            "field": field,
+            "current_scene": osc_manager.get_button_path(),
+            "scene_id": osc_manager.current_path,
+            "current_delay": osc_manager.current_delay,
+            "current_osc_off_delay": osc_manager.current_osc_off_delay,
+        })
+    osc_manager.add_listener(on_config_change)
@@ -0,0 +1,408 @@
+"""
+Web Process
+Runs the web interface in its own process (--processes split). The proxies
+here stand in for the objects create_app expects: reads come from the
+shared state block, changes and diagnostic queries go over the command
+socket to the real-time process. A crash of the web process leaves the
+buttons, timers and OSC output untouched; the WebProcess supervisor in the
+real-time process starts it again.
+"""
+
+import functools
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from ..controllers.led_patterns import PATTERNS
+from ..logging_setup import get_logger, log_event, setup_logging
+from ..managers import metrics
+from ..managers.journal import EventJournal
+from ..managers.osc_manager import OSCManager
+from ..managers.shared_state import StateBlock, CommandClient
+
+logger = get_logger("web.process")
+
+WEB_NICE = 5  # The web process yields the CPU to the real-time process
+PARENT_CHECK = 1.0  # seconds between checks that the real-time process is still there
+
+
+def build_commands(button_controller, osc_manager, osc_client, button_station=None, workspace_watcher=None,
+                   qlc_feedback=None, cue_engine=None):
+    """
+    Command table of the real-time side
+
+    Returns:
+        (commands, queries): {op: callable}; commands change state and republish the block, queries only read
+    """
+    def led(name, action):
+        led_controller = button_controller.led_controller
+        if name not in led_controller.leds:
+            raise ValueError(f"Unknown LED {name!r}")
+        if action in ('on', 'off'):
+            led_controller.turn_led(name, action == 'on')
+        elif action == 'toggle':
+            led_controller.toggle_led(name)
+        elif action in PATTERNS:
+            led_controller.set_pattern(name, action)
+        else:
+            raise ValueError(f"Invalid LED action {action!r}")
+
+    def workspace():
+        return osc_manager.workspace.to_dict() if osc_manager.workspace is not None else None
+
+    commands = {
+        'set_button_enabled': button_controller.set_button_enabled,
+        'set_button_path': osc_manager.set_button_path,
+        'set_delay_preset': osc_manager.set_delay_preset,
+        'set_timing': osc_manager.set_timing,
+        'select_function': osc_manager.select_function,
+        'set_button_config': osc_manager.set_button_config,
+        'set_tempo': osc_manager.set_tempo,
+        'tap_tempo': osc_manager.tap_tempo,
+        'led': led,
+    }
+    queries = {
+        'ping': lambda: True,
+        'metrics': metrics.REGISTRY.render,
+        'timing_stats': button_controller.scheduler.get_timing_stats,
+        'workspace': workspace,
+    }
+    if hasattr(osc_client, 'get_stats'):
+        queries['osc_stats'] = osc_client.get_stats
+    if button_station is not None:
+        queries['station_status'] = button_station.get_status
+    if workspace_watcher is not None:
+        queries['watcher_stats'] = workspace_watcher.get_stats
+    if qlc_feedback is not None:
+        queries['qlc_stats'] = qlc_feedback.get_stats
+    if cue_engine is not None:
+        commands['cue_save'] = lambda name, data: cue_engine.save_list(name, data) and None
+        commands['cue_delete'] = cue_engine.delete_list
+        queries['cue_status'] = cue_engine.get_status
+        queries['cue_get'] = cue_engine.get_list
+    return commands, queries
+
+
+class RemoteQueries:
+    def __init__(self, call, **methods):
+        """
+        Initialize a proxy whose methods are commands, e.g. RemoteQueries(call, get_stats='osc_stats')
+
+        Args:
+            call: RemoteSystem.call
+            methods: Method name -> command op
+        """
+        for name, op in methods.items():
+            setattr(self, name, functools.partial(call, op))
+
+
+class RemoteLEDController:
+    def __init__(self, call, led_names):
+        """
+        Initialize the LED proxy
+
+        Args:
+            call: RemoteSystem.call
+            led_names: LED names of the real-time LEDController
+        """
+        self._call = call
+        self.leds = dict.fromkeys(led_names)
+
+    def turn_led(self, led_name, on):
+        self._call('led', led_name, 'on' if on else 'off')
+
+    def toggle_led(self, led_name):
+        self._call('led', led_name, 'toggle')
+
+    def set_pattern(self, led_name, pattern):
+        self._call('led', led_name, pattern)
+
+
+class RemoteButtonController:
+    def __init__(self, call, led_names):
+        """
+        Initialize the button proxy (state mirrored from the state block)
+
+        Args:
+            call: RemoteSystem.call
+            led_names: LED names of the real-time LEDController
+        """
+        self._call = call
+        self.state = 'idle'
+        self.button_enabled = True
+        self.is_button_blocked = False
+        self.effect_running = False
+        self.is_held = False
+        self.last_effect_off_drift = None
+        self._block_deadline = None
+        self.led_controller = RemoteLEDController(call, led_names)
+        self.scheduler = RemoteQueries(call, get_timing_stats='timing_stats')
+
+    def apply(self, button):
+        """Take over the button part of a snapshot"""
+        self.state = button['state']
+        self.button_enabled = button['enabled']
+        self.is_button_blocked = button['blocked']
+        self.effect_running = button['effect_running']
+        self.is_held = button['held']
+        self.last_effect_off_drift = button['last_effect_off_drift']
+        self._block_deadline = button['block_deadline']
+
+    def block_remaining(self):
+        """Seconds until the button is unblocked (0 if not blocked)"""
+        if not self.is_button_blocked or self._block_deadline is None:
+            return 0
+        return max(0.0, self._block_deadline - time.monotonic())
+
+    def set_button_enabled(self, enabled):
+        self._call('set_button_enabled', enabled)
+
+
+class RemoteOSCManager(OSCManager):
+    def __init__(self, call):
+        """
+        Initialize the config proxy: reads are the OSCManager's own, on a mirror of the
+        real-time config; setters run on the real-time side
+
+        Args:
+            call: RemoteSystem.call
+        """
+        super().__init__()
+        self._call = call
+        self.workspace_version = None
+
+    def apply(self, config):
+        """Take over the config part of a snapshot (JSON turned the integer keys into strings)"""
+        self.button_paths = {int(key): path for key, path in config['button_paths'].items()}
+        self.delay_presets = {int(key): delay for key, delay in config['delay_presets'].items()}
+        self.button_configs = {int(key): button for key, button in config['button_configs'].items()}
+        self.current_path = config['current_path']
+        self.current_delay = config['current_delay']
+        self.current_osc_off_delay = config['current_osc_off_delay']
+        tempo = config['tempo']
+        self.tempo.bpm, self.tempo.quantize, self.tempo.origin = tempo['bpm'], tempo['quantize'], tempo['origin']
+
+    def set_button_path(self, path_id):
+        return self._call('set_button_path', path_id)
+
+    def set_delay_preset(self, preset_id):
+        return self._call('set_delay_preset', preset_id)
+
+    def set_timing(self, block_delay, osc_off_delay):
+        self._call('set_timing', block_delay, osc_off_delay)
+
+    def set_button_config(self, index, path_id=None, delay=None, osc_off_delay=None):
+        return self._call('set_button_config', index, path_id=path_id, delay=delay, osc_off_delay=osc_off_delay)
+
+    def select_function(self, function_id):
+        return self._call('select_function', function_id)
+
+    def set_tempo(self, bpm=None, quantize=None):
+        self._call('set_tempo', bpm, quantize)
+
+    def tap_tempo(self, t=None):
+        # Stamped on arrival in the real-time process (same machine, well under a millisecond later)
+        return self._call('tap_tempo')
+
+
+class RemoteSystem:
+    def __init__(self, options):
+        """
+        Initialize the web-side view of the real-time process
+
+        Args:
+            options: Dict from web_process_options() in the real-time process
+        """
+        self.options = options
+        self.client = CommandClient(options['command_socket'])
+        self.block = StateBlock(options['state_block']).attach()
+        self.published = None
+        self._sequence = None
+        self._lock = threading.Lock()
+
+        call = self.call
+        self.button_controller = RemoteButtonController(call, options['leds'])
+        self.osc_manager = RemoteOSCManager(call)
+        self.osc_client = RemoteQueries(call, get_stats='osc_stats') if options['osc_stats'] else object()
+        self.button_station = RemoteQueries(call, get_status='station_status') if options['station'] else None
+        self.workspace_watcher = RemoteQueries(call, get_stats='watcher_stats') if options['watcher'] else None
+        self.qlc_feedback = RemoteQueries(call, get_stats='qlc_stats') if options['qlc_feedback'] else None
+        if self.qlc_feedback is not None:
+            self.qlc_feedback.status = None
+        self.cue_engine = RemoteQueries(call, get_status='cue_status', get_list='cue_get', save_list='cue_save',
+                                        delete_list='cue_delete') if options['cues'] else None
+        self.registry = RemoteQueries(call, render='metrics')
+        self.journal = EventJournal(options['journal_file']).attach() if options['journal_file'] else None
+        self.sync()
+
+    def call(self, op, *args, **kwargs):
+        """Run a command on the real-time side, then mirror the state it published before replying"""
+        result = self.client.call(op, *args, **kwargs)
+        self.sync()
+        return result
+
+    def sync(self):
+        """Mirror the latest snapshot (a header read when nothing changed); runs before every request"""
+        with self._lock:
+            read = self.block.read(self._sequence)
+            if read is None:
+                return
+            self._sequence, payload = read
+            state = json.loads(payload)
+            self.published = state['published']
+            self.button_controller.apply(state['button'])
+            self.osc_manager.apply(state['config'])
+            if self.qlc_feedback is not None:
+                self.qlc_feedback.status = state['qlc_status']
+            version = state['workspace_version']
+            if version != self.osc_manager.workspace_version:
+                self._load_workspace(version)
+
+    def _load_workspace(self, version):
+        """Fetch the real-time side's parsed workspace (after a start or a hot reload)"""
+        from ..qlc.workspace import Workspace
+        data = self.client.call('workspace') if version is not None else None
+        self.osc_manager.workspace = Workspace.from_dict(data) if data is not None else None
+        self.osc_manager.workspace_version = version
+
+    def create_app(self):
+        from .web_config import create_app
+        app = create_app(self.button_controller, self.osc_manager, self.osc_client,
+                         event_port=self.options['event_port'], button_station=self.button_station,
+                         journal=self.journal, workspace_watcher=self.workspace_watcher,
+                         qlc_feedback=self.qlc_feedback, cue_engine=self.cue_engine, registry=self.registry)
+        app.before_request(self.sync)
+        return app
+
+    def close(self):
+        self.client.close()
+        self.block.close()
+        if self.journal is not None:
+            self.journal.close()
+
+
+def _exit_with_parent(parent_pid):
+    """Stop when the real-time process is gone (even if it was killed without a chance to stop us)"""
+    while os.getppid() == parent_pid:
+        time.sleep(PARENT_CHECK)
+    os._exit(0)
+
+
+def run_web_process(options):
+    """Web process entry point (spawned by WebProcess)"""
+    setup_logging()
+    # Ctrl+C reaches the whole process group: the real-time side stops us with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    threading.Thread(target=_exit_with_parent, args=(options['parent_pid'],), name="parent-watch", daemon=True).start()
+    try:
+        os.nice(WEB_NICE)
+    except OSError:
+        pass
+    from .server import run_server
+    system = RemoteSystem(options)
+    run_server(system.create_app(), options['host'], options['port'], mode=options['server'],
+               workers=options['workers'], request_timeout=options['request_timeout'], on_shutdown=system.close)
+
+
+def web_process_options(state_block, command_socket, button_controller, osc_client, port, event_port,
+                        host='0.0.0.0', server='pooled', workers=8, request_timeout=5.0, journal_file=None,
+                        button_station=None, workspace_watcher=None, qlc_feedback=None, cue_engine=None):
+    """Everything the web process needs, as plain picklable values"""
+    return {
+        'state_block': state_block,
+        'command_socket': command_socket,
+        'parent_pid': os.getpid(),
+        'host': host,
+        'port': port,
+        'event_port': event_port,
+        'server': server,
+        'workers': workers,
+        'request_timeout': request_timeout,
+        'journal_file': journal_file,
+        'leds': list(button_controller.led_controller.leds),
+        'osc_stats': hasattr(osc_client, 'get_stats'),
+        'station': button_station is not None,
+        'watcher': workspace_watcher is not None,
+        'qlc_feedback': qlc_feedback is not None,
+        'cues': cue_engine is not None,
+    }
+
+
+class WebProcess:
+    def __init__(self, options, restart_delay=1.0, max_restart_delay=30.0, stable_after=60.0, target=run_web_process):
+        """
+        Initialize the supervisor (real-time side)
+
+        Args:
+            options: Dict from web_process_options()
+            restart_delay: Seconds before the first restart after a crash (doubles per crash)
+            max_restart_delay: Upper bound of the restart delay
+            stable_after: Seconds of uptime after which the restart delay starts over
+            target: Process entry point
+        """
+        self.options = options
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self.target = target
+        self.restarts = 0
+        self.last_exitcode = None
+        # Spawn, not fork: forking a process with running threads can copy a held lock
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="web-supervisor", daemon=True)
+
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        delay = self.restart_delay
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            process = self._context.Process(target=self.target, args=(self.options,), name="tanzen-web", daemon=True)
+            process.start()
+            self._process = process
+            logger.info("Web process started (pid %s)", process.pid)
+            process.join()
+            if self._stopping.is_set():
+                break
+            self.last_exitcode = process.exitcode
+            self.restarts += 1
+            metrics.WEB_RESTARTS.inc()
+            if time.monotonic() - started > self.stable_after:
+                delay = self.restart_delay
+            logger.warning("Web process exited (code %s) - restarting in %.0f s", process.exitcode, delay)
+            log_event('web_restart', exitcode=process.exitcode, delay=delay)
+            self._stopping.wait(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+
+    def stop(self, timeout=5.0):
+        """Stop the web process (SIGTERM, then SIGKILL after the timeout)"""
+        self._stopping.set()
+        process = self._process
+        if process is not None and process.is_alive():
+            process.terminate()
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def get_stats(self):
+        process = self._process
+        return {
+            'pid': self.pid,
+            'alive': process is not None and process.is_alive(),
+            'restarts': self.restarts,
+            'last_exitcode': self.last_exitcode,
+        }
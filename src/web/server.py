@@ -0,0 +1,143 @@
+"""
+Web Server Modes
+Runs the Flask config app on the Werkzeug dev server, a bounded thread-pool
+WSGI server (default), or waitress when it is installed
+"""
+
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from ..logging_setup import get_logger
+
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    waitress = None
+    WAITRESS_AVAILABLE = False
+
+logger = get_logger("web.server")
+
+SERVER_MODES = ("dev", "pooled", "waitress")
+
+SERVICE_UNAVAILABLE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Length: 0\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n\r\n"
+)
+
+# Web worker threads run at lower OS priority than the button path
+WORKER_NICE = 5
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 handler: keep-alive connections, idle/read timeout per socket"""
+
+    protocol_version = "HTTP/1.1"
+    timeout = 5  # seconds; overridden per server
+
+    def log_request(self, code="-", size="-"):
+        logger.debug("%s %s %s", self.address_string(), self.requestline, code)
+
+
+def _lower_thread_priority():
+    """Renice the calling worker thread (Linux, best effort)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    def __init__(self, host, port, app, workers=8, backlog=16, request_timeout=5.0):
+        """
+        WSGI server with a bounded worker pool
+
+        Args:
+            host: Interface to listen on
+            port: TCP port
+            app: WSGI application
+            workers: Worker threads (concurrent connections being served)
+            backlog: Extra connections allowed to wait for a worker before 503
+            request_timeout: Socket timeout for reading requests and idle keep-alive (seconds)
+        """
+        handler = type("PooledRequestHandler", (KeepAliveRequestHandler,), {"timeout": request_timeout})
+        super().__init__(host, port, app, handler=handler)
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="web-worker",
+                                        initializer=_lower_thread_priority)
+
+    def process_request(self, request, client_address):
+        """Hand the connection to the pool, or reject it when saturated"""
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(SERVICE_UNAVAILABLE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._pool.submit(self._process_in_worker, request, client_address)
+
+    def _process_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        """Stop accepting, then let in-flight requests finish (bounded by the timeout)"""
+        super().server_close()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_server(app, host, port, mode="pooled", workers=8, request_timeout=5.0, on_shutdown=None):
+    """
+    Serve the app until SIGINT/SIGTERM, then shut down gracefully
+
+    Args:
+        app: Flask app
+        host: Interface to listen on
+        port: TCP port
+        mode: One of SERVER_MODES
+        workers: Worker threads (pooled/waitress)
+        request_timeout: Per-connection timeout in seconds (pooled/waitress)
+        on_shutdown: Called once after the server stopped (cleanup GPIO etc.)
+    """
+    if mode == "waitress" and not WAITRESS_AVAILABLE:
+        logger.warning("waitress is not installed - using the pooled server")
+        mode = "pooled"
+
+    # SIGTERM (systemd stop) takes the same path as Ctrl+C
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    logger.info("Web server mode: %s (workers: %s, timeout: %ss)", mode, workers, request_timeout)
+    server = None
+    try:
+        if mode == "dev":
+            app.run(host=host, port=port, debug=False, threaded=True)
+        elif mode == "waitress":
+            waitress.serve(app, host=host, port=port, threads=workers,
+                           channel_timeout=request_timeout, connection_limit=workers * 4)
+        else:
+            server = PooledWSGIServer(host, port, app, workers=workers, request_timeout=request_timeout)
+            server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutdown requested")
+    finally:
+        if server is not None:
+            server.server_close()
+        if on_shutdown is not None:
+            on_shutdown()
@@ -4,14 +4,57 @@ Web Configuration Interface for Tanzen Button Control System
 Simple Flask web frontend to configure button settings
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for
+import hashlib
+import json
 import threading
 import time
+from ..controllers.led_patterns import PATTERNS
+from ..managers.metrics import REGISTRY
+from ..managers.journal import KINDS as JOURNAL_KINDS
+from ..logging_setup import get_logger
 
-def create_app(button_controller, osc_manager, osc_client):
-    """Create Flask app with initialized components"""
+logger = get_logger("web")
+
+def create_app(button_controller, osc_manager, osc_client, event_port=None, button_station=None, journal=None,
+               workspace_watcher=None, qlc_feedback=None, cue_engine=None, registry=REGISTRY):
+    """Create Flask app with initialized components (or their web-process proxies, see src.web.remote)"""
     app = Flask(__name__)
 
+    def journal_filters():
+        """Time range, kinds and button from the query string (None = any); raises ValueError"""
+        start = request.args.get('since', type=float)
+        end = request.args.get('until', type=float)
+        kinds = request.args.get('type')
+        kinds = [kind for kind in kinds.split(',') if kind] if kinds else None
+        if kinds and any(kind not in JOURNAL_KINDS for kind in kinds):
+            raise ValueError(f"Unknown event type (one of {', '.join(JOURNAL_KINDS)})")
+        button = request.args.get('button', type=int)
+        return start, end, kinds, button
+
+    def presets():
+        """Static preset tables (scenes and delays)"""
+        return {
+            "available_scenes": osc_manager.button_paths,
+            "available_delays": osc_manager.delay_presets,
+            "scene_labels": osc_manager.get_scene_labels()
+        }
+
+    def function_info(function):
+        """JSON view of a QLC+ function, with the scene preset that triggers it"""
+        return {
+            "id": function.id,
+            "name": function.name,
+            "type": function.type,
+            "path": function.path,
+            "path_id": osc_manager.find_path_for_function(function.id)
+        }
+
+    def presets_etag():
+        """ETag of the preset tables - changes only when they change"""
+        payload = json.dumps(presets(), sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
     @app.route('/')
     def index():
         """Main configuration page"""
@@ -21,13 +64,17 @@ def create_app(button_controller, osc_manager, osc_client):
                              current_osc_off_delay=osc_manager.current_osc_off_delay,
                              button_enabled=button_controller.button_enabled,
                              available_paths=osc_manager.button_paths,
-                             available_delays=osc_manager.delay_presets)
+                             scene_labels=osc_manager.get_scene_labels(),
+                             available_delays=osc_manager.delay_presets,
+                             event_port=event_port)
 
     @app.route('/api/status')
     def api_status():
         """Get current system status"""
         return jsonify({
             "button_enabled": button_controller.button_enabled,
+            "button_state": button_controller.state,
+            "qlc_status": qlc_feedback.status if qlc_feedback is not None else None,
             "current_scene": osc_manager.get_button_path(),
             "current_delay": osc_manager.current_delay,
             "current_osc_off_delay": osc_manager.current_osc_off_delay,
@@ -35,6 +82,198 @@ def create_app(button_controller, osc_manager, osc_client):
             "available_delays": osc_manager.delay_presets
         })
 
+    @app.route('/api/events')
+    def api_events():
+        """Journal events: ?since=&until= (epoch seconds), type=press,press_rejected, button=, limit="""
+        if journal is None:
+            return jsonify({"error": "Event journal disabled"}), 404
+        try:
+            start, end, kinds, button = journal_filters()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        limit = max(1, min(request.args.get('limit', 200, type=int), 10000))
+        events = journal.query(start, end, kinds, button, limit=limit)
+        for event in events:
+            event['scene_name'] = osc_manager.button_paths.get(event['scene'])
+        return jsonify({"events": events, "journal": journal.get_stats()})
+
+    @app.route('/api/events/hourly')
+    def api_events_hourly():
+        """Per-hour event counts over the same filters as /api/events"""
+        if journal is None:
+            return jsonify({"error": "Event journal disabled"}), 404
+        try:
+            start, end, kinds, button = journal_filters()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        hours = journal.hourly(start, end, kinds, button)
+        for hour in hours:
+            hour['scenes'] = {osc_manager.button_paths.get(scene, str(scene)): n for scene, n in hour['scenes'].items()}
+        return jsonify({"hours": hours})
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics"""
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/api/osc/stats')
+    def api_osc_stats():
+        """Get OSC send statistics"""
+        if not hasattr(osc_client, 'get_stats'):
+            return jsonify({"error": "OSC client does not collect statistics"}), 404
+        return jsonify(osc_client.get_stats())
+
+    @app.route('/api/qlc/feedback')
+    def api_qlc_feedback():
+        """QLC+ feedback: responding status, round-trip times, re-sends"""
+        if qlc_feedback is None:
+            return jsonify({"error": "QLC+ feedback disabled"}), 404
+        return jsonify(qlc_feedback.get_stats())
+
+    @app.route('/api/tempo', methods=['GET', 'POST'])
+    def api_tempo():
+        """Get or set the BPM and quantize grid: {"bpm": 120, "quantize": 1} (quantize 0 = off)"""
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            try:
+                osc_manager.set_tempo(data.get('bpm'), data.get('quantize'))
+            except (TypeError, ValueError) as e:
+                return jsonify({"error": str(e)}), 400
+        return jsonify(osc_manager.tempo.to_dict())
+
+    @app.route('/api/tempo/tap', methods=['POST'])
+    def api_tempo_tap():
+        """Tap tempo: every call is a beat; two or more set the BPM"""
+        osc_manager.tap_tempo()
+        return jsonify(osc_manager.tempo.to_dict())
+
+    @app.route('/api/timing/jitter')
+    def api_timing_jitter():
+        """Timer mode and jitter: callback lateness, effect-off drift, tempo"""
+        drift = button_controller.last_effect_off_drift
+        return jsonify({
+            "scheduler": button_controller.scheduler.get_timing_stats(),
+            "last_effect_off_drift_ms": drift * 1000 if drift is not None else None,
+            "tempo": osc_manager.tempo.to_dict(),
+        })
+
+    @app.route('/api/cues')
+    def api_cues():
+        """Cue lists with their status, load errors and the next queued event"""
+        if cue_engine is None:
+            return jsonify({"error": "Cue lists disabled"}), 404
+        return jsonify(cue_engine.get_status())
+
+    @app.route('/api/cues/<name>', methods=['GET', 'PUT', 'DELETE'])
+    def api_cue_list(name):
+        """Get, create/replace (PUT the list JSON) or delete one cue list"""
+        if cue_engine is None:
+            return jsonify({"error": "Cue lists disabled"}), 404
+        if request.method == 'PUT':
+            try:
+                cue_engine.save_list(name, request.get_json())
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            except OSError as e:
+                logger.error("Could not save cue list %s: %s", name, e)
+                return jsonify({"error": "Could not save the cue list"}), 500
+        elif request.method == 'DELETE':
+            if not cue_engine.delete_list(name):
+                return jsonify({"error": "Unknown cue list"}), 404
+            return jsonify({"success": True})
+        cue_list = cue_engine.get_list(name)
+        if cue_list is None:
+            return jsonify({"error": "Unknown cue list"}), 404
+        return jsonify(cue_list)
+
+    @app.route('/api/presets')
+    def api_presets():
+        """Preset tables with ETag/304 caching"""
+        response = jsonify(presets())
+        response.set_etag(presets_etag())
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    @app.route('/api/workspace')
+    def api_workspace():
+        """Loaded QLC+ workspace and hot-reload statistics"""
+        workspace = osc_manager.workspace
+        if workspace is None:
+            return jsonify({"error": "No QLC+ workspace loaded"}), 404
+        return jsonify({
+            "functions": len(workspace.functions),
+            "buttons": len(workspace.buttons),
+            "universes": len(workspace.universes),
+            "watcher": workspace_watcher.get_stats() if workspace_watcher is not None else None,
+        })
+
+    @app.route('/api/functions')
+    def api_functions():
+        """List QLC+ functions from the workspace (filters: type, q)"""
+        if osc_manager.workspace is None:
+            return jsonify({"error": "No QLC+ workspace loaded"}), 404
+        functions = osc_manager.workspace.find_functions(request.args.get('q'), request.args.get('type'))
+        return jsonify({"functions": [function_info(f) for f in sorted(functions, key=lambda f: f.id)]})
+
+    @app.route('/api/functions/<int:function_id>')
+    def api_function_detail(function_id):
+        """Details of one QLC+ function"""
+        workspace = osc_manager.workspace
+        if workspace is None or function_id not in workspace.functions:
+            return jsonify({"error": "Unknown function"}), 404
+        function = workspace.functions[function_id]
+        info = function_info(function)
+        info.update({
+            "speed": function.speed,
+            "run_order": function.run_order,
+            "steps": function.steps,
+            "buttons": [b.caption for b in workspace.buttons if b.function_id == function_id]
+        })
+        return jsonify(info)
+
+    @app.route('/api/function', methods=['POST'])
+    def api_function():
+        """Select the scene by QLC+ function ID"""
+        data = request.get_json()
+        function_id = data.get('function_id')
+        
+        workspace = osc_manager.workspace
+        if workspace is None or function_id not in workspace.functions:
+            return jsonify({"error": "Unknown function"}), 404
+        
+        if not osc_manager.select_function(function_id):
+            return jsonify({"error": "Function is not reachable via an OSC button"}), 409
+        
+        return jsonify({
+            "success": True,
+            "current_path": osc_manager.get_button_path()
+        })
+
+    @app.route('/api/buttons')
+    def api_buttons():
+        """Per-button settings and state of the multi-button station"""
+        if button_station is None:
+            return jsonify({"buttons": []})
+        return jsonify({"buttons": button_station.get_status()})
+
+    @app.route('/api/buttons/<int:index>', methods=['POST'])
+    def api_station_button(index):
+        """Set scene, block delay and/or effect duration of one station button"""
+        if button_station is None or index not in osc_manager.button_configs:
+            return jsonify({"error": "Unknown button"}), 404
+        data = request.get_json()
+        
+        if not osc_manager.set_button_config(index,
+                                             path_id=data.get('path_id'),
+                                             delay=data.get('block_delay_seconds'),
+                                             osc_off_delay=data.get('osc_off_delay_seconds')):
+            return jsonify({"error": "Invalid button settings"}), 400
+        
+        return jsonify({
+            "success": True,
+            "button": button_station.get_status()[index]
+        })
+
     @app.route('/api/button', methods=['POST'])
     def api_button():
         """Enable/disable button"""
@@ -80,18 +319,17 @@ def create_app(button_controller, osc_manager, osc_client):
         if block_delay_seconds < 0 or osc_off_delay_seconds < 0:
             return jsonify({"error": "Delays cannot be negative"}), 400
         
-        osc_manager.current_delay = block_delay_seconds
-        osc_manager.current_osc_off_delay = osc_off_delay_seconds
+        osc_manager.set_timing(block_delay_seconds, osc_off_delay_seconds)
         
         if block_delay_seconds == 0:
-            print("Block delay set to: NO DELAY (immediate)")
+            logger.info("Block delay set to: NO DELAY (immediate)")
         else:
-            print(f"Block delay set to: {block_delay_seconds} seconds")
+            logger.info("Block delay set to: %s seconds", block_delay_seconds)
             
         if osc_off_delay_seconds == 0:
-            print("Effect duration set to: NO DELAY (immediate)")
+            logger.info("Effect duration set to: NO DELAY (immediate)")
         else:
-            print(f"Effect duration set to: {osc_off_delay_seconds} seconds")
+            logger.info("Effect duration set to: %s seconds", osc_off_delay_seconds)
         
         return jsonify({
             "success": True,
@@ -102,12 +340,18 @@ def create_app(button_controller, osc_manager, osc_client):
     @app.route('/api/led/<led_name>/<action>', methods=['POST'])
     def api_led(led_name, action):
         """Control LEDs"""
+        led_controller = button_controller.led_controller
+        if led_name not in led_controller.leds:
+            return jsonify({"error": "Unknown LED"}), 404
+        
         if action == 'on':
-            button_controller.turn_led(led_name, True)
+            led_controller.turn_led(led_name, True)
         elif action == 'off':
-            button_controller.turn_led(led_name, False)
+            led_controller.turn_led(led_name, False)
         elif action == 'toggle':
-            button_controller.toggle_led(led_name)
+            led_controller.toggle_led(led_name)
+        elif action in PATTERNS:
+            led_controller.set_pattern(led_name, action)
         else:
             return jsonify({"error": "Invalid action"}), 400
         
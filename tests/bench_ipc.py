@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Split process benchmark: how long a config change from the web process
+takes to be applied on the real-time side (command socket round trip),
+and what reading the shared state block costs the web process, unchanged
+(a header check) and after a change (copy, CRC and JSON parse)
+
+The web side runs in a separate process, like in --processes split.
+
+Usage:
+    python tests/bench_ipc.py --commands 2000
+    python tests/bench_ipc.py --json ipc.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.managers.shared_state import StateBlock, StatePublisher, CommandServer, CommandClient
+from src.simulation import Simulation
+from src.web.remote import build_commands
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return {'mean': sum(samples) / len(samples) * 1000, 'p50': pick(0.5), 'p95': pick(0.95),
+            'p99': pick(0.99), 'max': samples[-1] * 1000}
+
+
+def web_side(block_path, socket_path, commands, reads, results):
+    """Runs in the child process: time commands and state block reads"""
+    client = CommandClient(socket_path)
+    block = StateBlock(block_path).attach()
+    client.call('ping')
+
+    round_trips, sent = [], []
+    for i in range(commands):
+        start = time.monotonic()
+        client.call('set_timing', 30 + i % 2, 30)
+        round_trips.append(time.monotonic() - start)
+        sent.append(start)
+    sequence, _ = block.read()
+
+    unchanged, changed = [], []
+    for _ in range(reads):
+        start = time.perf_counter()
+        block.read(since=sequence)
+        unchanged.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        json.loads(block.read()[1])
+        changed.append(time.perf_counter() - start)
+    results.put({'round_trips': round_trips, 'sent': sent, 'unchanged': unchanged, 'changed': changed})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Command socket latency and state block read cost")
+    parser.add_argument('--commands', type=int, default=2000, help="Config changes to send")
+    parser.add_argument('--reads', type=int, default=20000, help="State block reads of each kind")
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    sim = Simulation()
+    applied_at = []
+    sim.osc_manager.add_listener(lambda field: applied_at.append(time.monotonic()))
+    with tempfile.TemporaryDirectory() as tmp:
+        block = StateBlock(os.path.join(tmp, "state")).create()
+        publisher = StatePublisher(block, sim.controller, sim.osc_manager).start()
+        commands, queries = build_commands(sim.controller, sim.osc_manager, sim.osc_client)
+        server = CommandServer(os.path.join(tmp, "command.sock"), commands, queries, publisher).start()
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        web = context.Process(target=web_side, args=(block.path, server.path, args.commands, args.reads, results))
+        web.start()
+        result = results.get()
+        web.join()
+        snapshot_bytes = len(block.read()[1])
+        server.close()
+        publisher.stop()
+        block.close()
+    sim.close()
+
+    # CLOCK_MONOTONIC is shared between the processes: send -> applied on the real-time side
+    to_applied = [done - sent for sent, done in zip(result['sent'], applied_at)]
+    report = {
+        'commands': args.commands,
+        'send_to_applied_ms': percentiles(to_applied),
+        'round_trip_ms': percentiles(result['round_trips']),
+        'read_unchanged_us': {key: value * 1000 for key, value in percentiles(result['unchanged']).items()},
+        'read_changed_us': {key: value * 1000 for key, value in percentiles(result['changed']).items()},
+        'snapshot_bytes': snapshot_bytes,
+    }
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    print(f"🔀 Split process IPC ({args.commands} config changes, snapshot {snapshot_bytes} bytes)")
+    for name in ('send_to_applied_ms', 'round_trip_ms'):
+        stats = report[name]
+        print(f"   {name:>20}: p50 {stats['p50']:7.3f}  p95 {stats['p95']:7.3f}  "
+              f"p99 {stats['p99']:7.3f}  max {stats['max']:7.3f}")
+    for name in ('read_unchanged_us', 'read_changed_us'):
+        stats = report[name]
+        print(f"   {name:>20}: p50 {stats['p50']:7.1f}  p95 {stats['p95']:7.1f}  "
+              f"p99 {stats['p99']:7.1f}  max {stats['max']:7.1f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark: scripted presses through mock GPIO,
+OSC received on a local UDP listener
+
+Reports press-to-OSC latency (p50/p95/p99), effect-off jitter against
+current_osc_off_delay, thread counts and CPU time.
+
+Usage:
+    python tests/bench_latency.py --rates 2,5,10 --presses 50 --json bench.json
+"""
+
+import argparse
+import json
+import platform
+import socket
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pythonosc.osc_message import OscMessage
+
+from src.gpio.mock_gpio import GPIO
+from src.controllers.button_controller import ButtonController
+from src.controllers.led_controller import LEDController
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
+from src.managers.scheduler import TimerScheduler
+
+BUTTON_PIN = 16
+LED_PINS = {
+    "led_green": 26,
+    "led_red": 13
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    """Summary statistics in milliseconds"""
+    if not values:
+        return None
+    ms = [v * 1000 for v in values]
+    return {
+        'count': len(ms),
+        'min': min(ms),
+        'p50': percentile(ms, 50),
+        'p95': percentile(ms, 95),
+        'p99': percentile(ms, 99),
+        'max': max(ms),
+        'mean': sum(ms) / len(ms),
+    }
+
+
+class OSCListener:
+    """Local UDP listener standing in for QLC+ - records (time, address, value)"""
+
+    def __init__(self, ip="127.0.0.1"):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((ip, 0))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.messages = []
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            try:
+                data = self.sock.recv(1024)
+            except socket.timeout:
+                continue
+            received_at = time.monotonic()
+            message = OscMessage(data)
+            self.messages.append((received_at, message.address, message.params[0] if message.params else None))
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self.sock.close()
+
+
+def run_rate(rate, presses, mode, off_delay, hold):
+    """Run one benchmark pass at the given press rate (presses per second)"""
+    GPIO.cleanup()
+    listener = OSCListener()
+    scheduler = TimerScheduler()
+    osc_manager = OSCManager()
+    osc_manager.set_timing(0, off_delay)
+    osc_client = OSCSender("127.0.0.1", listener.port, osc_manager, queue_size=1024)
+    led_controller = LEDController(GPIO, LED_PINS)
+    controller = ButtonController(GPIO, BUTTON_PIN, osc_client, osc_manager, led_controller, scheduler=scheduler)
+
+    poll_thread = None
+    polling = [True]
+    if mode == "edge":
+        controller.start_edge_detection()
+    else:
+        controller.enable_tap_latch()
+
+        def poll():
+            while polling[0]:
+                controller.process_button()
+                time.sleep(0.1)
+        poll_thread = threading.Thread(target=poll, daemon=True)
+        poll_thread.start()
+
+    interval = 1.0 / rate
+    press_times = []
+    max_threads = threading.active_count()
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+
+    for _ in range(presses):
+        start = time.monotonic()
+        press_times.append(start)
+        GPIO.set_input(BUTTON_PIN, GPIO.LOW)
+        time.sleep(hold)
+        GPIO.set_input(BUTTON_PIN, GPIO.HIGH)
+        max_threads = max(max_threads, threading.active_count())
+        time.sleep(max(0, interval - (time.monotonic() - start)))
+
+    # Let the last effect-off message arrive
+    time.sleep(off_delay + 0.2)
+    cpu_time = time.process_time() - cpu_start
+    wall_time = time.monotonic() - wall_start
+
+    polling[0] = False
+    if poll_thread:
+        poll_thread.join(timeout=0.5)
+    controller.cleanup()
+    led_controller.cleanup()
+    osc_client.close()
+    scheduler.stop()
+    listener.close()
+
+    # Match each press with the next "on" message, and the "off" that follows it.
+    # Both are 1 (QLC+ Toggle buttons), so the messages alternate on, off, on, ...
+    sent = [t for t, _, value in listener.messages if value == 1]
+    on_times, off_times = sent[0::2], sent[1::2]
+    latencies = []
+    on_matched = []
+    for i, pressed_at in enumerate(press_times):
+        next_press = press_times[i + 1] if i + 1 < len(press_times) else float('inf')
+        matched = [t for t in on_times if pressed_at <= t < next_press]
+        if matched:
+            latencies.append(matched[0] - pressed_at)
+            on_matched.append(matched[0])
+
+    jitter = []
+    for i, on_at in enumerate(on_matched):
+        next_on = on_matched[i + 1] if i + 1 < len(on_matched) else float('inf')
+        offs = [t for t in off_times if on_at <= t < next_on]
+        if offs:
+            jitter.append(offs[0] - (on_at + off_delay))
+
+    return {
+        'rate': rate,
+        'mode': mode,
+        'presses': presses,
+        'received_on': len(latencies),
+        'received_off': len(jitter),
+        'lost': presses - len(latencies),
+        'latency_ms': summarize(latencies),
+        'effect_off_jitter_ms': summarize(jitter),
+        'max_threads': max_threads,
+        'cpu_time_s': cpu_time,
+        'cpu_percent': cpu_time / wall_time * 100 if wall_time else None,
+        'osc_sender': osc_client.get_stats(),
+    }
+
+
+def print_result(result):
+    latency = result['latency_ms'] or {}
+    jitter = result['effect_off_jitter_ms'] or {}
+    print(f"📊 {result['mode']} @ {result['rate']}/s: {result['received_on']}/{result['presses']} presses, "
+          f"threads {result['max_threads']}, CPU {result['cpu_time_s']:.3f}s ({result['cpu_percent']:.1f}%)")
+    if latency:
+        print(f"   press→OSC  p50 {latency['p50']:.3f} ms  p95 {latency['p95']:.3f} ms  p99 {latency['p99']:.3f} ms  max {latency['max']:.3f} ms")
+    if jitter:
+        print(f"   off jitter p50 {jitter['p50']:.3f} ms  p95 {jitter['p95']:.3f} ms  p99 {jitter['p99']:.3f} ms  max {jitter['max']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Press-to-OSC latency benchmark")
+    parser.add_argument('--rates', default="2,5,10", help="Comma-separated press rates (presses/s)")
+    parser.add_argument('--presses', type=int, default=30, help="Presses per rate")
+    parser.add_argument('--mode', choices=("edge", "poll"), default="edge", help="Button input mode")
+    parser.add_argument('--off-delay', type=float, default=0.05, help="Effect duration (current_osc_off_delay) in seconds")
+    parser.add_argument('--hold', type=float, help="How long each press holds the pin LOW (default: 0.02 edge, 0.15 poll)")
+    parser.add_argument('--json', help="Write machine-readable results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    hold = args.hold if args.hold is not None else (0.02 if args.mode == "edge" else 0.15)
+    results = []
+    for rate in (float(r) for r in args.rates.split(',')):
+        result = run_rate(rate, args.presses, args.mode, args.off_delay, hold)
+        results.append(result)
+        if args.json != '-':
+            print_result(result)
+
+    report = {
+        'benchmark': 'press_to_osc_latency',
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+OSC control input flood: a sender blasts fader moves, scene buttons and
+bundles at the control port while scripted presses go through mock GPIO.
+Shows receive throughput and whether the flood delays button handling.
+
+Usage:
+    python tests/bench_osc_input.py --rate 5000 --presses 40
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pythonosc.osc_bundle_builder import OscBundleBuilder, IMMEDIATELY
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from src.gpio.mock_gpio import GPIO
+from src.controllers.button_controller import ButtonController
+from src.controllers.led_controller import LEDController
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
+from src.managers.osc_receiver import OSCReceiver
+from tests.bench_latency import OSCListener, summarize, BUTTON_PIN, LED_PINS
+from tests.load_web import press_latencies
+
+
+def build_datagrams():
+    """Fader moves (unmapped), scene button press/release pairs and a bundle"""
+    datagrams = []
+    for step in range(64):
+        msg = OscMessageBuilder(address=f'/1/fader{step % 4 + 1}')
+        msg.add_arg(step / 63.0)
+        datagrams.append(msg.build().dgram)
+    for address in range(7, 12):
+        for value in (1.0, 0.0):
+            msg = OscMessageBuilder(address=f'/2/dmx/{address}')
+            msg.add_arg(value)
+            datagrams.append(msg.build().dgram)
+    builder = OscBundleBuilder(IMMEDIATELY)
+    for step in range(8):
+        msg = OscMessageBuilder(address=f'/1/fader{step % 4 + 1}')
+        msg.add_arg(step / 7.0)
+        builder.add_content(msg.build())
+    datagrams.append(builder.build().dgram)
+    return datagrams
+
+
+def flood(port, rate, stop, counter):
+    """Send datagrams at about rate per second (in 1 ms slices)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    datagrams = build_datagrams()
+    per_slice = max(1, int(rate / 1000))
+    i = 0
+    next_slice = time.monotonic()
+    while not stop.is_set():
+        for _ in range(per_slice):
+            sock.sendto(datagrams[i % len(datagrams)], ('127.0.0.1', port))
+            i += 1
+        next_slice += 0.001
+        delay = next_slice - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    counter.append(i)
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC input flood vs. button latency")
+    parser.add_argument('--rate', type=int, default=5000, help="Datagrams per second")
+    parser.add_argument('--presses', type=int, default=40, help="Presses per phase")
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    listener = OSCListener()
+    osc_manager = OSCManager()
+    osc_manager.set_timing(0, 0)
+    osc_client = OSCSender("127.0.0.1", listener.port, osc_manager, queue_size=1024)
+    led_controller = LEDController(GPIO, LED_PINS)
+    controller = ButtonController(GPIO, BUTTON_PIN, osc_client, osc_manager, led_controller)
+    controller.start_edge_detection()
+    receiver = OSCReceiver('127.0.0.1', 0, osc_manager, controller).start()
+
+    print(f"🧪 OSC input flood ({args.rate} datagrams/s)")
+    idle = press_latencies(listener, args.presses, 0.05)
+
+    stop = threading.Event()
+    sent = []
+    sender = threading.Thread(target=flood, args=(receiver.port, args.rate, stop, sent), daemon=True)
+    started = time.monotonic()
+    received_before = receiver.received
+    sender.start()
+    time.sleep(0.5)
+    loaded = press_latencies(listener, args.presses, 0.05)
+    stop.set()
+    sender.join(timeout=2)
+    time.sleep(0.2)  # Let the receiver drain
+    elapsed = time.monotonic() - started
+
+    stats = receiver.get_stats()
+    receiver.close()
+    controller.cleanup()
+    led_controller.cleanup()
+    osc_client.close()
+    listener.close()
+
+    report = {
+        'rate': args.rate,
+        'datagrams_sent': sent[0] if sent else 0,
+        'messages_received': stats['received'] - received_before,
+        'messages_per_s': (stats['received'] - received_before) / elapsed,
+        'batches': stats['batches'],
+        'max_batch': stats['max_batch'],
+        'controls_applied': stats['applied'],
+        'press_latency_idle_ms': summarize(idle),
+        'press_latency_loaded_ms': summarize(loaded),
+    }
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    print(f"   sent {report['datagrams_sent']} datagrams, received {report['messages_received']} messages "
+          f"({report['messages_per_s']:.0f}/s) in {report['batches']} batches (max {report['max_batch']})")
+    print(f"   controls applied: {report['controls_applied']}")
+    for phase in ('idle', 'loaded'):
+        stats = report[f'press_latency_{phase}_ms'] or {}
+        print(f"   press→OSC {phase:>6}: p50 {stats.get('p50', 0):.3f} ms  p95 {stats.get('p95', 0):.3f} ms  max {stats.get('max', 0):.3f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Workspace reload benchmark: full parse against incremental reloads
+(function edit, Virtual Console edit, save without changes) for the
+real workspace and a synthetic workspace N times larger
+
+Usage:
+    python tests/bench_reload.py --factor 100 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.managers.osc_manager import OSCManager
+from src.qlc.watcher import WorkspaceWatcher
+from src.qlc.workspace import parse_workspace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKSPACE = os.path.join(ROOT, "tanzverein.qxw")
+ID_OFFSET = 100000
+
+
+def synthetic_workspace(text, factor):
+    """Copy every fixture, function and VC button factor times with fresh IDs"""
+    if factor <= 1:
+        return text
+
+    def renumber(fragment, copy):
+        shift = copy * ID_OFFSET
+        fragment = re.sub(r'ID="(\d+)"', lambda m: f'ID="{int(m.group(1)) + shift}"', fragment)
+        fragment = re.sub(r'<ID>(\d+)</ID>', lambda m: f'<ID>{int(m.group(1)) + shift}</ID>', fragment)
+        return re.sub(r'>(\d+)</Step>', lambda m: f'>{int(m.group(1)) + shift}</Step>', fragment)
+
+    engine_items = re.findall(r'^  <Fixture>.*?</Fixture>\n|^  <Function .*?</Function>\n', text, re.S | re.M)
+    buttons = re.findall(r'<Button .*?</Button>\n', text, re.S)
+    extra_engine = ''.join(renumber(item, copy) for copy in range(1, factor) for item in engine_items)
+    extra_buttons = ''.join(renumber(button, copy) for copy in range(1, factor) for button in buttons)
+    text = text.replace(' </Engine>', extra_engine + ' </Engine>', 1)
+    return text.replace(' </VirtualConsole>', extra_buttons + ' </VirtualConsole>', 1)
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure(path, cache_dir, repeat):
+    """Median milliseconds for a full parse and each kind of incremental reload"""
+    osc_manager = OSCManager()
+    watcher = WorkspaceWatcher(path, osc_manager, cache_dir=cache_dir)
+    result = {'size_bytes': os.path.getsize(path), 'full_parse_ms': timed(lambda: parse_workspace(path), repeat)}
+    result['first_load_ms'] = timed(watcher.reload, 1)
+    result['functions'] = len(osc_manager.workspace.functions)
+    result['buttons'] = len(osc_manager.workspace.buttons)
+
+    with open(path) as f:
+        text = f.read()
+    edits = {
+        'function_edit_ms': ('Name="Seq2"', 'Name="Seq2 *"'),
+        'vc_edit_ms': ('Caption="tap tempo"', 'Caption="tap tempo *"'),
+    }
+    for key, (old, new) in edits.items():
+        samples = []
+        swaps = []
+        for i in range(repeat):
+            text = text.replace(old if i % 2 == 0 else new, new if i % 2 == 0 else old, 1)
+            with open(path, 'w') as f:
+                f.write(text)
+            samples.append(timed(watcher.reload, 1))
+            swaps.append(watcher.last_reload_ms)  # Until the new workspace is live (before the index write)
+        result[key] = statistics.median(samples)
+        result[key.replace('_ms', '_swap_ms')] = statistics.median(swaps)
+        result[key.replace('_ms', '_sections')] = list(watcher.last_reparsed)
+    os.utime(path)
+    result['unchanged_save_ms'] = timed(watcher.reload, repeat)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workspace hot-reload timing")
+    parser.add_argument('--factor', type=int, default=100, help="Size factor of the synthetic workspace")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions per measurement (median)")
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    with open(WORKSPACE) as f:
+        text = f.read()
+    tmp = tempfile.mkdtemp()
+    try:
+        real = os.path.join(tmp, "tanzverein.qxw")
+        shutil.copy(WORKSPACE, real)
+        large = os.path.join(tmp, f"tanzverein_x{args.factor}.qxw")
+        with open(large, 'w') as f:
+            f.write(synthetic_workspace(text, args.factor))
+        report = {
+            'current': measure(real, os.path.join(tmp, "cache"), args.repeat),
+            f'x{args.factor}': measure(large, os.path.join(tmp, "cache"), args.repeat),
+        }
+    finally:
+        shutil.rmtree(tmp)
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    print("🔁 Workspace reload (median ms)")
+    for name, result in report.items():
+        print(f"   {name:>8}: {result['size_bytes'] / 1024:8.0f} KiB, {result['functions']} functions, {result['buttons']} buttons")
+        print(f"             full parse {result['full_parse_ms']:8.1f}   unchanged save {result['unchanged_save_ms']:6.1f}")
+        print(f"             function edit {result['function_edit_swap_ms']:8.1f} live, {result['function_edit_ms']:8.1f} total   "
+              f"VC edit {result['vc_edit_swap_ms']:8.1f} live, {result['vc_edit_ms']:8.1f} total")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Chaser renderer benchmark: output frames per second with every chaser of
+the workspace running at once, over all universes
+
+Measures live rendering (one frame per call), batch rendering (many
+frames per call, NumPy only) and playback of pre-rendered frame buffers,
+for the NumPy and pure-Python paths. Single-threaded; pin it to one core
+to get the per-core number on the Pi.
+
+Usage:
+    taskset -c 0 python tests/bench_render.py --seconds 2 --json render.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.qlc.workspace import load_workspace
+from src.qlc.renderer import compile_chasers, HAVE_NUMPY, DMX_SLOTS
+
+WORKSPACE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tanzverein.qxw")
+FRAME_MS = 1000.0 / 44  # DMX refresh at full 512 slots
+
+
+def measure(render_frame, seconds):
+    """Call render_frame(t_ms) for the given time; returns frames per second"""
+    frames = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    t_ms = 0.0
+    while True:
+        for _ in range(50):
+            render_frame(t_ms)
+            t_ms += FRAME_MS
+        frames += 50
+        now = time.perf_counter()
+        if now >= deadline:
+            return frames / (now - start)
+
+
+def bench_backend(workspace, universes, use_numpy, seconds, fps):
+    """Live, batch and pre-rendered frame rates for one backend"""
+    chasers = list(compile_chasers(workspace, universes, use_numpy=use_numpy).values())
+    frame = bytearray(DMX_SLOTS * len(universes))
+    zero = bytes(len(frame))
+
+    def live(t_ms):
+        frame[:] = zero
+        for chaser in chasers:
+            chaser.render_into(frame, t_ms)
+
+    buffers = [chaser.prerender(fps) for chaser in chasers]
+
+    def playback(t_ms):
+        frame[:] = zero
+        for buffer in buffers:
+            buffer.render_into(frame, t_ms)
+
+    result = {
+        'backend': 'numpy' if use_numpy else 'python',
+        'chasers': len(chasers),
+        'channels': sum(len(chaser.channels) for chaser in chasers),
+        'live_fps': measure(live, seconds),
+        'prerendered_fps': measure(playback, seconds),
+        'prerendered_bytes': sum(buffer.nbytes for buffer in buffers),
+    }
+    if use_numpy:
+        import numpy as np
+        batch = 1000
+        times = np.arange(batch) * FRAME_MS
+        rendered = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for chaser in chasers:
+                chaser.frames(times + rendered * FRAME_MS)
+            rendered += batch
+        result['batch_fps'] = rendered / (time.perf_counter() - start)
+    return result
+
+
+def check_backends(workspace, universes, duration_ms=60000):
+    """Largest difference between the NumPy and Python frames (0 expected)"""
+    numpy_chasers = compile_chasers(workspace, universes, use_numpy=True)
+    python_chasers = compile_chasers(workspace, universes, use_numpy=False)
+    worst = 0
+    for function_id, chaser in numpy_chasers.items():
+        for t_ms in range(0, duration_ms, 7):
+            expected = python_chasers[function_id].frame(t_ms)
+            worst = max([worst] + [abs(int(a) - b) for a, b in zip(chaser.frame(t_ms), expected)])
+    return worst
+
+
+def print_result(result):
+    print(f"📊 {result['backend']}: {result['chasers']} chasers, {result['channels']} channels")
+    print(f"   live         {result['live_fps']:10.0f} frames/s")
+    if 'batch_fps' in result:
+        print(f"   batch        {result['batch_fps']:10.0f} frames/s")
+    print(f"   pre-rendered {result['prerendered_fps']:10.0f} frames/s  ({result['prerendered_bytes']} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chaser renderer frames-per-second benchmark")
+    parser.add_argument('--seconds', type=float, default=2.0, help="Measuring time per mode")
+    parser.add_argument('--fps', type=float, default=44.0, help="Frame rate of the pre-rendered buffers")
+    parser.add_argument('--backend', choices=("auto", "numpy", "python"), default="auto",
+                        help="auto = both when NumPy is installed")
+    parser.add_argument('--json', help="Write machine-readable results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    workspace = load_workspace(WORKSPACE_FILE)
+    universes = sorted(workspace.universes)
+    backends = {"auto": [True, False] if HAVE_NUMPY else [False], "numpy": [True], "python": [False]}[args.backend]
+    if True in backends and not HAVE_NUMPY:
+        parser.error("NumPy is not installed")
+
+    print(f"🎛️  {len(universes)} universes, {args.seconds}s per mode, "
+          f"NumPy {'available' if HAVE_NUMPY else 'not installed'}")
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'universes': universes,
+        'results': [],
+    }
+    for use_numpy in backends:
+        result = bench_backend(workspace, universes, use_numpy, args.seconds, args.fps)
+        print_result(result)
+        report['results'].append(result)
+    if HAVE_NUMPY and len(backends) == 2:
+        report['max_backend_difference'] = check_backends(workspace, universes)
+        print(f"🔍 NumPy vs Python max difference: {report['max_backend_difference']}")
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Multi-button station benchmark: mock panels of growing size, scripted
+presses on random buttons, OSC received on a local UDP listener
+
+Reports press-to-OSC latency, time per sampling pass and idle CPU use per
+panel size - all should stay flat as buttons are added.
+
+Usage:
+    python tests/bench_station.py --sizes 1,4,8,16 --mode poll --json station.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.gpio.mock_gpio import GPIO
+from src.controllers.button_station import ButtonStation
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
+from tests.bench_latency import OSCListener, summarize
+
+FIRST_PIN = 100  # Mock pins, clear of the real button/LED pins
+
+
+def press_latencies(station, listener, presses, interval):
+    """Press random buttons and return press-to-OSC latencies (seconds)"""
+    latencies = []
+    for _ in range(presses):
+        pin = random.choice(station.pins)
+        before = len(listener.messages)
+        pressed_at = time.monotonic()
+        GPIO.set_input(pin, GPIO.LOW)
+        deadline = pressed_at + 1.0
+        while len(listener.messages) == before and time.monotonic() < deadline:
+            time.sleep(0.0002)
+        if len(listener.messages) > before:
+            latencies.append(listener.messages[before][0] - pressed_at)
+        GPIO.set_input(pin, GPIO.HIGH)
+        time.sleep(interval)
+    return latencies
+
+
+def poll_pass_time(station, passes=20000):
+    """Average seconds for one sampling pass over all pins"""
+    start = time.perf_counter()
+    for _ in range(passes):
+        station.poll()
+    return (time.perf_counter() - start) / passes
+
+
+def run_size(size, mode, presses, poll_interval, idle_seconds):
+    listener = OSCListener()
+    osc_manager = OSCManager()
+    osc_manager.set_timing(0, 0)
+    osc_client = OSCSender("127.0.0.1", listener.port, osc_manager, queue_size=1024)
+    station = ButtonStation(GPIO, range(FIRST_PIN, FIRST_PIN + size), osc_client, osc_manager)
+    for index in range(size):
+        osc_manager.set_button_config(index, delay=0, osc_off_delay=0)
+
+    pass_time = poll_pass_time(station)
+    if mode == "edge":
+        station.start_edge_detection()
+    else:
+        station.start_polling(poll_interval)
+
+    cpu_start = time.process_time()
+    time.sleep(idle_seconds)
+    idle_cpu = (time.process_time() - cpu_start) / idle_seconds
+
+    # Presses are held long enough for the poller to see them
+    hold = poll_interval * 1.5 if mode == "poll" else 0.005
+    latencies = press_latencies(station, listener, presses, hold)
+
+    station.cleanup()
+    osc_client.close()
+    listener.close()
+    GPIO.cleanup()
+    return {
+        'buttons': size,
+        'mode': mode,
+        'press_to_osc_ms': summarize(latencies),
+        'poll_pass_us': pass_time * 1e6,
+        'idle_cpu_percent': idle_cpu * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-button station benchmark")
+    parser.add_argument('--sizes', default="1,4,8,16", help="Comma-separated panel sizes")
+    parser.add_argument('--mode', choices=("edge", "poll"), default="poll")
+    parser.add_argument('--presses', type=int, default=40, help="Presses per panel size")
+    parser.add_argument('--poll-interval', type=float, default=0.01, help="Seconds between sampling passes")
+    parser.add_argument('--idle', type=float, default=1.0, help="Seconds of idle CPU measurement")
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = [run_size(int(size), args.mode, args.presses, args.poll_interval, args.idle)
+               for size in args.sizes.split(',')]
+
+    if args.json == '-':
+        print(json.dumps(results, indent=2))
+        return
+    print(f"🧪 Button station benchmark ({args.mode} mode)")
+    print("   buttons   p50 ms   p95 ms   pass µs   idle CPU")
+    for result in results:
+        stats = result['press_to_osc_ms'] or {}
+        print(f"   {result['buttons']:>7}  {stats.get('p50', 0):7.3f}  {stats.get('p95', 0):7.3f}"
+              f"  {result['poll_pass_us']:8.2f}  {result['idle_cpu_percent']:7.2f}%")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Timer jitter benchmark: lateness of scheduled callbacks in coarse mode
+(sleep until the deadline) against precise mode (sleep, then spin the
+last stretch), idle and with busy processes competing for the CPU
+
+Usage:
+    python tests/bench_timing.py --timers 200 --interval 0.01 --load 4
+    python tests/bench_timing.py --spin 0.001 --json timing.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.managers.scheduler import TimerScheduler
+
+DEFAULT_SPIN = 0.002  # as main.TIMER_SPIN
+
+
+def burn(stop):
+    """CPU load: spin until told to stop"""
+    while not stop.is_set():
+        pass
+
+
+def measure(spin, timers, interval):
+    """Schedule timers one interval apart (like effect-off and block timers) and collect their lateness"""
+    scheduler = TimerScheduler(name="bench-scheduler", spin=spin)
+    scheduler.start()
+    done = []
+    start = scheduler.clock() + interval
+    for i in range(timers):
+        scheduler.call_at(start + i * interval, done.append, i)
+    while len(done) < timers:
+        time.sleep(interval)
+    stats = scheduler.get_timing_stats()
+    scheduler.stop()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timer scheduler jitter, coarse vs precise")
+    parser.add_argument('--timers', type=int, default=200, help="Callbacks per run")
+    parser.add_argument('--interval', type=float, default=0.01, help="Seconds between callbacks")
+    parser.add_argument('--spin', type=float, default=DEFAULT_SPIN, help="Precise mode spin (seconds)")
+    parser.add_argument('--load', type=int, default=os.cpu_count() or 1, help="Busy processes for the loaded runs")
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    report = {}
+    for load in (0, args.load):
+        stop = multiprocessing.Event()
+        workers = [multiprocessing.Process(target=burn, args=(stop,), daemon=True) for _ in range(load)]
+        for worker in workers:
+            worker.start()
+        try:
+            for mode, spin in (('coarse', 0.0), ('precise', args.spin)):
+                report[f"{mode}_load{load}"] = measure(spin, args.timers, args.interval)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    print(f"⏱️  Timer lateness (ms), {args.timers} timers every {args.interval * 1000:.0f} ms")
+    for name, stats in report.items():
+        lateness = stats['lateness_ms']
+        print(f"   {name:>16}: p50 {lateness['p50']:7.3f}  p95 {lateness['p95']:7.3f}  "
+              f"p99 {lateness['p99']:7.3f}  max {lateness['max']:7.3f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Shared fixtures for the virtual-clock simulation tests
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.simulation import Simulation
+
+
+@pytest.fixture
+def simulation():
+    """Factory: simulation(**Simulation arguments); every simulation made is closed after the test"""
+    created = []
+
+    def make(**kwargs):
+        sim = Simulation(**kwargs)
+        created.append(sim)
+        return sim
+    yield make
+    for sim in created:
+        sim.close()
+
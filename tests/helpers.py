@@ -0,0 +1,19 @@
+"""
+Shared helpers for the virtual-clock simulation tests (fixtures live in conftest.py)
+"""
+
+
+def osc_sends(timeline, address=False, digits=None):
+    """
+    OSC messages recorded in a timeline
+
+    Args:
+        timeline: Simulation timeline
+        address: Include the OSC address: (t, address, value) instead of (t, value)
+        digits: Round t to this many digits (None = exact)
+    """
+    sends = []
+    for t, _, data in timeline.of_kind('osc'):
+        t = round(t, digits) if digits is not None else t
+        sends.append((t, data['address'], data['value']) if address else (t, data['value']))
+    return sends
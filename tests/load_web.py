@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Web load test: several "phones" hammer the config interface while scripted
+presses go through mock GPIO. Shows whether web traffic delays button handling.
+
+Usage:
+    python tests/load_web.py --server pooled --clients 12 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+from src.gpio.mock_gpio import GPIO
+from src.controllers.button_controller import ButtonController
+from src.controllers.led_controller import LEDController
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
+from src.web.web_config import create_app
+from src.web.server import PooledWSGIServer
+from tests.bench_latency import OSCListener, summarize, BUTTON_PIN, LED_PINS
+
+PATHS = ('/', '/api/status', '/api/presets', '/metrics')
+
+
+def press_latencies(listener, presses, interval):
+    """Inject presses and return press-to-OSC latencies (seconds)"""
+    latencies = []
+    for _ in range(presses):
+        before = len(listener.messages)
+        pressed_at = time.monotonic()
+        GPIO.set_input(BUTTON_PIN, GPIO.LOW)
+        deadline = pressed_at + 1.0
+        while len(listener.messages) == before and time.monotonic() < deadline:
+            time.sleep(0.0005)
+        if len(listener.messages) > before:
+            latencies.append(listener.messages[before][0] - pressed_at)
+        GPIO.set_input(BUTTON_PIN, GPIO.HIGH)
+        time.sleep(interval)
+    return latencies
+
+
+def web_client(port, stop, results):
+    """One phone: keep-alive connection, requests in a loop"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    i = 0
+    while not stop.is_set():
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        start = time.monotonic()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            results.append((time.monotonic() - start, response.status))
+        except (OSError, http.client.HTTPException):
+            results.append((time.monotonic() - start, 0))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Web load vs. button latency")
+    parser.add_argument('--server', choices=("pooled", "dev"), default="pooled")
+    parser.add_argument('--clients', type=int, default=12, help="Concurrent web clients")
+    parser.add_argument('--workers', type=int, default=8, help="Pooled server workers")
+    parser.add_argument('--presses', type=int, default=40, help="Presses per phase")
+    parser.add_argument('--json', help="Write results to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    listener = OSCListener()
+    osc_manager = OSCManager()
+    osc_manager.set_timing(0, 0)
+    osc_client = OSCSender("127.0.0.1", listener.port, osc_manager, queue_size=1024)
+    led_controller = LEDController(GPIO, LED_PINS)
+    controller = ButtonController(GPIO, BUTTON_PIN, osc_client, osc_manager, led_controller)
+    controller.start_edge_detection()
+
+    app = create_app(controller, osc_manager, osc_client)
+    if args.server == "pooled":
+        server = PooledWSGIServer('127.0.0.1', 0, app, workers=args.workers)
+    else:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"🧪 Web load test ({args.server}, {args.clients} clients)")
+    idle = press_latencies(listener, args.presses, 0.05)
+
+    stop = threading.Event()
+    web_results = []
+    clients = [threading.Thread(target=web_client, args=(port, stop, web_results), daemon=True)
+               for _ in range(args.clients)]
+    for client in clients:
+        client.start()
+    time.sleep(0.5)
+    loaded = press_latencies(listener, args.presses, 0.05)
+    stop.set()
+    for client in clients:
+        client.join(timeout=6)
+
+    server.shutdown()
+    server.server_close()
+    controller.cleanup()
+    led_controller.cleanup()
+    osc_client.close()
+    listener.close()
+
+    report = {
+        'server': args.server,
+        'clients': args.clients,
+        'press_latency_idle_ms': summarize(idle),
+        'press_latency_loaded_ms': summarize(loaded),
+        'web_requests': len(web_results),
+        'web_errors': sum(1 for _, status in web_results if status != 200),
+        'web_latency_ms': summarize([t for t, _ in web_results]),
+    }
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+        return
+    for phase in ('idle', 'loaded'):
+        stats = report[f'press_latency_{phase}_ms'] or {}
+        print(f"   press→OSC {phase:>6}: p50 {stats.get('p50', 0):.3f} ms  p95 {stats.get('p95', 0):.3f} ms  max {stats.get('max', 0):.3f} ms")
+    web = report['web_latency_ms'] or {}
+    print(f"   web: {report['web_requests']} requests, {report['web_errors']} errors, p95 {web.get('p95', 0):.1f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+QLC+ stand-in: receives the OSC scene presses like QLC+'s OSC input and
+sends the Virtual Console button state back like its OSC feedback output.
+Every press toggles the button of its path (as QLC+ Toggle buttons do) and
+the new state is echoed as a float (1.0 on, 0.0 off); releases are ignored.
+
+Usage:
+    python tests/qlc_echo.py --port 7700 --feedback-port 9000 --delay 0.005
+    python tests/qlc_echo.py --start-after 3   # like QLC+ still starting up
+"""
+
+import argparse
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.managers.osc_receiver import first_argument, iter_messages
+from src.managers.osc_sender import encode_message
+
+
+class QLCEchoServer:
+    def __init__(self, feedback_port, port=0, host='127.0.0.1', delay=0.0, drop=0):
+        """
+        Initialize the stand-in
+
+        Args:
+            feedback_port: UDP port the feedback is sent to (the monitor)
+            port: UDP port presses are received on (0 picks a free port)
+            host: Interface and feedback destination
+            delay: Seconds between a press and its echo
+            drop: Ignore this many presses first (QLC+ not up yet)
+        """
+        self.feedback_address = (host, feedback_port)
+        self.delay = delay
+        self.drop = drop
+        self.responding = True  # False: presses are received but neither applied nor echoed
+        self.states = {}  # path -> button on
+        self.received = []  # (path, value) in arrival order
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, port))
+        self.port = self._socket.getsockname()[1]
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="qlc-echo", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            readable, _, _ = select.select([self._socket, self._wake_r], [], [])
+            if self._wake_r in readable:
+                break
+            data = self._socket.recv(65535)
+            try:
+                messages = list(iter_messages(data, strict=False))
+            except (ValueError, IndexError, struct.error):
+                continue
+            for address, tags, message in messages:
+                path = address.decode()
+                value = first_argument(message, tags)
+                self.received.append((path, value))
+                if not value or not self.responding:
+                    continue
+                if self.drop > 0:
+                    self.drop -= 1
+                    continue
+                self.states[path] = not self.states.get(path, False)
+                if self.delay:
+                    time.sleep(self.delay)
+                self._socket.sendto(encode_message(path, 1.0 if self.states[path] else 0.0), self.feedback_address)
+        self._socket.close()
+
+    def presses(self, path=None):
+        """Presses (value > 0) received, optionally for one path"""
+        return [item for item in self.received if item[1] and (path is None or item[0] == path)]
+
+    def close(self):
+        self._wake_w.send(b'\0')
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self._wake_r.close()
+        self._wake_w.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QLC+ OSC input/feedback stand-in")
+    parser.add_argument('--port', type=int, default=7700, help="Press input port (QLC+ OSC input)")
+    parser.add_argument('--feedback-port', type=int, default=9000, help="Feedback destination port")
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds before each echo")
+    parser.add_argument('--start-after', type=float, default=0.0, help="Ignore presses for this many seconds")
+    args = parser.parse_args()
+
+    server = QLCEchoServer(args.feedback_port, args.port, delay=args.delay)
+    server.responding = args.start_after <= 0
+    server.start()
+    print(f"🎭 QLC+ stand-in: presses on {server.port}, feedback to {args.feedback_port}")
+    try:
+        if args.start_after > 0:
+            time.sleep(args.start_after)
+            server.responding = True
+            print("🎭 Now responding")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        for path, state in sorted(server.states.items()):
+            print(f"   {path}: {'on' if state else 'off'}")
+
+
+if __name__ == "__main__":
+    main()
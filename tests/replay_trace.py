@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Replay a button input trace on the virtual clock and print what happened
+
+Trace format: one '<seconds> <action> [args]' per line (press, release,
+tap [hold], enable, disable, timing <block> <effect>, scene <id>,
+tempo <bpm> [quantize], beat).
+Without a trace file a synthetic evening is generated.
+
+Usage:
+    python tests/replay_trace.py evening.trace --block 60 --effect 10 --timeline timeline.jsonl
+    python tests/replay_trace.py --hours 5 --presses 300 --mode poll
+"""
+
+import argparse
+import json
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.simulation import Simulation, load_trace, synthetic_evening
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic trace replay on a virtual clock")
+    parser.add_argument('trace', nargs='?', help="Trace file (default: synthetic evening)")
+    parser.add_argument('--block', type=float, default=60, help="Block delay in seconds")
+    parser.add_argument('--effect', type=float, default=10, help="Effect duration in seconds")
+    parser.add_argument('--mode', choices=("edge", "poll"), default="edge", help="Button input mode")
+    parser.add_argument('--hours', type=float, default=5.0, help="Synthetic evening length")
+    parser.add_argument('--presses', type=int, default=300, help="Synthetic presses")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic trace seed")
+    parser.add_argument('--until', type=float, help="Stop at this virtual time (default: when idle)")
+    parser.add_argument('--timeline', help="Write the timeline as JSON lines to this file")
+    parser.add_argument('--json', action='store_true', help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace) if args.trace else synthetic_evening(args.hours, args.presses, args.seed)
+    sim = Simulation(block_delay=args.block, effect_duration=args.effect, input_mode=args.mode)
+    started = time.perf_counter()
+    timeline = sim.load(trace).run(args.until)
+    wall = time.perf_counter() - started
+    summary = sim.summary()
+    summary['wall_s'] = wall
+    summary['speedup'] = summary['duration_s'] / wall if wall else None
+    sim.close()
+
+    if args.timeline:
+        timeline.dump(args.timeline)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"🎬 Replayed {len(trace)} inputs: {summary['duration_s'] / 3600:.2f} h virtual in {wall:.2f} s "
+          f"({summary['speedup']:.0f}x real time)")
+    print(f"   presses {summary['presses']}, rejected {summary['rejected']}, OSC sent {summary['osc_sent']}, "
+          f"GPIO writes {summary['gpio_writes']}")
+    print(f"   debounce {summary['debounce']}")
+    if args.timeline:
+        print(f"💾 Timeline ({len(timeline)} entries) written to {args.timeline}")
+
+
+if __name__ == "__main__":
+    main()
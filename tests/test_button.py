@@ -5,15 +5,16 @@ Test script for button functionality without web server
 
 import time
 import threading
-from pythonosc.udp_client import SimpleUDPClient
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.logging_setup import setup_logging
 from src.gpio.gpio_handler import GPIO, setup_gpio
 from src.controllers.button_controller import ButtonController
 from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
 from src.controllers.led_controller import LEDController
 
 # Configuration
@@ -32,17 +33,16 @@ def run_button_loop(button_controller):
         time.sleep(0.1)
 
 def main():
+    setup_logging()
     print("🧪 Starting Button Test (No Web Server)...")
     
     # Initialize GPIO (automatically uses real or mock GPIO)
     GPIO.setmode(GPIO.BCM)
     setup_gpio()
     
-    # Initialize OSC client
-    osc_client = SimpleUDPClient(IP, OUT_PORT)
-    
     # Initialize system components
     osc_manager = OSCManager()
+    osc_client = OSCSender(IP, OUT_PORT, osc_manager)
     led_controller = LEDController(GPIO, LED_PINS)
     button_controller = ButtonController(GPIO, BUTTON_PIN, osc_client, osc_manager, led_controller)
     
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Cue list tests on the virtual-clock simulation: scheduled scenes, the
+block/override rules against manual presses, joining a run in progress,
+daily repeats, wall-clock jumps, thousands of cues and the web CRUD API
+
+Usage:
+    python -m pytest tests/test_cues.py
+"""
+
+import sys
+import os
+import datetime
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.helpers import osc_sends as sends
+from src.gpio.debounce import DEFAULT_MIN_HOLD
+from src.managers.cues import CueEngine, CueList
+
+# Virtual time 0 is 20:59 local time: a list starting at 21:00 runs at t=60
+EPOCH = datetime.datetime(2026, 10, 17, 20, 59).timestamp()
+
+
+@pytest.fixture
+def rig(simulation, tmp_path):
+    engines = []
+
+    def make(lists, block_delay=0, effect_duration=30, start=0.0):
+        sim = simulation(block_delay=block_delay, effect_duration=effect_duration, start=start)
+        wall = {'offset': EPOCH}
+        for name, data in lists.items():
+            (tmp_path / f"{name}.json").write_text(json.dumps(data))
+        engine = CueEngine(str(tmp_path), sim.osc_client, sim.osc_manager, sim.scheduler, sim.controller,
+                           wall_clock=lambda: wall['offset'] + sim.clock()).load()
+        engines.append(engine)
+        return sim, engine, wall
+    yield make
+    # Before the simulation fixture closes the simulations
+    for engine in engines:
+        engine.close()
+
+
+def osc_sends(timeline):
+    return sends(timeline, address=True, digits=3)
+
+
+SHOW = {"start": "2026-10-17 21:00", "end": 900,
+        "cues": [{"at": 0, "scene": "Scene B", "duration": 600}, {"at": "21:10", "scene": 4}]}
+
+
+def test_show_blocks_the_button_and_ends_a_manual_effect(rig):
+    sim, engine, _ = rig({"show": SHOW})
+    timeline = sim.load([(30, 'tap', ()), (100, 'tap', ())]).run(until=2000)
+    press = 30 + DEFAULT_MIN_HOLD
+    assert osc_sends(timeline) == [
+        (round(press, 3), 'Scene A', 1),
+        (60, 'Scene A', 1),  # The show takes the stage from the manual effect (toggled off)
+        (60, 'Scene B', 1),
+        (660, 'Scene B', 1),
+        (660, 'Scene D', 1),
+        (960, 'Scene D', 1),
+    ]
+    assert [data['reason'] for _, _, data in timeline.of_kind('event', event='press_rejected')] == ['cue']
+    assert [data['held'] for _, _, data in timeline.of_kind('event', event='hold')] == [True, False]
+    assert sim.controller.state == 'idle'
+    assert engine.get_status()['fired'] == 6 and engine.get_status()['queued'] == 0
+
+
+def test_override_press_takes_the_stage_until_the_next_cue(rig):
+    sim, engine, _ = rig({"show": dict(SHOW, manual="override")}, effect_duration=300)
+    timeline = sim.load([(100, 'tap', ())]).run(until=2000)
+    press = round(100 + DEFAULT_MIN_HOLD, 3)
+    assert osc_sends(timeline) == [
+        (60, 'Scene B', 1),
+        (press, 'Scene B', 1),  # The press switches the cue scene off first
+        (press, 'Scene A', 1),
+        (press + 300, 'Scene A', 1),
+        (660, 'Scene D', 1),  # Scene B's own off is skipped: it is already off
+        (960, 'Scene D', 1),
+    ]
+    assert not timeline.of_kind('event', event='press_rejected')
+
+
+def test_run_in_progress_is_joined(rig):
+    sim, engine, _ = rig({"show": SHOW}, start=300)
+    sim.run(until=300)
+    assert engine.running_lists() == ['show'] and sim.controller.state == 'held'
+    timeline = sim.run(until=2000)
+    assert osc_sends(timeline) == [(300, 'Scene B', 1), (660, 'Scene B', 1), (660, 'Scene D', 1), (960, 'Scene D', 1)]
+
+
+def test_daily_list_queues_its_next_run(rig):
+    sim, engine, _ = rig({"nightly": {"start": "21:00", "manual": "layer", "cues": [{"scene": 1, "duration": 60}]}})
+    timeline = sim.run(until=2 * 86400)
+    assert [t for t, _, _ in osc_sends(timeline)][0::2] == [60, 60 + 86400]  # Sends alternate on, off
+    assert engine.get_status()['next_event']['at'] == pytest.approx(EPOCH + 60 + 2 * 86400)
+
+
+def test_wall_clock_jump_requeues(rig):
+    sim, engine, wall = rig({"show": SHOW})
+    sim.run(until=10)
+    wall['offset'] += 40  # NTP: the wall clock was 40 s behind
+    timeline = sim.run(until=100)
+    # Noticed at the next clock check (30 s); the show already started then, so it is joined
+    assert osc_sends(timeline)[0] == (30, 'Scene B', 1)
+    assert engine.clock_jumps == 1
+
+
+def test_thousands_of_cues_use_one_timer(rig):
+    scenes = ["Scene A", "Scene B", "Scene C"]
+    big = {"start": "2026-10-17 21:00", "manual": "layer",
+           "cues": [{"at": i, "scene": scenes[i % 3]} for i in range(5000)], "end": 5000}
+    sim, engine, _ = rig({"big": big})
+    assert engine.get_status()['queued'] == 2 + 2 * 5000
+    assert sim.scheduler.pending() == 1  # One armed timer, not one per cue
+    timeline = sim.run(until=60 + 5001)
+    # From the second cue on, each switches the previous scene off (a second 1) first
+    sends = osc_sends(timeline)
+    ons = [(t, address) for t, address, _ in sends[:1] + sends[2::2]]
+    assert len(ons) == 5000
+    assert ons[:3] == [(60, 'Scene A'), (61, 'Scene B'), (62, 'Scene C')] and ons[-1] == (60 + 4999, 'Scene B')
+    assert engine.get_status()['max_lateness_ms'] == 0
+
+
+def test_invalid_lists_are_rejected(rig):
+    sim, engine, _ = rig({})
+    for data, message in (({"cues": [{"scene": 1}]}, "start"),
+                          ({"start": "25:00", "cues": [{"scene": 1}]}, "time"),
+                          ({"start": "21:00", "cues": [{"scene": "Scene Z"}]}, "unknown scene"),
+                          ({"start": "21:00", "manual": "maybe", "cues": [{"scene": 1}]}, "manual")):
+        with pytest.raises(ValueError, match=message):
+            CueList("x", data, sim.osc_manager)
+    with pytest.raises(ValueError):
+        engine.save_list("../evil", SHOW)
+
+
+def test_web_crud(rig, tmp_path):
+    from src.web.web_config import create_app
+    sim, engine, _ = rig({})
+    client = create_app(sim.controller, sim.osc_manager, sim.osc_client, cue_engine=engine).test_client()
+    assert client.put('/api/cues/show', json={"start": "21:00"}).status_code == 400
+    assert client.put('/api/cues/show', json=SHOW).get_json()['status']['cues'] == 2
+    assert json.loads((tmp_path / "show.json").read_text()) == SHOW
+    sim.run(until=100)
+    assert client.get('/api/cues').get_json()['lists']['show']['on_stage'] == 'Scene B'
+    assert client.delete('/api/cues/show').get_json() == {"success": True}
+    sim.run(until=200)
+    assert osc_sends(sim.timeline)[-1] == (100, 'Scene B', 1)  # Deleted mid-run: its scene is switched off
+    assert sim.controller.state == 'idle'
+    assert client.get('/api/cues/show').status_code == 404
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Debouncer on a virtual clock: timestamped raw edge sequences for a clean
+press and release, contact bounce inside the settle window, and glitches
+shorter than the minimum pulse
+
+Usage:
+    python -m pytest tests/test_debounce.py
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.gpio.debounce import Debouncer
+from src.simulation import VirtualClock, VirtualScheduler
+
+LOW, HIGH = 0, 1
+SETTLE = 0.03
+MIN_HOLD = 0.002
+
+
+@pytest.fixture
+def debounce():
+    """Debouncer on a virtual clock with one idle-high channel 0; returns (debouncer, feed)"""
+    clock = VirtualClock()
+    scheduler = VirtualScheduler(clock)
+    changes = []
+    debouncer = Debouncer(lambda channel, level, t: changes.append((level, round(t, 6))),
+                          settle=SETTLE, min_hold=MIN_HOLD, scheduler=scheduler)
+    debouncer.add_channel(0, HIGH)
+
+    def advance(t):
+        while True:
+            deadline = scheduler.next_deadline()
+            if deadline is None or deadline > t:
+                break
+            clock.advance_to(deadline)
+            scheduler.run_due()
+        clock.advance_to(t)
+
+    def feed(edges, until=10):
+        """Feed (timestamp, level) raw edges at their times, then run the re-checks up to until"""
+        for t, level in edges:
+            advance(t)
+            debouncer.feed(0, level, t)
+        advance(until)
+        return changes
+
+    return debouncer, feed
+
+
+def test_clean_press_and_release(debounce):
+    debouncer, feed = debounce
+    assert feed([(1.0, LOW), (1.2, HIGH)]) == [(LOW, 1.0), (HIGH, 1.2)]
+    assert debouncer.stats == {'accepted': 2, 'bounces': 0, 'glitches': 0}
+    assert debouncer.level(0) == HIGH
+
+
+def test_press_is_accepted_only_after_min_hold(debounce):
+    debouncer, feed = debounce
+    assert feed([(1.0, LOW)], until=1.0 + MIN_HOLD / 2) == []
+    assert feed([], until=1.0 + MIN_HOLD) == [(LOW, 1.0)]  # Timestamped with the raw edge
+
+
+def test_bounce_inside_the_settle_window(debounce):
+    debouncer, feed = debounce
+    edges = [(1.0, LOW), (1.005, HIGH), (1.008, LOW), (1.012, HIGH), (1.015, LOW), (1.3, HIGH)]
+    assert feed(edges) == [(LOW, 1.0), (HIGH, 1.3)]
+    assert debouncer.stats == {'accepted': 2, 'bounces': 4, 'glitches': 0}
+
+
+def test_release_inside_the_settle_window_counts_at_its_end(debounce):
+    debouncer, feed = debounce
+    # A real short tap: the line stays high after the bounce, so the release is taken at the re-check
+    assert feed([(1.0, LOW), (1.01, HIGH)], until=1.0 + SETTLE - 0.001) == [(LOW, 1.0)]
+    assert feed([]) == [(LOW, 1.0), (HIGH, 1.01)]
+    assert debouncer.stats['bounces'] == 1
+
+
+def test_glitch_shorter_than_min_hold(debounce):
+    debouncer, feed = debounce
+    assert feed([(1.0, LOW), (1.0 + MIN_HOLD / 2, HIGH)]) == []
+    assert debouncer.stats == {'accepted': 0, 'bounces': 0, 'glitches': 1}
+    assert debouncer.level(0) == HIGH
+    # The next real press is not affected
+    assert feed([(2.0, LOW), (2.2, HIGH)]) == [(LOW, 2.0), (HIGH, 2.2)]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Native DMX output against tanzverein.qxw: Art-Net/sACN packets round-trip
+through their parsers, scenes are HTP-merged, Collections are refcounted,
+closing sends a blackout, and the OSC paths act like the QLC+ Toggle
+buttons they replace
+
+Usage:
+    python -m pytest tests/test_dmx_output.py
+"""
+
+import sys
+import os
+import socket
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.qlc.dmx_output import (DMXOutput, DMX_SLOTS, artnet_template, sacn_template, parse_artnet, parse_sacn,
+                                ARTNET_DATA_OFFSET, SACN_DATA_OFFSET)
+from src.qlc.workspace import load_workspace
+
+WORKSPACE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tanzverein.qxw")
+
+
+@pytest.fixture
+def receiver():
+    """Local UDP socket the frames go to"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    yield sock
+    sock.close()
+
+
+@pytest.fixture
+def output(receiver):
+    output = DMXOutput(load_workspace(WORKSPACE_FILE, use_cache=False), target="127.0.0.1",
+                       port=receiver.getsockname()[1])
+    yield output
+    output.close()
+
+
+def receive_until(receiver, parse, done, timeout=2.0):
+    """Latest data per universe received until done(frames) holds; fails on timeout"""
+    frames = {}
+    deadline = time.monotonic() + timeout
+    while not done(frames):
+        assert time.monotonic() < deadline, f"timed out, last frames: {frames}"
+        try:
+            packet = receiver.recv(1024)
+        except socket.timeout:
+            continue
+        universe, _, data = parse(packet)
+        frames[universe] = data
+    return frames
+
+
+def levels(**channels):
+    """A universe with the given channels (ch<N>=value) set"""
+    data = bytearray(DMX_SLOTS)
+    for name, value in channels.items():
+        data[int(name[2:])] = value
+    return bytes(data)
+
+
+def test_artnet_packet_round_trip():
+    data = bytes(range(256)) * 2
+    packet = artnet_template(0x1234)
+    packet[12] = 7
+    packet[ARTNET_DATA_OFFSET:] = data
+    assert len(packet) == ARTNET_DATA_OFFSET + DMX_SLOTS
+    assert parse_artnet(packet) == (0x1234, 7, data)
+    assert parse_artnet(packet[:10]) is None
+    assert parse_artnet(b'Art-Nut\0' + bytes(packet[8:])) is None
+
+
+def test_sacn_packet_round_trip():
+    data = bytes(range(255, -1, -1)) * 2
+    packet = sacn_template(300, bytes(16), "tanzen")
+    packet[111] = 42
+    packet[SACN_DATA_OFFSET:] = data
+    assert len(packet) == SACN_DATA_OFFSET + DMX_SLOTS
+    assert parse_sacn(packet) == (300, 42, data)
+    assert bytes(packet[44:50]) == b"tanzen"
+    assert parse_sacn(bytes(SACN_DATA_OFFSET)) is None
+
+
+def test_sacn_output_frames_parse(receiver):
+    output = DMXOutput(load_workspace(WORKSPACE_FILE, use_cache=False), protocol="sacn", target="127.0.0.1",
+                       port=receiver.getsockname()[1])
+    try:
+        output.start_function(11)  # 'all': channels 0-3 of universe 0 (wire universe 1)
+        receive_until(receiver, parse_sacn, lambda frames: frames.get(1) == levels(ch0=255, ch1=255, ch2=255, ch3=255))
+    finally:
+        output.close()
+
+
+def test_scenes_merge_highest_takes_precedence(receiver):
+    workspace = load_workspace(WORKSPACE_FILE, use_cache=False)
+    # '1 2 3' (channels 0-2) at half level, overlapping '2 3 4' (channels 1-3) at full
+    half = workspace.functions[26]
+    half.values = [(fixture, channel, 128) for fixture, channel, _ in half.values]
+    output = DMXOutput(workspace, target="127.0.0.1", port=receiver.getsockname()[1])
+    try:
+        output.start_function(26)
+        output.start_function(27)
+        receive_until(receiver, parse_artnet, lambda frames: frames.get(0) == levels(ch0=128, ch1=255, ch2=255, ch3=255))
+        output.stop_function(27)
+        receive_until(receiver, parse_artnet, lambda frames: frames.get(0) == levels(ch0=128, ch1=128, ch2=128))
+    finally:
+        output.close()
+
+
+def test_collection_members_are_refcounted(output):
+    # 'strobe nebel' (22) = 'All Strobe' (21, itself a Collection of chaser 9) + 'smoke' (17)
+    output.start_function(17)
+    output.start_function(22)
+    assert output.running_functions() == [9, 17, 21, 22]
+    output.start_function(22)
+    output.stop_function(22)
+    assert output.running_functions() == [9, 17, 21, 22]  # Started twice, stopped once
+    output.stop_function(22)
+    assert output.running_functions() == [17]  # Still started on its own
+    output.stop_function(17)
+    output.stop_function(17)  # Stopping a stopped function is a no-op
+    assert output.running_functions() == []
+
+
+def test_close_sends_a_blackout(receiver):
+    output = DMXOutput(load_workspace(WORKSPACE_FILE, use_cache=False), target="127.0.0.1",
+                       port=receiver.getsockname()[1])
+    output.start_function(11)
+    output.start_function(14)  # 'tap tempo': universe 1
+    receive_until(receiver, parse_artnet, lambda frames: any(frames.get(0, b'')) and any(frames.get(1, b'')))
+    output.close()
+    assert output.running_functions() == []
+    # The last frame of every universe is dark
+    frames = {}
+    receiver.settimeout(0.2)
+    while True:
+        try:
+            universe, _, data = parse_artnet(receiver.recv(1024))
+        except socket.timeout:
+            break
+        frames[universe] = data
+    assert frames == {0: bytes(DMX_SLOTS), 1: bytes(DMX_SLOTS)}
+
+
+def test_osc_path_toggles_like_a_qlc_button(output):
+    collection = output.workspace.function_for_osc_path("Scene D").id
+    output.send_message("Scene D", 1)
+    assert collection in output.running_functions()
+    output.send_message("Scene D", 1)  # The effect-off message: a second 1
+    assert output.running_functions() == []
+    output.send_message("Scene D", 0)  # 0 only ever stops
+    assert output.running_functions() == []
+    output.send_message("Scene D", 1)
+    output.send_message("Scene D", 0)
+    assert output.running_functions() == []
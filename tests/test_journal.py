@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Event journal tests: fixed file size, ring wrap-around, persistence across
+reopen, query filters, per-hour aggregates and write cost
+
+Usage:
+    python -m pytest tests/test_journal.py
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.managers.journal import EventJournal, attach_journal, HEADER_SIZE, RECORD
+from src.simulation import Simulation, parse_trace
+
+
+class FakeClock:
+    def __init__(self, t=1_700_000_000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "events.journal")
+
+
+def test_ring_keeps_size_and_newest_records(journal_path):
+    clock = FakeClock()
+    journal = EventJournal(journal_path, size=HEADER_SIZE + 10 * RECORD.size, clock=clock).open()
+    for i in range(25):
+        clock.t += 1
+        journal.append('press', scene=i % 5 + 1, value=i)
+    assert os.path.getsize(journal_path) == HEADER_SIZE + 10 * RECORD.size
+    assert len(journal) == 10
+    assert [event['value'] for event in journal.query()] == list(range(15, 25))
+    journal.close()
+
+
+def test_survives_reopen(journal_path):
+    clock = FakeClock()
+    journal = EventJournal(journal_path, size=4096, clock=clock).open()
+    journal.append('press', scene=2, value=1.5)
+    journal.append('press_rejected', reason='blocked')
+    journal.close()
+
+    reopened = EventJournal(journal_path, size=4096, clock=clock).open()
+    reopened.append('block_end')
+    events = reopened.query()
+    assert [(e['kind'], e['reason'], e['scene']) for e in events] == [
+        ('press', '', 2), ('press_rejected', 'blocked', 0), ('block_end', '', 0)]
+    assert reopened.get_stats()['written'] == 3
+    reopened.close()
+
+    # A different size starts a new journal and keeps the old one aside
+    resized = EventJournal(journal_path, size=8192, clock=clock).open()
+    assert len(resized) == 0
+    assert os.path.exists(journal_path + ".old")
+    resized.close()
+
+
+def test_clock_going_back_is_clamped(journal_path):
+    clock = FakeClock(5000.0)
+    journal = EventJournal(journal_path, size=4096, clock=clock).open()
+    journal.append('press')
+    clock.t = 100.0  # Early boot before NTP
+    journal.append('press')
+    assert [event['t'] for event in journal.query()] == [5000.0, 5000.0]
+    assert len(journal.query(start=4000)) == 2
+    journal.close()
+
+
+def test_filters_and_hourly(journal_path):
+    clock = FakeClock(3600 * 1000)
+    journal = EventJournal(journal_path, size=1 << 16, clock=clock).open()
+    for minute in range(150):
+        clock.t = 3600 * 1000 + minute * 60
+        journal.append('press', scene=minute % 2 + 1)
+        if minute % 3 == 0:
+            journal.append('press_rejected', reason='blocked' if minute % 2 else 'disabled', button=2)
+
+    hour = 3600 * 1000
+    assert len(journal.query(hour + 3600, hour + 7200, kinds=['press'])) == 60
+    assert len(journal.query(kinds=['press_rejected'], button=2)) == 50
+    assert len(journal.query(limit=5)) == 5
+
+    hours = journal.hourly()
+    assert [h['hour'] for h in hours] == [hour, hour + 3600, hour + 7200]
+    assert hours[0]['counts'] == {'press': 60, 'press_rejected': 20}
+    assert hours[0]['scenes'] == {1: 30, 2: 30}
+    assert hours[0]['rejected'] == {'disabled': 10, 'blocked': 10}
+    assert hours[2]['counts']['press'] == 30
+    journal.close()
+
+
+def test_controller_events_are_journaled(journal_path):
+    sim = Simulation(block_delay=60, effect_duration=10)
+    journal = EventJournal(journal_path, size=4096, clock=sim.clock).open()
+    attach_journal(journal, sim.controller, sim.osc_manager)
+    sim.load(parse_trace(["1 tap", "5 tap", "100 disable"])).run()
+    sim.close()
+    kinds = [(e['kind'], e['reason']) for e in journal.query()]
+    assert kinds == [('press', ''), ('effect_on', ''), ('block_start', ''), ('press_rejected', 'blocked'),
+                     ('effect_off', ''), ('block_end', ''), ('disabled', '')]
+    assert journal.query(kinds=['block_start'])[0]['value'] == 60
+    journal.close()
+
+
+def test_append_costs_microseconds(journal_path):
+    journal = EventJournal(journal_path).open()
+    count = 20000
+    start = time.perf_counter()
+    for _ in range(count):
+        journal.append('press', scene=1, value=0.5)
+    per_write = (time.perf_counter() - start) / count
+    journal.close()
+    assert per_write < 50e-6
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+OSC control input tests: address table, argument decoding, bundles and
+coalescing of message floods
+
+Usage:
+    python -m pytest tests/test_osc_receiver.py
+"""
+
+import sys
+import os
+import socket
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from pythonosc.osc_bundle_builder import OscBundleBuilder, IMMEDIATELY
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_receiver import OSCReceiver, first_argument, iter_messages
+
+
+def message(address, *args):
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build().dgram
+
+
+def bundle(*messages):
+    builder = OscBundleBuilder(IMMEDIATELY)
+    for address, args in messages:
+        msg = OscMessageBuilder(address=address)
+        for arg in args:
+            msg.add_arg(arg)
+        builder.add_content(msg.build())
+    return builder.build().dgram
+
+
+class Controller:
+    """Stand-in for ButtonController.set_button_enabled"""
+
+    def __init__(self):
+        self.button_enabled = True
+        self.calls = []
+
+    def set_button_enabled(self, enabled):
+        self.button_enabled = enabled
+        self.calls.append(enabled)
+
+
+@pytest.fixture
+def receiver():
+    osc_manager = OSCManager()
+    receiver = OSCReceiver('127.0.0.1', 0, osc_manager, Controller())
+    yield receiver
+    receiver.close()
+
+
+def feed(receiver, *datagrams):
+    pending = {}
+    for datagram in datagrams:
+        receiver.feed(datagram, pending)
+    receiver.apply(pending)
+    return pending
+
+
+@pytest.mark.parametrize('value', [1, 2.5, True, False, 'x', 7.25])
+def test_first_argument_matches_python_osc(value):
+    (address, tags, data), = iter_messages(message('/2/dmx/0', value))
+    assert address == b'/2/dmx/0'
+    expected = {True: 1, False: 0}.get(value, value) if isinstance(value, bool) else value
+    assert first_argument(data, tags) == expected
+    (_, tags, data), = iter_messages(message('/2/dmx/0'))
+    assert first_argument(data, tags) is None
+
+
+def test_controls_map_to_manager(receiver):
+    osc_manager = receiver.osc_manager
+    feed(receiver, message('/2/dmx/9', 1.0), message('/2/dmx/9', 0.0))
+    assert osc_manager.current_path == 3
+    feed(receiver, message('/2/dmx/4', 1))
+    assert osc_manager.current_delay == osc_manager.delay_presets[4]
+    feed(receiver, message('/2/dmx/0', 0))
+    assert receiver.button_controller.button_enabled is False
+    feed(receiver, message('/2/dmx/0'))  # No argument toggles
+    assert receiver.button_controller.button_enabled is True
+    feed(receiver, message('/some/fader', 0.3), b'garbage')
+    assert (receiver.unknown, receiver.malformed) == (1, 1)
+
+
+def test_bundle_elements_are_dispatched(receiver):
+    feed(receiver, bundle(('/2/dmx/8', [1]), ('/2/dmx/2', [1]), ('/2/dmx/0', [False])))
+    assert receiver.osc_manager.current_path == 2
+    assert receiver.osc_manager.current_delay == receiver.osc_manager.delay_presets[2]
+    assert receiver.button_controller.calls == [False]
+
+
+def test_flood_is_coalesced(receiver):
+    changes = []
+    receiver.osc_manager.add_listener(changes.append)
+    datagrams = [message(f'/2/dmx/{7 + i % 5}', 1.0) for i in range(1000)] + [message('/2/dmx/10', 1.0)]
+    datagrams += [message('/2/dmx/0') for _ in range(4)]  # Even number of toggles: unchanged
+    pending = feed(receiver, *datagrams)
+    assert pending == {'path': 4, 'enable': True}
+    assert changes == ['path']
+    assert receiver.button_controller.calls == []
+
+
+def test_udp_burst(receiver):
+    receiver.start()
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for i in range(3000):
+        sender.sendto(message('/2/dmx/7', float(i % 2)), ('127.0.0.1', receiver.port))
+    sender.sendto(message('/2/dmx/11', 1.0), ('127.0.0.1', receiver.port))
+    deadline = time.monotonic() + 5
+    while receiver.osc_manager.current_path != 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sender.close()
+    assert receiver.osc_manager.current_path == 5
+    assert receiver.batches < receiver.received
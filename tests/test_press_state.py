@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Press state machine tests: defined behavior for presses during an effect
+and a threaded stress test that checks OSC on/off messages stay paired
+
+Usage:
+    python -m pytest tests/test_press_state.py
+"""
+
+import sys
+import os
+import random
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.gpio.debounce import DEFAULT_MIN_HOLD
+from src.gpio.mock_gpio import GPIO
+from src.controllers.button_controller import ButtonController
+from src.controllers.led_controller import LEDController
+from src.controllers.led_patterns import LEDPatternEngine
+from src.managers.osc_manager import OSCManager
+from src.managers.scheduler import TimerScheduler
+from src.simulation import Simulation, parse_trace, LED_PINS
+
+
+def assert_paired(sends):
+    """Every send toggles its scene (QLC+ Toggle buttons): only one scene is on at a time, all end off"""
+    on = set()
+    for address, value in sends:
+        assert value == 1, f"{address} sent {value}: QLC+ ignores it"
+        on ^= {address}
+        assert len(on) <= 1, f"{sorted(on)} on at the same time"
+    assert not on, f"{on} left on"
+
+
+@pytest.fixture
+def sim():
+    sim = Simulation(block_delay=0, effect_duration=10)
+    yield sim
+    sim.close()
+
+
+def test_press_during_effect_extends_it(sim):
+    timeline = sim.load(parse_trace(["0 tap", "5 tap"])).run()
+    sends = [(t, data['value']) for t, _, data in timeline.of_kind('osc')]
+    assert [value for _, value in sends] == [1, 1]
+    assert sends[1][0] == pytest.approx(15 + DEFAULT_MIN_HOLD)
+
+
+def test_press_during_effect_switches_scene(sim):
+    timeline = sim.load(parse_trace(["0 tap", "2 scene 2", "3 tap"])).run()
+    sends = [(data['address'], data['value']) for _, _, data in timeline.of_kind('osc')]
+    first, second = sends[0][0], sends[2][0]
+    assert first != second
+    assert sends == [(first, 1), (first, 1), (second, 1), (second, 1)]
+
+
+def test_state_names(sim):
+    sim.osc_manager.set_timing(5, 2)
+    states = []
+    sim.controller.add_listener(lambda event, data: states.append(sim.controller.state))
+    sim.load(parse_trace(["0 tap", "3 disable", "4 enable", "6 tap"])).run()
+    assert sim.controller.state == 'idle'
+    assert 'blocked' in states and 'disabled' in states
+    assert sim.controller.is_button_blocked is False and sim.controller.button_enabled is True
+
+
+def test_interleaved_presses_and_toggles_stay_paired():
+    GPIO.cleanup()
+    scheduler = TimerScheduler()
+    scheduler.start()
+    engine = LEDPatternEngine()
+    osc_manager = OSCManager()
+    osc_manager.set_timing(0.001, 0.002)
+    sends = []
+    lock = threading.Lock()
+
+    class Client:
+        def send_message(self, address, value, origin=None):
+            with lock:
+                sends.append((address, value))
+
+    controller = ButtonController(GPIO, 16, Client(), osc_manager, LEDController(GPIO, LED_PINS, engine=engine),
+                                  scheduler=scheduler)
+    paths = sorted(osc_manager.button_paths)
+
+    def presser(seed):
+        rng = random.Random(seed)
+        for _ in range(2000):
+            controller.handle_edge(GPIO.LOW, time.monotonic())
+            if rng.random() < 0.3:
+                time.sleep(rng.uniform(0, 0.002))
+            controller.handle_edge(GPIO.HIGH, time.monotonic())
+
+    def toggler(seed):
+        rng = random.Random(seed)
+        for i in range(2000):
+            action = rng.random()
+            if action < 0.3:
+                controller.set_button_enabled(i % 2 == 1)
+            elif action < 0.6:
+                osc_manager.set_button_path(rng.choice(paths))
+            else:
+                osc_manager.set_timing(rng.choice((0, 0.001, 0.003)), rng.choice((0, 0.001, 0.004)))
+            if rng.random() < 0.2:
+                time.sleep(0.0005)
+        controller.set_button_enabled(True)
+
+    threads = [threading.Thread(target=presser, args=(seed,)) for seed in range(4)]
+    threads += [threading.Thread(target=toggler, args=(seed,)) for seed in range(100, 102)]
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often so unguarded transitions would interleave
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        sys.setswitchinterval(switch_interval)
+        deadline = time.monotonic() + 5
+        while (controller.effect_running or controller.is_button_blocked) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert controller.state == 'idle'
+        assert len(sends) > 100
+        assert_paired(sends)
+    finally:
+        sys.setswitchinterval(switch_interval)
+        controller.cleanup()
+        engine.stop()
+        scheduler.stop()
+        GPIO.cleanup()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+QLC+ feedback tests against the local stand-in (tests/qlc_echo.py):
+echo matching and round-trip time, re-sends while QLC+ is starting,
+the 'not responding' alert and recovery
+
+Usage:
+    python -m pytest tests/test_qlc_feedback.py
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.gpio.mock_gpio import GPIO
+from src.controllers.led_controller import LEDController
+from src.controllers.led_patterns import LEDPatternEngine
+from src.managers.osc_manager import OSCManager
+from src.managers.osc_sender import OSCSender
+from src.managers.qlc_feedback import FeedbackMonitor, STATUS_OK, STATUS_NOT_RESPONDING, STATUS_UNKNOWN
+from src.managers.scheduler import TimerScheduler
+from src.simulation import LED_PINS
+from tests.qlc_echo import QLCEchoServer
+
+TIMEOUT = 0.05
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def rig():
+    """Sender -> stand-in -> feedback monitor, with an LED controller for the alert"""
+    GPIO.cleanup()
+    scheduler = TimerScheduler()
+    scheduler.start()
+    osc_manager = OSCManager()
+    leds = LEDController(GPIO, LED_PINS, engine=LEDPatternEngine())
+    sender = OSCSender('127.0.0.1', 9, osc_manager)
+    monitor = FeedbackMonitor('127.0.0.1', 0, sender, osc_manager, scheduler, leds, timeout=TIMEOUT).start()
+    server = QLCEchoServer(monitor.port).start()
+    sender._address = ('127.0.0.1', server.port)
+    path = osc_manager.button_paths[1]
+    yield sender, monitor, server, leds, path
+    monitor.close()
+    server.close()
+    sender.close()
+    leds.cleanup()
+    scheduler.stop()
+
+
+def test_press_is_matched_with_round_trip(rig):
+    sender, monitor, server, leds, path = rig
+    assert monitor.status == STATUS_UNKNOWN
+    sender.send_message(path, 1)
+    assert wait_for(lambda: monitor.matched == 1)
+    assert monitor.status == STATUS_OK
+    assert 0 < monitor.last_rtt < 0.5
+    assert monitor.button_states[path] is True
+    assert monitor.get_stats()['round_trip_ms']['p50'] > 0
+    assert monitor.resends == 0 and not monitor.get_stats()['waiting']
+    assert leds.get_patterns()['led_green'] != 'no_response'
+
+
+def test_press_is_resent_until_qlc_is_up(rig):
+    sender, monitor, server, leds, path = rig
+    server.drop = 2  # QLC+ still starting: the first two presses are lost
+    sender.send_message(path, 1)
+    assert wait_for(lambda: monitor.matched == 1)
+    assert monitor.resends == 2
+    # Re-sent only until answered: the scene ends up on, not toggled back off
+    time.sleep(TIMEOUT * 8)
+    assert len(server.presses(path)) == 3
+    assert server.states[path] is True
+    assert monitor.status == STATUS_OK
+
+
+def test_not_responding_alert_and_recovery(rig):
+    sender, monitor, server, leds, path = rig
+    statuses = []
+    monitor.add_listener(lambda event, data: statuses.append(data['status']))
+    server.responding = False
+    sender.send_message(path, 1)
+    assert wait_for(lambda: monitor.status == STATUS_NOT_RESPONDING)
+    assert wait_for(lambda: leds.get_patterns()['led_green'] == 'no_response')
+    assert wait_for(lambda: monitor.unanswered == 1)
+    assert monitor.resends == monitor.max_resends
+    assert len(server.presses(path)) == 1 + monitor.max_resends
+
+    # The alert covers state changes made meanwhile and clears on the next echo
+    leds.switch_green_led(True)
+    assert leds.get_patterns()['led_green'] == 'no_response'
+    server.responding = True
+    sender.send_message(osc_path := monitor.osc_manager.button_paths[2], 1)
+    assert wait_for(lambda: monitor.status == STATUS_OK)
+    assert leds.get_patterns()['led_green'] == 'on'
+    assert monitor.button_states[osc_path] is True
+    assert statuses == [STATUS_NOT_RESPONDING, STATUS_OK]
+
+
+def test_release_ends_the_wait(rig):
+    sender, monitor, server, leds, path = rig
+    server.responding = False
+    sender.send_message(path, 1)
+    sender.send_message(path, 0)
+    assert wait_for(lambda: monitor.presses == 1 and not monitor.get_stats()['waiting'])
+    time.sleep(TIMEOUT * 4)
+    assert monitor.resends == 0
+    assert len(server.presses(path)) == 1
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+TimerScheduler on a virtual clock: one-shot and periodic callbacks,
+cancel, re-arming fired and cancelled handles, lazy heap cleanup and
+the pending() backlog count
+
+Usage:
+    python -m pytest tests/test_scheduler.py
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.simulation import VirtualClock, VirtualScheduler
+
+
+@pytest.fixture
+def scheduler():
+    """Scheduler on a virtual clock at t=0, run by run_until() instead of a thread"""
+    return VirtualScheduler(VirtualClock())
+
+
+def run_until(scheduler, t):
+    """Advance the virtual clock deadline by deadline up to t, running the due callbacks"""
+    while True:
+        deadline = scheduler.next_deadline()
+        if deadline is None or deadline > t:
+            break
+        scheduler.clock.advance_to(deadline)
+        scheduler.run_due()
+    scheduler.clock.advance_to(t)
+
+
+def test_call_later_runs_once_at_its_deadline(scheduler):
+    calls = []
+    handle = scheduler.call_later(2, lambda name: calls.append((scheduler.clock(), name)), "off")
+    assert handle.active and handle.remaining() == 2
+    run_until(scheduler, 1.9)
+    assert calls == []
+    run_until(scheduler, 10)
+    assert calls == [(2, "off")]
+    assert not handle.active and handle.remaining() == 0 and scheduler.pending() == 0
+
+
+def test_call_later_runs_in_deadline_order(scheduler):
+    calls = []
+    scheduler.call_later(3, calls.append, "c")
+    scheduler.call_later(1, calls.append, "a")
+    scheduler.call_later(2, calls.append, "b")
+    run_until(scheduler, 5)
+    assert calls == ["a", "b", "c"]
+
+
+def test_call_every_keeps_its_phase(scheduler):
+    calls = []
+
+    def tick():
+        calls.append(scheduler.clock())
+        scheduler.clock.advance_to(scheduler.clock() + 0.3)  # A slow callback does not shift later ticks
+
+    handle = scheduler.call_every(1, tick, first_delay=0.5)
+    run_until(scheduler, 4)
+    assert calls == [0.5, 1.5, 2.5, 3.5]
+    assert handle.active and scheduler.pending() == 1
+    handle.cancel()
+    run_until(scheduler, 10)
+    assert len(calls) == 4 and scheduler.pending() == 0
+
+
+def test_cancel_before_the_deadline(scheduler):
+    calls = []
+    handle = scheduler.call_later(1, calls.append, "off")
+    handle.cancel()
+    handle.cancel()  # Safe twice
+    run_until(scheduler, 5)
+    assert calls == [] and handle.cancelled and not handle.active and scheduler.pending() == 0
+
+
+def test_reschedule_a_fired_handle(scheduler):
+    calls = []
+    handle = scheduler.timer(lambda: calls.append(scheduler.clock()))
+    assert not handle.active and scheduler.pending() == 0
+    handle.reschedule(1)
+    run_until(scheduler, 2)
+    handle.reschedule(1)  # Re-armed after it ran
+    run_until(scheduler, 5)
+    assert calls == [1, 3]
+
+
+def test_reschedule_a_cancelled_handle(scheduler):
+    calls = []
+    handle = scheduler.call_later(1, lambda: calls.append(scheduler.clock()))
+    handle.cancel()
+    handle.reschedule(2)
+    assert handle.active and not handle.cancelled and scheduler.pending() == 1
+    run_until(scheduler, 5)
+    assert calls == [2]
+
+
+def test_reschedule_moves_a_pending_handle(scheduler):
+    calls = []
+    handle = scheduler.call_later(1, lambda: calls.append(scheduler.clock()))
+    run_until(scheduler, 0.5)
+    handle.reschedule(2)  # Later: the old deadline must not fire
+    run_until(scheduler, 5)
+    assert calls == [2.5] and scheduler.pending() == 0
+
+
+def test_cancelled_entries_are_dropped_lazily(scheduler):
+    handles = [scheduler.call_later(delay, lambda: None) for delay in (1, 2, 3)]
+    handles[0].cancel()
+    handles[1].reschedule(4)
+    # cancel() and reschedule() leave the old entries in the heap...
+    assert len(scheduler._heap) == 4 and scheduler.pending() == 2
+    # ...until they come up at the head
+    assert scheduler.next_deadline() == 3
+    assert len(scheduler._heap) == 2
+    run_until(scheduler, 10)
+    assert scheduler._heap == [] and scheduler.pending() == 0
+
+
+def test_pending_counts_waiting_callbacks(scheduler):
+    one_shot = scheduler.call_later(1, lambda: None)
+    periodic = scheduler.call_every(1, lambda: None, first_delay=1)
+    scheduler.timer(lambda: None)  # Not armed
+    assert scheduler.pending() == 2
+    one_shot.reschedule(2)  # Still one entry
+    assert scheduler.pending() == 2
+    run_until(scheduler, 2.5)
+    assert scheduler.pending() == 1  # The periodic one stays
+    periodic.cancel()
+    assert scheduler.pending() == 0
+    periodic.cancel()
+    assert scheduler.pending() == 0
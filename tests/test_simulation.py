@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Timing regression tests on the virtual-clock simulation: block and effect
+timing, debounce, LED feedback and a full evening replayed in seconds
+
+Usage:
+    python -m pytest tests/test_simulation.py
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.helpers import osc_sends
+from src.gpio.debounce import DEFAULT_MIN_HOLD
+from src.simulation import parse_trace, synthetic_evening, LED_PINS
+
+
+def test_effect_off_after_effect_duration(simulation):
+    sim = simulation(block_delay=0, effect_duration=10)
+    timeline = sim.load(parse_trace(["1 tap"])).run()
+    (on_at, on), (off_at, off) = osc_sends(timeline)
+    assert (on, off) == (1, 1)  # Toggle button: the second 1 switches the scene off
+    assert on_at == pytest.approx(1 + DEFAULT_MIN_HOLD)
+    assert off_at - on_at == pytest.approx(10)
+
+
+def test_presses_during_block_are_rejected(simulation):
+    sim = simulation(block_delay=7200, effect_duration=30)
+    timeline = sim.load(parse_trace(["0 tap", "60 tap", "7199 tap", "7201 tap"])).run()
+    presses = [t for t, _, _ in timeline.of_kind('event', event='press')]
+    rejected = [t for t, _, _ in timeline.of_kind('event', event='press_rejected')]
+    assert presses == pytest.approx([0 + DEFAULT_MIN_HOLD, 7201 + DEFAULT_MIN_HOLD])
+    assert len(rejected) == 2
+    assert sim.clock() > 2 * 7200  # Two full blocks simulated
+
+
+def test_contact_bounce_counts_once(simulation):
+    sim = simulation(block_delay=0, effect_duration=1)
+    trace = ["5.000 press", "5.001 release", "5.0015 press", "5.004 release", "5.005 press", "5.2 release"]
+    timeline = sim.load(parse_trace(trace)).run()
+    assert len(timeline.of_kind('event', event='press')) == 1
+
+
+def test_led_feedback_on_timeline(simulation):
+    sim = simulation(block_delay=10, effect_duration=2)
+    timeline = sim.load(parse_trace(["1 tap"])).run()
+    green = [(t, data['state']) for t, _, data in timeline.of_kind('gpio', pin=LED_PINS['led_green'])]
+    red = [(t, data['state']) for t, _, data in timeline.of_kind('gpio', pin=LED_PINS['led_red'])]
+    # Green blinks during the effect (0.4 s steps), red shows the block pattern until it ends
+    effect = [t for t, _ in green if 1 < t < 3]
+    assert len(effect) >= 4
+    block_end = timeline.of_kind('event', event='block_end')[0][0]
+    assert block_end == pytest.approx(11 + DEFAULT_MIN_HOLD)
+    assert any(state for t, state in red if 1 < t < block_end)
+    assert red[-1][1] == 0 and red[-1][0] <= block_end
+
+
+def test_disabled_button_sends_nothing(simulation):
+    sim = simulation(block_delay=0, effect_duration=1)
+    timeline = sim.load(parse_trace(["0 disable", "1 tap", "2 enable", "3 tap"])).run()
+    assert [value for _, value in osc_sends(timeline)] == [1, 1]
+    assert timeline.of_kind('event', event='press_rejected', reason='disabled')
+
+
+def test_poll_mode_catches_taps(simulation):
+    sim = simulation(block_delay=0, effect_duration=1, input_mode="poll", poll_interval=0.1)
+    timeline = sim.load(parse_trace(["1.03 tap 0.04", "3.01 tap 0.3"])).run(until=10)
+    assert len(timeline.of_kind('event', event='press')) == 2
+
+
+def test_replay_is_deterministic(simulation):
+    trace = synthetic_evening(hours=1, presses=40, seed=3)
+    first = simulation(block_delay=60, effect_duration=10).load(trace).run().as_list()
+    second = simulation(block_delay=60, effect_duration=10).load(trace).run().as_list()
+    assert first == second
+
+
+def test_evening_replays_in_seconds(simulation):
+    block = 60
+    trace = synthetic_evening(hours=5, presses=300, seed=1)
+    sim = simulation(block_delay=block, effect_duration=10)
+    started = time.perf_counter()
+    timeline = sim.load(trace).run()
+    assert time.perf_counter() - started < 10
+    assert sim.clock() > 4 * 3600
+
+    # Reference model: a tap is accepted once the previous accepted press's block is over
+    expected = []
+    for t, _, _ in trace:
+        dispatched = t + DEFAULT_MIN_HOLD
+        if not expected or dispatched >= expected[-1] + block:
+            expected.append(dispatched)
+    presses = [t for t, _, _ in timeline.of_kind('event', event='press')]
+    assert presses == pytest.approx(expected)
+    assert len(timeline.of_kind('osc')) == 2 * len(expected)
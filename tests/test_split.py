@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Split process mode: the seqlock state block, the command socket, the web
+proxies behind the unchanged Flask app, a read-only journal reader and
+the web process supervisor restarting a crashed web process
+
+Usage:
+    python -m pytest tests/test_split.py
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.gpio.debounce import DEFAULT_MIN_HOLD
+from src.managers.journal import EventJournal
+from src.managers.shared_state import StateBlock, StatePublisher, CommandServer, CommandClient, RemoteError
+from src.simulation import Simulation
+from src.web.remote import RemoteSystem, WebProcess, build_commands, web_process_options
+
+
+@pytest.fixture
+def split(tmp_path):
+    """Real-time side on the simulation, web side as RemoteSystem in the same process"""
+    sim = Simulation(block_delay=60, effect_duration=5)
+    block = StateBlock(str(tmp_path / "state")).create()
+    publisher = StatePublisher(block, sim.controller, sim.osc_manager).start()
+    commands, queries = build_commands(sim.controller, sim.osc_manager, sim.osc_client)
+    server = CommandServer(str(tmp_path / "command.sock"), commands, queries, publisher).start()
+    options = web_process_options(block.path, server.path, sim.controller, sim.osc_client, port=0, event_port=0)
+    system = RemoteSystem(options)
+    yield sim, publisher, system
+    system.close()
+    server.close()
+    publisher.stop()
+    block.close()
+    sim.close()
+
+
+def test_state_block_round_trip_and_torn_reads(tmp_path):
+    writer = StateBlock(str(tmp_path / "state"), size=4096).create()
+    reader = StateBlock(writer.path).attach()
+    assert reader.read() is None  # Nothing published yet
+    writer.write(b'{"a":1}')
+    sequence, payload = reader.read()
+    assert payload == b'{"a":1}' and reader.read(since=sequence) is None
+    with pytest.raises(ValueError):
+        writer.write(b'x' * 4096)
+    # A writer stuck mid-write (odd sequence) never yields a half-written payload
+    writer._mm[8] = writer._mm[8] | 1
+    with pytest.raises(RemoteError):
+        reader.read(attempts=3)
+    assert reader.retries == 3
+    reader.close()
+    writer.close()
+
+
+def test_web_changes_reach_the_real_time_side(split):
+    sim, _, system = split
+    client = system.create_app().test_client()
+    assert client.post('/api/path', json={"path_id": 3}).get_json()['current_path'] == 'Scene C'
+    assert sim.osc_manager.current_path == 3
+    client.post('/api/timing', json={"block_delay_seconds": 10, "osc_off_delay_seconds": 2})
+    assert (sim.osc_manager.current_delay, sim.osc_manager.current_osc_off_delay) == (10, 2)
+    assert client.post('/api/tempo', json={"bpm": 5}).status_code == 400
+    assert client.post('/api/tempo', json={"bpm": 120, "quantize": 1}).get_json()['bpm'] == 120
+    assert sim.osc_manager.tempo.bpm == 120
+    assert client.post('/api/button', json={"enabled": False}).get_json()['button_enabled'] is False
+    assert not sim.controller.button_enabled
+    assert client.post('/api/led/led_red/blink', json={}).status_code == 200
+    assert client.post('/api/led/nope/on', json={}).status_code == 404
+    assert 'tanzen_button_presses_total' in client.get('/metrics').get_data(as_text=True)
+
+
+def test_button_state_is_mirrored_without_asking(split):
+    sim, publisher, system = split
+    client = system.create_app().test_client()
+    sim.load([(1, 'tap', ())]).run(until=2)
+    publisher.publish()  # The publisher thread would do this within microseconds
+    writes = publisher.block.writes
+    status = client.get('/api/status').get_json()
+    assert status['button_state'] == 'blocked'
+    assert 0 < system.button_controller.block_remaining() <= 60
+    assert publisher.block.writes == writes  # Reads never reach the real-time side
+
+
+def test_journal_reader_follows_the_writer(tmp_path):
+    t = [1000.0]
+    writer = EventJournal(str(tmp_path / "events.journal"), size=64 + 32 * 8, clock=lambda: t[0]).open()
+    reader = EventJournal(writer.path).attach()
+    writer.append('press', scene=1)
+    assert [event['kind'] for event in reader.query()] == ['press']
+    for _ in range(10):
+        t[0] += 1
+        writer.append('press_rejected', reason='blocked')
+    assert len(reader.query()) == 8 and reader.get_stats()['written'] == 11
+    reader.append('press')  # Read-only: ignored
+    assert writer.get_stats()['written'] == 11
+    reader.close()
+    writer.close()
+
+
+def crash_at_once(options):
+    """Stand-in web process that dies right away"""
+    os._exit(3)
+
+
+def test_supervisor_restarts_a_crashed_web_process(split):
+    sim, _, system = split
+    supervisor = WebProcess({}, restart_delay=0.05, max_restart_delay=0.1, target=crash_at_once).start()
+    deadline = time.monotonic() + 30
+    while supervisor.restarts < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    supervisor.stop()
+    assert supervisor.restarts >= 2 and supervisor.last_exitcode == 3
+    # The real-time side kept working throughout
+    sim.load([(10, 'tap', ())]).run(until=20)
+    assert sim.timeline.of_kind('event', event='effect_off')[-1][0] == pytest.approx(10 + 5 + DEFAULT_MIN_HOLD)
+    assert CommandClient(system.client.path).call('ping') is True
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Startup budget regression test: the button -> OSC path must be up quickly
+and must not wait for the web interface
+
+Runs main.py --startup-check in a fresh interpreter and checks the
+per-phase report. Budgets can be raised for slow boards with
+TANZEN_BUTTON_BUDGET_MS / TANZEN_WEB_BUDGET_MS.
+
+Usage:
+    python -m pytest tests/test_startup.py
+    python tests/test_startup.py   # prints the report
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUTTON_BUDGET_MS = float(os.environ.get('TANZEN_BUTTON_BUDGET_MS', 1000))
+WEB_BUDGET_MS = float(os.environ.get('TANZEN_WEB_BUDGET_MS', 5000))
+
+# Heavy modules that must stay off the button path
+WEB_ONLY_MODULES = ('flask', 'werkzeug', 'pythonosc', 'jinja2')
+
+
+def run_startup_check():
+    """Start main.py in check mode and return its startup report"""
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [sys.executable, 'main.py', '--startup-check', '--state-file', os.path.join(tmp, 'state.json'),
+             '--journal-file', os.path.join(tmp, 'events.journal')],
+            cwd=ROOT, stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60,
+            env=dict(os.environ, TANZEN_LOG_QUIET='1'))
+    assert result.returncode == 0, result.stderr
+    report_line = [line for line in result.stdout.splitlines() if line.startswith('{')][-1]
+    return json.loads(report_line)
+
+
+def test_startup_budget():
+    report = run_startup_check()
+    marks = report['marks_ms']
+    assert marks['button_ready'] < BUTTON_BUDGET_MS, report
+    assert marks['web_ready'] < WEB_BUDGET_MS, report
+    # The button must not wait for the web interface
+    assert marks['button_ready'] < marks['web_ready']
+    phases = {phase['name'] for phase in report['phases']}
+    assert {'import', 'gpio', 'osc', 'button', 'input', 'web'} <= phases
+
+
+def test_button_path_imports_no_web_modules():
+    code = ("import sys, main; "
+            f"print(','.join(m for m in {WEB_ONLY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '', f"imported at startup: {result.stdout.strip()}"
+
+
+if __name__ == "__main__":
+    report = run_startup_check()
+    print("🕒 Startup report:")
+    for phase in report['phases']:
+        print(f"   {phase['name']:<12} {phase['duration_ms']:8.1f} ms  (at {phase['start_ms']:7.1f} ms)")
+    for name, offset in report['marks_ms'].items():
+        print(f"   {name:<12} {offset:8.1f} ms")
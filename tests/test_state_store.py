@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Runtime state store on the virtual-clock simulation: settings survive a
+restart, an interrupted block resumes with its remaining time, and saved
+station scenes that no longer exist fall back to the default
+
+Usage:
+    python -m pytest tests/test_state_store.py
+"""
+
+import sys
+import os
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.managers.state_store import StateStore, restore_state, attach_state, STATE_VERSION
+from src.simulation import parse_trace
+
+STATION_BUTTONS = 2
+
+
+def test_settings_and_block_survive_a_restart(simulation, tmp_path):
+    path = str(tmp_path / "state.json")
+    sim = simulation(block_delay=60, effect_duration=2)
+    sim.osc_manager.configure_station(STATION_BUTTONS)
+    # Wall clock of the first run: 1000 s at virtual t=0
+    store = StateStore(path, coalesce=0, clock=lambda: 1000.0 + sim.clock())
+    attach_state(store, sim.controller, sim.osc_manager)
+    sim.osc_manager.set_button_path(3)
+    sim.osc_manager.set_button_config(1, path_id=2, delay=5, osc_off_delay=7)
+    sim.osc_manager.set_tempo(120, 1)
+    sim.load(parse_trace(["1 tap"])).run(until=10)
+    assert sim.controller.state == 'blocked'
+    store.close()
+    assert store.writes > 0
+
+    # Restart 30 s of wall time after the press
+    restarted = simulation(block_delay=60, effect_duration=2)
+    restarted.osc_manager.configure_station(STATION_BUTTONS)
+    block_started = sim.timeline.of_kind('event', event='block_start')[0][0]
+    store = StateStore(path, clock=lambda: 1000.0 + block_started + 30 + restarted.clock())
+    remaining = restore_state(store, restarted.controller, restarted.osc_manager)
+
+    manager = restarted.osc_manager
+    assert manager.current_path == 3
+    assert manager.get_button_config(1) == {'path_id': 2, 'delay': 5, 'osc_off_delay': 7}
+    assert (manager.tempo.bpm, manager.tempo.quantize) == (120, 1)
+    assert remaining == pytest.approx(30)
+    assert restarted.controller.state == 'blocked'
+    timeline = restarted.run()
+    (end_at, _, _), = timeline.of_kind('event', event='block_end')
+    assert end_at == pytest.approx(30)
+    assert restarted.controller.state == 'idle'
+
+
+def test_block_over_during_the_restart_is_not_resumed(simulation, tmp_path):
+    path = str(tmp_path / "state.json")
+    with open(path, 'w') as f:
+        json.dump({'version': STATE_VERSION, 'state': {'block_until': 1050.0, 'block_delay': 60}}, f)
+    sim = simulation()
+    assert restore_state(StateStore(path, clock=lambda: 1100.0), sim.controller, sim.osc_manager) == 0
+    assert sim.controller.state == 'idle'
+
+
+def write_buttons(path, buttons):
+    with open(path, 'w') as f:
+        json.dump({'version': STATE_VERSION, 'state': {'buttons': buttons}}, f)
+
+
+def test_saved_station_scene_is_restored(simulation, tmp_path):
+    path = str(tmp_path / "state.json")
+    write_buttons(path, {'0': {'path_id': 4, 'delay': 3, 'osc_off_delay': 4}})
+    sim = simulation()
+    sim.osc_manager.configure_station(STATION_BUTTONS)
+    restore_state(StateStore(path), sim.controller, sim.osc_manager)
+    assert sim.osc_manager.get_button_config(0) == {'path_id': 4, 'delay': 3, 'osc_off_delay': 4}
+
+
+def test_unknown_station_scene_falls_back_to_the_default(simulation, tmp_path):
+    path = str(tmp_path / "state.json")
+    write_buttons(path, {'0': {'path_id': 99, 'delay': 3, 'osc_off_delay': 4},
+                         str(STATION_BUTTONS): {'path_id': 99, 'delay': 3, 'osc_off_delay': 4}})
+    sim = simulation()
+    manager = sim.osc_manager
+    manager.configure_station(STATION_BUTTONS)
+    default = manager.get_button_config(0)['path_id']
+    restore_state(StateStore(path), sim.controller, manager)
+    # The scene falls back, the saved delays are kept
+    assert manager.get_button_config(0) == {'path_id': default, 'delay': 3, 'osc_off_delay': 4}
+    # A button the station was not configured with gets the default a new button would
+    unconfigured = manager.get_button_config(STATION_BUTTONS)
+    assert unconfigured['path_id'] == manager.default_button_config(STATION_BUTTONS)['path_id']
+    assert all(config['path_id'] in manager.button_paths for config in manager.button_configs.values())
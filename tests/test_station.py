@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Button station on the virtual-clock simulation: effect pairing of the
+QLC+ toggle scenes on re-presses and scene changes, block and hold
+states, enabling with the main button, beat-quantized presses, and
+presses racing cue list holds
+
+Usage:
+    python -m pytest tests/test_station.py
+"""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.helpers import osc_sends
+from src.controllers.press_state import EFFECT
+from src.controllers.button_station import ButtonStation
+from src.gpio.mock_gpio import GPIO
+from src.managers.cues import CueEngine, CueList, _Event, HOLD, RELEASE
+from src.managers.osc_manager import OSCManager
+from src.managers.scheduler import TimerScheduler
+
+FIRST_PIN = 100  # Mock pins, clear of the real button/LED pins
+
+
+@pytest.fixture
+def station(simulation):
+    """Two-button station on the simulation; returns (sim, station)"""
+    sim = simulation()
+    station = ButtonStation(sim.gpio, [FIRST_PIN, FIRST_PIN + 1], sim.osc_client, sim.osc_manager,
+                            sim.led_controller, scheduler=sim.scheduler)
+    yield sim, station
+    station.cleanup()
+
+
+def press(sim, station, index, t, hold=0.1):
+    """Debounced press and release of button index at virtual time t"""
+    sim.scheduler.call_at(t, station.handle_edge, index, GPIO.LOW, t)
+    sim.scheduler.call_at(t + hold, station.handle_edge, index, GPIO.HIGH, t + hold)
+
+
+def test_re_press_extends_the_running_scene(station):
+    sim, station = station
+    sim.osc_manager.set_button_config(0, delay=2, osc_off_delay=10)
+    press(sim, station, 0, 0)
+    press(sim, station, 0, 3)
+    timeline = sim.run()
+    scene = sim.osc_manager.button_paths[sim.osc_manager.get_button_config(0)['path_id']]
+    # Re-sending 1 would toggle the scene off: one on, and the off moves to 3 + 10
+    assert osc_sends(timeline, address=True) == [(0, scene, 1), (13, scene, 1)]
+
+
+def test_scene_change_switches_the_old_scene_off_first(station):
+    sim, station = station
+    manager = sim.osc_manager
+    path_ids = sorted(manager.button_paths)
+    manager.set_button_config(0, path_id=path_ids[0], delay=2, osc_off_delay=10)
+    press(sim, station, 0, 0)
+    sim.scheduler.call_at(1, manager.set_button_config, 0, path_ids[1])
+    press(sim, station, 0, 3)
+    timeline = sim.run()
+    old, new = manager.button_paths[path_ids[0]], manager.button_paths[path_ids[1]]
+    assert osc_sends(timeline, address=True) == [(0, old, 1), (3, old, 1), (3, new, 1), (13, new, 1)]
+
+
+def test_block_and_hold_states(station):
+    sim, station = station
+    sim.osc_manager.set_button_config(0, delay=5, osc_off_delay=2)
+    rejected = []
+    station.add_listener(lambda event, data: rejected.append(data['reason']) if event == 'press_rejected' else None)
+    press(sim, station, 0, 0)
+    press(sim, station, 0, 1)
+    sim.run(until=1.5)
+    assert [s['state'] for s in station.get_status()] == ['blocked', 'idle']
+    assert station.buttons[0].flags & EFFECT and 3 < station.get_status()[0]['block_remaining'] <= 4
+    sim.run(until=3)
+    assert station.state(0) == 'blocked' and not station.buttons[0].flags & EFFECT
+    station.set_hold(True)
+    press(sim, station, 1, 4)
+    sim.run()
+    assert station.state(0) == 'held' and rejected == ['blocked', 'cue']
+    station.set_hold(False)
+    assert [s['state'] for s in station.get_status()] == ['idle', 'idle']
+
+
+def test_station_follows_the_main_button_enable(station):
+    from src.web.web_config import create_app
+    sim, station = station
+    station.follow(sim.controller)
+    client = create_app(sim.controller, sim.osc_manager, sim.osc_client).test_client()
+    rejected = []
+    station.add_listener(lambda event, data: rejected.append(data['reason']) if event == 'press_rejected' else None)
+    client.post('/api/button', json={"enabled": False})
+    assert not station.enabled and station.state(0) == 'disabled'
+    press(sim, station, 0, 1)
+    sim.load([(2, 'enable', ())])  # Simulation input: the same set_button_enabled path OSC control takes
+    press(sim, station, 1, 3)
+    timeline = sim.run()
+    assert rejected == ['disabled'] and station.enabled
+    assert [address for _, address, _ in osc_sends(timeline, address=True)] == [station.get_status()[1]['scene']] * 2
+
+
+def test_presses_before_the_beat_share_one_trigger(station):
+    sim, station = station
+    sim.osc_manager.set_button_config(0, delay=0, osc_off_delay=2)
+    sim.osc_manager.set_tempo(120, 1)  # Beats every 0.5 s from t=0
+    armed = []
+    press(sim, station, 0, 1.1, hold=0.05)
+    sim.scheduler.call_at(1.2, lambda: armed.append(station.state(0)))
+    press(sim, station, 0, 1.3, hold=0.05)
+    timeline = sim.run()
+    assert armed == ['armed']
+    assert osc_sends(timeline, digits=6) == [(1.5, 1), (3.5, 1)]
+
+
+def test_presses_race_hold_cues_without_deadlock(tmp_path):
+    GPIO.cleanup()
+    scheduler = TimerScheduler()
+    scheduler.start()
+
+    class Client:
+        def send_message(self, address, value, origin=None):
+            return True
+
+    osc_manager = OSCManager()
+    station = ButtonStation(GPIO, [FIRST_PIN, FIRST_PIN + 1], Client(), osc_manager, scheduler=scheduler)
+    for index in range(len(station)):
+        osc_manager.set_button_config(index, delay=0.001, osc_off_delay=0.002)
+    engine = CueEngine(str(tmp_path), Client(), osc_manager, scheduler, button_station=station)
+    show = CueList("show", {"start": "21:00", "manual": "block", "cues": [{"scene": 1}]}, osc_manager)
+
+    def presser(index):
+        for _ in range(10000):
+            station.handle_edge(index, GPIO.LOW, time.monotonic())
+            station.handle_edge(index, GPIO.HIGH, time.monotonic())
+
+    def cues():
+        # The HOLD/RELEASE events a 'block' list fires at its start and end
+        for _ in range(10000):
+            engine._apply(_Event(0, HOLD, None, "show", show, 0))
+            engine._apply(_Event(0, RELEASE, None, "show", show, 0))
+
+    threads = [threading.Thread(target=presser, args=(index,), daemon=True) for index in range(len(station))]
+    threads.append(threading.Thread(target=cues, daemon=True))
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often so opposite lock orders would meet
+    try:
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 20
+        for thread in threads:
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+    finally:
+        sys.setswitchinterval(switch_interval)
+    # Cleanup takes the station locks, so a deadlock must fail before it
+    assert not any(thread.is_alive() for thread in threads), "deadlocked"
+    assert not station.held and station.presses[0] > 0
+    station.cleanup()
+    scheduler.stop()
+    GPIO.cleanup()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Beat-quantized triggers on the virtual-clock simulation (BPM, tap tempo,
+grace window) and timer lateness reporting of the real scheduler
+
+Usage:
+    python -m pytest tests/test_timing.py
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.helpers import osc_sends
+from src.gpio.debounce import DEFAULT_MIN_HOLD
+from src.managers.scheduler import TimerScheduler
+from src.managers.tempo import BeatClock
+from src.simulation import parse_trace
+
+
+def test_quantized_press_lands_on_the_next_beat(simulation):
+    sim = simulation(block_delay=5, effect_duration=2)
+    # 120 BPM from t=0: beats every 0.5 s
+    timeline = sim.load(parse_trace(["0 tempo 120 1", "1.1 tap", "1.3 tap"])).run()
+    (on_at, on), (off_at, off) = osc_sends(timeline)
+    assert (on, off) == (1, 1)
+    assert on_at == pytest.approx(1.5)
+    assert off_at == pytest.approx(3.5)
+    # The block starts with the press, not the beat: the second tap is rejected
+    assert timeline.of_kind('event', event='armed')[0][2]['delay'] == pytest.approx(0.4 - DEFAULT_MIN_HOLD)
+    assert len(timeline.of_kind('event', event='press_rejected')) == 1
+
+
+def test_press_just_after_a_beat_is_not_delayed(simulation):
+    sim = simulation(block_delay=0, effect_duration=2)
+    timeline = sim.load(parse_trace(["0 tempo 120 1", "1.0 tap"])).run()
+    assert osc_sends(timeline)[0] == (pytest.approx(1.0 + DEFAULT_MIN_HOLD), 1)
+    assert not timeline.of_kind('event', event='armed')
+
+
+def test_tap_tempo_sets_bpm_and_phase(simulation):
+    sim = simulation(block_delay=0, effect_duration=1)
+    sim.osc_manager.set_tempo(quantize=2)  # Without a tempo: no quantize yet
+    trace = ["0.2 tap"] + [f"{10 + i * 0.6} beat" for i in range(4)] + ["13 tap"]
+    timeline = sim.load(parse_trace(trace)).run()
+    assert sim.osc_manager.tempo.bpm == pytest.approx(100)
+    # Last tap at 11.8, grid every 2 beats (1.2 s): 13.0 is on it, within the grace
+    ons = [t for t, _ in osc_sends(timeline)][0::2]  # Sends alternate on, off
+    assert ons == [pytest.approx(0.2 + DEFAULT_MIN_HOLD), pytest.approx(13 + DEFAULT_MIN_HOLD)]
+
+
+def test_armed_press_is_replaced_by_a_later_one(simulation):
+    sim = simulation(block_delay=0, effect_duration=1)
+    timeline = sim.load(parse_trace(["0 tempo 60 1", "0.2 tap", "0.5 scene 2", "0.6 tap"])).run()
+    assert sim.controller.state == 'idle'
+    path = sim.osc_manager.button_paths[2]
+    assert osc_sends(timeline, address=True) == [(pytest.approx(1.0), path, 1), (pytest.approx(2.0), path, 1)]
+
+
+def test_beat_clock_validation_and_tap_reset():
+    clock = BeatClock(clock=lambda: 0.0)
+    with pytest.raises(ValueError):
+        clock.set_bpm(5)
+    for beats in (-1, 17, 'nan', float('nan'), 'inf'):
+        with pytest.raises(ValueError):
+            clock.set_quantize(beats)
+    assert clock.quantize == 0 and not clock.active
+    assert clock.delay(1.0) == 0  # No tempo: never quantized
+    clock.tap(0.0)
+    assert clock.tap(0.5) == pytest.approx(120)
+    assert clock.tap(10.0) is None  # Gap: a new tap sequence
+    assert clock.bpm == pytest.approx(120) and clock.origin == 10.0
+
+
+def test_scheduler_reports_lateness_in_both_modes():
+    for spin in (0.0, 0.002):
+        scheduler = TimerScheduler(name="test-scheduler", spin=spin)
+        done = []
+        start = scheduler.clock() + 0.01
+        for i in range(20):
+            scheduler.call_at(start + i * 0.005, done.append, i)
+        deadline = time.monotonic() + 3
+        while len(done) < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = scheduler.get_timing_stats()
+        scheduler.stop()
+        assert done == list(range(20))
+        assert stats['mode'] == ('precise' if spin else 'coarse')
+        assert stats['dispatched'] == 20
+        assert 0 <= stats['lateness_ms']['p50'] <= stats['lateness_ms']['max']
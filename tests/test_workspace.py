@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Workspace loader against tanzverein.qxw: function and button indexes,
+scene OSC paths resolved to functions, and the on-disk index cache
+(hit on an unchanged file, hash check on a touched one, reparse on an
+edited one)
+
+Usage:
+    python -m pytest tests/test_workspace.py
+"""
+
+import sys
+import os
+import json
+import shutil
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.qlc import workspace as workspace_module
+from src.qlc.workspace import load_workspace, osc_channel, _cache_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKSPACE = os.path.join(ROOT, "tanzverein.qxw")
+SCENE_FUNCTIONS = {"Scene A": 20, "Scene B": 23, "Scene C": 24, "Scene D": 22, "Scene E": 10}
+
+
+@pytest.fixture
+def workspace_copy(tmp_path):
+    path = tmp_path / "show.qxw"
+    shutil.copy(WORKSPACE, path)
+    return str(path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Paths parse_workspace was called with (the loader still parses)"""
+    calls = []
+    parse = workspace_module.parse_workspace
+
+    def counting(source):
+        calls.append(source)
+        return parse(source)
+    monkeypatch.setattr(workspace_module, "parse_workspace", counting)
+    return calls
+
+
+def test_function_index():
+    workspace = load_workspace(WORKSPACE, use_cache=False)
+    assert len(workspace.functions) == 29
+    assert workspace.functions[20].name == "Seq1" and workspace.functions[20].type == "Chaser"
+    assert [f.id for f in workspace.find_functions(function_type="Collection")] == [21, 22]
+    assert {f.id for f in workspace.find_functions(name="seq", function_type="Chaser")} == {20, 23, 24, 25}
+    assert [step['function'] for step in workspace.functions[22].steps] == [21, 17]
+
+
+def test_function_for_osc_path():
+    workspace = load_workspace(WORKSPACE, use_cache=False)
+    assert workspace.osc_universes == [2]
+    for path, function_id in SCENE_FUNCTIONS.items():
+        assert workspace.function_for_osc_path(path).id == function_id
+        assert all((2, osc_channel(path)) in button.inputs for button in workspace.buttons_for_osc_path(path))
+    assert workspace.function_for_osc_path("/no/such/path") is None
+
+
+def test_cache_hit_on_an_unchanged_file(workspace_copy, tmp_path, parses):
+    cache_dir = str(tmp_path / "cache")
+    parsed = load_workspace(workspace_copy, cache_dir=cache_dir)
+    assert len(parses) == 1 and os.path.exists(_cache_path(workspace_copy, cache_dir))
+    cached = load_workspace(workspace_copy, cache_dir=cache_dir)
+    assert len(parses) == 1
+    assert cached.to_dict() == parsed.to_dict()
+    assert cached.function_for_osc_path("Scene A").id == SCENE_FUNCTIONS["Scene A"]
+
+
+def test_touched_file_is_checked_by_hash(workspace_copy, tmp_path, parses):
+    cache_dir = str(tmp_path / "cache")
+    load_workspace(workspace_copy, cache_dir=cache_dir)
+    stat = os.stat(workspace_copy)
+    os.utime(workspace_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    load_workspace(workspace_copy, cache_dir=cache_dir)
+    assert len(parses) == 1  # Same content: still a hit
+    with open(_cache_path(workspace_copy, cache_dir)) as f:
+        assert json.load(f)['mtime_ns'] == stat.st_mtime_ns + 10 ** 9  # Entry refreshed
+
+
+def test_edited_file_invalidates_the_cache(workspace_copy, tmp_path, parses):
+    cache_dir = str(tmp_path / "cache")
+    load_workspace(workspace_copy, cache_dir=cache_dir)
+    stat = os.stat(workspace_copy)
+    with open(workspace_copy) as f:
+        text = f.read()
+    with open(workspace_copy, 'w') as f:
+        f.write(text.replace('Name="Seq1"', 'Name="SeqX"', 1))  # Same size
+    os.utime(workspace_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    workspace = load_workspace(workspace_copy, cache_dir=cache_dir)
+    assert len(parses) == 2
+    assert workspace.functions[20].name == "SeqX"
+    assert load_workspace(workspace_copy, cache_dir=cache_dir).functions[20].name == "SeqX"
+    assert len(parses) == 2
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Workspace hot-reload tests: section split, incremental reparse, diff and
+the watcher in inotify and polling mode
+
+Usage:
+    python -m pytest tests/test_workspace_reload.py
+"""
+
+import sys
+import os
+import shutil
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.managers.osc_manager import OSCManager
+from src.qlc.watcher import WorkspaceWatcher, HAVE_INOTIFY
+from src.qlc.workspace import IncrementalLoader, parse_workspace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKSPACE = os.path.join(ROOT, "tanzverein.qxw")
+
+
+@pytest.fixture
+def workspace_copy(tmp_path):
+    path = tmp_path / "show.qxw"
+    shutil.copy(WORKSPACE, path)
+    return str(path)
+
+
+def edit(path, old, new):
+    with open(path) as f:
+        text = f.read()
+    assert old in text
+    with open(path, 'w') as f:
+        f.write(text.replace(old, new, 1))
+
+
+def test_sections_match_full_parse(tmp_path):
+    loader = IncrementalLoader(WORKSPACE, cache_dir=str(tmp_path))
+    assert loader.load().to_dict() == parse_workspace(WORKSPACE).to_dict()
+    assert loader.last_reparsed == ('universes', 'functions', 'virtualconsole')
+    loader.load()
+    assert loader.last_reparsed == ()
+
+
+def test_only_changed_section_is_reparsed(workspace_copy, tmp_path):
+    loader = IncrementalLoader(workspace_copy, cache_dir=str(tmp_path))
+    loader.load()
+    edit(workspace_copy, 'Name="Seq2"', 'Name="Seq2 renamed"')
+    workspace = loader.load()
+    assert loader.last_reparsed == ('functions',)
+    assert loader.last_items_parsed == 1
+    assert workspace.functions[23].name == "Seq2 renamed"
+    edit(workspace_copy, 'Caption="tap tempo"', 'Caption="tempo"')
+    workspace = loader.load()
+    assert loader.last_reparsed == ('virtualconsole',)
+    assert workspace.buttons_by_caption.get('tempo')
+    assert workspace.to_dict() == parse_workspace(workspace_copy).to_dict()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.mark.parametrize('use_inotify', [pytest.param(True, marks=pytest.mark.skipif(not HAVE_INOTIFY, reason="no inotify")),
+                                         False])
+def test_watcher_swaps_workspace(workspace_copy, tmp_path, use_inotify):
+    osc_manager = OSCManager()
+    osc_manager.set_workspace(parse_workspace(workspace_copy))
+    original = osc_manager.workspace
+    labels = osc_manager.get_scene_labels()
+    changes = []
+    osc_manager.add_listener(changes.append)
+    watcher = WorkspaceWatcher(workspace_copy, osc_manager, interval=0.05, settle=0.05,
+                               use_inotify=use_inotify, cache_dir=str(tmp_path)).start()
+    try:
+        assert wait_for(lambda: watcher.mode is not None and watcher.last_reparsed)
+        assert osc_manager.workspace is original  # Priming does not swap an identical workspace
+        assert watcher.mode == ("inotify" if use_inotify else "poll")
+
+        # Scene A's function (ID 20) renamed in QLC+
+        name = original.functions[20].name
+        edit(workspace_copy, f'Name="{name}"', 'Name="Opening"')
+        assert wait_for(lambda: osc_manager.workspace is not original)
+        assert osc_manager.get_scene_labels()[1] == "Scene A · Opening"
+        assert labels[1] != osc_manager.get_scene_labels()[1]
+        assert watcher.last_diff['functions']['renamed'] == [(20, name, "Opening")]
+        assert watcher.last_reparsed == ('functions',)
+        assert 'workspace' in changes
+
+        # A half-written save keeps the current workspace
+        reloaded = osc_manager.workspace
+        with open(workspace_copy) as f:
+            text = f.read()
+        with open(workspace_copy, 'w') as f:
+            f.write(text[:len(text) // 2])
+        assert wait_for(lambda: watcher.errors > 0)
+        assert osc_manager.workspace is reloaded
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize('started', [True, False])
+def test_stop_closes_the_wake_pipe_once(workspace_copy, tmp_path, started):
+    watcher = WorkspaceWatcher(workspace_copy, OSCManager(), interval=0.05, use_inotify=False, cache_dir=str(tmp_path))
+    if started:
+        watcher.start()
+        assert wait_for(lambda: watcher.mode is not None)
+    wake_r, wake_w = watcher._wake_r, watcher._wake_w
+    watcher.stop()
+    for fd in (wake_r, wake_w):
+        with pytest.raises(OSError):
+            os.fstat(fd)
+    # A descriptor reused after the stop must not get the wake byte of a second stop
+    read_fd, write_fd = os.pipe()
+    try:
+        watcher.stop()
+        os.set_blocking(read_fd, False)
+        with pytest.raises(BlockingIOError):
+            os.read(read_fd, 1)
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
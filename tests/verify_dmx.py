@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+DMX output check: a local UDP receiver for Art-Net / sACN frames
+
+Default mode presses the button through mock GPIO with the native DMX
+output as the ButtonController target, and verifies that
+- universes are keep-alive'd at the configured interval while idle
+- the press sends the scene values of the pressed function at once
+- the release returns the universe to zero
+- only changed universes are sent between keep-alives
+
+Usage:
+    python tests/verify_dmx.py --protocol sacn
+    python tests/verify_dmx.py --listen --port 6454   # watch main.py --output artnet --dmx-target 127.0.0.1
+"""
+
+import argparse
+import socket
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.gpio.mock_gpio import GPIO
+from src.controllers.button_controller import ButtonController
+from src.controllers.led_controller import LEDController
+from src.managers.osc_manager import OSCManager
+from src.qlc.workspace import load_workspace
+from src.qlc.dmx_output import DMXOutput, DMX_SLOTS, parse_artnet, parse_sacn, PROTOCOLS
+from src.qlc.renderer import step_timing
+
+BUTTON_PIN = 16
+LED_PINS = {
+    "led_green": 26,
+    "led_red": 13
+}
+WORKSPACE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tanzverein.qxw")
+PARSERS = {"artnet": parse_artnet, "sacn": parse_sacn}
+
+
+class DMXReceiver:
+    """Local UDP receiver standing in for a DMX node - records (time, universe, sequence, data)"""
+
+    def __init__(self, protocol, ip="127.0.0.1", port=0):
+        self.parse = PARSERS[protocol]
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((ip, port))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.frames = []
+        self.invalid = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            try:
+                data = self.sock.recv(1024)
+            except socket.timeout:
+                continue
+            frame = self.parse(data)
+            if frame is None:
+                self.invalid += 1
+            else:
+                self.frames.append((time.monotonic(),) + frame)
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self.sock.close()
+
+
+def expected_levels(output, function_id):
+    """Universe -> {slot: value} of a scene, or of a chaser's first step, and its fade-in in seconds"""
+    function = output.workspace.functions[function_id]
+    fade_in = 0
+    if function.type == 'Chaser':
+        fade_in = step_timing(output.workspace, function, function.steps[0])[0] / 1000.0
+        function = output.workspace.functions[function.steps[0]['function']]
+    levels = {}
+    for flat, value in output._scene_values.get(function.id, ()):
+        levels.setdefault(output.universes[flat // DMX_SLOTS], {})[flat % DMX_SLOTS] = value
+    return levels, fade_in
+
+
+def check(name, ok, detail=""):
+    print(f"   {'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    return ok
+
+
+def verify(protocol, keepalive, effect):
+    """Run the press/release sequence and check the received frames"""
+    GPIO.cleanup()
+    receiver = DMXReceiver(protocol)
+    workspace = load_workspace(WORKSPACE_FILE)
+    osc_manager = OSCManager()
+    osc_manager.set_workspace(workspace)
+    osc_manager.set_timing(0, effect)
+    output = DMXOutput(workspace, protocol, target="127.0.0.1", port=receiver.port, keepalive=keepalive)
+    output.start()
+    led_controller = LEDController(GPIO, LED_PINS)
+    controller = ButtonController(GPIO, BUTTON_PIN, output, osc_manager, led_controller)
+    controller.start_edge_detection()
+    wire_offset = 1 if protocol == "sacn" else 0
+
+    function = osc_manager.get_function_for_path(osc_manager.current_path)
+    levels, fade_in = expected_levels(output, function.id)
+    print(f"🔘 {protocol}: pressing {osc_manager.get_button_path()} → {function.type} '{function.name}' "
+          f"(universes {output.universes}, keep-alive {keepalive}s, effect {effect}s)")
+
+    time.sleep(keepalive * 2.5)
+    pressed_at = time.monotonic()
+    GPIO.set_input(BUTTON_PIN, GPIO.LOW)
+    time.sleep(0.05)
+    GPIO.set_input(BUTTON_PIN, GPIO.HIGH)
+    time.sleep(effect + 0.2)
+    released_by = time.monotonic()
+    time.sleep(keepalive * 1.5)
+
+    controller.cleanup()
+    led_controller.cleanup()
+    output.close()
+    receiver.close()
+
+    frames = receiver.frames
+    results = [check("all frames parsed", receiver.invalid == 0, f"{len(frames)} frames")]
+
+    # Idle: each universe repeats at the keep-alive interval, not at the refresh rate
+    idle = [f for f in frames if f[0] < pressed_at]
+    for uid in output.universes:
+        times = [f[0] for f in idle if f[1] == uid + wire_offset]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        results.append(check(f"universe {uid} idle keep-alive", gaps and min(gaps) > keepalive * 0.8,
+                             f"gaps {', '.join(f'{g:.2f}' for g in gaps)}s"))
+
+    # Press: the scene values arrive at once (after the first step's fade-in for chasers)
+    for uid, slots in levels.items():
+        after = [f for f in frames if f[0] >= pressed_at and f[1] == uid + wire_offset
+                 and all(f[3][slot] == value for slot, value in slots.items())]
+        latency = (after[0][0] - pressed_at) * 1000 if after else None
+        results.append(check(f"universe {uid} scene values on press", latency is not None and latency < fade_in * 1000 + 100,
+                             f"{latency:.1f} ms" if latency is not None else "not received"))
+
+    # Release: back to zero once the effect is over
+    for uid in levels:
+        last = [f for f in frames if f[0] >= released_by and f[1] == uid + wire_offset]
+        results.append(check(f"universe {uid} released", bool(last) and not any(last[-1][3]),
+                             f"{len(last)} frames after release"))
+
+    # Untouched universes are never sent faster than the keep-alive
+    for uid in output.universes:
+        if uid in levels:
+            continue
+        times = [f[0] for f in frames if f[1] == uid + wire_offset]
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        results.append(check(f"universe {uid} unchanged, keep-alive only", gaps and min(gaps) > keepalive * 0.8))
+
+    sequences_ok = all(
+        all(b == a % 255 + 1 for a, b in zip(seqs, seqs[1:]))
+        for seqs in ([f[2] for f in frames if f[1] == uid + wire_offset] for uid in output.universes))
+    results.append(check("sequence numbers consecutive", sequences_ok))
+    print(f"   stats: {output.get_stats()}")
+    return all(results)
+
+
+def listen(protocol, port):
+    """Print received frames (non-zero slots only)"""
+    receiver = DMXReceiver(protocol, "0.0.0.0", port)
+    print(f"🎧 {protocol} receiver on port {receiver.port} - Ctrl+C to stop")
+    seen = 0
+    try:
+        while True:
+            time.sleep(0.1)
+            for received_at, universe, sequence, data in receiver.frames[seen:]:
+                active = {slot: value for slot, value in enumerate(data) if value}
+                print(f"📨 universe {universe} seq {sequence:3d}: {active or 'blackout'}")
+            seen = len(receiver.frames)
+    except KeyboardInterrupt:
+        receiver.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Art-Net/sACN output check")
+    parser.add_argument('--protocol', choices=PROTOCOLS, default="artnet", help="DMX protocol")
+    parser.add_argument('--keepalive', type=float, default=0.5, help="Keep-alive interval in seconds")
+    parser.add_argument('--effect', type=float, default=0.5, help="Effect duration (osc off delay) in seconds")
+    parser.add_argument('--listen', action='store_true', help="Only print received frames")
+    parser.add_argument('--port', type=int, help="Receive port for --listen (default: protocol port)")
+    args = parser.parse_args()
+
+    if args.listen:
+        listen(args.protocol, args.port or (6454 if args.protocol == "artnet" else 5568))
+        return
+    ok = verify(args.protocol, args.keepalive, args.effect)
+    print("✅ DMX output verified" if ok else "❌ DMX output check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()